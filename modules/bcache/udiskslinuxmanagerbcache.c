@@ -311,6 +311,7 @@ handle_bcache_create (UDisksManagerBcache    *object,
                                                       bcache_file,
                                                       NULL,
                                                       10, /* timeout_seconds */
+                                                      NULL, /* cancellable */
                                                       &error);
 
   if (bcache_object == NULL)
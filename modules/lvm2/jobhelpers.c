@@ -20,11 +20,15 @@
  *
  */
 
+#include <stdio.h>
+#include <string.h>
+
 #include <glib.h>
 #include <blockdev/lvm.h>
 #include <blockdev/utils.h>
 
 #include <src/udisksthreadedjob.h>
+#include <src/udiskslogging.h>
 
 #include "jobhelpers.h"
 
@@ -268,9 +272,209 @@ void lv_list_free (BDLVMLVdata **lv_list) {
 void vgs_pvs_data_free (VGsPVsData *data) {
   vg_list_free (data->vgs);
   pv_list_free (data->pvs);
+  lv_list_free (data->lvs);
   g_free (data);
 }
 
+/* set once 'lvm fullreport' turned out to be unsupported, e.g. because LVM is too old */
+static gint fullreport_unsupported = 0;
+
+/* exit statuses of the lvm command for unknown commands and invalid
+ * command lines, see lib/commands/errors.h in LVM */
+#define LVM_ENO_SUCH_CMD        2
+#define LVM_EINVALID_CMD_LINE   3
+
+#define FULLREPORT_VG_FIELDS "vg_name,vg_uuid,vg_size,vg_free,vg_extent_size,vg_extent_count,vg_free_count,pv_count"
+#define FULLREPORT_PV_FIELDS "pv_name,pv_uuid,pv_free,pv_size,pe_start,vg_name"
+#define FULLREPORT_LV_FIELDS "vg_name,lv_name,lv_uuid,lv_size,lv_attr,origin,pool_lv,metadata_lv,move_pv," \
+                             "data_percent,metadata_percent,copy_percent"
+
+/* parses a line of 'KEY1=value1 KEY2=value2' pairs as produced by the
+ * --nameprefixes and --unquoted options of the LVM reporting commands */
+static GHashTable *
+parse_report_line (const gchar *line)
+{
+  GHashTable *table;
+  gchar **tokens;
+  gchar **t;
+
+  table = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, g_free);
+  tokens = g_strsplit_set (line, " \t", -1);
+  for (t = tokens; *t; t++)
+    {
+      gchar *eq = strchr (*t, '=');
+      if (eq != NULL)
+        g_hash_table_insert (table, g_strndup (*t, eq - *t), g_strdup (eq + 1));
+    }
+  g_strfreev (tokens);
+
+  return table;
+}
+
+static gchar *
+dup_report_value (GHashTable  *table,
+                  const gchar *key)
+{
+  const gchar *value = g_hash_table_lookup (table, key);
+
+  /* empty values mean the value is not set */
+  return (value && *value) ? g_strdup (value) : NULL;
+}
+
+static guint64
+get_report_value_uint64 (GHashTable  *table,
+                         const gchar *key)
+{
+  const gchar *value = g_hash_table_lookup (table, key);
+
+  return value ? g_ascii_strtoull (value, NULL, 0) : 0;
+}
+
+static BDLVMVGdata *
+vg_data_from_report (GHashTable *table)
+{
+  BDLVMVGdata *data = g_new0 (BDLVMVGdata, 1);
+
+  data->name = dup_report_value (table, "LVM2_VG_NAME");
+  data->uuid = dup_report_value (table, "LVM2_VG_UUID");
+  data->size = get_report_value_uint64 (table, "LVM2_VG_SIZE");
+  data->free = get_report_value_uint64 (table, "LVM2_VG_FREE");
+  data->extent_size = get_report_value_uint64 (table, "LVM2_VG_EXTENT_SIZE");
+  data->extent_count = get_report_value_uint64 (table, "LVM2_VG_EXTENT_COUNT");
+  data->free_count = get_report_value_uint64 (table, "LVM2_VG_FREE_COUNT");
+  data->pv_count = get_report_value_uint64 (table, "LVM2_PV_COUNT");
+
+  return data;
+}
+
+static BDLVMPVdata *
+pv_data_from_report (GHashTable *table)
+{
+  BDLVMPVdata *data = g_new0 (BDLVMPVdata, 1);
+
+  data->pv_name = dup_report_value (table, "LVM2_PV_NAME");
+  data->pv_uuid = dup_report_value (table, "LVM2_PV_UUID");
+  data->pv_free = get_report_value_uint64 (table, "LVM2_PV_FREE");
+  data->pv_size = get_report_value_uint64 (table, "LVM2_PV_SIZE");
+  data->pe_start = get_report_value_uint64 (table, "LVM2_PE_START");
+  /* orphan PVs have no VG */
+  data->vg_name = dup_report_value (table, "LVM2_VG_NAME");
+
+  return data;
+}
+
+static BDLVMLVdata *
+lv_data_from_report (GHashTable *table)
+{
+  BDLVMLVdata *data = g_new0 (BDLVMLVdata, 1);
+
+  data->lv_name = dup_report_value (table, "LVM2_LV_NAME");
+  data->vg_name = dup_report_value (table, "LVM2_VG_NAME");
+  data->uuid = dup_report_value (table, "LVM2_LV_UUID");
+  data->size = get_report_value_uint64 (table, "LVM2_LV_SIZE");
+  data->attr = dup_report_value (table, "LVM2_LV_ATTR");
+  data->origin = dup_report_value (table, "LVM2_ORIGIN");
+  data->pool_lv = dup_report_value (table, "LVM2_POOL_LV");
+  data->metadata_lv = dup_report_value (table, "LVM2_METADATA_LV");
+  data->move_pv = dup_report_value (table, "LVM2_MOVE_PV");
+  data->data_percent = get_report_value_uint64 (table, "LVM2_DATA_PERCENT");
+  data->metadata_percent = get_report_value_uint64 (table, "LVM2_METADATA_PERCENT");
+  data->copy_percent = get_report_value_uint64 (table, "LVM2_COPY_PERCENT");
+
+  return data;
+}
+
+/* Gets the VGs, PVs and LVs with a single 'lvm fullreport' call instead
+ * of 'vgs', 'pvs' and one 'lvs' per VG, each of them scanning (and
+ * locking) the LVM metadata again. */
+static gboolean
+lvm_fullreport (VGsPVsData  *data,
+                GError     **error)
+{
+  const gchar *argv[] = {"lvm", "fullreport", "--noheadings", "--nameprefixes", "--unquoted",
+                         "--units", "b", "--nosuffix",
+                         "--configreport", "vg", "-o", FULLREPORT_VG_FIELDS,
+                         "--configreport", "pv", "-o", FULLREPORT_PV_FIELDS,
+                         "--configreport", "lv", "-o", FULLREPORT_LV_FIELDS,
+                         "--configreport", "pvseg", "-o", "pvseg_start",
+                         "--configreport", "seg", "-o", "seg_start",
+                         NULL};
+  gchar *output = NULL;
+  gchar **lines;
+  GPtrArray *vgs;
+  GPtrArray *pvs;
+  GPtrArray *lvs;
+
+  if (!bd_utils_exec_and_capture_output (argv, NULL /* extra */, &output, error))
+    {
+      if (g_error_matches (*error, BD_UTILS_EXEC_ERROR, BD_UTILS_EXEC_ERROR_NOOUT))
+        /* no output => no VGs and PVs, it's not an error */
+        g_clear_error (error);
+      else
+        return FALSE;
+    }
+
+  vgs = g_ptr_array_new ();
+  pvs = g_ptr_array_new ();
+  lvs = g_ptr_array_new ();
+
+  /* the VG, PV, LV, PV segment and LV segment reports for each VG follow
+   * each other - tell them apart by the fields only a single one has */
+  lines = g_strsplit (output ? output : "", "\n", 0);
+  for (gchar **lines_p = lines; *lines_p; lines_p++)
+    {
+      GHashTable *table = parse_report_line (*lines_p);
+
+      if (g_hash_table_contains (table, "LVM2_LV_NAME"))
+        g_ptr_array_add (lvs, lv_data_from_report (table));
+      else if (g_hash_table_contains (table, "LVM2_PV_NAME"))
+        g_ptr_array_add (pvs, pv_data_from_report (table));
+      else if (g_hash_table_contains (table, "LVM2_VG_EXTENT_COUNT"))
+        {
+          const gchar *vg_name = g_hash_table_lookup (table, "LVM2_VG_NAME");
+          /* skip the internal VG for orphan PVs, if reported */
+          if (vg_name && *vg_name && *vg_name != '#')
+            g_ptr_array_add (vgs, vg_data_from_report (table));
+        }
+
+      g_hash_table_destroy (table);
+    }
+  g_strfreev (lines);
+  g_free (output);
+
+  g_ptr_array_add (vgs, NULL);
+  g_ptr_array_add (pvs, NULL);
+  g_ptr_array_add (lvs, NULL);
+  data->vgs = (BDLVMVGdata **) g_ptr_array_free (vgs, FALSE);
+  data->pvs = (BDLVMPVdata **) g_ptr_array_free (pvs, FALSE);
+  data->lvs = (BDLVMLVdata **) g_ptr_array_free (lvs, FALSE);
+
+  return TRUE;
+}
+
+/* Whether 'lvm fullreport' failed because this version of LVM doesn't
+ * know the command or some of the options used, as opposed to failing
+ * just this time, e.g. because the metadata couldn't be locked. */
+static gboolean
+fullreport_error_is_unsupported (GError *error)
+{
+  gint status;
+
+  if (!g_error_matches (error, BD_UTILS_EXEC_ERROR, BD_UTILS_EXEC_ERROR_FAILED))
+    return FALSE;
+
+  if (strstr (error->message, "No such command") != NULL ||
+      strstr (error->message, "nrecognised option") != NULL ||
+      strstr (error->message, "nrecognized option") != NULL)
+    return TRUE;
+
+  /* "Process reported exit code %d: %s" */
+  if (sscanf (error->message, "Process reported exit code %d:", &status) == 1)
+    return status == LVM_ENO_SUCH_CMD || status == LVM_EINVALID_CMD_LINE;
+
+  return FALSE;
+}
+
 void vgs_task_func (GTask        *task,
                     gpointer      source_obj,
                     gpointer      task_data,
@@ -279,6 +483,26 @@ void vgs_task_func (GTask        *task,
   GError *error = NULL;
   VGsPVsData *ret = g_new0 (VGsPVsData, 1);
 
+  if (!g_atomic_int_get (&fullreport_unsupported))
+    {
+      if (lvm_fullreport (ret, &error))
+        {
+          g_task_return_pointer (task, ret, (GDestroyNotify) vgs_pvs_data_free);
+          return;
+        }
+
+      if (fullreport_error_is_unsupported (error))
+        {
+          udisks_info ("LVM2 plugin: 'lvm fullreport' is not supported, listing VGs, PVs and LVs separately from now on: %s",
+                       error->message);
+          g_atomic_int_set (&fullreport_unsupported, 1);
+        }
+      else
+        udisks_info ("LVM2 plugin: 'lvm fullreport' failed, listing VGs, PVs and LVs separately: %s",
+                     error->message);
+      g_clear_error (&error);
+    }
+
   ret->vgs = bd_lvm_vgs (&error);
   if (!ret->vgs)
     g_task_return_error (task, error);
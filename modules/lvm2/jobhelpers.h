@@ -56,6 +56,7 @@ typedef struct {
 typedef struct {
   BDLVMVGdata **vgs;
   BDLVMPVdata **pvs;
+  BDLVMLVdata **lvs;  /* NULL if the LVs have to be listed per VG */
 } VGsPVsData;
 
 gboolean lvcreate_job_func (UDisksThreadedJob  *job,
@@ -490,6 +490,7 @@ wait_for_logical_volume_path (UDisksLinuxVolumeGroupObject  *group_object,
                                                       &data,
                                                       NULL,
                                                       10, /* timeout_seconds */
+                                                      NULL, /* cancellable */
                                                       error);
   if (volume_object == NULL)
     return NULL;
@@ -699,6 +700,7 @@ handle_activate (UDisksLogicalVolume *_volume,
                                                      object,
                                                      NULL,
                                                      10, /* timeout_seconds */
+                                                     NULL, /* cancellable */
                                                      &error);
   if (block_object == NULL)
     {
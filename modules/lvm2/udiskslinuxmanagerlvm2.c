@@ -366,6 +366,7 @@ handle_volume_group_create (UDisksManagerLVM2     *_object,
                                                      (gpointer) arg_name,
                                                      NULL,
                                                      10, /* timeout_seconds */
+                                                     NULL, /* cancellable */
                                                      &error);
   if (group_object == NULL)
     {
@@ -431,6 +431,7 @@ handle_rename (UDisksVolumeGroup     *_group,
                                                      (gpointer) new_name,
                                                      NULL,
                                                      10, /* timeout_seconds */
+                                                     NULL, /* cancellable */
                                                      &error);
   if (group_object == NULL)
     {
@@ -784,6 +785,7 @@ wait_for_logical_volume_path (UDisksLinuxVolumeGroupObject  *group_object,
                                                       &data,
                                                       NULL,
                                                       10, /* timeout_seconds */
+                                                      NULL, /* cancellable */
                                                       error);
   if (volume_object == NULL)
     return NULL;
@@ -27,6 +27,7 @@
 #include <stdio.h>
 
 #include <src/udiskslogging.h>
+#include <src/udisksprovider.h>
 #include <src/udiskslinuxprovider.h>
 #include <src/udisksdaemon.h>
 #include <src/udisksdaemonutil.h>
@@ -67,6 +68,8 @@ struct _UDisksLinuxVolumeGroupObject
   gchar *name;
 
   GHashTable *logical_volumes;
+  /* object paths of the block objects that are PVs of this group */
+  GHashTable *pv_block_paths;
   guint32 poll_epoch;
   guint poll_timeout_id;
   gboolean poll_requested;
@@ -109,6 +112,7 @@ udisks_linux_volume_group_object_finalize (GObject *_object)
     g_object_unref (object->iface_volume_group);
 
   g_hash_table_unref (object->logical_volumes);
+  g_hash_table_unref (object->pv_block_paths);
   g_free (object->name);
 
   g_signal_handlers_disconnect_by_func (udisks_daemon_get_fstab_monitor (object->daemon),
@@ -195,6 +199,7 @@ udisks_linux_volume_group_object_constructed (GObject *_object)
                                                    g_str_equal,
                                                    g_free,
                                                    (GDestroyNotify) g_object_unref);
+  object->pv_block_paths = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
 
   /* compute the object path */
   s = g_string_new ("/org/freedesktop/UDisks2/lvm/");
@@ -444,68 +449,162 @@ lv_object_update_block_path (UDisksLinuxBlockObject       *block_object,
     }
 }
 
+/* Returns the device-mapper name LVM uses for the @lv_name LV in @vg_name */
+static gchar *
+lv_dm_name (const gchar *vg_name,
+            const gchar *lv_name)
+{
+  GString *ret;
+  const gchar *c;
+
+  ret = g_string_new (NULL);
+  for (c = vg_name; *c != '\0'; c++)
+    {
+      if (*c == '-')
+        g_string_append_c (ret, '-');
+      g_string_append_c (ret, *c);
+    }
+  g_string_append_c (ret, '-');
+  for (c = lv_name; *c != '\0'; c++)
+    {
+      if (*c == '-')
+        g_string_append_c (ret, '-');
+      g_string_append_c (ret, *c);
+    }
+
+  return g_string_free (ret, FALSE);
+}
+
+static UDisksLinuxBlockObject *
+find_lv_block_object (UDisksDaemon *daemon,
+                      const gchar  *vg_name,
+                      const gchar  *lv_name)
+{
+  UDisksObject *block_object;
+  UDisksLinuxDevice *device;
+  gchar *dm_name;
+  gchar *device_file;
+  gboolean matches = FALSE;
+
+  dm_name = lv_dm_name (vg_name, lv_name);
+  device_file = g_strdup_printf ("/dev/mapper/%s", dm_name);
+  block_object = udisks_daemon_find_block_by_device_file (daemon, device_file);
+  g_free (device_file);
+  g_free (dm_name);
+
+  if (block_object == NULL)
+    return NULL;
+
+  if (!UDISKS_IS_LINUX_BLOCK_OBJECT (block_object))
+    {
+      g_object_unref (block_object);
+      return NULL;
+    }
+
+  /* the dm name is ambiguous in theory, make sure it's really the LV */
+  device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (block_object));
+  if (device)
+    {
+      matches = g_strcmp0 (g_udev_device_get_property (device->udev_device, "DM_VG_NAME"), vg_name) == 0
+                && g_strcmp0 (g_udev_device_get_property (device->udev_device, "DM_LV_NAME"), lv_name) == 0;
+      g_object_unref (device);
+    }
+
+  if (!matches)
+    {
+      g_object_unref (block_object);
+      return NULL;
+    }
+
+  return UDISKS_LINUX_BLOCK_OBJECT (block_object);
+}
+
 static void
-update_block (UDisksLinuxBlockObject       *block_object,
-              UDisksLinuxVolumeGroupObject *group_object,
-              GHashTable                   *new_lvs,
-              GHashTable                   *new_pvs)
-{
-  UDisksBlock *block;
-  BDLVMPVdata *pv_info;
-
-  block = udisks_object_peek_block (UDISKS_OBJECT (block_object));
-  if (block == NULL)
-    return;
-
-  // XXX - move this elsewhere?
-  {
-    UDisksLinuxDevice *device;
-    UDisksLinuxLogicalVolumeObject *lv_object;
-    const gchar *block_vg_name;
-    const gchar *block_lv_name;
-
-    device = udisks_linux_block_object_get_device (block_object);
-    if (device)
-      {
-        block_vg_name = g_udev_device_get_property (device->udev_device, "DM_VG_NAME");
-        block_lv_name = g_udev_device_get_property (device->udev_device, "DM_LV_NAME");
-
-        if (g_strcmp0 (block_vg_name, udisks_linux_volume_group_object_get_name (group_object)) == 0
-            && (lv_object = g_hash_table_lookup (new_lvs, block_lv_name)))
-          {
-            block_object_update_lvm_iface (block_object, g_dbus_object_get_object_path (G_DBUS_OBJECT (lv_object)));
-            lv_object_update_block_path (block_object, lv_object);
-          }
-
-        g_object_unref(device);
-      }
-  }
-
-  pv_info = g_hash_table_lookup (new_pvs, udisks_block_get_device (block));
-  if (!pv_info)
+update_lv_blocks (UDisksLinuxVolumeGroupObject *group_object,
+                  GHashTable                   *new_lvs)
+{
+  GHashTableIter iter;
+  gpointer key, value;
+
+  g_hash_table_iter_init (&iter, new_lvs);
+  while (g_hash_table_iter_next (&iter, &key, &value))
     {
-      const gchar *const *symlinks;
-      int i;
-      symlinks = udisks_block_get_symlinks (block);
-      for (i = 0; symlinks[i]; i++)
+      UDisksLinuxLogicalVolumeObject *lv_object = value;
+      UDisksLinuxBlockObject *block_object;
+
+      block_object = find_lv_block_object (group_object->daemon, group_object->name, key);
+      if (block_object == NULL)
+        continue;
+
+      if (udisks_object_peek_block (UDISKS_OBJECT (block_object)) != NULL)
         {
-          pv_info = g_hash_table_lookup (new_pvs, symlinks[i]);
-          if (pv_info)
-            break;
+          block_object_update_lvm_iface (block_object, g_dbus_object_get_object_path (G_DBUS_OBJECT (lv_object)));
+          lv_object_update_block_path (block_object, lv_object);
         }
+      g_object_unref (block_object);
     }
+}
 
-  if (pv_info)
+static void
+update_pv_blocks (UDisksLinuxVolumeGroupObject *group_object,
+                  GSList                       *vg_pvs)
+{
+  GHashTable *pv_block_paths;
+  GHashTableIter iter;
+  gpointer key;
+  const gchar *group_path;
+
+  group_path = g_dbus_object_get_object_path (G_DBUS_OBJECT (group_object));
+  pv_block_paths = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
+
+  for (GSList *vg_pvs_p=vg_pvs; vg_pvs_p; vg_pvs_p=vg_pvs_p->next)
     {
-      udisks_linux_block_object_update_lvm_pv (block_object, group_object, pv_info);
+      BDLVMPVdata *pv_info = vg_pvs_p->data;
+      UDisksObject *block_object;
+
+      if (!pv_info->pv_name)
+        continue;
+
+      /* also looks at the device file symlinks */
+      block_object = udisks_daemon_find_block_by_device_file (group_object->daemon, pv_info->pv_name);
+      if (block_object == NULL)
+        continue;
+
+      if (UDISKS_IS_LINUX_BLOCK_OBJECT (block_object)
+          && udisks_object_peek_block (block_object) != NULL)
+        {
+          udisks_linux_block_object_update_lvm_pv (UDISKS_LINUX_BLOCK_OBJECT (block_object), group_object, pv_info);
+          g_hash_table_insert (pv_block_paths,
+                               g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (block_object))),
+                               NULL);
+        }
+      g_object_unref (block_object);
     }
-  else
+
+  /* drop the PV interface from the block objects that are no longer PVs
+   * of this group (unless some other group claimed them already) */
+  g_hash_table_iter_init (&iter, group_object->pv_block_paths);
+  while (g_hash_table_iter_next (&iter, &key, NULL))
     {
-      UDisksPhysicalVolume *pv = udisks_object_peek_physical_volume (UDISKS_OBJECT (block_object));
-      if (pv && g_strcmp0 (udisks_physical_volume_get_volume_group (pv),
-                           g_dbus_object_get_object_path (G_DBUS_OBJECT (group_object))) == 0)
-        udisks_linux_block_object_update_lvm_pv (block_object, NULL, NULL);
+      UDisksObject *block_object;
+      UDisksPhysicalVolume *pv;
+
+      if (g_hash_table_contains (pv_block_paths, key))
+        continue;
+
+      block_object = udisks_daemon_find_object (group_object->daemon, key);
+      if (block_object == NULL)
+        continue;
+
+      pv = udisks_object_peek_physical_volume (block_object);
+      if (UDISKS_IS_LINUX_BLOCK_OBJECT (block_object)
+          && pv && g_strcmp0 (udisks_physical_volume_get_volume_group (pv), group_path) == 0)
+        udisks_linux_block_object_update_lvm_pv (UDISKS_LINUX_BLOCK_OBJECT (block_object), NULL, NULL);
+      g_object_unref (block_object);
     }
+
+  g_hash_table_unref (group_object->pv_block_paths);
+  group_object->pv_block_paths = pv_block_paths;
 }
 
 /**
@@ -536,50 +635,19 @@ cmp_int_lv_name (const gchar *int_lv_name, const gchar *lv_name)
   return FALSE;
 }
 
+/* takes ownership of @vg_info, @vg_pvs and @lvs */
 static void
-update_vg (GObject      *source_obj,
-           GAsyncResult *result,
-           gpointer      user_data)
+update_vg_with_lvs (UDisksLinuxVolumeGroupObject *object,
+                    BDLVMVGdata                  *vg_info,
+                    GSList                       *vg_pvs,
+                    BDLVMLVdata                 **lvs)
 {
   UDisksDaemon *daemon;
   GDBusObjectManagerServer *manager;
   GHashTableIter volume_iter;
   gpointer key, value;
   GHashTable *new_lvs;
-  GHashTable *new_pvs;
-  GList *objects, *l;
   gboolean needs_polling = FALSE;
-  GError *error = NULL;
-
-  UDisksLinuxVolumeGroupObject *object = UDISKS_LINUX_VOLUME_GROUP_OBJECT (source_obj);
-  GTask *task = G_TASK (result);
-  VGUpdateData *data = user_data;
-  BDLVMLVdata **lvs = g_task_propagate_pointer (task, &error);
-  BDLVMVGdata *vg_info = data->vg_info;
-  GSList *vg_pvs = data->vg_pvs;
-
-  /* free the data container (but not 'vg_info' and 'vg_pvs') */
-  g_free (data);
-
-  if (!lvs)
-    {
-      if (error)
-        {
-          udisks_warning ("Failed to update LVM volume group %s: %s",
-                          udisks_linux_volume_group_object_get_name (object),
-                          error->message);
-        }
-      else
-        {
-          /* this should never happen */
-          udisks_warning ("Failed to update LVM volume group %s: no error reported",
-                          udisks_linux_volume_group_object_get_name (object));
-        }
-      g_slist_free_full (vg_pvs, (GDestroyNotify) bd_lvm_pvdata_free);
-      bd_lvm_vgdata_free (vg_info);
-      g_object_unref (object);
-      return;
-    }
 
   daemon = udisks_linux_volume_group_object_get_daemon (object);
   manager = udisks_daemon_get_object_manager (daemon);
@@ -643,41 +711,94 @@ update_vg (GObject      *source_obj,
   udisks_volume_group_set_needs_polling (UDISKS_VOLUME_GROUP (object->iface_volume_group),
                                          needs_polling);
 
-  /* Update block objects. */
-  new_pvs = g_hash_table_new (g_str_hash, g_str_equal);
-  for (GSList *vg_pvs_p=vg_pvs; vg_pvs_p; vg_pvs_p=vg_pvs_p->next)
-    {
-      BDLVMPVdata *pv_info = vg_pvs_p->data;
-      gchar *pv_name = pv_info->pv_name;
-      if (pv_name)
-        g_hash_table_insert (new_pvs, pv_name, pv_info);
-    }
-
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (manager));
-  for (l = objects; l != NULL; l = l->next)
-    {
-      if (UDISKS_IS_LINUX_BLOCK_OBJECT (l->data))
-        update_block (UDISKS_LINUX_BLOCK_OBJECT (l->data), object, new_lvs, new_pvs);
-    }
-  g_list_free_full (objects, g_object_unref);
+  /* Update block objects. Only the block objects of our LVs and PVs are
+   * looked up (using the daemon's block index), walking all the exported
+   * objects for every group is too expensive with many groups and devices.
+   */
+  update_lv_blocks (object, new_lvs);
+  update_pv_blocks (object, vg_pvs);
 
   g_hash_table_destroy (new_lvs);
-  g_hash_table_destroy (new_pvs);
+
+  /* logical volumes and the block objects backing them may have changed */
+  udisks_provider_emit_changed (UDISKS_PROVIDER (udisks_daemon_get_linux_provider (daemon)));
 
   g_slist_free_full (vg_pvs, (GDestroyNotify) bd_lvm_pvdata_free);
   bd_lvm_vgdata_free (vg_info);
   lv_list_free (lvs);
+}
+
+static void
+update_vg (GObject      *source_obj,
+           GAsyncResult *result,
+           gpointer      user_data)
+{
+  GError *error = NULL;
+
+  UDisksLinuxVolumeGroupObject *object = UDISKS_LINUX_VOLUME_GROUP_OBJECT (source_obj);
+  GTask *task = G_TASK (result);
+  VGUpdateData *data = user_data;
+  BDLVMLVdata **lvs = g_task_propagate_pointer (task, &error);
+  BDLVMVGdata *vg_info = data->vg_info;
+  GSList *vg_pvs = data->vg_pvs;
+
+  /* free the data container (but not 'vg_info' and 'vg_pvs') */
+  g_free (data);
+
+  if (!lvs)
+    {
+      if (error)
+        {
+          udisks_warning ("Failed to update LVM volume group %s: %s",
+                          udisks_linux_volume_group_object_get_name (object),
+                          error->message);
+        }
+      else
+        {
+          /* this should never happen */
+          udisks_warning ("Failed to update LVM volume group %s: no error reported",
+                          udisks_linux_volume_group_object_get_name (object));
+        }
+      g_slist_free_full (vg_pvs, (GDestroyNotify) bd_lvm_pvdata_free);
+      bd_lvm_vgdata_free (vg_info);
+      g_object_unref (object);
+      return;
+    }
 
+  update_vg_with_lvs (object, vg_info, vg_pvs, lvs);
   g_object_unref (object);
 }
 
+/**
+ * udisks_linux_volume_group_object_update:
+ * @object: A #UDisksLinuxVolumeGroupObject.
+ * @vg_info: (transfer full): Information about the volume group.
+ * @pvs: (transfer full) (element-type BDLVMPVdata): The physical volumes of the volume group.
+ * @lvs: (transfer full) (allow-none): The logical volumes of the volume group or %NULL.
+ *
+ * Updates @object and its logical volumes. If @lvs is %NULL, the logical
+ * volumes are listed in a separate thread first.
+ */
 void
-udisks_linux_volume_group_object_update (UDisksLinuxVolumeGroupObject *object, BDLVMVGdata *vg_info, GSList *pvs)
+udisks_linux_volume_group_object_update (UDisksLinuxVolumeGroupObject  *object,
+                                         BDLVMVGdata                   *vg_info,
+                                         GSList                        *pvs,
+                                         BDLVMLVdata                  **lvs)
 {
-  VGUpdateData *data = g_new0 (VGUpdateData, 1);
-  gchar *vg_name = g_strdup (vg_info->name);
+  VGUpdateData *data;
+  gchar *vg_name;
   GTask *task = NULL;
 
+  if (lvs != NULL)
+    {
+      /* the logical volumes are already known, e.g. from a full report */
+      update_vg_with_lvs (object, vg_info, pvs, lvs);
+      return;
+    }
+
+  data = g_new0 (VGUpdateData, 1);
+  vg_name = g_strdup (vg_info->name);
+
   data->vg_info = vg_info;
   data->vg_pvs = pvs;
 
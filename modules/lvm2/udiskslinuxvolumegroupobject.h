@@ -41,7 +41,8 @@ const gchar                    *udisks_linux_volume_group_object_get_name      (
 UDisksDaemon                   *udisks_linux_volume_group_object_get_daemon    (UDisksLinuxVolumeGroupObject *object);
 void                            udisks_linux_volume_group_object_update        (UDisksLinuxVolumeGroupObject *object,
                                                                                 BDLVMVGdata *vginfo,
-                                                                                GSList *pvs);
+                                                                                GSList *pvs,
+                                                                                BDLVMLVdata **lvs);
 
 void                            udisks_linux_volume_group_object_poll          (UDisksLinuxVolumeGroupObject *object);
 
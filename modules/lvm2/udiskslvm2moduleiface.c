@@ -37,6 +37,7 @@
 #include <src/udisksdaemon.h>
 #include <src/udisksmodulemanager.h>
 #include <src/udiskslogging.h>
+#include <src/udisksconfigmanager.h>
 
 #include "udisks-lvm2-generated.h"
 #include "udiskslvm2types.h"
@@ -128,6 +129,69 @@ udisks_module_get_drive_object_iface_setup_entries (void)
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* Interval of the full refreshes done as a safety net, in seconds */
+#define LVM_FULL_UPDATE_INTERVAL_SEC 600
+
+static gboolean periodic_lvm_update (gpointer user_data);
+
+typedef struct
+{
+  /* names of the volume groups to refresh, %NULL to refresh all of them */
+  GHashTable *vg_names;
+  /* start of the initial scan recorded in the startup profile, or 0 */
+  gint64 coldplug_start_time;
+} LVMUpdateData;
+
+typedef struct
+{
+  UDisksLinuxVolumeGroupObject *group;
+  BDLVMVGdata *vg_info;
+  GSList *vg_pvs;
+  BDLVMLVdata **vg_lvs;  /* NULL if not known from a full report */
+} VGUpdate;
+
+static void
+lvm_update_data_free (LVMUpdateData *data)
+{
+  if (data->vg_names != NULL)
+    g_hash_table_unref (data->vg_names);
+  g_free (data);
+}
+
+/* Returns TRUE if a physical volume of @vg_name was added to the group
+ * since @group was last refreshed, i.e. the block device doesn't know
+ * about it yet.
+ */
+static gboolean
+vg_pvs_changed (UDisksDaemon                 *daemon,
+                UDisksLinuxVolumeGroupObject *group,
+                const gchar                  *vg_name,
+                BDLVMPVdata                 **pvs)
+{
+  const gchar *group_path = g_dbus_object_get_object_path (G_DBUS_OBJECT (group));
+  gboolean ret = FALSE;
+
+  for (BDLVMPVdata **pvs_p=pvs; !ret && *pvs_p; pvs_p++)
+    {
+      UDisksObject *object;
+      UDisksPhysicalVolume *pv;
+
+      if (g_strcmp0 ((*pvs_p)->vg_name, vg_name) != 0 || (*pvs_p)->pv_name == NULL)
+        continue;
+
+      /* no block object yet, it will be refreshed on its uevent */
+      object = udisks_daemon_find_block_by_device_file (daemon, (*pvs_p)->pv_name);
+      if (object == NULL)
+        continue;
+
+      pv = udisks_object_peek_physical_volume (object);
+      ret = pv == NULL || g_strcmp0 (udisks_physical_volume_get_volume_group (pv), group_path) != 0;
+      g_object_unref (object);
+    }
+
+  return ret;
+}
+
 static void
 lvm_update_vgs (GObject      *source_obj,
                 GAsyncResult *result,
@@ -140,8 +204,12 @@ lvm_update_vgs (GObject      *source_obj,
   GTask *task = G_TASK (result);
   GError *error = NULL;
   VGsPVsData *data = g_task_propagate_pointer (task, &error);
+  LVMUpdateData *update_data = user_data;
   BDLVMVGdata **vgs = NULL;
   BDLVMPVdata **pvs = NULL;
+  BDLVMLVdata **lvs = NULL;
+  GHashTable *updated_vgs;
+  GSList *updates = NULL;
 
   GHashTableIter vg_name_iter;
   gpointer key, value;
@@ -155,12 +223,14 @@ lvm_update_vgs (GObject      *source_obj,
         /* this should never happen */
         udisks_warning ("LVM2 plugin: failure but no error when getting VGs!");
 
+      lvm_update_data_free (update_data);
       return;
     }
   vgs = data->vgs;
   pvs = data->pvs;
+  lvs = data->lvs;
 
-  /* free the data container (but not 'vgs' and 'pvs') */
+  /* free the data container (but not 'vgs', 'pvs' and 'lvs') */
   g_free (data);
 
   manager = udisks_daemon_get_object_manager (daemon);
@@ -189,11 +259,16 @@ lvm_update_vgs (GObject      *source_obj,
         }
     }
 
-  /* Add new groups and update existing groups */
+  /* Add new groups and find the groups to update. Listing the VGs and PVs
+   * is cheap, updating a group is not as it lists all its LVs (unless they
+   * were listed by a full report already) so only update the groups
+   * affected by the uevents (and the new ones)
+   */
+  updated_vgs = g_hash_table_new (g_str_hash, g_str_equal);
   for (BDLVMVGdata **vgs_p=vgs; *vgs_p; vgs_p++)
     {
       UDisksLinuxVolumeGroupObject *group;
-      GSList *vg_pvs = NULL;
+      VGUpdate *update;
       vg_name = (*vgs_p)->name;
       group = g_hash_table_lookup (udisks_lvm2_state_get_name_to_volume_group (state),
                                    vg_name);
@@ -204,31 +279,88 @@ lvm_update_vgs (GObject      *source_obj,
           g_hash_table_insert (udisks_lvm2_state_get_name_to_volume_group (state),
                                g_strdup (vg_name), group);
         }
+      else if (update_data->vg_names != NULL
+               && !g_hash_table_contains (update_data->vg_names, vg_name)
+               && !vg_pvs_changed (daemon, group, vg_name, pvs))
+        {
+          bd_lvm_vgdata_free (*vgs_p);
+          continue;
+        }
+
+      update = g_new0 (VGUpdate, 1);
+      update->group = group;
+      update->vg_info = *vgs_p;
 
       for (BDLVMPVdata **pvs_p=pvs; *pvs_p; pvs_p++)
         if (g_strcmp0 ((*pvs_p)->vg_name, vg_name) == 0)
-            vg_pvs = g_slist_prepend (vg_pvs, *pvs_p);
+            update->vg_pvs = g_slist_prepend (update->vg_pvs, *pvs_p);
 
-      udisks_linux_volume_group_object_update (group, *vgs_p, vg_pvs);
+      if (lvs != NULL)
+        {
+          GPtrArray *vg_lvs = g_ptr_array_new ();
+          for (BDLVMLVdata **lvs_p=lvs; *lvs_p; lvs_p++)
+            if (g_strcmp0 ((*lvs_p)->vg_name, vg_name) == 0)
+              g_ptr_array_add (vg_lvs, *lvs_p);
+          g_ptr_array_add (vg_lvs, NULL);
+          update->vg_lvs = (BDLVMLVdata **) g_ptr_array_free (vg_lvs, FALSE);
+        }
+
+      g_hash_table_add (updated_vgs, (gpointer) udisks_linux_volume_group_object_get_name (group));
+      updates = g_slist_prepend (updates, update);
     }
 
-  /* this is safe to do -- all BDLVMPVdata objects are still existing because
-     the function that frees them is scheduled in main loop by the
-     udisks_linux_volume_group_object_update() call above */
+  udisks_debug ("LVM2 plugin: updating %u of %u volume groups",
+                g_hash_table_size (updated_vgs),
+                g_hash_table_size (udisks_lvm2_state_get_name_to_volume_group (state)));
+
+  /* free the PVs and LVs not passed further before updating the groups --
+     the update may free the passed ones right away */
   for (BDLVMPVdata **pvs_p=pvs; *pvs_p; pvs_p++)
-    if ((*pvs_p)->vg_name == NULL)
+    if ((*pvs_p)->vg_name == NULL || !g_hash_table_contains (updated_vgs, (*pvs_p)->vg_name))
       bd_lvm_pvdata_free (*pvs_p);
+  if (lvs != NULL)
+    for (BDLVMLVdata **lvs_p=lvs; *lvs_p; lvs_p++)
+      if ((*lvs_p)->vg_name == NULL || !g_hash_table_contains (updated_vgs, (*lvs_p)->vg_name))
+        bd_lvm_lvdata_free (*lvs_p);
+
+  g_hash_table_destroy (updated_vgs);
 
   /* only free the containers, the contents were passed further */
   g_free (vgs);
   g_free (pvs);
+  g_free (lvs);
+
+  updates = g_slist_reverse (updates);
+  for (GSList *l = updates; l != NULL; l = l->next)
+    {
+      VGUpdate *update = l->data;
+      udisks_linux_volume_group_object_update (update->group, update->vg_info, update->vg_pvs, update->vg_lvs);
+    }
+  g_slist_free_full (updates, g_free);
+
+  if (update_data->coldplug_start_time != 0)
+    udisks_daemon_add_startup_phase (daemon, "lvm2-scan", update_data->coldplug_start_time, g_get_monotonic_time ());
+
+  lvm_update_data_free (update_data);
 }
 
 static void
-lvm_update (UDisksDaemon *daemon)
+lvm_update (UDisksDaemon *daemon,
+            gboolean      coldplug,
+            GHashTable   *vg_names)
 {
+  LVMUpdateData *update_data;
+  GTask *task;
+
+  update_data = g_new0 (LVMUpdateData, 1);
+  update_data->vg_names = vg_names; /* takes ownership */
+
+  /* the time of the initial scan is recorded in the startup profile */
+  if (coldplug)
+    update_data->coldplug_start_time = g_get_monotonic_time ();
+
   /* the callback (lvm_update_vgs) is called in the default main loop (context) */
-  GTask *task = g_task_new (daemon, NULL /* cancellable */, lvm_update_vgs, NULL /* callback_data */);
+  task = g_task_new (daemon, NULL /* cancellable */, lvm_update_vgs, update_data /* callback_data */);
 
   /* holds a reference to 'task' until it is finished */
   g_task_run_in_thread (task, (GTaskThreadFunc) vgs_task_func);
@@ -241,21 +373,48 @@ delayed_lvm_update (gpointer user_data)
 {
   UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
   UDisksLVM2State *state;
+  GHashTable *pending;
+  GHashTable *vg_names = NULL;
+  GHashTableIter iter;
+  gpointer key;
 
   state = get_module_state (daemon);
+  pending = udisks_lvm2_state_get_pending_vg_updates (state);
 
-  lvm_update (daemon);
+  /* take the names collected so far */
+  if (! udisks_lvm2_state_get_full_update_pending (state))
+    {
+      vg_names = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
+      g_hash_table_iter_init (&iter, pending);
+      while (g_hash_table_iter_next (&iter, &key, NULL))
+        g_hash_table_add (vg_names, g_strdup (key));
+    }
+  g_hash_table_remove_all (pending);
+
+  udisks_lvm2_state_set_full_update_pending (state, FALSE);
   udisks_lvm2_state_set_lvm_delayed_update_id (state, 0);
+
+  lvm_update (daemon, FALSE, vg_names);
   return FALSE;
 }
 
+/* Schedules a refresh of the volume group @vg_name or of all the volume
+ * groups if @vg_name is %NULL.
+ */
 static void
-trigger_delayed_lvm_update (UDisksDaemon *daemon)
+trigger_delayed_lvm_update (UDisksDaemon *daemon,
+                            const gchar  *vg_name)
 {
   UDisksLVM2State *state;
+  UDisksConfigManager *config_manager;
 
   state = get_module_state (daemon);
 
+  if (vg_name != NULL)
+    g_hash_table_add (udisks_lvm2_state_get_pending_vg_updates (state), g_strdup (vg_name));
+  else
+    udisks_lvm2_state_set_full_update_pending (state, TRUE);
+
   if (udisks_lvm2_state_get_lvm_delayed_update_id (state) > 0)
     return;
 
@@ -267,17 +426,37 @@ trigger_delayed_lvm_update (UDisksDaemon *daemon)
        * coldplugging has been finished or not. Might be subject to change in
        * the future. */
       udisks_lvm2_state_set_coldplug_done (state, TRUE);
-      lvm_update (daemon);
+      udisks_lvm2_state_set_full_update_pending (state, FALSE);
+      g_hash_table_remove_all (udisks_lvm2_state_get_pending_vg_updates (state));
+      lvm_update (daemon, TRUE, NULL);
+
+      /* refreshes are limited to the volume groups the uevents are for
+       * so reconcile everything every now and then
+       */
+      udisks_lvm2_state_set_full_update_timeout_id (state,
+                                                    g_timeout_add_seconds (LVM_FULL_UPDATE_INTERVAL_SEC,
+                                                                           periodic_lvm_update,
+                                                                           daemon));
     }
   else
     {
+      config_manager = udisks_daemon_get_config_manager (daemon);
       udisks_lvm2_state_set_lvm_delayed_update_id (state,
-                                                   g_timeout_add (100,
+                                                   g_timeout_add (udisks_config_manager_get_lvm2_update_delay (config_manager),
                                                                   delayed_lvm_update,
                                                                   daemon));
     }
 }
 
+static gboolean
+periodic_lvm_update (gpointer user_data)
+{
+  UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
+
+  trigger_delayed_lvm_update (daemon, NULL);
+  return TRUE; /* keep timeout around */
+}
+
 static gboolean
 is_logical_volume (UDisksLinuxDevice *device)
 {
@@ -300,6 +479,43 @@ is_recorded_as_physical_volume (UDisksDaemon      *daemon,
   return object && udisks_object_peek_physical_volume (object) != NULL;
 }
 
+/* Gets the name of the volume group @device belongs to, or %NULL if not
+ * known (e.g. a new physical volume) and all groups need to be refreshed.
+ */
+static gchar *
+get_vg_name_for_device (UDisksDaemon      *daemon,
+                        UDisksLinuxDevice *device)
+{
+  const gchar *dm_vg_name;
+  UDisksObject *object;
+  UDisksObject *group_object;
+  UDisksPhysicalVolume *pv;
+  gchar *ret = NULL;
+
+  dm_vg_name = g_udev_device_get_property (device->udev_device, "DM_VG_NAME");
+  if (dm_vg_name && *dm_vg_name)
+    return g_strdup (dm_vg_name);
+
+  object = udisks_daemon_find_block (daemon, g_udev_device_get_device_number (device->udev_device));
+  if (object == NULL)
+    return NULL;
+
+  pv = udisks_object_peek_physical_volume (object);
+  if (pv != NULL)
+    {
+      group_object = udisks_daemon_find_object (daemon, udisks_physical_volume_get_volume_group (pv));
+      if (group_object != NULL)
+        {
+          if (UDISKS_IS_LINUX_VOLUME_GROUP_OBJECT (group_object))
+            ret = g_strdup (udisks_linux_volume_group_object_get_name (UDISKS_LINUX_VOLUME_GROUP_OBJECT (group_object)));
+          g_object_unref (group_object);
+        }
+    }
+  g_object_unref (object);
+
+  return ret;
+}
+
 static GDBusObjectSkeleton *
 lvm2_object_new (UDisksDaemon      *daemon,
                  UDisksLinuxDevice *device)
@@ -314,7 +530,11 @@ lvm2_object_new (UDisksDaemon      *daemon,
   if (is_logical_volume (device)
       || has_physical_volume_label (device)
       || is_recorded_as_physical_volume (daemon, device))
-    trigger_delayed_lvm_update (daemon);
+    {
+      gchar *vg_name = get_vg_name_for_device (daemon, device);
+      trigger_delayed_lvm_update (daemon, vg_name);
+      g_free (vg_name);
+    }
 
   return NULL;
 }
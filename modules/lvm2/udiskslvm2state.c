@@ -32,6 +32,12 @@ struct _UDisksLVM2State
 
   gint lvm_delayed_update_id;
   gboolean coldplug_done;
+
+  /* names of the volume groups to refresh on the next delayed update */
+  GHashTable *pending_vg_updates;
+  /* whether the next delayed update has to refresh all volume groups */
+  gboolean full_update_pending;
+  guint full_update_timeout_id;
 };
 
 /**
@@ -55,6 +61,10 @@ udisks_lvm2_state_new (UDisksDaemon *daemon)
                                                        g_free,
                                                        (GDestroyNotify) g_object_unref);
   state->coldplug_done = FALSE;
+  state->pending_vg_updates = g_hash_table_new_full (g_str_hash,
+                                                     g_str_equal,
+                                                     g_free,
+                                                     NULL);
 
   return state;
 }
@@ -70,6 +80,12 @@ udisks_lvm2_state_free (UDisksLVM2State *state)
 {
   g_assert (state != NULL);
 
+  if (state->lvm_delayed_update_id > 0)
+    g_source_remove (state->lvm_delayed_update_id);
+  if (state->full_update_timeout_id > 0)
+    g_source_remove (state->full_update_timeout_id);
+
+  g_hash_table_unref (state->pending_vg_updates);
   g_hash_table_unref (state->name_to_volume_group);
 
   g_free (state);
@@ -83,6 +99,14 @@ udisks_lvm2_state_get_name_to_volume_group (UDisksLVM2State *state)
   return state->name_to_volume_group;
 }
 
+GHashTable *
+udisks_lvm2_state_get_pending_vg_updates (UDisksLVM2State *state)
+{
+  g_assert (state != NULL);
+
+  return state->pending_vg_updates;
+}
+
 gint
 udisks_lvm2_state_get_lvm_delayed_update_id (UDisksLVM2State *state)
 {
@@ -99,6 +123,22 @@ udisks_lvm2_state_get_coldplug_done (UDisksLVM2State *state)
   return state->coldplug_done;
 }
 
+gboolean
+udisks_lvm2_state_get_full_update_pending (UDisksLVM2State *state)
+{
+  g_assert (state != NULL);
+
+  return state->full_update_pending;
+}
+
+guint
+udisks_lvm2_state_get_full_update_timeout_id (UDisksLVM2State *state)
+{
+  g_assert (state != NULL);
+
+  return state->full_update_timeout_id;
+}
+
 void
 udisks_lvm2_state_set_lvm_delayed_update_id (UDisksLVM2State *state,
                                              gint             id)
@@ -116,3 +156,21 @@ udisks_lvm2_state_set_coldplug_done (UDisksLVM2State *state,
 
   state->coldplug_done = coldplug_done;
 }
+
+void
+udisks_lvm2_state_set_full_update_pending (UDisksLVM2State *state,
+                                           gboolean         full_update_pending)
+{
+  g_assert (state != NULL);
+
+  state->full_update_pending = full_update_pending;
+}
+
+void
+udisks_lvm2_state_set_full_update_timeout_id (UDisksLVM2State *state,
+                                              guint            id)
+{
+  g_assert (state != NULL);
+
+  state->full_update_timeout_id = id;
+}
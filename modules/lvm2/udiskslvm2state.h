@@ -32,13 +32,20 @@ UDisksLVM2State *udisks_lvm2_state_new  (UDisksDaemon *daemon);
 void             udisks_lvm2_state_free (UDisksLVM2State *state);
 
 GHashTable      *udisks_lvm2_state_get_name_to_volume_group  (UDisksLVM2State *state);
+GHashTable      *udisks_lvm2_state_get_pending_vg_updates    (UDisksLVM2State *state);
 gint             udisks_lvm2_state_get_lvm_delayed_update_id (UDisksLVM2State *state);
 gboolean         udisks_lvm2_state_get_coldplug_done         (UDisksLVM2State *state);
+gboolean         udisks_lvm2_state_get_full_update_pending   (UDisksLVM2State *state);
+guint            udisks_lvm2_state_get_full_update_timeout_id (UDisksLVM2State *state);
 
 void             udisks_lvm2_state_set_lvm_delayed_update_id (UDisksLVM2State *state,
                                                               gint             id);
 void             udisks_lvm2_state_set_coldplug_done         (UDisksLVM2State *state,
                                                               gboolean         coldplug_done);
+void             udisks_lvm2_state_set_full_update_pending   (UDisksLVM2State *state,
+                                                              gboolean         full_update_pending);
+void             udisks_lvm2_state_set_full_update_timeout_id (UDisksLVM2State *state,
+                                                               guint            id);
 
 G_END_DECLS
 
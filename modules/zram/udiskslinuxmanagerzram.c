@@ -416,6 +416,7 @@ handle_create_devices (UDisksManagerZRAM     *object,
                                                       zram_paths,
                                                       NULL,
                                                       10, /* timeout_seconds */
+                                                      NULL, /* cancellable */
                                                       &error);
 
   if (zram_objects == NULL)
@@ -116,6 +116,34 @@ def install_new_udev_rules(projdir, tmpdir):
                        tmpdir)
 
 
+def install_new_udisks_conf(projdir, tmpdir):
+    """
+    Installs the udisks2.conf file read by the uninstalled daemon with a job
+    limit for the erase jobs, so that queueing of jobs can be tested.
+
+    Returns a list of file(s) that need to be restored or deleted.
+    """
+    conf_dir = os.path.join(projdir, 'udisks2')
+    conf_file = os.path.join(conf_dir, 'udisks2.conf')
+    if not os.path.exists(conf_dir):
+        os.makedirs(conf_dir)
+    if not os.path.exists(conf_file):
+        # the file is only needed by the tests, remove it afterwards
+        atexit.register(os.unlink, conf_file)
+
+    with open(os.path.join(projdir, 'udisks', 'udisks2.conf')) as f:
+        conf = f.read()
+    conf = re.sub(r'^job_limit_total=.*$', 'job_limit_total=1', conf, flags=re.M)
+    conf = re.sub(r'^job_limit_operations=.*$', 'job_limit_operations=format-erase', conf, flags=re.M)
+
+    new_conf_file = os.path.join(tempfile.mkdtemp(dir=tmpdir), 'udisks2.conf')
+    with open(new_conf_file, 'w') as f:
+        f.write(conf)
+
+    udiskstestcase.job_limit_total = 1
+    return _copy_files([new_conf_file], conf_dir, tmpdir)
+
+
 def restore_files(restore_list, tmpdir):
     banner = False
     for f, delete in restore_list:
@@ -188,6 +216,7 @@ if __name__ == '__main__':
         files_to_restore.extend(install_new_policy(projdir, tmpdir))
         files_to_restore.extend(install_new_dbus_conf(projdir, tmpdir))
         files_to_restore.extend(install_new_udev_rules(projdir, tmpdir))
+        files_to_restore.extend(install_new_udisks_conf(projdir, tmpdir))
 
         udev_shake()
 
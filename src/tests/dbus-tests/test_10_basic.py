@@ -45,6 +45,49 @@ class UdisksBaseTest(udiskstestcase.UdisksTestCase):
         self.assertEqual({str(s) for s in fss.value},
                          {'nilfs2', 'btrfs', 'swap', 'ext3', 'udf', 'xfs', 'minix', 'ext2', 'ext4', 'f2fs', 'reiserfs', 'ntfs', 'vfat', 'exfat'})
 
+    def test_40_startup_profile(self):
+        profile = self.get_property(self.manager_obj, '.Manager', 'StartupProfile')
+        phases = {str(name): (int(start), int(duration)) for (name, start, duration) in profile.value}
+        self.assertIn('coldplug', phases)
+        self.assertIn('ready', phases)
+
+        # every phase that finished before the daemon was ready is part of it
+        ready_start, ready_duration = phases['ready']
+        self.assertEqual(ready_start, 0)
+        start, duration = phases['coldplug']
+        self.assertLessEqual(start + duration, ready_duration)
+
+    def test_50_query_objects(self):
+        manager = self.get_interface(self.manager_obj, '.Manager')
+        dev = self.vdevs[0]
+        dev_path = self.path_prefix + '/block_devices/' + os.path.basename(dev)
+
+        # filter on a property, only return the requested properties
+        objects = manager.QueryObjects({self.iface_prefix + '.Block': ['Device', 'Size']},
+                                       [(self.iface_prefix + '.Block', 'Device', 'equals',
+                                         self.str_to_ay(dev))],
+                                       self.no_options)
+        self.assertEqual(list(objects.keys()), [dev_path])
+        block_props = objects[dev_path][self.iface_prefix + '.Block']
+        self.assertEqual(set(block_props.keys()), {'Device', 'Size'})
+        self.assertEqual(self.ay_to_str(block_props['Device']), dev)
+
+        # interface presence and prefix filters
+        objects = manager.QueryObjects({},
+                                       [(self.iface_prefix + '.Block', '', '', dbus.String('')),
+                                        (self.iface_prefix + '.Block', 'Symlinks', 'prefix',
+                                         dbus.String('/dev/disk/by-path/'))],
+                                       self.no_options)
+        self.assertNotIn(self.path_prefix + '/Manager', objects)
+        for path, interfaces in objects.items():
+            self.assertIn(self.iface_prefix + '.Block', interfaces)
+
+        # invalid match type
+        msg = 'Invalid filter for property Device'
+        with self.assertRaisesRegex(dbus.exceptions.DBusException, msg):
+            manager.QueryObjects({}, [(self.iface_prefix + '.Block', 'Device', 'contains', dbus.String('sd'))],
+                                 self.no_options)
+
     def test_80_device_presence(self):
         '''Test the debug devices are present on the bus'''
         for d in self.vdevs:
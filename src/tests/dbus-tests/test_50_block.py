@@ -48,6 +48,34 @@ class UdisksBlockTest(udiskstestcase.UdisksTestCase):
         _ret, sys_fstype = self.run_command('lsblk -d -no FSTYPE %s' % self.vdevs[0])
         self.assertEqual(sys_fstype, '')
 
+    def test_format_erase_modes(self):
+
+        disk = self.get_object('/block_devices/' + os.path.basename(self.vdevs[0]))
+        self.assertIsNotNone(disk)
+
+        for mode in ('zero-offload', 'discard', 'secure-discard'):
+            # put some data on the disk first
+            self.run_command('dd if=/dev/urandom of=%s bs=1M count=1 oflag=direct' % self.vdevs[0])
+
+            d = dbus.Dictionary(signature='sv')
+            d['erase'] = mode
+            try:
+                disk.Format('empty', d, dbus_interface=self.iface_prefix + '.Block')
+            except dbus.exceptions.DBusException as e:
+                # only discarding may not be supported by the device
+                self.assertNotEqual(mode, 'zero-offload')
+                self.assertEqual(e.get_dbus_name(), 'org.freedesktop.UDisks2.Error.NotSupported')
+                self.assertIn('not supported', e.get_dbus_message())
+                continue
+
+            usage = self.get_property(disk, '.Block', 'IdUsage')
+            usage.assertEqual('')
+
+            # zeroing must leave nothing but zeroes behind
+            if mode == 'zero-offload':
+                with open(self.vdevs[0], 'rb') as f:
+                    self.assertEqual(f.read(1024**2), b'\0' * 1024**2)
+
     def test_format_parttype(self):
 
         disk = self.get_object('/block_devices/' + os.path.basename(self.vdevs[0]))
@@ -254,6 +254,52 @@ class UdisksPartitionTableTest(udiskstestcase.UdisksTestCase):
         _ret, sys_fstype = self.run_command('lsblk -d -no FSTYPE /dev/%s' % part_name)
         self.assertEqual(sys_fstype, 'xfs')
 
+    def test_create_multiple(self):
+        disk = self.get_object('/block_devices/' + os.path.basename(self.vdevs[0]))
+        self.assertIsNotNone(disk)
+
+        self.addCleanup(self._remove_format, disk)
+
+        # names are not supported on MBR, the table shouldn't be touched
+        self._create_format(disk, 'dos')
+        specs = dbus.Array([dbus.Struct((dbus.UInt64(1024**2), dbus.UInt64(100 * 1024**2),
+                                         '', 'name', '', self.no_options), signature='ttsssa{sv}')],
+                           signature='(ttsssa{sv})')
+        msg = 'MBR partition table does not support names'
+        with six.assertRaisesRegex(self, dbus.exceptions.DBusException, msg):
+            disk.CreatePartitions(specs, self.no_options,
+                                  dbus_interface=self.iface_prefix + '.PartitionTable')
+
+        # create gpt partition table
+        self._create_format(disk, 'gpt')
+
+        names = ['first', 'second', 'third']
+        specs = dbus.Array([], signature='(ttsssa{sv})')
+        for i, name in enumerate(names):
+            fstype = 'xfs' if i == 1 else ''
+            specs.append(dbus.Struct((dbus.UInt64((1 + i * 100) * 1024**2), dbus.UInt64(100 * 1024**2),
+                                      '', name, fstype, self.no_options), signature='ttsssa{sv}'))
+
+        paths = disk.CreatePartitions(specs, self.no_options,
+                                      dbus_interface=self.iface_prefix + '.PartitionTable')
+        self.assertEqual(len(paths), len(names))
+
+        self.udev_settle()
+        for i, path in enumerate(paths):
+            part = self.bus.get_object(self.iface_prefix, path)
+            self.assertIsNotNone(part)
+            self.addCleanup(self._remove_partition, part)
+
+            # partitions are returned in the order they were requested
+            offset = self.get_property(part, '.Partition', 'Offset')
+            offset.assertEqual((1 + i * 100) * 1024**2)
+
+            dbus_name = self.get_property(part, '.Partition', 'Name')
+            dbus_name.assertEqual(names[i])
+
+        fstype = self.get_property(self.bus.get_object(self.iface_prefix, paths[1]), '.Block', 'IdType')
+        fstype.assertEqual('xfs')
+
 
 class UdisksPartitionTest(udiskstestcase.UdisksTestCase):
     '''This is a basic partition test suite'''
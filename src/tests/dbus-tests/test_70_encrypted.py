@@ -125,6 +125,40 @@ class UdisksEncryptedTest(udiskstestcase.UdisksTestCase):
         self.assertIsNotNone(luks)
         self.assertTrue(os.path.exists('/dev/disk/by-uuid/%s' % luks_uuid))
 
+    def test_unlock_batch(self):
+        disks = [self.get_object('/block_devices/' + os.path.basename(dev)) for dev in self.vdevs[:2]]
+        for disk in disks:
+            self._create_luks(disk, 'test')
+            self.addCleanup(self._remove_luks, disk)
+        self.udev_settle()
+
+        for disk in disks:
+            disk.Lock(self.no_options, dbus_interface=self.iface_prefix + '.Encrypted')
+
+        manager = self.get_interface(self.get_object('/Manager'), '.Manager')
+        paths = [disk.object_path for disk in disks]
+
+        # wrong password
+        results = manager.UnlockEncrypted(paths, 'shbdkjaf', self.no_options)
+        self.assertEqual(len(results), 2)
+        for path, result in zip(paths, results):
+            self.assertEqual(result[0], path)
+            self.assertEqual(result[1], '/')
+            self.assertEqual(result[2], 'org.freedesktop.UDisks2.Error.Failed')
+
+        # right password
+        results = manager.UnlockEncrypted(paths, 'test', self.no_options)
+        for path, result in zip(paths, results):
+            self.assertEqual(result[0], path)
+            self.assertEqual(result[2], '')
+            crypto_dev = self.get_property(self.get_object(result[1]), '.Block', 'CryptoBackingDevice')
+            crypto_dev.assertEqual(path)
+
+        # already unlocked
+        results = manager.UnlockEncrypted(paths[:1], 'test', self.no_options)
+        self.assertEqual(results[0][1], '/')
+        self.assertIn('is already unlocked', results[0][3])
+
     def test_mount(self):
         disk_name = os.path.basename(self.vdevs[0])
         disk = self.get_object('/block_devices/' + disk_name)
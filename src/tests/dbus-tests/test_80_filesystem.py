@@ -195,6 +195,64 @@ class UdisksFSTestCase(udiskstestcase.UdisksTestCase):
         self.assertIn(tmp, out)
         self.assertIn('ro', out)
 
+    def test_mount_batch(self):
+        if not self._can_create:
+            self.skipTest('Cannot create %s filesystem' % self._fs_name)
+
+        if not self._can_mount:
+            self.skipTest('Cannot mount %s filesystem' % self._fs_name)
+
+        # this test will change /etc/fstab, we might want to revert the changes after it finishes
+        fstab = self.read_file('/etc/fstab')
+        self.addCleanup(self.write_file, '/etc/fstab', fstab)
+
+        manager = self.get_interface(self.get_object('/Manager'), '.Manager')
+        disks = [self.get_object('/block_devices/' + os.path.basename(dev)) for dev in self.vdevs[:2]]
+
+        for disk in disks:
+            disk.Format(self._fs_name, self.no_options, dbus_interface=self.iface_prefix + '.Block')
+            self.addCleanup(self._clean_format, disk)
+
+        # the second filesystem is mounted inside the first one
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        nested = os.path.join(tmp, 'nested')
+        for disk, mnt in zip(disks, [tmp, nested]):
+            conf = dbus.Dictionary({'dir': self.str_to_ay(mnt), 'type': self.str_to_ay(self._fs_name),
+                                    'opts': self.str_to_ay('defaults'), 'freq': 0, 'passno': 0},
+                                   signature=dbus.Signature('sv'))
+            disk.AddConfigurationItem(('fstab', conf), self.no_options,
+                                      dbus_interface=self.iface_prefix + '.Block')
+
+        paths = [disk.object_path for disk in disks]
+        invalid_path = self.path_prefix + '/block_devices/nonexistent'
+
+        # mount the nested filesystem first, it has to wait for the other one
+        results = manager.MountFilesystems([paths[1], paths[0], invalid_path], self.no_options)
+        self.addCleanup(self._unmount, self.vdevs[0])
+        self.addCleanup(self._unmount, self.vdevs[1])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(list(results[0]), [paths[1], nested, '', ''])
+        self.assertEqual(list(results[1]), [paths[0], tmp, '', ''])
+        self.assertEqual(results[2][0], invalid_path)
+        self.assertEqual(results[2][1], '')
+        self.assertEqual(results[2][2], 'org.freedesktop.UDisks2.Error.Failed')
+
+        self.assertTrue(os.path.ismount(tmp))
+        self.assertTrue(os.path.ismount(nested))
+
+        # mounting again fails for each filesystem
+        results = manager.MountFilesystems(paths, self.no_options)
+        for result in results:
+            self.assertEqual(result[2], 'org.freedesktop.UDisks2.Error.AlreadyMounted')
+
+        # unmount the outer filesystem first, it has to wait for the nested one
+        results = manager.UnmountFilesystems([paths[0], paths[1]], self.no_options)
+        self.assertEqual([list(result) for result in results], [[paths[0], '', ''], [paths[1], '', '']])
+
+        self.assertFalse(os.path.ismount(nested))
+        self.assertFalse(os.path.ismount(tmp))
+
 
 class Ext2TestCase(UdisksFSTestCase):
     _fs_name = 'ext2'
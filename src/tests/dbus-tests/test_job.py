@@ -35,6 +35,16 @@ class UdisksJobTest(udiskstestcase.UdisksTestCase):
         except Exception as e:
             self.exception = e
 
+    def _erase(self, devname, exceptions):
+        try:
+            safe_dbus.call_sync(self.iface_prefix,
+                                self.path_prefix + '/block_devices/' + devname,
+                                self.iface_prefix + '.Block',
+                                'Format',
+                                GLib.Variant('(sa{sv})', ('empty', {'erase': GLib.Variant("s", 'zero')})))
+        except Exception as e:
+            exceptions.append(e)
+
     def _wait_for_job_thread(self, operation, device_path):
         t = threading.currentThread()
 
@@ -91,6 +101,10 @@ class UdisksJobTest(udiskstestcase.UdisksTestCase):
 
         self.assertTrue(properties['Cancelable'])
 
+        # a single erase job is never queued
+        self.assertEqual(properties['State'], 'running')
+        self.assertEqual(properties['QueuePosition'], 0)
+
     def test_cancel(self):
         '''Test if it's possible to cancel the Job'''
 
@@ -131,3 +145,48 @@ class UdisksJobTest(udiskstestcase.UdisksTestCase):
         self.assertIsNotNone(self.exception)
         self.assertTrue(isinstance(self.exception, safe_dbus.DBusCallError))
         self.assertIn('Error erasing device: Job was canceled', str(self.exception))
+
+    def test_queued_job(self):
+        '''Test that jobs over the job limits are queued'''
+
+        if udiskstestcase.job_limit_total != 1:
+            self.skipTest('The daemon was not started with a limit of one erase job at a time')
+
+        disk_names = [os.path.basename(dev) for dev in self.vdevs[0:2]]
+        obj_paths = [self.path_prefix + '/block_devices/' + name for name in disk_names]
+        exceptions = []
+
+        erase_threads = [threading.Thread(target=self._erase, args=(name, exceptions)) for name in disk_names]
+        for erase_thread in erase_threads:
+            erase_thread.start()
+
+        # collect the states of the two erase jobs until both are done
+        seen_states = []
+        queued_job = None
+        queued_job_started = False
+        while any(erase_thread.is_alive() for erase_thread in erase_threads):
+            objects = self._get_objects()
+            jobs = {path: props[self.iface_prefix + '.Job'] for (path, props) in objects[0].items()
+                    if '/jobs/' in path and props[self.iface_prefix + '.Job']['Operation'] == 'format-erase'
+                    and props[self.iface_prefix + '.Job']['Objects'][0] in obj_paths}
+
+            if len(jobs) == 2:
+                seen_states.append(sorted((job['State'], job['QueuePosition']) for job in jobs.values()))
+            for path, job in jobs.items():
+                if job['State'] == 'queued':
+                    queued_job = path
+                elif path == queued_job and job['State'] == 'running':
+                    queued_job_started = True
+
+            time.sleep(0.1)
+
+        for erase_thread in erase_threads:
+            erase_thread.join()
+
+        # both devices were erased, the second one after the first one
+        if exceptions:
+            raise exceptions[0]
+        self.assertIn([('queued', 1), ('running', 0)], seen_states)
+        self.assertNotIn([('running', 0), ('running', 0)], seen_states)
+        self.assertIsNotNone(queued_job)
+        self.assertTrue(queued_job_started)
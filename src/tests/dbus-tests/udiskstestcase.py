@@ -5,6 +5,7 @@ import os
 import time
 
 test_devs = None
+job_limit_total = 0  # limit for the format-erase jobs the daemon was started with, 0 if unknown
 
 def get_call_long(call):
     def call_long(*args, **kwargs):
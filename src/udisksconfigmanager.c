@@ -34,6 +34,16 @@ struct _UDisksConfigManager {
 
   UDisksModuleLoadPreference load_preference;
   GList *modules;
+
+  gint probing_threads;
+  gint housekeeping_threads;
+  gint housekeeping_timeout;
+  gint lvm2_update_delay;
+  gint authorization_cache_ttl;
+  gint job_limit_total;
+  gint job_limit_drive;
+  gint job_limit_controller;
+  gchar **job_limit_operations;
 };
 
 struct _UDisksConfigManagerClass {
@@ -53,6 +63,29 @@ enum
 static const gchar *modules_group_name = PACKAGE_NAME_UDISKS2;
 static const gchar *modules_key = "modules";
 static const gchar *modules_load_preference_key = "modules_load_preference";
+static const gchar *probing_threads_key = "probing_threads";
+static const gchar *housekeeping_threads_key = "housekeeping_threads";
+static const gchar *housekeeping_timeout_key = "housekeeping_timeout";
+static const gchar *lvm2_update_delay_key = "lvm2_update_delay";
+static const gchar *authorization_cache_ttl_key = "authorization_cache_ttl";
+static const gchar *job_limit_total_key = "job_limit_total";
+static const gchar *job_limit_drive_key = "job_limit_drive";
+static const gchar *job_limit_controller_key = "job_limit_controller";
+static const gchar *job_limit_operations_key = "job_limit_operations";
+
+#define PROBING_THREADS_DEFAULT       4
+#define PROBING_THREADS_MAX           64
+#define HOUSEKEEPING_THREADS_DEFAULT  4
+#define HOUSEKEEPING_THREADS_MAX      64
+#define HOUSEKEEPING_TIMEOUT_DEFAULT  120
+#define HOUSEKEEPING_TIMEOUT_MAX      3600
+#define LVM2_UPDATE_DELAY_DEFAULT     100
+#define LVM2_UPDATE_DELAY_MAX         10000
+#define AUTHORIZATION_CACHE_TTL_DEFAULT 5
+#define AUTHORIZATION_CACHE_TTL_MAX   300
+#define JOB_LIMIT_DEFAULT             0
+#define JOB_LIMIT_MAX                 1024
+#define JOB_LIMIT_OPERATIONS_DEFAULT  "format-wipe,format-mkfs,format-erase"
 
 static void
 udisks_config_manager_get_property (GObject    *object,
@@ -129,6 +162,40 @@ strtrim (const gchar *s)
   return result;
 }
 
+/* Reads an integer option from the [udisks2] group, falling back to
+ * @default_value if it is missing or out of the [@min, @max] range. */
+static gint
+get_integer_key (GKeyFile    *config_file,
+                 const gchar *key,
+                 gint         min,
+                 gint         max,
+                 gint         default_value)
+{
+  GError *error = NULL;
+  gint value;
+
+  value = g_key_file_get_integer (config_file,
+                                  modules_group_name,
+                                  key,
+                                  &error);
+  if (error != NULL)
+    {
+      udisks_debug ("No '%s' found in configuration file", key);
+      g_clear_error (&error);
+      return default_value;
+    }
+
+  if (value < min || value > max)
+    {
+      udisks_warning ("Invalid value used for '%s': %d"
+                      "; defaulting to %d",
+                      key, value, default_value);
+      return default_value;
+    }
+
+  return value;
+}
+
 static void
 udisks_config_manager_constructed (GObject *object)
 {
@@ -226,6 +293,69 @@ udisks_config_manager_constructed (GObject *object)
           manager->load_preference = UDISKS_MODULE_LOAD_ONDEMAND;
         }
 
+      /* Read the number of device probing threads. */
+      manager->probing_threads = get_integer_key (config_file,
+                                                  probing_threads_key,
+                                                  1, PROBING_THREADS_MAX,
+                                                  PROBING_THREADS_DEFAULT);
+
+      /* Read the number of housekeeping threads and the per-object deadline. */
+      manager->housekeeping_threads = get_integer_key (config_file,
+                                                       housekeeping_threads_key,
+                                                       1, HOUSEKEEPING_THREADS_MAX,
+                                                       HOUSEKEEPING_THREADS_DEFAULT);
+      manager->housekeeping_timeout = get_integer_key (config_file,
+                                                       housekeeping_timeout_key,
+                                                       1, HOUSEKEEPING_TIMEOUT_MAX,
+                                                       HOUSEKEEPING_TIMEOUT_DEFAULT);
+
+      /* Read the time LVM2 refreshes are delayed by to coalesce uevents. */
+      manager->lvm2_update_delay = get_integer_key (config_file,
+                                                    lvm2_update_delay_key,
+                                                    0, LVM2_UPDATE_DELAY_MAX,
+                                                    LVM2_UPDATE_DELAY_DEFAULT);
+
+      /* Read for how long authorization decisions are cached. */
+      manager->authorization_cache_ttl = get_integer_key (config_file,
+                                                          authorization_cache_ttl_key,
+                                                          0, AUTHORIZATION_CACHE_TTL_MAX,
+                                                          AUTHORIZATION_CACHE_TTL_DEFAULT);
+
+      /* Read how many jobs may run at the same time. */
+      manager->job_limit_total = get_integer_key (config_file,
+                                                  job_limit_total_key,
+                                                  0, JOB_LIMIT_MAX,
+                                                  JOB_LIMIT_DEFAULT);
+      manager->job_limit_drive = get_integer_key (config_file,
+                                                  job_limit_drive_key,
+                                                  0, JOB_LIMIT_MAX,
+                                                  JOB_LIMIT_DEFAULT);
+      manager->job_limit_controller = get_integer_key (config_file,
+                                                       job_limit_controller_key,
+                                                       0, JOB_LIMIT_MAX,
+                                                       JOB_LIMIT_DEFAULT);
+
+      /* Read the list of job operations the limits apply to. */
+      manager->job_limit_operations = g_key_file_get_string_list (config_file,
+                                                                  modules_group_name,
+                                                                  job_limit_operations_key,
+                                                                  NULL,
+                                                                  &error);
+      if (manager->job_limit_operations != NULL)
+        {
+          for (modules_tmp = manager->job_limit_operations; *modules_tmp != NULL; modules_tmp++)
+            {
+              tmp = *modules_tmp;
+              *modules_tmp = strtrim (tmp);
+              g_free (tmp);
+            }
+        }
+      else
+        {
+          udisks_debug ("No '%s' found in configuration file", job_limit_operations_key);
+          g_clear_error (&error);
+          manager->job_limit_operations = g_strsplit (JOB_LIMIT_OPERATIONS_DEFAULT, ",", -1);
+        }
     }
   else
     {
@@ -233,6 +363,15 @@ udisks_config_manager_constructed (GObject *object)
       udisks_warning ("Can't load configuration file %s", conf_filename);
       manager->modules = NULL; /* NULL == '*' */
       manager->load_preference = UDISKS_MODULE_LOAD_ONDEMAND;
+      manager->probing_threads = PROBING_THREADS_DEFAULT;
+      manager->housekeeping_threads = HOUSEKEEPING_THREADS_DEFAULT;
+      manager->housekeeping_timeout = HOUSEKEEPING_TIMEOUT_DEFAULT;
+      manager->lvm2_update_delay = LVM2_UPDATE_DELAY_DEFAULT;
+      manager->authorization_cache_ttl = AUTHORIZATION_CACHE_TTL_DEFAULT;
+      manager->job_limit_total = JOB_LIMIT_DEFAULT;
+      manager->job_limit_drive = JOB_LIMIT_DEFAULT;
+      manager->job_limit_controller = JOB_LIMIT_DEFAULT;
+      manager->job_limit_operations = g_strsplit (JOB_LIMIT_OPERATIONS_DEFAULT, ",", -1);
     }
 
 
@@ -261,6 +400,8 @@ udisks_config_manager_finalize (GObject *object)
       manager->modules = NULL;
     }
 
+  g_strfreev (manager->job_limit_operations);
+
   if (G_OBJECT_CLASS (udisks_config_manager_parent_class))
     G_OBJECT_CLASS (udisks_config_manager_parent_class)->finalize (object);
 }
@@ -363,3 +504,66 @@ udisks_config_manager_get_load_preference (UDisksConfigManager *manager)
                         UDISKS_MODULE_LOAD_ONDEMAND);
   return manager->load_preference;
 }
+
+gint
+udisks_config_manager_get_probing_threads (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), PROBING_THREADS_DEFAULT);
+  return manager->probing_threads;
+}
+
+gint
+udisks_config_manager_get_housekeeping_threads (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), HOUSEKEEPING_THREADS_DEFAULT);
+  return manager->housekeeping_threads;
+}
+
+gint
+udisks_config_manager_get_housekeeping_timeout (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), HOUSEKEEPING_TIMEOUT_DEFAULT);
+  return manager->housekeeping_timeout;
+}
+
+gint
+udisks_config_manager_get_lvm2_update_delay (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), LVM2_UPDATE_DELAY_DEFAULT);
+  return manager->lvm2_update_delay;
+}
+
+gint
+udisks_config_manager_get_authorization_cache_ttl (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), AUTHORIZATION_CACHE_TTL_DEFAULT);
+  return manager->authorization_cache_ttl;
+}
+
+gint
+udisks_config_manager_get_job_limit_total (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), JOB_LIMIT_DEFAULT);
+  return manager->job_limit_total;
+}
+
+gint
+udisks_config_manager_get_job_limit_drive (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), JOB_LIMIT_DEFAULT);
+  return manager->job_limit_drive;
+}
+
+gint
+udisks_config_manager_get_job_limit_controller (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), JOB_LIMIT_DEFAULT);
+  return manager->job_limit_controller;
+}
+
+const gchar *const *
+udisks_config_manager_get_job_limit_operations (UDisksConfigManager *manager)
+{
+  g_return_val_if_fail (UDISKS_IS_CONFIG_MANAGER (manager), NULL);
+  return (const gchar *const *) manager->job_limit_operations;
+}
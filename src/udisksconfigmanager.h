@@ -55,6 +55,15 @@ const GList          *udisks_config_manager_get_modules     (UDisksConfigManager
 gboolean              udisks_config_manager_get_modules_all (UDisksConfigManager *manager);
 UDisksModuleLoadPreference
                       udisks_config_manager_get_load_preference (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_probing_threads (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_housekeeping_threads (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_housekeeping_timeout (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_lvm2_update_delay (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_authorization_cache_ttl (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_job_limit_total (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_job_limit_drive (UDisksConfigManager *manager);
+gint                  udisks_config_manager_get_job_limit_controller (UDisksConfigManager *manager);
+const gchar *const   *udisks_config_manager_get_job_limit_operations (UDisksConfigManager *manager);
 
 G_END_DECLS
 
@@ -58,6 +58,8 @@ struct _UDisksCrypttabMonitor
 
   gboolean have_data;
   GList *crypttab_entries;
+  /* device (e.g. UUID=..., LABEL=... or /dev/...) -> GList of entries */
+  GHashTable *entries_by_device;
 
   GFileMonitor *file_monitor;
 };
@@ -100,6 +102,7 @@ udisks_crypttab_monitor_finalize (GObject *object)
 
   g_list_foreach (monitor->crypttab_entries, (GFunc) g_object_unref, NULL);
   g_list_free (monitor->crypttab_entries);
+  g_hash_table_destroy (monitor->entries_by_device);
 
   if (G_OBJECT_CLASS (udisks_crypttab_monitor_parent_class)->finalize != NULL)
     G_OBJECT_CLASS (udisks_crypttab_monitor_parent_class)->finalize (object);
@@ -109,6 +112,10 @@ static void
 udisks_crypttab_monitor_init (UDisksCrypttabMonitor *monitor)
 {
   monitor->crypttab_entries = NULL;
+  monitor->entries_by_device = g_hash_table_new_full (g_str_hash,
+                                                      g_str_equal,
+                                                      g_free,
+                                                      (GDestroyNotify) g_list_free);
 }
 
 static void
@@ -320,6 +327,7 @@ udisks_crypttab_monitor_invalidate (UDisksCrypttabMonitor *monitor)
 {
   monitor->have_data = FALSE;
 
+  g_hash_table_remove_all (monitor->entries_by_device);
   g_list_foreach (monitor->crypttab_entries, (GFunc) g_object_unref, NULL);
   g_list_free (monitor->crypttab_entries);
   monitor->crypttab_entries = NULL;
@@ -349,6 +357,32 @@ have_entry (UDisksCrypttabMonitor *monitor,
   return ret;
 }
 
+static void
+index_entry (UDisksCrypttabMonitor *monitor,
+             UDisksCrypttabEntry   *entry)
+{
+  const gchar *device;
+  GList *entries;
+
+  device = udisks_crypttab_entry_get_device (entry);
+  if (!(g_str_has_prefix (device, "UUID=") ||
+        g_str_has_prefix (device, "LABEL=") ||
+        g_str_has_prefix (device, "PARTUUID=") ||
+        g_str_has_prefix (device, "PARTLABEL=") ||
+        g_str_has_prefix (device, "/dev")))
+    {
+      /* ignore non-device entries */
+      return;
+    }
+
+  /* the list head only changes when the first entry is added */
+  entries = g_hash_table_lookup (monitor->entries_by_device, device);
+  if (entries == NULL)
+    g_hash_table_insert (monitor->entries_by_device, g_strdup (device), g_list_prepend (NULL, entry));
+  else
+    entries = g_list_append (entries, entry);
+}
+
 static void
 udisks_crypttab_monitor_ensure (UDisksCrypttabMonitor *monitor)
 {
@@ -407,6 +441,7 @@ udisks_crypttab_monitor_ensure (UDisksCrypttabMonitor *monitor)
       if (!have_entry (monitor, entry))
         {
           monitor->crypttab_entries = g_list_prepend (monitor->crypttab_entries, entry);
+          index_entry (monitor, entry);
         }
       else
         {
@@ -446,3 +481,31 @@ udisks_crypttab_monitor_get_entries (UDisksCrypttabMonitor  *monitor)
   return ret;
 }
 
+/**
+ * udisks_crypttab_monitor_get_entries_for_device:
+ * @monitor: A #UDisksCrypttabMonitor.
+ * @device: The device specification to look up, e.g. <literal>UUID=...</literal>, <literal>LABEL=...</literal> or a device file.
+ *
+ * Gets the /etc/crypttab entries whose device field is exactly @device.
+ *
+ * This uses an index built when the file is (re)loaded so, unlike
+ * udisks_crypttab_monitor_get_entries(), it is cheap enough to call for
+ * every block device update.
+ *
+ * Returns: (transfer full) (element-type UDisksCrypttabEntry): A list of #UDisksCrypttabEntry objects that must be freed with g_list_free() after each element has been freed with g_object_unref().
+ */
+GList *
+udisks_crypttab_monitor_get_entries_for_device (UDisksCrypttabMonitor *monitor,
+                                                const gchar           *device)
+{
+  GList *ret;
+
+  g_return_val_if_fail (UDISKS_IS_CRYPTTAB_MONITOR (monitor), NULL);
+  g_return_val_if_fail (device != NULL, NULL);
+
+  udisks_crypttab_monitor_ensure (monitor);
+
+  ret = g_list_copy (g_hash_table_lookup (monitor->entries_by_device, device));
+  g_list_foreach (ret, (GFunc) g_object_ref, NULL);
+  return ret;
+}
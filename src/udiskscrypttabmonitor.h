@@ -32,6 +32,8 @@ G_BEGIN_DECLS
 GType                   udisks_crypttab_monitor_get_type    (void) G_GNUC_CONST;
 UDisksCrypttabMonitor  *udisks_crypttab_monitor_new         (void);
 GList                  *udisks_crypttab_monitor_get_entries (UDisksCrypttabMonitor  *monitor);
+GList                  *udisks_crypttab_monitor_get_entries_for_device (UDisksCrypttabMonitor *monitor,
+                                                                        const gchar           *device);
 
 G_END_DECLS
 
@@ -40,6 +40,7 @@
 #include "udiskscrypttabmonitor.h"
 #include "udiskscrypttabentry.h"
 #include "udiskslinuxblockobject.h"
+#include "udiskslinuxdriveobject.h"
 #include "udiskslinuxdevice.h"
 #include "udisksmodulemanager.h"
 #include "udisksconfigmanager.h"
@@ -86,6 +87,54 @@ struct _UDisksDaemon
   gboolean disable_modules;
   gboolean force_load_modules;
   gboolean uninstalled;
+
+  /* Lookup indexes for exported block and drive objects, maintained by the
+   * Linux provider and protected by @index_lock since lookups may happen
+   * from any thread.
+   */
+  GMutex index_lock;
+  GHashTable *block_by_dev;             /* dev_t -> UDisksObject */
+  GHashTable *block_by_device_file;     /* device file -> UDisksObject */
+  GHashTable *block_by_symlink;         /* device file symlink -> UDisksObject */
+  GHashTable *block_by_sysfs_path;      /* sysfs path -> UDisksObject */
+  GHashTable *block_index_keys;         /* UDisksObject -> BlockIndexKeys */
+  GHashTable *drive_by_sysfs_path;      /* sysfs path of a drive device -> UDisksObject */
+
+  /* Bumped whenever objects are added, removed or updated so that threads
+   * in udisks_daemon_wait_for_object_sync() can recheck. Protected by
+   * @objects_changed_lock.
+   */
+  GMutex objects_changed_lock;
+  GCond objects_changed_cond;
+  guint64 objects_changed_serial;
+
+  /* Monotonic time the daemon was created at and the startup phases
+   * recorded so far, protected by @startup_profile_lock.
+   */
+  gint64 startup_time;
+  GMutex startup_profile_lock;
+  GPtrArray *startup_profile;           /* of StartupPhase */
+
+  /* Credentials and authorization decisions of the callers, dropped when
+   * the caller's unique bus name goes away, and per-action cache
+   * statistics. Protected by @callers_lock.
+   */
+  GMutex callers_lock;
+  GHashTable *callers;                  /* unique bus name -> CallerEntry */
+  GHashTable *authorization_stats;      /* action id -> AuthorizationStats */
+  guint name_owner_changed_id;
+
+  /* Jobs subject to the configured job limits, the ones waiting for a
+   * slot in the order they were started and the number of slots taken
+   * in total, per drive and per controller. Protected by @jobs_lock.
+   */
+  GMutex jobs_lock;
+  GCond jobs_cond;
+  GHashTable *scheduled_jobs;           /* UDisksBaseJob -> ScheduledJob */
+  GQueue queued_jobs;                   /* of ScheduledJob */
+  GHashTable *running_jobs_per_drive;   /* drive object path -> count */
+  GHashTable *running_jobs_per_controller; /* controller sysfs path -> count */
+  guint running_jobs;
 };
 
 struct _UDisksDaemonClass
@@ -108,8 +157,99 @@ enum
   PROP_UNINSTALLED,
 };
 
+/* The keys a block object was indexed with, needed to remove the object
+ * from the indexes once its device file, symlinks or number change.
+ */
+typedef struct
+{
+  dev_t   dev;
+  gchar  *device_file;
+  gchar **symlinks;
+  gchar  *sysfs_path;
+} BlockIndexKeys;
+
+static void
+block_index_keys_free (BlockIndexKeys *keys)
+{
+  g_free (keys->device_file);
+  g_strfreev (keys->symlinks);
+  g_free (keys->sysfs_path);
+  g_slice_free (BlockIndexKeys, keys);
+}
+
+/* A phase of the daemon startup, times are in microseconds with @start
+ * relative to the creation of the daemon.
+ */
+typedef struct
+{
+  gchar  *name;
+  gint64  start;
+  gint64  duration;
+} StartupPhase;
+
+static void
+startup_phase_free (StartupPhase *phase)
+{
+  g_free (phase->name);
+  g_slice_free (StartupPhase, phase);
+}
+
+/* Unique bus names are never reused, so the credentials of a caller
+ * don't change until it disconnects. Authorization decisions expire at
+ * @expire_time (monotonic).
+ */
+typedef struct
+{
+  gboolean    have_uid;
+  uid_t       uid;
+  gboolean    have_pid;
+  pid_t       pid;
+  GHashTable *authorizations;           /* cache key -> AuthorizationEntry */
+} CallerEntry;
+
+typedef struct
+{
+  gboolean is_authorized;
+  gint64   expire_time;
+} AuthorizationEntry;
+
+typedef struct
+{
+  guint64 hits;
+  guint64 misses;
+} AuthorizationStats;
+
+/* Callers that disconnect while their request is being handled may be
+ * added back after their entry was dropped, so the cache is flushed if it
+ * grows beyond this.
+ */
+#define MAX_CACHED_CALLERS 1024
+
+static void
+authorization_entry_free (AuthorizationEntry *entry)
+{
+  g_slice_free (AuthorizationEntry, entry);
+}
+
+static void
+caller_entry_free (CallerEntry *entry)
+{
+  g_hash_table_unref (entry->authorizations);
+  g_slice_free (CallerEntry, entry);
+}
+
+static void
+authorization_stats_free (AuthorizationStats *stats)
+{
+  g_slice_free (AuthorizationStats, stats);
+}
+
 G_DEFINE_TYPE (UDisksDaemon, udisks_daemon, G_TYPE_OBJECT);
 
+static void on_objects_changed (UDisksDaemon *daemon);
+static void on_authority_changed (PolkitAuthority *authority,
+                                  gpointer         user_data);
+
 static void
 udisks_daemon_finalize (GObject *object)
 {
@@ -118,8 +258,20 @@ udisks_daemon_finalize (GObject *object)
   udisks_state_stop_cleanup (daemon->state);
   g_object_unref (daemon->state);
 
+  if (daemon->authority != NULL)
+    g_signal_handlers_disconnect_by_func (daemon->authority,
+                                          G_CALLBACK (on_authority_changed),
+                                          daemon);
   g_clear_object (&daemon->authority);
+  if (daemon->name_owner_changed_id != 0)
+    g_dbus_connection_signal_unsubscribe (daemon->connection, daemon->name_owner_changed_id);
+  g_signal_handlers_disconnect_by_func (daemon->object_manager,
+                                        G_CALLBACK (on_objects_changed),
+                                        daemon);
   g_object_unref (daemon->object_manager);
+  g_signal_handlers_disconnect_by_func (daemon->linux_provider,
+                                        G_CALLBACK (on_objects_changed),
+                                        daemon);
   g_object_unref (daemon->linux_provider);
   g_object_unref (daemon->connection);
 
@@ -133,6 +285,26 @@ udisks_daemon_finalize (GObject *object)
 
   g_clear_object (&daemon->config_manager);
 
+  g_hash_table_unref (daemon->block_by_dev);
+  g_hash_table_unref (daemon->block_by_device_file);
+  g_hash_table_unref (daemon->block_by_symlink);
+  g_hash_table_unref (daemon->block_by_sysfs_path);
+  g_hash_table_unref (daemon->block_index_keys);
+  g_hash_table_unref (daemon->drive_by_sysfs_path);
+  g_mutex_clear (&daemon->index_lock);
+  g_mutex_clear (&daemon->objects_changed_lock);
+  g_cond_clear (&daemon->objects_changed_cond);
+  g_ptr_array_unref (daemon->startup_profile);
+  g_mutex_clear (&daemon->startup_profile_lock);
+  g_hash_table_unref (daemon->callers);
+  g_hash_table_unref (daemon->authorization_stats);
+  g_mutex_clear (&daemon->callers_lock);
+  g_hash_table_unref (daemon->scheduled_jobs);
+  g_hash_table_unref (daemon->running_jobs_per_drive);
+  g_hash_table_unref (daemon->running_jobs_per_controller);
+  g_mutex_clear (&daemon->jobs_lock);
+  g_cond_clear (&daemon->jobs_cond);
+
   if (G_OBJECT_CLASS (udisks_daemon_parent_class)->finalize != NULL)
     G_OBJECT_CLASS (udisks_daemon_parent_class)->finalize (object);
 }
@@ -229,6 +401,51 @@ udisks_daemon_set_property (GObject      *object,
 static void
 udisks_daemon_init (UDisksDaemon *daemon)
 {
+  daemon->startup_time = g_get_monotonic_time ();
+  g_mutex_init (&daemon->startup_profile_lock);
+  daemon->startup_profile = g_ptr_array_new_with_free_func ((GDestroyNotify) startup_phase_free);
+  g_mutex_init (&daemon->objects_changed_lock);
+  g_cond_init (&daemon->objects_changed_cond);
+  g_mutex_init (&daemon->callers_lock);
+  daemon->callers = g_hash_table_new_full (g_str_hash,
+                                           g_str_equal,
+                                           g_free,
+                                           (GDestroyNotify) caller_entry_free);
+  daemon->authorization_stats = g_hash_table_new_full (g_str_hash,
+                                                       g_str_equal,
+                                                       g_free,
+                                                       (GDestroyNotify) authorization_stats_free);
+  g_mutex_init (&daemon->jobs_lock);
+  g_cond_init (&daemon->jobs_cond);
+  daemon->scheduled_jobs = g_hash_table_new (g_direct_hash, g_direct_equal);
+  g_queue_init (&daemon->queued_jobs);
+  daemon->running_jobs_per_drive = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
+  daemon->running_jobs_per_controller = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
+  g_mutex_init (&daemon->index_lock);
+  daemon->block_by_dev = g_hash_table_new_full (g_int64_hash,
+                                                g_int64_equal,
+                                                g_free,
+                                                g_object_unref);
+  daemon->block_by_device_file = g_hash_table_new_full (g_str_hash,
+                                                        g_str_equal,
+                                                        g_free,
+                                                        g_object_unref);
+  daemon->block_by_symlink = g_hash_table_new_full (g_str_hash,
+                                                    g_str_equal,
+                                                    g_free,
+                                                    g_object_unref);
+  daemon->block_by_sysfs_path = g_hash_table_new_full (g_str_hash,
+                                                       g_str_equal,
+                                                       g_free,
+                                                       g_object_unref);
+  daemon->block_index_keys = g_hash_table_new_full (g_direct_hash,
+                                                    g_direct_equal,
+                                                    NULL,
+                                                    (GDestroyNotify) block_index_keys_free);
+  daemon->drive_by_sysfs_path = g_hash_table_new_full (g_str_hash,
+                                                       g_str_equal,
+                                                       g_free,
+                                                       g_object_unref);
 }
 
 static void
@@ -237,7 +454,60 @@ mount_monitor_on_mount_removed (UDisksMountMonitor *monitor,
                                 gpointer            user_data)
 {
   UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
-  udisks_state_check (daemon->state);
+  udisks_state_check_block (daemon->state, udisks_mount_get_dev (mount));
+}
+
+static void
+on_objects_changed (UDisksDaemon *daemon)
+{
+  g_mutex_lock (&daemon->objects_changed_lock);
+  daemon->objects_changed_serial++;
+  g_cond_broadcast (&daemon->objects_changed_cond);
+  g_mutex_unlock (&daemon->objects_changed_lock);
+}
+
+static void
+on_authority_changed (PolkitAuthority *authority,
+                      gpointer         user_data)
+{
+  UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
+  GHashTableIter iter;
+  gpointer value;
+
+  /* policy, rules or temporary authorizations changed, drop all decisions */
+  g_mutex_lock (&daemon->callers_lock);
+  g_hash_table_iter_init (&iter, daemon->callers);
+  while (g_hash_table_iter_next (&iter, NULL, &value))
+    g_hash_table_remove_all (((CallerEntry *) value)->authorizations);
+  g_mutex_unlock (&daemon->callers_lock);
+}
+
+static void
+on_name_owner_changed (GDBusConnection *connection,
+                       const gchar     *sender_name,
+                       const gchar     *object_path,
+                       const gchar     *interface_name,
+                       const gchar     *signal_name,
+                       GVariant        *parameters,
+                       gpointer         user_data)
+{
+  UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
+  const gchar *name;
+  const gchar *old_owner;
+  const gchar *new_owner;
+
+  if (!g_variant_is_of_type (parameters, G_VARIANT_TYPE ("(sss)")))
+    return;
+
+  g_variant_get (parameters, "(&s&s&s)", &name, &old_owner, &new_owner);
+
+  /* only unique names are cached, forget them once they disconnect */
+  if (name[0] == ':' && new_owner[0] == '\0')
+    {
+      g_mutex_lock (&daemon->callers_lock);
+      g_hash_table_remove (daemon->callers, name);
+      g_mutex_unlock (&daemon->callers_lock);
+    }
 }
 
 static void
@@ -246,6 +516,7 @@ udisks_daemon_constructed (GObject *object)
   UDisksDaemon *daemon = UDISKS_DAEMON (object);
   GError *error;
   gboolean ret = FALSE;
+  gint64 phase_start_time;
 
   /* NULL means no specific so_name (implementation) */
   BDPluginSpec part_plugin = {BD_PLUGIN_PART, NULL};
@@ -262,6 +533,7 @@ udisks_daemon_constructed (GObject *object)
                              &fs_plugin, &crypto_plugin, NULL};
   error = NULL;
 
+  phase_start_time = g_get_monotonic_time ();
   ret = bd_ensure_init (plugins, NULL, &error);
   if (!ret)
     {
@@ -269,7 +541,9 @@ udisks_daemon_constructed (GObject *object)
                     error->message, g_quark_to_string (error->domain), error->code);
       g_error_free (error);
     }
+  udisks_daemon_add_startup_phase (daemon, "libblockdev", phase_start_time, g_get_monotonic_time ());
 
+  phase_start_time = g_get_monotonic_time ();
   daemon->authority = polkit_authority_get_sync (NULL, &error);
   if (daemon->authority == NULL)
     {
@@ -277,9 +551,47 @@ udisks_daemon_constructed (GObject *object)
                     error->message, g_quark_to_string (error->domain), error->code);
       g_clear_error (&error);
     }
+  else
+    {
+      g_signal_connect (daemon->authority,
+                        "changed",
+                        G_CALLBACK (on_authority_changed),
+                        daemon);
+    }
+  udisks_daemon_add_startup_phase (daemon, "polkit", phase_start_time, g_get_monotonic_time ());
+
+  /* cached caller credentials are only valid until the caller disconnects */
+  daemon->name_owner_changed_id = g_dbus_connection_signal_subscribe (daemon->connection,
+                                                                      "org.freedesktop.DBus",
+                                                                      "org.freedesktop.DBus",
+                                                                      "NameOwnerChanged",
+                                                                      "/org/freedesktop/DBus",
+                                                                      NULL, /* arg0 */
+                                                                      G_DBUS_SIGNAL_FLAGS_NONE,
+                                                                      on_name_owner_changed,
+                                                                      daemon,
+                                                                      NULL); /* user_data_free_func */
 
   daemon->object_manager = g_dbus_object_manager_server_new ("/org/freedesktop/UDisks2");
 
+  /* wake up threads waiting for objects - see wait_for_objects() */
+  g_signal_connect_swapped (daemon->object_manager,
+                            "object-added",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+  g_signal_connect_swapped (daemon->object_manager,
+                            "object-removed",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+  g_signal_connect_swapped (daemon->object_manager,
+                            "interface-added",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+  g_signal_connect_swapped (daemon->object_manager,
+                            "interface-removed",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+
   if (!g_file_test ("/run/udisks2", G_FILE_TEST_IS_DIR))
     {
       if (g_mkdir_with_parents ("/run/udisks2", 0700) != 0)
@@ -317,17 +629,33 @@ udisks_daemon_constructed (GObject *object)
                     G_CALLBACK (mount_monitor_on_mount_removed),
                     daemon);
 
+  /* block objects update their properties on mount changes too */
+  g_signal_connect_swapped (daemon->mount_monitor,
+                            "mount-added",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+  g_signal_connect_swapped (daemon->mount_monitor,
+                            "mount-removed",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
+
   daemon->fstab_monitor = udisks_fstab_monitor_new ();
   daemon->crypttab_monitor = udisks_crypttab_monitor_new ();
 
   /* now add providers */
   daemon->linux_provider = udisks_linux_provider_new (daemon);
+  g_signal_connect_swapped (daemon->linux_provider,
+                            "changed",
+                            G_CALLBACK (on_objects_changed),
+                            daemon);
 
   if (daemon->force_load_modules
       || (udisks_config_manager_get_load_preference (daemon->config_manager)
           == UDISKS_MODULE_LOAD_ONSTARTUP))
     {
+      phase_start_time = g_get_monotonic_time ();
       udisks_module_manager_load_modules (daemon->module_manager);
+      udisks_daemon_add_startup_phase (daemon, "modules", phase_start_time, g_get_monotonic_time ());
     }
 
   udisks_provider_start (UDISKS_PROVIDER (daemon->linux_provider));
@@ -339,6 +667,11 @@ udisks_daemon_constructed (GObject *object)
   udisks_state_start_cleanup (daemon->state);
   udisks_state_check (daemon->state);
 
+  /* initial housekeeping and module scans may still be running but
+   * objects are exported and method calls are served from now on
+   */
+  udisks_daemon_add_startup_phase (daemon, "ready", daemon->startup_time, g_get_monotonic_time ());
+
   if (G_OBJECT_CLASS (udisks_daemon_parent_class)->constructed != NULL)
     G_OBJECT_CLASS (udisks_daemon_parent_class)->constructed (object);
 }
@@ -595,6 +928,477 @@ udisks_daemon_get_state (UDisksDaemon *daemon)
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+typedef struct
+{
+  UDisksDaemon       *daemon;
+  UDisksBaseJob      *job;
+  gchar              *drive_key;        /* drive object path or NULL */
+  gchar              *controller_key;   /* controller sysfs path or NULL */
+  gboolean            queued;
+  gboolean            holds_slot;
+  UDisksJobStartFunc  start_func;       /* NULL for udisks_daemon_start_job_sync() */
+  GMainContext       *context;
+  GCancellable       *cancellable;
+  gulong              cancelled_id;
+} ScheduledJob;
+
+static void
+scheduled_job_free (ScheduledJob *entry)
+{
+  if (entry->cancellable != NULL)
+    {
+      g_cancellable_disconnect (entry->cancellable, entry->cancelled_id);
+      g_object_unref (entry->cancellable);
+    }
+  if (entry->context != NULL)
+    g_main_context_unref (entry->context);
+  g_free (entry->drive_key);
+  g_free (entry->controller_key);
+  g_free (entry);
+}
+
+static gboolean
+job_limits_apply (UDisksDaemon *daemon,
+                  const gchar  *job_operation)
+{
+  const gchar *const *operations;
+
+  if (udisks_config_manager_get_job_limit_total (daemon->config_manager) == 0 &&
+      udisks_config_manager_get_job_limit_drive (daemon->config_manager) == 0 &&
+      udisks_config_manager_get_job_limit_controller (daemon->config_manager) == 0)
+    return FALSE;
+
+  operations = udisks_config_manager_get_job_limit_operations (daemon->config_manager);
+  for (; operations != NULL && *operations != NULL; operations++)
+    {
+      if (g_strcmp0 (*operations, job_operation) == 0)
+        return TRUE;
+    }
+
+  return FALSE;
+}
+
+/* Determines the drive and the controller (the closest PCI device in the
+ * sysfs topology, e.g. an HBA) the job on @object ends up using.
+ */
+static void
+get_job_resource_keys (UDisksDaemon  *daemon,
+                       UDisksObject  *object,
+                       gchar        **out_drive_key,
+                       gchar        **out_controller_key)
+{
+  UDisksLinuxDevice *device = NULL;
+  GUdevDevice *controller;
+  UDisksBlock *block;
+  guint n;
+
+  object = g_object_ref (object);
+
+  /* for cleartext devices, it's the backing device that does the I/O */
+  for (n = 0; n < 8; n++)
+    {
+      UDisksObject *backing_object;
+      const gchar *backing_path;
+
+      block = udisks_object_peek_block (object);
+      if (block == NULL)
+        break;
+      backing_path = udisks_block_get_crypto_backing_device (block);
+      if (g_strcmp0 (backing_path, "/") == 0)
+        break;
+      backing_object = udisks_daemon_find_object (daemon, backing_path);
+      if (backing_object == NULL)
+        break;
+      g_object_unref (object);
+      object = backing_object;
+    }
+
+  block = udisks_object_peek_block (object);
+  if (block != NULL)
+    {
+      if (g_strcmp0 (udisks_block_get_drive (block), "/") != 0)
+        *out_drive_key = udisks_block_dup_drive (block);
+      if (UDISKS_IS_LINUX_BLOCK_OBJECT (object))
+        device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (object));
+    }
+  else if (UDISKS_IS_LINUX_DRIVE_OBJECT (object))
+    {
+      *out_drive_key = g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+      device = udisks_linux_drive_object_get_device (UDISKS_LINUX_DRIVE_OBJECT (object), TRUE /* get_hw */);
+    }
+
+  if (device != NULL)
+    {
+      controller = g_udev_device_get_parent_with_subsystem (device->udev_device, "pci", NULL);
+      if (controller != NULL)
+        {
+          *out_controller_key = g_strdup (g_udev_device_get_sysfs_path (controller));
+          g_object_unref (controller);
+        }
+      g_object_unref (device);
+    }
+
+  g_object_unref (object);
+}
+
+static void
+register_scheduled_job (UDisksDaemon  *daemon,
+                        UDisksBaseJob *job,
+                        UDisksObject  *object,
+                        const gchar   *job_operation)
+{
+  ScheduledJob *entry;
+
+  if (!job_limits_apply (daemon, job_operation))
+    return;
+
+  entry = g_new0 (ScheduledJob, 1);
+  entry->daemon = daemon;
+  entry->job = job;
+  if (object != NULL)
+    get_job_resource_keys (daemon, object, &entry->drive_key, &entry->controller_key);
+
+  g_mutex_lock (&daemon->jobs_lock);
+  g_hash_table_insert (daemon->scheduled_jobs, job, entry);
+  g_mutex_unlock (&daemon->jobs_lock);
+}
+
+/* must be called with @jobs_lock held */
+static gboolean
+can_start_job_unlocked (UDisksDaemon *daemon,
+                        ScheduledJob *entry)
+{
+  gint limit;
+
+  limit = udisks_config_manager_get_job_limit_total (daemon->config_manager);
+  if (limit > 0 && daemon->running_jobs >= (guint) limit)
+    return FALSE;
+
+  limit = udisks_config_manager_get_job_limit_drive (daemon->config_manager);
+  if (limit > 0 && entry->drive_key != NULL &&
+      GPOINTER_TO_UINT (g_hash_table_lookup (daemon->running_jobs_per_drive, entry->drive_key)) >= (guint) limit)
+    return FALSE;
+
+  limit = udisks_config_manager_get_job_limit_controller (daemon->config_manager);
+  if (limit > 0 && entry->controller_key != NULL &&
+      GPOINTER_TO_UINT (g_hash_table_lookup (daemon->running_jobs_per_controller, entry->controller_key)) >= (guint) limit)
+    return FALSE;
+
+  return TRUE;
+}
+
+static void
+count_running_job (GHashTable  *running_jobs,
+                   const gchar *key,
+                   gint         delta)
+{
+  guint count;
+
+  if (key == NULL)
+    return;
+
+  count = GPOINTER_TO_UINT (g_hash_table_lookup (running_jobs, key)) + delta;
+  if (count > 0)
+    g_hash_table_insert (running_jobs, g_strdup (key), GUINT_TO_POINTER (count));
+  else
+    g_hash_table_remove (running_jobs, key);
+}
+
+/* must be called with @jobs_lock held */
+static void
+acquire_job_slot_unlocked (UDisksDaemon *daemon,
+                           ScheduledJob *entry)
+{
+  g_assert (!entry->holds_slot);
+  entry->holds_slot = TRUE;
+  daemon->running_jobs++;
+  count_running_job (daemon->running_jobs_per_drive, entry->drive_key, 1);
+  count_running_job (daemon->running_jobs_per_controller, entry->controller_key, 1);
+}
+
+/* must be called with @jobs_lock held */
+static void
+release_job_slot_unlocked (UDisksDaemon *daemon,
+                           ScheduledJob *entry)
+{
+  if (!entry->holds_slot)
+    return;
+  entry->holds_slot = FALSE;
+  daemon->running_jobs--;
+  count_running_job (daemon->running_jobs_per_drive, entry->drive_key, -1);
+  count_running_job (daemon->running_jobs_per_controller, entry->controller_key, -1);
+}
+
+/* must be called with @jobs_lock held */
+static void
+update_queue_positions_unlocked (UDisksDaemon *daemon)
+{
+  GList *l;
+  guint position = 1;
+
+  for (l = daemon->queued_jobs.head; l != NULL; l = l->next, position++)
+    {
+      ScheduledJob *entry = l->data;
+      udisks_job_set_queue_position (UDISKS_JOB (entry->job), position);
+    }
+}
+
+/* must be called with @jobs_lock held */
+static void
+unqueue_job_unlocked (UDisksDaemon *daemon,
+                      ScheduledJob *entry)
+{
+  g_queue_remove (&daemon->queued_jobs, entry);
+  entry->queued = FALSE;
+  udisks_job_set_queue_position (UDISKS_JOB (entry->job), 0);
+  udisks_job_set_state (UDISKS_JOB (entry->job), "running");
+  udisks_job_set_start_time (UDISKS_JOB (entry->job), g_get_real_time ());
+}
+
+/* Gives free slots to the queued jobs in order, skipping the ones that
+ * would exceed a limit. Returns the jobs to start with their start
+ * function, the ones waiting in udisks_daemon_start_job_sync() are
+ * woken up.
+ *
+ * Must be called with @jobs_lock held.
+ */
+static GList *
+dispatch_queued_jobs_unlocked (UDisksDaemon *daemon)
+{
+  GList *ret = NULL;
+  GList *l, *next;
+  gboolean wake_up = FALSE;
+
+  for (l = daemon->queued_jobs.head; l != NULL; l = next)
+    {
+      ScheduledJob *entry = l->data;
+
+      next = l->next;
+      if (!can_start_job_unlocked (daemon, entry))
+        continue;
+
+      acquire_job_slot_unlocked (daemon, entry);
+      unqueue_job_unlocked (daemon, entry);
+      if (entry->start_func != NULL)
+        ret = g_list_prepend (ret, entry);
+      else
+        wake_up = TRUE;
+    }
+
+  if (wake_up)
+    g_cond_broadcast (&daemon->jobs_cond);
+  update_queue_positions_unlocked (daemon);
+
+  return g_list_reverse (ret);
+}
+
+static gboolean
+start_queued_job_cb (gpointer user_data)
+{
+  ScheduledJob *entry = user_data;
+
+  udisks_debug ("Starting queued job %s",
+                g_dbus_object_get_object_path (g_dbus_interface_get_object (G_DBUS_INTERFACE (entry->job))));
+  entry->start_func (entry->job);
+  return FALSE; /* remove source */
+}
+
+/* starts the jobs in the thread and the main context they were started in */
+static void
+start_queued_jobs (GList *entries)
+{
+  GList *l;
+
+  for (l = entries; l != NULL; l = l->next)
+    {
+      ScheduledJob *entry = l->data;
+      g_main_context_invoke (entry->context, start_queued_job_cb, entry);
+    }
+  g_list_free (entries);
+}
+
+static void
+on_queued_job_cancelled (GCancellable *cancellable,
+                         gpointer      user_data)
+{
+  ScheduledJob *entry = user_data;
+  UDisksDaemon *daemon = entry->daemon;
+  gboolean start = FALSE;
+
+  /* A cancelled job still needs to be started (without a slot) for it to
+   * complete, the start functions check @cancellable right away.
+   */
+  g_mutex_lock (&daemon->jobs_lock);
+  if (entry->queued)
+    {
+      unqueue_job_unlocked (daemon, entry);
+      update_queue_positions_unlocked (daemon);
+      if (entry->start_func != NULL)
+        start = TRUE;
+      else
+        g_cond_broadcast (&daemon->jobs_cond);
+    }
+  g_mutex_unlock (&daemon->jobs_lock);
+
+  if (start)
+    start_queued_jobs (g_list_prepend (NULL, entry));
+}
+
+/* Returns %NULL if @job can be started right away or the queued entry
+ * otherwise.
+ */
+static ScheduledJob *
+queue_scheduled_job (UDisksDaemon       *daemon,
+                     UDisksBaseJob      *job,
+                     UDisksJobStartFunc  start_func)
+{
+  ScheduledJob *entry;
+  GCancellable *cancellable;
+  gboolean start_now = TRUE;
+
+  g_mutex_lock (&daemon->jobs_lock);
+  entry = g_hash_table_lookup (daemon->scheduled_jobs, job);
+  if (entry != NULL && !entry->holds_slot && entry->cancellable == NULL)
+    {
+      start_now = can_start_job_unlocked (daemon, entry);
+      if (start_now)
+        acquire_job_slot_unlocked (daemon, entry);
+    }
+  g_mutex_unlock (&daemon->jobs_lock);
+
+  if (start_now)
+    return NULL;
+
+  /* connected before the job is queued since the handler may run right away */
+  cancellable = udisks_base_job_get_cancellable (job);
+  entry->cancellable = g_object_ref (cancellable);
+  entry->cancelled_id = g_cancellable_connect (cancellable,
+                                               G_CALLBACK (on_queued_job_cancelled),
+                                               entry,
+                                               NULL);
+
+  g_mutex_lock (&daemon->jobs_lock);
+  if (g_cancellable_is_cancelled (cancellable))
+    {
+      start_now = TRUE;
+    }
+  else if (can_start_job_unlocked (daemon, entry))
+    {
+      acquire_job_slot_unlocked (daemon, entry);
+      start_now = TRUE;
+    }
+  else
+    {
+      entry->queued = TRUE;
+      entry->start_func = start_func;
+      entry->context = g_main_context_ref_thread_default ();
+      g_queue_push_tail (&daemon->queued_jobs, entry);
+      udisks_job_set_state (UDISKS_JOB (job), "queued");
+      update_queue_positions_unlocked (daemon);
+      udisks_notice ("Queued job %s (%s) due to the job limits, position %u",
+                     g_dbus_object_get_object_path (g_dbus_interface_get_object (G_DBUS_INTERFACE (job))),
+                     udisks_job_get_operation (UDISKS_JOB (job)),
+                     udisks_job_get_queue_position (UDISKS_JOB (job)));
+    }
+  g_mutex_unlock (&daemon->jobs_lock);
+
+  return start_now ? NULL : entry;
+}
+
+static void
+release_scheduled_job (UDisksDaemon  *daemon,
+                       UDisksBaseJob *job)
+{
+  ScheduledJob *entry;
+  GList *to_start = NULL;
+
+  g_mutex_lock (&daemon->jobs_lock);
+  entry = g_hash_table_lookup (daemon->scheduled_jobs, job);
+  if (entry != NULL)
+    {
+      g_hash_table_remove (daemon->scheduled_jobs, job);
+      if (entry->queued)
+        {
+          g_queue_remove (&daemon->queued_jobs, entry);
+          entry->queued = FALSE;
+        }
+      release_job_slot_unlocked (daemon, entry);
+      to_start = dispatch_queued_jobs_unlocked (daemon);
+    }
+  g_mutex_unlock (&daemon->jobs_lock);
+
+  if (entry != NULL)
+    scheduled_job_free (entry);
+  start_queued_jobs (to_start);
+}
+
+/**
+ * udisks_daemon_start_job:
+ * @daemon: A #UDisksDaemon.
+ * @job: A #UDisksBaseJob launched by @daemon.
+ * @start_func: Function to start @job with.
+ *
+ * Starts @job by calling @start_func, unless @job is subject to the job
+ * limits configured in <filename>udisks2.conf</filename> and starting
+ * it would exceed one of them. In that case @job is queued, its
+ * #UDisksJob:state property is set to <literal>queued</literal> and
+ * @start_func is called later from the thread-default main context of
+ * the calling thread, once other jobs complete.
+ *
+ * If @job is cancelled while queued, @start_func is called right away
+ * and is expected to complete @job.
+ */
+void
+udisks_daemon_start_job (UDisksDaemon       *daemon,
+                         UDisksBaseJob      *job,
+                         UDisksJobStartFunc  start_func)
+{
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (UDISKS_IS_BASE_JOB (job));
+  g_return_if_fail (start_func != NULL);
+
+  if (queue_scheduled_job (daemon, job, start_func) == NULL)
+    start_func (job);
+}
+
+/**
+ * udisks_daemon_start_job_sync:
+ * @daemon: A #UDisksDaemon.
+ * @job: A #UDisksBaseJob launched by @daemon.
+ * @error: Return location for error or %NULL.
+ *
+ * Like udisks_daemon_start_job() but for jobs doing the work in the
+ * calling thread (e.g. a #UDisksSimpleJob): blocks the calling thread
+ * while @job is queued.
+ *
+ * Returns: %TRUE if the work of @job can be started, %FALSE if @job
+ * was cancelled and @error is set.
+ */
+gboolean
+udisks_daemon_start_job_sync (UDisksDaemon   *daemon,
+                              UDisksBaseJob  *job,
+                              GError        **error)
+{
+  ScheduledJob *entry;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), FALSE);
+  g_return_val_if_fail (UDISKS_IS_BASE_JOB (job), FALSE);
+  g_return_val_if_fail (error == NULL || *error == NULL, FALSE);
+
+  entry = queue_scheduled_job (daemon, job, NULL);
+  if (entry != NULL)
+    {
+      g_mutex_lock (&daemon->jobs_lock);
+      while (entry->queued)
+        g_cond_wait (&daemon->jobs_cond, &daemon->jobs_lock);
+      g_mutex_unlock (&daemon->jobs_lock);
+    }
+
+  return !g_cancellable_set_error_if_cancelled (udisks_base_job_get_cancellable (job), error);
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 static void
 on_job_completed (UDisksJob    *job,
                   gboolean      success,
@@ -604,6 +1408,9 @@ on_job_completed (UDisksJob    *job,
   UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
   UDisksObjectSkeleton *object;
 
+  /* let queued jobs take the slot of this one */
+  release_scheduled_job (daemon, UDISKS_BASE_JOB (job));
+
   object = UDISKS_OBJECT_SKELETON (g_dbus_interface_get_object (G_DBUS_INTERFACE (job)));
   g_assert (object != NULL);
 
@@ -649,6 +1456,9 @@ common_job (UDisksDaemon    *daemon,
   udisks_job_set_cancelable (UDISKS_JOB (job), TRUE);
   udisks_job_set_operation (UDISKS_JOB (job), job_operation);
   udisks_job_set_started_by_uid (UDISKS_JOB (job), job_started_by_uid);
+  udisks_job_set_state (UDISKS_JOB (job), "running");
+
+  register_scheduled_job (daemon, UDISKS_BASE_JOB (job), object, job_operation);
 
   g_dbus_object_manager_server_export (daemon->object_manager, G_DBUS_OBJECT_SKELETON (job_object));
   g_signal_connect_after (job,
@@ -1181,46 +1991,95 @@ udisks_daemon_launch_threaded_job_sync (UDisksDaemon          *daemon,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/**
- * udisks_daemon_wait_for_object_sync:
- * @daemon: A #UDisksDaemon.
- * @wait_func: Function to check for desired object.
- * @user_data: User data to pass to @wait_func.
- * @user_data_free_func: (allow-none): Function to free @user_data or %NULL.
- * @timeout_seconds: Maximum time to wait for the object (in seconds) or 0 to never wait.
- * @error: (allow-none): Return location for error or %NULL.
- *
- * Blocks the calling thread until an object picked by @wait_func is
- * available or until @timeout_seconds has passed (in which case the
- * function fails with %UDISKS_ERROR_TIMED_OUT).
- *
- * Note that @wait_func will be called from time to time - for example
- * if there is a device event.
- *
- * Returns: (transfer full): The object picked by @wait_func or %NULL if @error is set.
- */
-
-typedef struct {
-  GMainContext *context;
-  GMainLoop *loop;
-  gboolean timed_out;
-} WaitData;
-
 static gboolean
 wait_on_timed_out (gpointer user_data)
 {
-  WaitData *data = user_data;
-  data->timed_out = TRUE;
-  g_main_loop_quit (data->loop);
+  gboolean *timed_out = user_data;
+  *timed_out = TRUE;
   return FALSE; /* remove the source */
 }
 
+static void
+wait_on_cancelled (GCancellable *cancellable,
+                   gpointer      user_data)
+{
+  UDisksDaemon *daemon = UDISKS_DAEMON (user_data);
+
+  /* take the lock so the wakeup can't get lost between a waiter checking
+   * the cancellable and starting to wait
+   */
+  g_mutex_lock (&daemon->objects_changed_lock);
+  g_cond_broadcast (&daemon->objects_changed_cond);
+  g_mutex_unlock (&daemon->objects_changed_lock);
+
+  g_main_context_wakeup (NULL);
+}
+
+static guint64
+get_objects_changed_serial (UDisksDaemon *daemon)
+{
+  guint64 ret;
+
+  g_mutex_lock (&daemon->objects_changed_lock);
+  ret = daemon->objects_changed_serial;
+  g_mutex_unlock (&daemon->objects_changed_lock);
+
+  return ret;
+}
+
+/* Blocks until objects changed since @serial was taken, @cancellable is
+ * cancelled or @end_time (monotonic) is reached. Returns %FALSE only in
+ * the last case.
+ */
 static gboolean
-wait_on_recheck (gpointer user_data)
+wait_for_objects_changed (UDisksDaemon *daemon,
+                          guint64       serial,
+                          gint64        end_time,
+                          GCancellable *cancellable)
 {
-  WaitData *data = user_data;
-  g_main_loop_quit (data->loop);
-  return FALSE; /* remove the source */
+  gboolean timed_out = FALSE;
+
+  if (g_main_context_is_owner (g_main_context_default ()))
+    {
+      GSource *source;
+      gint64 remaining;
+
+      /* We are in the main thread - objects are added and updated from
+       * here so blocking would just deadlock until the timeout. Keep
+       * dispatching events instead.
+       */
+      remaining = MAX (end_time - g_get_monotonic_time (), 0);
+      source = g_timeout_source_new (remaining / 1000);
+      g_source_set_priority (source, G_PRIORITY_DEFAULT);
+      g_source_set_callback (source, wait_on_timed_out, &timed_out, NULL);
+      g_source_attach (source, NULL);
+
+      while (!timed_out
+             && get_objects_changed_serial (daemon) == serial
+             && !g_cancellable_is_cancelled (cancellable))
+        g_main_context_iteration (NULL, TRUE);
+
+      g_source_destroy (source);
+      g_source_unref (source);
+    }
+  else
+    {
+      g_mutex_lock (&daemon->objects_changed_lock);
+      while (daemon->objects_changed_serial == serial
+             && !g_cancellable_is_cancelled (cancellable))
+        {
+          if (!g_cond_wait_until (&daemon->objects_changed_cond,
+                                  &daemon->objects_changed_lock,
+                                  end_time))
+            {
+              timed_out = daemon->objects_changed_serial == serial;
+              break;
+            }
+        }
+      g_mutex_unlock (&daemon->objects_changed_lock);
+    }
+
+  return !timed_out;
 }
 
 static gpointer wait_for_objects (UDisksDaemon                *daemon,
@@ -1228,88 +2087,91 @@ static gpointer wait_for_objects (UDisksDaemon                *daemon,
                                   gpointer                     user_data,
                                   GDestroyNotify               user_data_free_func,
                                   guint                        timeout_seconds,
+                                  GCancellable                *cancellable,
                                   GError                     **error)
 {
   gpointer ret;
-  WaitData data;
-
-  /* TODO: support GCancellable */
+  gint64 end_time;
+  guint64 serial;
+  gulong cancelled_id = 0;
 
   g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
   g_return_val_if_fail (wait_func != NULL, NULL);
-
-  ret = NULL;
-
-  memset (&data, '\0', sizeof (data));
-  data.context = NULL;
-  data.loop = NULL;
+  g_return_val_if_fail (cancellable == NULL || G_IS_CANCELLABLE (cancellable), NULL);
 
   g_object_ref (daemon);
 
- again:
-  ret = wait_func (daemon, user_data);
+  end_time = g_get_monotonic_time () + timeout_seconds * G_TIME_SPAN_SECOND;
+  if (cancellable != NULL && timeout_seconds > 0)
+    cancelled_id = g_cancellable_connect (cancellable,
+                                          G_CALLBACK (wait_on_cancelled),
+                                          daemon,
+                                          NULL);
 
-  if (ret == NULL && timeout_seconds > 0)
+  while (TRUE)
     {
-      GSource *source;
-
-      /* sit and wait for up to @timeout_seconds if the object isn't there already */
-      if (data.context == NULL)
-        {
-          /* TODO: this will deadlock if we are calling from the main thread... */
-          data.context = g_main_context_new ();
-          data.loop = g_main_loop_new (data.context, FALSE);
-
-          source = g_timeout_source_new_seconds (timeout_seconds);
-          g_source_set_priority (source, G_PRIORITY_DEFAULT);
-          g_source_set_callback (source, wait_on_timed_out, &data, NULL);
-          g_source_attach (source, data.context);
-          g_source_unref (source);
-        }
+      /* take the serial first so no change between the check and the wait is missed */
+      serial = get_objects_changed_serial (daemon);
 
-      /* TODO: do something a bit more elegant than checking every 250ms ... it's
-       *       probably going to involve having each UDisksProvider emit a "changed"
-       *       signal when it's time to recheck... for now this works.
-       */
-      source = g_timeout_source_new (250);
-      g_source_set_priority (source, G_PRIORITY_DEFAULT);
-      g_source_set_callback (source, wait_on_recheck, &data, NULL);
-      g_source_attach (source, data.context);
-      g_source_unref (source);
+      ret = wait_func (daemon, user_data);
+      if (ret != NULL || timeout_seconds == 0)
+        break;
 
-      g_main_loop_run (data.loop);
+      /* sit and wait for up to @timeout_seconds if the object isn't there already */
+      if (g_cancellable_set_error_if_cancelled (cancellable, error))
+        break;
 
-      if (data.timed_out)
+      if (!wait_for_objects_changed (daemon, serial, end_time, cancellable))
         {
           g_set_error (error,
                        UDISKS_ERROR, UDISKS_ERROR_FAILED,
                        "Timed out waiting for object");
-        }
-      else
-        {
-          goto again;
+          break;
         }
     }
 
+  if (cancelled_id != 0)
+    g_cancellable_disconnect (cancellable, cancelled_id);
+
   if (user_data_free_func != NULL)
     user_data_free_func (user_data);
 
   g_object_unref (daemon);
 
-  if (data.loop != NULL)
-    g_main_loop_unref (data.loop);
-  if (data.context != NULL)
-    g_main_context_unref (data.context);
-
   return ret;
 }
 
+/**
+ * udisks_daemon_wait_for_object_sync:
+ * @daemon: A #UDisksDaemon.
+ * @wait_func: Function to check for desired object.
+ * @user_data: User data to pass to @wait_func.
+ * @user_data_free_func: (allow-none): Function to free @user_data or %NULL.
+ * @timeout_seconds: Maximum time to wait for the object (in seconds) or 0 to never wait.
+ * @cancellable: (allow-none): A #GCancellable or %NULL.
+ * @error: (allow-none): Return location for error or %NULL.
+ *
+ * Blocks the calling thread until an object picked by @wait_func is
+ * available, until @timeout_seconds has passed (in which case the
+ * function fails with %UDISKS_ERROR_FAILED) or until @cancellable is
+ * cancelled (in which case the function fails with
+ * %G_IO_ERROR_CANCELLED).
+ *
+ * Note that @wait_func is only called again after objects were added,
+ * removed or updated - for example if there is a device event.
+ *
+ * If called from the main thread, the default main context is iterated
+ * while waiting.
+ *
+ * Returns: (transfer full): The object picked by @wait_func or %NULL if @error is set.
+ */
 UDisksObject *
 udisks_daemon_wait_for_object_sync (UDisksDaemon               *daemon,
                                     UDisksDaemonWaitFuncObject  wait_func,
                                     gpointer                    user_data,
                                     GDestroyNotify              user_data_free_func,
                                     guint                       timeout_seconds,
+                                    GCancellable               *cancellable,
                                     GError                      **error)
 {
   return (UDisksObject *) wait_for_objects (daemon,
@@ -1317,15 +2179,32 @@ udisks_daemon_wait_for_object_sync (UDisksDaemon               *daemon,
                                             user_data,
                                             user_data_free_func,
                                             timeout_seconds,
+                                            cancellable,
                                             error);
 }
 
+/**
+ * udisks_daemon_wait_for_objects_sync:
+ * @daemon: A #UDisksDaemon.
+ * @wait_func: Function to check for desired objects.
+ * @user_data: User data to pass to @wait_func.
+ * @user_data_free_func: (allow-none): Function to free @user_data or %NULL.
+ * @timeout_seconds: Maximum time to wait for the objects (in seconds) or 0 to never wait.
+ * @cancellable: (allow-none): A #GCancellable or %NULL.
+ * @error: (allow-none): Return location for error or %NULL.
+ *
+ * Like udisks_daemon_wait_for_object_sync() but for @wait_func
+ * returning a %NULL-terminated array of objects.
+ *
+ * Returns: (transfer full): The objects picked by @wait_func or %NULL if @error is set.
+ */
 UDisksObject **
 udisks_daemon_wait_for_objects_sync (UDisksDaemon                 *daemon,
                                      UDisksDaemonWaitFuncObjects   wait_func,
                                      gpointer                      user_data,
                                      GDestroyNotify                user_data_free_func,
                                      guint                         timeout_seconds,
+                                     GCancellable                 *cancellable,
                                      GError                      **error)
 {
   return (UDisksObject **) wait_for_objects (daemon,
@@ -1333,11 +2212,167 @@ udisks_daemon_wait_for_objects_sync (UDisksDaemon                 *daemon,
                                              user_data,
                                              user_data_free_func,
                                              timeout_seconds,
+                                             cancellable,
                                              error);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* called with index_lock held */
+static void
+index_remove_if_object (GHashTable    *table,
+                        gconstpointer  key,
+                        UDisksObject  *object)
+{
+  /* only drop the entry if it still points to @object - the key may have
+   * been taken over by a newer object in the meantime
+   */
+  if (key != NULL && g_hash_table_lookup (table, key) == (gpointer) object)
+    g_hash_table_remove (table, key);
+}
+
+/* called with index_lock held */
+static void
+block_index_remove (UDisksDaemon *daemon,
+                    UDisksObject *object)
+{
+  BlockIndexKeys *keys;
+  guint n;
+
+  keys = g_hash_table_lookup (daemon->block_index_keys, object);
+  if (keys == NULL)
+    return;
+
+  index_remove_if_object (daemon->block_by_dev, &keys->dev, object);
+  index_remove_if_object (daemon->block_by_device_file, keys->device_file, object);
+  for (n = 0; keys->symlinks != NULL && keys->symlinks[n] != NULL; n++)
+    index_remove_if_object (daemon->block_by_symlink, keys->symlinks[n], object);
+  index_remove_if_object (daemon->block_by_sysfs_path, keys->sysfs_path, object);
+
+  g_hash_table_remove (daemon->block_index_keys, object);
+}
+
+/**
+ * udisks_daemon_index_block_object:
+ * @daemon: A #UDisksDaemon.
+ * @object: A #UDisksLinuxBlockObject.
+ *
+ * Adds @object to the lookup indexes used by udisks_daemon_find_block(),
+ * udisks_daemon_find_block_by_device_file() and
+ * udisks_daemon_find_block_by_sysfs_path() or refreshes its entries if
+ * @object is already indexed.
+ *
+ * This is used by the #UDisksLinuxProvider when exporting @object and
+ * whenever it receives a uevent for it.
+ */
+void
+udisks_daemon_index_block_object (UDisksDaemon           *daemon,
+                                  UDisksLinuxBlockObject *object)
+{
+  UDisksLinuxDevice *device;
+  BlockIndexKeys *keys;
+  const gchar * const *symlinks;
+  gint64 *dev_key;
+  guint n;
+
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (UDISKS_IS_LINUX_BLOCK_OBJECT (object));
+
+  device = udisks_linux_block_object_get_device (object);
+  if (device == NULL)
+    return;
+
+  keys = g_slice_new0 (BlockIndexKeys);
+  keys->dev = g_udev_device_get_device_number (device->udev_device);
+  keys->device_file = g_strdup (g_udev_device_get_device_file (device->udev_device));
+  symlinks = g_udev_device_get_device_file_symlinks (device->udev_device);
+  keys->symlinks = g_strdupv ((gchar **) symlinks);
+  keys->sysfs_path = g_strdup (g_udev_device_get_sysfs_path (device->udev_device));
+  g_object_unref (device);
+
+  g_mutex_lock (&daemon->index_lock);
+
+  block_index_remove (daemon, UDISKS_OBJECT (object));
+
+  dev_key = g_new (gint64, 1);
+  *dev_key = keys->dev;
+  g_hash_table_insert (daemon->block_by_dev, dev_key, g_object_ref (object));
+  if (keys->device_file != NULL)
+    g_hash_table_insert (daemon->block_by_device_file, g_strdup (keys->device_file), g_object_ref (object));
+  for (n = 0; keys->symlinks != NULL && keys->symlinks[n] != NULL; n++)
+    g_hash_table_insert (daemon->block_by_symlink, g_strdup (keys->symlinks[n]), g_object_ref (object));
+  if (keys->sysfs_path != NULL)
+    g_hash_table_insert (daemon->block_by_sysfs_path, g_strdup (keys->sysfs_path), g_object_ref (object));
+  g_hash_table_insert (daemon->block_index_keys, object, keys);
+
+  g_mutex_unlock (&daemon->index_lock);
+}
+
+/**
+ * udisks_daemon_unindex_block_object:
+ * @daemon: A #UDisksDaemon.
+ * @object: A #UDisksLinuxBlockObject.
+ *
+ * Removes @object from the block lookup indexes. This is used by the
+ * #UDisksLinuxProvider when unexporting @object.
+ */
+void
+udisks_daemon_unindex_block_object (UDisksDaemon           *daemon,
+                                    UDisksLinuxBlockObject *object)
+{
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (UDISKS_IS_LINUX_BLOCK_OBJECT (object));
+
+  g_mutex_lock (&daemon->index_lock);
+  block_index_remove (daemon, UDISKS_OBJECT (object));
+  g_mutex_unlock (&daemon->index_lock);
+}
+
+/**
+ * udisks_daemon_index_drive_device:
+ * @daemon: A #UDisksDaemon.
+ * @sysfs_path: The sysfs path of a device belonging to @object.
+ * @object: (allow-none): A #UDisksLinuxDriveObject or %NULL.
+ *
+ * Records that the block device at @sysfs_path belongs to the drive
+ * @object or, if @object is %NULL, forgets about @sysfs_path. This is
+ * used by the #UDisksLinuxProvider to keep the index used by
+ * udisks_daemon_find_drive_by_sysfs_path() up to date.
+ */
+void
+udisks_daemon_index_drive_device (UDisksDaemon           *daemon,
+                                  const gchar            *sysfs_path,
+                                  UDisksLinuxDriveObject *object)
+{
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (sysfs_path != NULL);
+  g_return_if_fail (object == NULL || UDISKS_IS_LINUX_DRIVE_OBJECT (object));
+
+  g_mutex_lock (&daemon->index_lock);
+  if (object != NULL)
+    g_hash_table_insert (daemon->drive_by_sysfs_path, g_strdup (sysfs_path), g_object_ref (object));
+  else
+    g_hash_table_remove (daemon->drive_by_sysfs_path, sysfs_path);
+  g_mutex_unlock (&daemon->index_lock);
+}
+
+/* called without index_lock held */
+static UDisksObject *
+index_lookup (UDisksDaemon  *daemon,
+              GHashTable    *table,
+              gconstpointer  key)
+{
+  UDisksObject *ret;
+
+  g_mutex_lock (&daemon->index_lock);
+  ret = g_hash_table_lookup (table, key);
+  if (ret != NULL)
+    g_object_ref (ret);
+  g_mutex_unlock (&daemon->index_lock);
+
+  return ret;
+}
+
 /**
  * udisks_daemon_find_block:
  * @daemon: A #UDisksDaemon.
@@ -1351,28 +2386,10 @@ UDisksObject *
 udisks_daemon_find_block (UDisksDaemon *daemon,
                           dev_t         block_device_number)
 {
-  UDisksObject *ret = NULL;
-  GList *objects, *l;
+  gint64 dev = block_device_number;
 
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (daemon->object_manager));
-  for (l = objects; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
-
-      block = udisks_object_peek_block (object);
-      if (block == NULL)
-        continue;
-
-      if (udisks_block_get_device_number (block) == block_device_number)
-        {
-          ret = g_object_ref (object);
-          goto out;
-        }
-    }
- out:
-  g_list_free_full (objects, g_object_unref);
-  return ret;
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+  return index_lookup (daemon, daemon->block_by_dev, &dev);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -1380,9 +2397,11 @@ udisks_daemon_find_block (UDisksDaemon *daemon,
 /**
  * udisks_daemon_find_block_by_device_file:
  * @daemon: A #UDisksDaemon.
- * @device_file: A device file.
+ * @device_file: A device file or a symlink to it.
  *
- * Finds a block device with device file given by @device_file.
+ * Finds a block device with device file given by @device_file. Device
+ * file symlinks (such as <filename>/dev/disk/by-uuid/…</filename>) known
+ * to udev are also recognized.
  *
  * Returns: (transfer full): A #UDisksObject or %NULL if not found. Free with g_object_unref().
  */
@@ -1390,27 +2409,16 @@ UDisksObject *
 udisks_daemon_find_block_by_device_file (UDisksDaemon *daemon,
                                          const gchar  *device_file)
 {
-  UDisksObject *ret = NULL;
-  GList *objects, *l;
+  UDisksObject *ret;
 
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (daemon->object_manager));
-  for (l = objects; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
 
-      block = udisks_object_peek_block (object);
-      if (block == NULL)
-        continue;
+  if (device_file == NULL)
+    return NULL;
 
-      if (g_strcmp0 (udisks_block_get_device (block), device_file) == 0)
-        {
-          ret = g_object_ref (object);
-          goto out;
-        }
-    }
- out:
-  g_list_free_full (objects, g_object_unref);
+  ret = index_lookup (daemon, daemon->block_by_device_file, device_file);
+  if (ret == NULL)
+    ret = index_lookup (daemon, daemon->block_by_symlink, device_file);
   return ret;
 }
 
@@ -1429,33 +2437,35 @@ UDisksObject *
 udisks_daemon_find_block_by_sysfs_path (UDisksDaemon *daemon,
                                         const gchar  *sysfs_path)
 {
-  UDisksObject *ret = NULL;
-  GList *objects, *l;
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
 
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (daemon->object_manager));
-  for (l = objects; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksLinuxDevice *device;
+  if (sysfs_path == NULL)
+    return NULL;
 
-      if (!UDISKS_IS_LINUX_BLOCK_OBJECT (object))
-        continue;
+  return index_lookup (daemon, daemon->block_by_sysfs_path, sysfs_path);
+}
 
-      device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (object));
-      if (device == NULL)
-        continue;
+/* ---------------------------------------------------------------------------------------------------- */
 
-      if (g_strcmp0 (g_udev_device_get_sysfs_path (device->udev_device), sysfs_path) == 0)
-        {
-          g_object_unref (device);
-          ret = g_object_ref (object);
-          goto out;
-        }
-      g_object_unref (device);
-    }
- out:
-  g_list_free_full (objects, g_object_unref);
-  return ret;
+/**
+ * udisks_daemon_find_drive_by_sysfs_path:
+ * @daemon: A #UDisksDaemon.
+ * @sysfs_path: The sysfs path of a whole-disk block device.
+ *
+ * Finds the drive the block device at @sysfs_path belongs to.
+ *
+ * Returns: (transfer full): A #UDisksObject or %NULL if not found. Free with g_object_unref().
+ */
+UDisksObject *
+udisks_daemon_find_drive_by_sysfs_path (UDisksDaemon *daemon,
+                                        const gchar  *sysfs_path)
+{
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+
+  if (sysfs_path == NULL)
+    return NULL;
+
+  return index_lookup (daemon, daemon->drive_by_sysfs_path, sysfs_path);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -1669,3 +2679,402 @@ udisks_daemon_get_parent_for_tracking (UDisksDaemon  *daemon,
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
+
+static GVariant *
+get_startup_profile_unlocked (UDisksDaemon *daemon)
+{
+  GVariantBuilder builder;
+  guint n;
+
+  g_variant_builder_init (&builder, G_VARIANT_TYPE ("a(stt)"));
+  for (n = 0; n < daemon->startup_profile->len; n++)
+    {
+      StartupPhase *phase = g_ptr_array_index (daemon->startup_profile, n);
+      g_variant_builder_add (&builder, "(stt)", phase->name, (guint64) phase->start, (guint64) phase->duration);
+    }
+  return g_variant_builder_end (&builder);
+}
+
+/**
+ * udisks_daemon_add_startup_phase:
+ * @daemon: A #UDisksDaemon.
+ * @name: The name of the phase, e.g. <literal>coldplug</literal>.
+ * @start_time: The g_get_monotonic_time() the phase started at.
+ * @end_time: The g_get_monotonic_time() the phase ended at.
+ *
+ * Records how long a phase of the daemon startup took. The phase is
+ * logged and added to the #org.freedesktop.UDisks2.Manager:StartupProfile
+ * property.
+ *
+ * This can be called from any thread.
+ */
+void
+udisks_daemon_add_startup_phase (UDisksDaemon *daemon,
+                                 const gchar  *name,
+                                 gint64        start_time,
+                                 gint64        end_time)
+{
+  StartupPhase *phase;
+  UDisksObject *object;
+  UDisksManager *manager;
+  GVariant *profile;
+
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (name != NULL);
+
+  phase = g_slice_new0 (StartupPhase);
+  phase->name = g_strdup (name);
+  phase->start = MAX (start_time - daemon->startup_time, 0);
+  phase->duration = MAX (end_time - start_time, 0);
+
+  udisks_info ("Startup phase %s took %.3f seconds (started %.3f seconds after daemon start)",
+               phase->name,
+               phase->duration / ((gdouble) G_USEC_PER_SEC),
+               phase->start / ((gdouble) G_USEC_PER_SEC));
+
+  g_mutex_lock (&daemon->startup_profile_lock);
+  g_ptr_array_add (daemon->startup_profile, phase);
+  profile = g_variant_ref_sink (get_startup_profile_unlocked (daemon));
+  g_mutex_unlock (&daemon->startup_profile_lock);
+
+  /* the manager is created with the phases recorded before it was exported */
+  object = NULL;
+  if (daemon->object_manager != NULL)
+    object = udisks_daemon_find_object (daemon, "/org/freedesktop/UDisks2/Manager");
+  if (object != NULL)
+    {
+      manager = udisks_object_peek_manager (object);
+      if (manager != NULL)
+        udisks_manager_set_startup_profile (manager, profile);
+      g_object_unref (object);
+    }
+  g_variant_unref (profile);
+}
+
+/**
+ * udisks_daemon_get_startup_profile:
+ * @daemon: A #UDisksDaemon.
+ *
+ * Gets the startup phases recorded with udisks_daemon_add_startup_phase()
+ * so far as an array of (name, start, duration) tuples, in microseconds
+ * with start relative to the creation of @daemon.
+ *
+ * Returns: (transfer floating): A #GVariant of type <literal>a(stt)</literal>.
+ */
+GVariant *
+udisks_daemon_get_startup_profile (UDisksDaemon *daemon)
+{
+  GVariant *ret;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+
+  g_mutex_lock (&daemon->startup_profile_lock);
+  ret = get_startup_profile_unlocked (daemon);
+  g_mutex_unlock (&daemon->startup_profile_lock);
+
+  return ret;
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
+/* must be called with @callers_lock held */
+static CallerEntry *
+get_caller_entry_unlocked (UDisksDaemon *daemon,
+                           const gchar  *sender,
+                           gboolean      create)
+{
+  CallerEntry *entry;
+
+  entry = g_hash_table_lookup (daemon->callers, sender);
+  if (entry == NULL && create)
+    {
+      if (g_hash_table_size (daemon->callers) >= MAX_CACHED_CALLERS)
+        g_hash_table_remove_all (daemon->callers);
+
+      entry = g_slice_new0 (CallerEntry);
+      entry->authorizations = g_hash_table_new_full (g_str_hash,
+                                                     g_str_equal,
+                                                     g_free,
+                                                     (GDestroyNotify) authorization_entry_free);
+      g_hash_table_insert (daemon->callers, g_strdup (sender), entry);
+    }
+
+  return entry;
+}
+
+/**
+ * udisks_daemon_get_cached_caller_uid:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @out_uid: (out): Return location for the user id.
+ *
+ * Looks up the user id of @sender stored with
+ * udisks_daemon_cache_caller_uid().
+ *
+ * This can be called from any thread.
+ *
+ * Returns: %TRUE if the user id of @sender is known, %FALSE otherwise.
+ */
+gboolean
+udisks_daemon_get_cached_caller_uid (UDisksDaemon *daemon,
+                                     const gchar  *sender,
+                                     uid_t        *out_uid)
+{
+  CallerEntry *entry;
+  gboolean ret = FALSE;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), FALSE);
+
+  if (sender == NULL)
+    return FALSE;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, FALSE);
+  if (entry != NULL && entry->have_uid)
+    {
+      *out_uid = entry->uid;
+      ret = TRUE;
+    }
+  g_mutex_unlock (&daemon->callers_lock);
+
+  return ret;
+}
+
+/**
+ * udisks_daemon_cache_caller_uid:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @uid: The user id of @sender.
+ *
+ * Remembers the user id of @sender until it disconnects from the bus.
+ *
+ * This can be called from any thread.
+ */
+void
+udisks_daemon_cache_caller_uid (UDisksDaemon *daemon,
+                                const gchar  *sender,
+                                uid_t         uid)
+{
+  CallerEntry *entry;
+
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+
+  if (sender == NULL || sender[0] != ':')
+    return;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, TRUE);
+  entry->uid = uid;
+  entry->have_uid = TRUE;
+  g_mutex_unlock (&daemon->callers_lock);
+}
+
+/**
+ * udisks_daemon_get_cached_caller_pid:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @out_pid: (out): Return location for the process id.
+ *
+ * Looks up the process id of @sender stored with
+ * udisks_daemon_cache_caller_pid().
+ *
+ * This can be called from any thread.
+ *
+ * Returns: %TRUE if the process id of @sender is known, %FALSE otherwise.
+ */
+gboolean
+udisks_daemon_get_cached_caller_pid (UDisksDaemon *daemon,
+                                     const gchar  *sender,
+                                     pid_t        *out_pid)
+{
+  CallerEntry *entry;
+  gboolean ret = FALSE;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), FALSE);
+
+  if (sender == NULL)
+    return FALSE;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, FALSE);
+  if (entry != NULL && entry->have_pid)
+    {
+      *out_pid = entry->pid;
+      ret = TRUE;
+    }
+  g_mutex_unlock (&daemon->callers_lock);
+
+  return ret;
+}
+
+/**
+ * udisks_daemon_cache_caller_pid:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @pid: The process id of @sender.
+ *
+ * Remembers the process id of @sender until it disconnects from the bus.
+ *
+ * This can be called from any thread.
+ */
+void
+udisks_daemon_cache_caller_pid (UDisksDaemon *daemon,
+                                const gchar  *sender,
+                                pid_t         pid)
+{
+  CallerEntry *entry;
+
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+
+  if (sender == NULL || sender[0] != ':')
+    return;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, TRUE);
+  entry->pid = pid;
+  entry->have_pid = TRUE;
+  g_mutex_unlock (&daemon->callers_lock);
+}
+
+/**
+ * udisks_daemon_get_cached_authorization:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @action_id: The polkit action id.
+ * @cache_key: The key the decision was stored with, covering @action_id and the details of the check.
+ * @out_is_authorized: (out): Return location for the decision.
+ *
+ * Looks up a still valid authorization decision stored with
+ * udisks_daemon_cache_authorization() and updates the hit and miss
+ * counters of @action_id, see udisks_daemon_get_authorization_stats().
+ *
+ * This can be called from any thread.
+ *
+ * Returns: %TRUE if a decision was found, %FALSE otherwise.
+ */
+gboolean
+udisks_daemon_get_cached_authorization (UDisksDaemon *daemon,
+                                        const gchar  *sender,
+                                        const gchar  *action_id,
+                                        const gchar  *cache_key,
+                                        gboolean     *out_is_authorized)
+{
+  CallerEntry *entry;
+  AuthorizationEntry *auth_entry = NULL;
+  AuthorizationStats *stats;
+  gboolean ret = FALSE;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), FALSE);
+  g_return_val_if_fail (action_id != NULL && cache_key != NULL, FALSE);
+
+  if (sender == NULL)
+    return FALSE;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, FALSE);
+  if (entry != NULL)
+    auth_entry = g_hash_table_lookup (entry->authorizations, cache_key);
+  if (auth_entry != NULL)
+    {
+      if (auth_entry->expire_time > g_get_monotonic_time ())
+        {
+          *out_is_authorized = auth_entry->is_authorized;
+          ret = TRUE;
+        }
+      else
+        g_hash_table_remove (entry->authorizations, cache_key);
+    }
+
+  stats = g_hash_table_lookup (daemon->authorization_stats, action_id);
+  if (stats == NULL)
+    {
+      stats = g_slice_new0 (AuthorizationStats);
+      g_hash_table_insert (daemon->authorization_stats, g_strdup (action_id), stats);
+    }
+  if (ret)
+    stats->hits++;
+  else
+    stats->misses++;
+
+  udisks_debug ("%s cached authorization for %s of %s (%" G_GUINT64_FORMAT " hits, %" G_GUINT64_FORMAT " misses)",
+                ret ? "Using" : "No", action_id, sender, stats->hits, stats->misses);
+  g_mutex_unlock (&daemon->callers_lock);
+
+  return ret;
+}
+
+/**
+ * udisks_daemon_cache_authorization:
+ * @daemon: A #UDisksDaemon.
+ * @sender: The unique bus name of the caller.
+ * @cache_key: The key to store the decision with.
+ * @is_authorized: The decision.
+ *
+ * Remembers an authorization decision for the number of seconds
+ * configured with the <literal>authorization_cache_ttl</literal>
+ * option or until @sender disconnects from the bus or the polkit
+ * configuration changes, whatever happens first.
+ *
+ * This can be called from any thread.
+ */
+void
+udisks_daemon_cache_authorization (UDisksDaemon *daemon,
+                                   const gchar  *sender,
+                                   const gchar  *cache_key,
+                                   gboolean      is_authorized)
+{
+  CallerEntry *entry;
+  AuthorizationEntry *auth_entry;
+  gint ttl;
+
+  g_return_if_fail (UDISKS_IS_DAEMON (daemon));
+  g_return_if_fail (cache_key != NULL);
+
+  if (sender == NULL || sender[0] != ':')
+    return;
+
+  ttl = udisks_config_manager_get_authorization_cache_ttl (daemon->config_manager);
+  if (ttl <= 0)
+    return;
+
+  auth_entry = g_slice_new0 (AuthorizationEntry);
+  auth_entry->is_authorized = is_authorized;
+  auth_entry->expire_time = g_get_monotonic_time () + ttl * G_USEC_PER_SEC;
+
+  g_mutex_lock (&daemon->callers_lock);
+  entry = get_caller_entry_unlocked (daemon, sender, TRUE);
+  g_hash_table_replace (entry->authorizations, g_strdup (cache_key), auth_entry);
+  g_mutex_unlock (&daemon->callers_lock);
+}
+
+/**
+ * udisks_daemon_get_authorization_stats:
+ * @daemon: A #UDisksDaemon.
+ *
+ * Gets the number of authorization checks answered from the cache
+ * (hits) and passed to polkit (misses) for each action id. The totals
+ * are logged periodically by the housekeeping.
+ *
+ * Returns: (transfer floating): A #GVariant of type <literal>a{s(tt)}</literal>.
+ */
+GVariant *
+udisks_daemon_get_authorization_stats (UDisksDaemon *daemon)
+{
+  GVariantBuilder builder;
+  GHashTableIter iter;
+  gpointer key, value;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+
+  g_variant_builder_init (&builder, G_VARIANT_TYPE ("a{s(tt)}"));
+  g_mutex_lock (&daemon->callers_lock);
+  g_hash_table_iter_init (&iter, daemon->authorization_stats);
+  while (g_hash_table_iter_next (&iter, &key, &value))
+    {
+      AuthorizationStats *stats = value;
+      g_variant_builder_add (&builder, "{s(tt)}", (const gchar *) key, stats->hits, stats->misses);
+    }
+  g_mutex_unlock (&daemon->callers_lock);
+
+  return g_variant_builder_end (&builder);
+}
@@ -69,6 +69,7 @@ UDisksObject             *udisks_daemon_wait_for_object_sync  (UDisksDaemon
                                                                gpointer                   user_data,
                                                                GDestroyNotify             user_data_free_func,
                                                                guint                      timeout_seconds,
+                                                               GCancellable              *cancellable,
                                                                GError                   **error);
 
 UDisksObject             **udisks_daemon_wait_for_objects_sync  (UDisksDaemon                *daemon,
@@ -76,6 +77,7 @@ UDisksObject             **udisks_daemon_wait_for_objects_sync  (UDisksDaemon
                                                                  gpointer                     user_data,
                                                                  GDestroyNotify               user_data_free_func,
                                                                  guint                        timeout_seconds,
+                                                                 GCancellable                *cancellable,
                                                                  GError                       **error);
 
 GList                    *udisks_daemon_get_objects           (UDisksDaemon         *daemon);
@@ -89,9 +91,20 @@ UDisksObject             *udisks_daemon_find_block_by_device_file (UDisksDaemon
 UDisksObject             *udisks_daemon_find_block_by_sysfs_path (UDisksDaemon *daemon,
                                                                   const gchar  *sysfs_path);
 
+UDisksObject             *udisks_daemon_find_drive_by_sysfs_path (UDisksDaemon *daemon,
+                                                                  const gchar  *sysfs_path);
+
 UDisksObject             *udisks_daemon_find_object           (UDisksDaemon         *daemon,
                                                                const gchar          *object_path);
 
+void                      udisks_daemon_index_block_object    (UDisksDaemon           *daemon,
+                                                               UDisksLinuxBlockObject *object);
+void                      udisks_daemon_unindex_block_object  (UDisksDaemon           *daemon,
+                                                               UDisksLinuxBlockObject *object);
+void                      udisks_daemon_index_drive_device    (UDisksDaemon           *daemon,
+                                                               const gchar            *sysfs_path,
+                                                               UDisksLinuxDriveObject *object);
+
 UDisksBaseJob            *udisks_daemon_launch_simple_job     (UDisksDaemon    *daemon,
                                                                UDisksObject    *object,
                                                                const gchar     *job_operation,
@@ -160,6 +173,51 @@ gboolean                 udisks_daemon_launch_threaded_job_sync (UDisksDaemon
                                                                  GCancellable          *cancellable,
                                                                  GError               **error);
 
+/**
+ * UDisksJobStartFunc:
+ * @job: The #UDisksBaseJob to start.
+ *
+ * Type for the function used by udisks_daemon_start_job() to actually
+ * start a job.
+ */
+typedef void (*UDisksJobStartFunc) (UDisksBaseJob *job);
+
+void                      udisks_daemon_start_job             (UDisksDaemon          *daemon,
+                                                               UDisksBaseJob         *job,
+                                                               UDisksJobStartFunc     start_func);
+gboolean                  udisks_daemon_start_job_sync        (UDisksDaemon          *daemon,
+                                                               UDisksBaseJob         *job,
+                                                               GError               **error);
+
+void                      udisks_daemon_add_startup_phase     (UDisksDaemon    *daemon,
+                                                               const gchar     *name,
+                                                               gint64           start_time,
+                                                               gint64           end_time);
+GVariant                 *udisks_daemon_get_startup_profile   (UDisksDaemon    *daemon);
+
+gboolean                  udisks_daemon_get_cached_caller_uid (UDisksDaemon    *daemon,
+                                                               const gchar     *sender,
+                                                               uid_t           *out_uid);
+void                      udisks_daemon_cache_caller_uid      (UDisksDaemon    *daemon,
+                                                               const gchar     *sender,
+                                                               uid_t            uid);
+gboolean                  udisks_daemon_get_cached_caller_pid (UDisksDaemon    *daemon,
+                                                               const gchar     *sender,
+                                                               pid_t           *out_pid);
+void                      udisks_daemon_cache_caller_pid      (UDisksDaemon    *daemon,
+                                                               const gchar     *sender,
+                                                               pid_t            pid);
+gboolean                  udisks_daemon_get_cached_authorization (UDisksDaemon *daemon,
+                                                                  const gchar  *sender,
+                                                                  const gchar  *action_id,
+                                                                  const gchar  *cache_key,
+                                                                  gboolean     *out_is_authorized);
+void                      udisks_daemon_cache_authorization   (UDisksDaemon    *daemon,
+                                                               const gchar     *sender,
+                                                               const gchar     *cache_key,
+                                                               gboolean         is_authorized);
+GVariant                 *udisks_daemon_get_authorization_stats (UDisksDaemon  *daemon);
+
 /* Return value and *uuid_ret must be freed with g_free.  If return
    value is NULL, *uuid has not been changed.
  */
@@ -554,6 +554,52 @@ _safe_polkit_details_insert_uint64 (PolkitDetails *details, const gchar *key, gu
   polkit_details_insert (details, key, buf);
 }
 
+static gint
+compare_strings (gconstpointer a,
+                 gconstpointer b)
+{
+  return g_strcmp0 (*((const gchar **) a), *((const gchar **) b));
+}
+
+/* Returns a key identifying the authorization check for @action_id by the
+ * caller of @invocation with @details or %NULL if the caller's uid is not
+ * known. Free with g_free().
+ */
+static gchar *
+get_authorization_cache_key (UDisksDaemon          *daemon,
+                             GDBusMethodInvocation *invocation,
+                             const gchar           *action_id,
+                             PolkitDetails         *details)
+{
+  GString *key;
+  gchar **detail_keys;
+  uid_t caller_uid;
+  guint n;
+
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon,
+                                               invocation,
+                                               NULL,         /* GCancellable* */
+                                               &caller_uid,
+                                               NULL,         /* gid_t *out_gid */
+                                               NULL,         /* gchar **out_user_name */
+                                               NULL))        /* GError** */
+    return NULL;
+
+  key = g_string_new (NULL);
+  g_string_append_printf (key, "%u\n%s", (guint) caller_uid, action_id);
+
+  detail_keys = polkit_details_get_keys (details);
+  if (detail_keys != NULL)
+    {
+      qsort (detail_keys, g_strv_length (detail_keys), sizeof (gchar *), compare_strings);
+      for (n = 0; detail_keys[n] != NULL; n++)
+        g_string_append_printf (key, "\n%s=%s", detail_keys[n], polkit_details_lookup (details, detail_keys[n]));
+      g_strfreev (detail_keys);
+    }
+
+  return g_string_free (key, FALSE);
+}
+
 static gboolean
 check_authorization_no_polkit (UDisksDaemon            *daemon,
                                UDisksObject            *object,
@@ -686,6 +732,10 @@ udisks_daemon_util_check_authorization_sync_with_error (UDisksDaemon           *
   gboolean auth_no_user_interaction = FALSE;
   const gchar *details_device = NULL;
   gchar *details_drive = NULL;
+  const gchar *sender = g_dbus_method_invocation_get_sender (invocation);
+  gchar *cache_key = NULL;
+  gboolean is_authorized = FALSE;
+  gboolean cacheable = FALSE;
 
   authority = udisks_daemon_get_authority (daemon);
   if (authority == NULL)
@@ -694,7 +744,7 @@ udisks_daemon_util_check_authorization_sync_with_error (UDisksDaemon           *
       goto out;
     }
 
-  subject = polkit_system_bus_name_new (g_dbus_method_invocation_get_sender (invocation));
+  subject = polkit_system_bus_name_new (sender);
   if (options != NULL)
     {
       g_variant_lookup (options,
@@ -826,14 +876,56 @@ udisks_daemon_util_check_authorization_sync_with_error (UDisksDaemon           *
   if (details_drive != NULL)
     polkit_details_insert (details, "drive", details_drive);
 
+  /* Decisions are cached per caller, see udisks_daemon_cache_authorization() */
+  cache_key = get_authorization_cache_key (daemon, invocation, action_id, details);
+  if (cache_key != NULL
+      && udisks_daemon_get_cached_authorization (daemon, sender, action_id, cache_key, &is_authorized))
+    {
+      if (is_authorized)
+        ret = TRUE;
+      else
+        g_set_error (error,
+                     UDISKS_ERROR,
+                     UDISKS_ERROR_NOT_AUTHORIZED,
+                     "Not authorized to perform operation");
+      goto out;
+    }
+
+  /* Check without user interaction first: if that's enough, the decision
+   * didn't involve any authentication and can be reused. If the caller
+   * has to authenticate, the decision can only be reused while polkit
+   * retains the authorization.
+   */
   sub_error = NULL;
   result = polkit_authority_check_authorization_sync (authority,
                                                       subject,
                                                       action_id,
                                                       details,
-                                                      flags,
+                                                      POLKIT_CHECK_AUTHORIZATION_FLAGS_NONE,
                                                       NULL, /* GCancellable* */
                                                       &sub_error);
+  if (result != NULL
+      && polkit_authorization_result_get_is_challenge (result)
+      && (flags & POLKIT_CHECK_AUTHORIZATION_FLAGS_ALLOW_USER_INTERACTION))
+    {
+      g_clear_object (&result);
+      result = polkit_authority_check_authorization_sync (authority,
+                                                          subject,
+                                                          action_id,
+                                                          details,
+                                                          flags,
+                                                          NULL, /* GCancellable* */
+                                                          &sub_error);
+      cacheable = result != NULL
+                  && polkit_authorization_result_get_is_authorized (result)
+                  && polkit_authorization_result_get_retains_authorization (result);
+    }
+  else if (result != NULL)
+    {
+      /* authenticating is not possible or not allowed (no interaction), a
+       * challenge may still be satisfied by authenticating elsewhere */
+      cacheable = !polkit_authorization_result_get_is_challenge (result);
+    }
   if (result == NULL)
     {
       if (sub_error->domain != POLKIT_ERROR)
@@ -877,6 +969,9 @@ udisks_daemon_util_check_authorization_sync_with_error (UDisksDaemon           *
   ret = TRUE;
 
  out:
+  if (cacheable && cache_key != NULL)
+    udisks_daemon_cache_authorization (daemon, sender, cache_key, ret);
+  g_free (cache_key);
   g_free (details_drive);
   g_clear_object (&block_object);
   g_clear_object (&drive_object);
@@ -972,16 +1067,19 @@ udisks_daemon_util_get_caller_uid_sync (UDisksDaemon            *daemon,
 {
   gboolean ret;
   uid_t uid;
-
-  /* TODO: cache this on @daemon */
+  const gchar *caller = g_dbus_method_invocation_get_sender (invocation);
 
   ret = FALSE;
 
-  if (!dbus_freedesktop_guint32_get (invocation, cancellable,
-                                     "GetConnectionUnixUser",
-                                     &uid, error))
+  if (!udisks_daemon_get_cached_caller_uid (daemon, caller, &uid))
     {
-      goto out;
+      if (!dbus_freedesktop_guint32_get (invocation, cancellable,
+                                         "GetConnectionUnixUser",
+                                         &uid, error))
+        {
+          goto out;
+        }
+      udisks_daemon_cache_caller_uid (daemon, caller, uid);
     }
 
   if (out_uid != NULL)
@@ -1044,15 +1142,28 @@ udisks_daemon_util_get_caller_pid_sync (UDisksDaemon            *daemon,
                                         pid_t                   *out_pid,
                                         GError                 **error)
 {
-  // "GetConnectionUnixProcessID"
+  const gchar *caller = g_dbus_method_invocation_get_sender (invocation);
+  pid_t pid;
+
+  if (udisks_daemon_get_cached_caller_pid (daemon, caller, &pid))
+    {
+      if (out_pid != NULL)
+        *out_pid = pid;
+      return TRUE;
+    }
 
-  /* TODO: cache this on @daemon */
   /* NOTE: pid_t is a signed 32 bit, but the
    * GetConnectionUnixProcessID dbus method returns an unsigned */
 
-  return dbus_freedesktop_guint32_get (invocation, cancellable,
-                                       "GetConnectionUnixProcessID",
-                                       (guint32*)(out_pid), error);
+  if (!dbus_freedesktop_guint32_get (invocation, cancellable,
+                                     "GetConnectionUnixProcessID",
+                                     (guint32*)(&pid), error))
+    return FALSE;
+
+  udisks_daemon_cache_caller_pid (daemon, caller, pid);
+  if (out_pid != NULL)
+    *out_pid = pid;
+  return TRUE;
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -59,6 +59,8 @@ struct _UDisksFstabMonitor
 
   gboolean have_data;
   GList *fstab_entries;
+  /* fsname (e.g. UUID=..., LABEL=... or /dev/...) -> GList of entries */
+  GHashTable *entries_by_fsname;
 
   GFileMonitor *file_monitor;
 };
@@ -101,6 +103,7 @@ udisks_fstab_monitor_finalize (GObject *object)
 
   g_list_foreach (monitor->fstab_entries, (GFunc) g_object_unref, NULL);
   g_list_free (monitor->fstab_entries);
+  g_hash_table_destroy (monitor->entries_by_fsname);
 
   if (G_OBJECT_CLASS (udisks_fstab_monitor_parent_class)->finalize != NULL)
     G_OBJECT_CLASS (udisks_fstab_monitor_parent_class)->finalize (object);
@@ -110,6 +113,10 @@ static void
 udisks_fstab_monitor_init (UDisksFstabMonitor *monitor)
 {
   monitor->fstab_entries = NULL;
+  monitor->entries_by_fsname = g_hash_table_new_full (g_str_hash,
+                                                      g_str_equal,
+                                                      g_free,
+                                                      (GDestroyNotify) g_list_free);
 }
 
 static void
@@ -321,6 +328,7 @@ udisks_fstab_monitor_invalidate (UDisksFstabMonitor *monitor)
 {
   monitor->have_data = FALSE;
 
+  g_hash_table_remove_all (monitor->entries_by_fsname);
   g_list_foreach (monitor->fstab_entries, (GFunc) g_object_unref, NULL);
   g_list_free (monitor->fstab_entries);
   monitor->fstab_entries = NULL;
@@ -350,6 +358,32 @@ have_entry (UDisksFstabMonitor *monitor,
   return ret;
 }
 
+static void
+index_entry (UDisksFstabMonitor *monitor,
+             UDisksFstabEntry   *entry)
+{
+  const gchar *fsname;
+  GList *entries;
+
+  fsname = udisks_fstab_entry_get_fsname (entry);
+  if (!(g_str_has_prefix (fsname, "UUID=") ||
+        g_str_has_prefix (fsname, "LABEL=") ||
+        g_str_has_prefix (fsname, "PARTUUID=") ||
+        g_str_has_prefix (fsname, "PARTLABEL=") ||
+        g_str_has_prefix (fsname, "/dev")))
+    {
+      /* ignore non-device entries */
+      return;
+    }
+
+  /* the list head only changes when the first entry is added */
+  entries = g_hash_table_lookup (monitor->entries_by_fsname, fsname);
+  if (entries == NULL)
+    g_hash_table_insert (monitor->entries_by_fsname, g_strdup (fsname), g_list_prepend (NULL, entry));
+  else
+    entries = g_list_append (entries, entry);
+}
+
 static void
 udisks_fstab_monitor_ensure (UDisksFstabMonitor *monitor)
 {
@@ -380,6 +414,7 @@ udisks_fstab_monitor_ensure (UDisksFstabMonitor *monitor)
       if (!have_entry (monitor, entry))
         {
           monitor->fstab_entries = g_list_prepend (monitor->fstab_entries, entry);
+          index_entry (monitor, entry);
         }
       else
         {
@@ -416,3 +451,31 @@ udisks_fstab_monitor_get_entries (UDisksFstabMonitor  *monitor)
   return ret;
 }
 
+/**
+ * udisks_fstab_monitor_get_entries_for_fsname:
+ * @monitor: A #UDisksFstabMonitor.
+ * @fsname: The device specification to look up, e.g. <literal>UUID=...</literal>, <literal>LABEL=...</literal> or a device file.
+ *
+ * Gets the /etc/fstab entries whose device field is exactly @fsname.
+ *
+ * This uses an index built when the file is (re)loaded so, unlike
+ * udisks_fstab_monitor_get_entries(), it is cheap enough to call for
+ * every block device update.
+ *
+ * Returns: (transfer full) (element-type UDisksFstabEntry): A list of #UDisksFstabEntry objects that must be freed with g_list_free() after each element has been freed with g_object_unref().
+ */
+GList *
+udisks_fstab_monitor_get_entries_for_fsname (UDisksFstabMonitor *monitor,
+                                             const gchar        *fsname)
+{
+  GList *ret;
+
+  g_return_val_if_fail (UDISKS_IS_FSTAB_MONITOR (monitor), NULL);
+  g_return_val_if_fail (fsname != NULL, NULL);
+
+  udisks_fstab_monitor_ensure (monitor);
+
+  ret = g_list_copy (g_hash_table_lookup (monitor->entries_by_fsname, fsname));
+  g_list_foreach (ret, (GFunc) g_object_ref, NULL);
+  return ret;
+}
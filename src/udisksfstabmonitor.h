@@ -32,6 +32,8 @@ G_BEGIN_DECLS
 GType                udisks_fstab_monitor_get_type    (void) G_GNUC_CONST;
 UDisksFstabMonitor  *udisks_fstab_monitor_new         (void);
 GList               *udisks_fstab_monitor_get_entries (UDisksFstabMonitor  *monitor);
+GList               *udisks_fstab_monitor_get_entries_for_fsname (UDisksFstabMonitor *monitor,
+                                                                  const gchar        *fsname);
 
 G_END_DECLS
 
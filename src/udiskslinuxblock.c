@@ -18,12 +18,13 @@
  *
  */
 
-#define _GNU_SOURCE /* for O_DIRECT */
+#define _GNU_SOURCE /* for O_DIRECT and sync_file_range() */
 
 #include "config.h"
 #include <glib/gi18n-lib.h>
 
 #include <sys/types.h>
+#include <sys/ioctl.h>
 #include <sys/mount.h>
 #include <sys/stat.h>
 #include <fcntl.h>
@@ -148,52 +149,32 @@ get_sysfs_attr (GUdevDevice *device,
 /* ---------------------------------------------------------------------------------------------------- */
 
 static gchar *
-find_block_device_by_sysfs_path (GDBusObjectManagerServer *object_manager,
-                                 const gchar              *sysfs_path)
+find_block_device_by_sysfs_path (UDisksDaemon *daemon,
+                                 const gchar  *sysfs_path)
 {
-  gchar *ret;
-  GList *objects;
-  GList *l;
-
-  ret = NULL;
+  UDisksObject *object;
+  gchar *ret = NULL;
 
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (object_manager));
-  for (l = objects; l != NULL; l = l->next)
+  object = udisks_daemon_find_block_by_sysfs_path (daemon, sysfs_path);
+  if (object != NULL)
     {
-      GDBusObjectSkeleton *object = G_DBUS_OBJECT_SKELETON (l->data);
-      UDisksLinuxDevice *device;
-
-      if (!UDISKS_IS_LINUX_BLOCK_OBJECT (object))
-        continue;
-
-      device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (object));
-      if (g_strcmp0 (sysfs_path, g_udev_device_get_sysfs_path (device->udev_device)) == 0)
-        {
-          ret = g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
-          g_object_unref (device);
-          goto out;
-        }
-      g_object_unref (device);
+      ret = g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+      g_object_unref (object);
     }
 
- out:
-  g_list_foreach (objects, (GFunc) g_object_unref, NULL);
-  g_list_free (objects);
   return ret;
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
 static gchar *
-find_drive (GDBusObjectManagerServer  *object_manager,
-            GUdevDevice               *block_device,
-            UDisksDrive              **out_drive)
+find_drive (UDisksDaemon  *daemon,
+            GUdevDevice   *block_device,
+            UDisksDrive  **out_drive)
 {
   GUdevDevice *whole_disk_block_device;
-  const gchar *whole_disk_block_device_sysfs_path;
+  UDisksObject *object;
   gchar *ret;
-  GList *objects;
-  GList *l;
 
   ret = NULL;
 
@@ -201,43 +182,23 @@ find_drive (GDBusObjectManagerServer  *object_manager,
     whole_disk_block_device = g_object_ref (block_device);
   else
     whole_disk_block_device = g_udev_device_get_parent_with_subsystem (block_device, "block", "disk");
-  whole_disk_block_device_sysfs_path = g_udev_device_get_sysfs_path (whole_disk_block_device);
-
-  objects = g_dbus_object_manager_get_objects (G_DBUS_OBJECT_MANAGER (object_manager));
-  for (l = objects; l != NULL; l = l->next)
-    {
-      GDBusObjectSkeleton *object = G_DBUS_OBJECT_SKELETON (l->data);
-      GList *drive_devices;
-      GList *j;
-
-      if (!UDISKS_IS_LINUX_DRIVE_OBJECT (object))
-        continue;
 
-      drive_devices = udisks_linux_drive_object_get_devices (UDISKS_LINUX_DRIVE_OBJECT (object));
-      for (j = drive_devices; j != NULL; j = j->next)
-        {
-          UDisksLinuxDevice *drive_device = UDISKS_LINUX_DEVICE (j->data);
-          const gchar *drive_sysfs_path;
+  if (whole_disk_block_device == NULL)
+    goto out;
 
-          drive_sysfs_path = g_udev_device_get_sysfs_path (drive_device->udev_device);
-          if (g_strcmp0 (whole_disk_block_device_sysfs_path, drive_sysfs_path) == 0)
-            {
-              if (out_drive != NULL)
-                *out_drive = udisks_object_get_drive (UDISKS_OBJECT (object));
-              ret = g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
-              g_list_foreach (drive_devices, (GFunc) g_object_unref, NULL);
-              g_list_free (drive_devices);
-              goto out;
-            }
-        }
-      g_list_foreach (drive_devices, (GFunc) g_object_unref, NULL);
-      g_list_free (drive_devices);
+  object = udisks_daemon_find_drive_by_sysfs_path (daemon,
+                                                   g_udev_device_get_sysfs_path (whole_disk_block_device));
+  if (object != NULL)
+    {
+      if (out_drive != NULL)
+        *out_drive = udisks_object_get_drive (object);
+      ret = g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+      g_object_unref (object);
     }
 
- out:
-  g_list_foreach (objects, (GFunc) g_object_unref, NULL);
-  g_list_free (objects);
   g_object_unref (whole_disk_block_device);
+
+ out:
   return ret;
 }
 
@@ -434,112 +395,79 @@ update_hints (UDisksLinuxBlock  *block,
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
-static void
-process_device_symlinks (const gchar      *device,
-                         UDisksLinuxBlock *block,
-                         gpointer          object,
-                         GList           **ret)
+/* Returns all the ways /etc/fstab and /etc/crypttab may refer to @block,
+ * e.g. /dev/sda1, /dev/disk/by-uuid/..., UUID=... or LABEL=...
+ *
+ * Free with g_strfreev().
+ */
+static gchar **
+get_device_specs (UDisksLinuxBlock *block,
+                  gboolean          include_partition_specs)
 {
+  GPtrArray *p;
   const gchar *const *symlinks;
+  const gchar *value;
   guint n;
 
-  if (g_strcmp0 (device, udisks_block_get_device (UDISKS_BLOCK (block))) == 0)
-    *ret = g_list_prepend (*ret, g_object_ref (object));
-  else
+  p = g_ptr_array_new ();
+
+  g_ptr_array_add (p, g_strdup (udisks_block_get_device (UDISKS_BLOCK (block))));
+  symlinks = udisks_block_get_symlinks (UDISKS_BLOCK (block));
+  if (symlinks != NULL)
+    for (n = 0; symlinks[n] != NULL; n++)
+      g_ptr_array_add (p, g_strdup (symlinks[n]));
+
+  value = udisks_block_get_id_uuid (UDISKS_BLOCK (block));
+  if (value != NULL && strlen (value) > 0)
+    g_ptr_array_add (p, g_strdup_printf ("UUID=%s", value));
+  value = udisks_block_get_id_label (UDISKS_BLOCK (block));
+  if (value != NULL && strlen (value) > 0)
+    g_ptr_array_add (p, g_strdup_printf ("LABEL=%s", value));
+
+  if (include_partition_specs)
     {
-      symlinks = udisks_block_get_symlinks (UDISKS_BLOCK (block));
-      if (symlinks != NULL)
-        for (n = 0; symlinks[n] != NULL; n++)
-          if (g_strcmp0 (device, symlinks[n]) == 0)
-            *ret = g_list_prepend (*ret, g_object_ref (object));
+      UDisksLinuxBlockObject *object;
+      UDisksLinuxDevice *device;
+
+      object = udisks_daemon_util_dup_object (block, NULL);
+      if (object != NULL)
+        {
+          device = udisks_linux_block_object_get_device (object);
+          if (device->udev_device != NULL)
+            {
+              value = g_udev_device_get_property (device->udev_device, "ID_PART_ENTRY_UUID");
+              if (value != NULL && strlen (value) > 0)
+                g_ptr_array_add (p, g_strdup_printf ("PARTUUID=%s", value));
+              value = g_udev_device_get_property (device->udev_device, "ID_PART_ENTRY_NAME");
+              if (value != NULL && strlen (value) > 0)
+                g_ptr_array_add (p, g_strdup_printf ("PARTLABEL=%s", value));
+            }
+          g_object_unref (device);
+          g_object_unref (object);
+        }
     }
+
+  g_ptr_array_add (p, NULL);
+  return (gchar **) g_ptr_array_free (p, FALSE);
 }
 
 static GList *
 find_fstab_entries_for_device (UDisksLinuxBlock *block,
                                UDisksDaemon     *daemon)
 {
-  GList *entries;
-  GList *l;
+  UDisksFstabMonitor *monitor;
+  gchar **specs;
   GList *ret;
+  guint n;
 
   ret = NULL;
 
-  /* if this is too slow, we could add lookup methods to UDisksFstabMonitor... */
-  entries = udisks_fstab_monitor_get_entries (udisks_daemon_get_fstab_monitor (daemon));
-  for (l = entries; l != NULL; l = l->next)
-    {
-      UDisksFstabEntry *entry = UDISKS_FSTAB_ENTRY (l->data);
-      const gchar *fsname;
-      const gchar *device = NULL;
-      const gchar *label = NULL;
-      const gchar *uuid = NULL;
-      const gchar *partuuid = NULL;
-      const gchar *partlabel = NULL;
-
-      fsname = udisks_fstab_entry_get_fsname (entry);
-      device = NULL;
-      if (g_str_has_prefix (fsname, "UUID="))
-        {
-          uuid = fsname + 5;
-        }
-      else if (g_str_has_prefix (fsname, "LABEL="))
-        {
-          label = fsname + 6;
-        }
-      else if (g_str_has_prefix (fsname, "PARTUUID="))
-        {
-          partuuid = fsname + 9;
-        }
-      else if (g_str_has_prefix (fsname, "PARTLABEL="))
-        {
-          partlabel = fsname + 10;
-        }
-      else if (g_str_has_prefix (fsname, "/dev"))
-        {
-          device = fsname;
-        }
-      else
-        {
-          /* ignore non-device entries */
-          goto continue_loop;
-        }
-
-      if (device != NULL)
-        {
-          process_device_symlinks (device, block, entry, &ret);
-        }
-      else if (label != NULL && g_strcmp0 (label, udisks_block_get_id_label (UDISKS_BLOCK (block))) == 0)
-        {
-          ret = g_list_prepend (ret, g_object_ref (entry));
-        }
-      else if (uuid != NULL && g_strcmp0 (uuid, udisks_block_get_id_uuid (UDISKS_BLOCK (block))) == 0)
-        {
-          ret = g_list_prepend (ret, g_object_ref (entry));
-        }
-      else if (partlabel != NULL || partuuid != NULL)
-        {
-          UDisksLinuxBlockObject *object;
-          GUdevDevice *u_dev = NULL;
-
-          object = udisks_daemon_util_dup_object (block, NULL);
-          if (object == NULL)
-            goto continue_loop;
-          u_dev = udisks_linux_block_object_get_device (object)->udev_device;
-          g_clear_object (&object);
-          if (u_dev == NULL)
-            goto continue_loop;
-          if ((partuuid != NULL && g_strcmp0 (partuuid, g_udev_device_get_property (u_dev, "ID_PART_ENTRY_UUID")) == 0) ||
-              (partlabel != NULL && g_strcmp0 (partlabel, g_udev_device_get_property (u_dev, "ID_PART_ENTRY_NAME")) == 0))
-            ret = g_list_prepend (ret, g_object_ref (entry));
-        }
-
-    continue_loop:
-      ;
-    }
+  monitor = udisks_daemon_get_fstab_monitor (daemon);
+  specs = get_device_specs (block, TRUE);
+  for (n = 0; specs[n] != NULL; n++)
+    ret = g_list_concat (ret, udisks_fstab_monitor_get_entries_for_fsname (monitor, specs[n]));
+  g_strfreev (specs);
 
-  g_list_foreach (entries, (GFunc) g_object_unref, NULL);
-  g_list_free (entries);
   return ret;
 }
 
@@ -547,60 +475,19 @@ static GList *
 find_crypttab_entries_for_device (UDisksLinuxBlock *block,
                                   UDisksDaemon     *daemon)
 {
-  GList *entries;
-  GList *l;
+  UDisksCrypttabMonitor *monitor;
+  gchar **specs;
   GList *ret;
+  guint n;
 
   ret = NULL;
 
-  /* if this is too slow, we could add lookup methods to UDisksCrypttabMonitor... */
-  entries = udisks_crypttab_monitor_get_entries (udisks_daemon_get_crypttab_monitor (daemon));
-  for (l = entries; l != NULL; l = l->next)
-    {
-      UDisksCrypttabEntry *entry = UDISKS_CRYPTTAB_ENTRY (l->data);
-      const gchar *device_in_entry;
-      const gchar *device = NULL;
-      const gchar *label = NULL;
-      const gchar *uuid = NULL;
-
-      device_in_entry = udisks_crypttab_entry_get_device (entry);
-      if (g_str_has_prefix (device_in_entry, "UUID="))
-        {
-          uuid = device_in_entry + 5;
-        }
-      else if (g_str_has_prefix (device_in_entry, "LABEL="))
-        {
-          label = device_in_entry + 6;
-        }
-      else if (g_str_has_prefix (device_in_entry, "/dev"))
-        {
-          device = device_in_entry;
-        }
-      else
-        {
-          /* ignore non-device entries */
-          goto continue_loop;
-        }
-
-      if (device != NULL)
-        {
-          process_device_symlinks (device, block, entry, &ret);
-        }
-      else if (label != NULL && g_strcmp0 (label, udisks_block_get_id_label (UDISKS_BLOCK (block))) == 0)
-        {
-          ret = g_list_prepend (ret, g_object_ref (entry));
-        }
-      else if (uuid != NULL && g_strcmp0 (uuid, udisks_block_get_id_uuid (UDISKS_BLOCK (block))) == 0)
-        {
-          ret = g_list_prepend (ret, g_object_ref (entry));
-        }
-
-    continue_loop:
-      ;
-    }
+  monitor = udisks_daemon_get_crypttab_monitor (daemon);
+  specs = get_device_specs (block, FALSE);
+  for (n = 0; specs[n] != NULL; n++)
+    ret = g_list_concat (ret, udisks_crypttab_monitor_get_entries_for_device (monitor, specs[n]));
+  g_strfreev (specs);
 
-  g_list_foreach (entries, (GFunc) g_object_unref, NULL);
-  g_list_free (entries);
   return ret;
 }
 
@@ -951,7 +838,7 @@ udisks_linux_block_update (UDisksLinuxBlock       *block,
           if (g_strv_length (slaves) == 1)
             {
               gchar *slave_object_path;
-              slave_object_path = find_block_device_by_sysfs_path (object_manager, slaves[0]);
+              slave_object_path = find_block_device_by_sysfs_path (daemon, slaves[0]);
               if (slave_object_path != NULL)
                 {
                   udisks_block_set_crypto_backing_device (iface, slave_object_path);
@@ -1026,12 +913,8 @@ udisks_linux_block_update (UDisksLinuxBlock       *block,
     preferred_device_file = g_udev_device_get_device_file (device->udev_device);
   udisks_block_set_preferred_device (iface, preferred_device_file);
 
-  /* Determine the drive this block device belongs to
-   *
-   * TODO: if this is slow we could have a cache or ensure that we
-   * only do this once or something else
-   */
-  drive_object_path = find_drive (object_manager, device->udev_device, &drive);
+  /* Determine the drive this block device belongs to */
+  drive_object_path = find_drive (daemon, device->udev_device, &drive);
   if (drive_object_path != NULL)
     {
       udisks_block_set_drive (iface, drive_object_path);
@@ -2241,7 +2124,219 @@ erase_ata_device (UDisksBlock   *block,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-#define ERASE_SIZE (1 * 1024*1024)
+#ifndef BLKDISCARD
+#define BLKDISCARD _IO(0x12,119)
+#endif
+#ifndef BLKSECDISCARD
+#define BLKSECDISCARD _IO(0x12,125)
+#endif
+#ifndef BLKZEROOUT
+#define BLKZEROOUT _IO(0x12,127)
+#endif
+
+/* Zeroes are written in chunks of ERASE_SIZE with up to a queue depth
+ * worth of chunks (see get_erase_queue_depth()) being written back at
+ * a time. The BLKZEROOUT, BLKDISCARD and BLKSECDISCARD ioctls are
+ * issued for ERASE_IOCTL_SIZE at a time so the job can report progress
+ * and be cancelled.
+ */
+#define ERASE_SIZE            (8 * 1024*1024)
+#define ERASE_IOCTL_SIZE      (G_GUINT64_CONSTANT (1024) * 1024*1024)
+#define ERASE_MIN_QUEUE_DEPTH 2
+#define ERASE_MAX_QUEUE_DEPTH 16
+
+static guint
+get_erase_queue_depth (UDisksObject *object)
+{
+  UDisksLinuxDevice *device;
+  GUdevDevice *disk;
+  gint nr_requests;
+
+  device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (object));
+  if (g_strcmp0 (g_udev_device_get_devtype (device->udev_device), "partition") == 0)
+    disk = g_udev_device_get_parent_with_subsystem (device->udev_device, "block", "disk");
+  else
+    disk = g_object_ref (device->udev_device);
+  g_object_unref (device);
+
+  nr_requests = 0;
+  if (disk != NULL)
+    {
+      nr_requests = g_udev_device_get_sysfs_attr_as_int (disk, "queue/nr_requests");
+      g_object_unref (disk);
+    }
+
+  /* a request is usually much smaller than ERASE_SIZE */
+  return CLAMP (nr_requests / 8, ERASE_MIN_QUEUE_DEPTH, ERASE_MAX_QUEUE_DEPTH);
+}
+
+static gboolean
+erase_check_cancelled (UDisksBaseJob  *job,
+                       GError        **error)
+{
+  if (g_cancellable_is_cancelled (udisks_base_job_get_cancellable (job)))
+    {
+      g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_CANCELLED,
+                   "Job was canceled");
+      return TRUE;
+    }
+  return FALSE;
+}
+
+static void
+erase_report_progress (UDisksBaseJob *job,
+                       guint64        pos,
+                       guint64        size,
+                       gint64        *time_of_last_signal)
+{
+  gint64 now;
+
+  /* only emit D-Bus signal at most once a second */
+  now = g_get_monotonic_time ();
+  if (now - *time_of_last_signal > G_USEC_PER_SEC)
+    {
+      udisks_job_set_progress (UDISKS_JOB (job), ((gdouble) pos) / size);
+      *time_of_last_signal = now;
+    }
+}
+
+/* Issues @request (BLKZEROOUT, BLKDISCARD or BLKSECDISCARD) for the whole
+ * device. If the very first range fails because the device doesn't support
+ * @request, @out_unsupported is set to %TRUE.
+ */
+static gboolean
+erase_device_ioctl (gint            fd,
+                    const gchar    *device_file,
+                    gulong          request,
+                    const gchar    *request_name,
+                    UDisksBaseJob  *job,
+                    guint64         size,
+                    gboolean       *out_unsupported,
+                    GError        **error)
+{
+  guint64 range[2];
+  guint64 pos;
+  gint64 time_of_last_signal;
+
+  *out_unsupported = FALSE;
+
+  pos = 0;
+  time_of_last_signal = g_get_monotonic_time ();
+  while (pos < size)
+    {
+      range[0] = pos;
+      range[1] = MIN (size - pos, ERASE_IOCTL_SIZE);
+      if (ioctl (fd, request, &range) != 0)
+        {
+          if (pos == 0 && (errno == EOPNOTSUPP || errno == ENOTTY || errno == EINVAL))
+            {
+              *out_unsupported = TRUE;
+              g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_NOT_SUPPORTED,
+                           "%s ioctl is not supported on %s: %m", request_name, device_file);
+            }
+          else
+            g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                         "Error doing %s ioctl on %s: %m", request_name, device_file);
+          return FALSE;
+        }
+      pos += range[1];
+
+      if (erase_check_cancelled (job, error))
+        return FALSE;
+
+      erase_report_progress (job, pos, size, &time_of_last_signal);
+    }
+
+  return TRUE;
+}
+
+/* Writes zeroes over the whole device. Rather than waiting for each write
+ * to hit the disk, the writeback of every chunk is started right away and
+ * only the oldest chunk is waited for once @queue_depth chunks are in
+ * flight. Progress only accounts for data known to be on the disk.
+ */
+static gboolean
+erase_device_write (gint            fd,
+                    const gchar    *device_file,
+                    UDisksBaseJob  *job,
+                    guint64         size,
+                    guint           queue_depth,
+                    GError        **error)
+{
+  gboolean ret = FALSE;
+  guchar *buf;
+  guint64 pos;
+  guint64 synced;
+  gint64 time_of_last_signal;
+
+  buf = g_new0 (guchar, ERASE_SIZE);
+  pos = 0;
+  synced = 0;
+  time_of_last_signal = g_get_monotonic_time ();
+  while (pos < size)
+    {
+      size_t to_write;
+      size_t written;
+      ssize_t num_written;
+
+      to_write = MIN (size - pos, ERASE_SIZE);
+      written = 0;
+      while (written < to_write)
+        {
+          num_written = pwrite (fd, buf, to_write - written, pos + written);
+          if (num_written == -1 || num_written == 0)
+            {
+              if (num_written == -1 && errno == EINTR)
+                continue;
+              g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                           "Error writing %d bytes to %s: %m",
+                           (gint) (to_write - written), device_file);
+              goto out;
+            }
+          written += num_written;
+        }
+
+      /* start writing back this chunk ... */
+      if (sync_file_range (fd, pos, to_write, SYNC_FILE_RANGE_WRITE) != 0)
+        {
+          g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                       "Error syncing %s: %m", device_file);
+          goto out;
+        }
+      pos += to_write;
+
+      /* ... and wait for the oldest one once the queue is full */
+      if (pos - synced > (guint64) queue_depth * ERASE_SIZE)
+        {
+          if (sync_file_range (fd, synced, ERASE_SIZE,
+                               SYNC_FILE_RANGE_WAIT_BEFORE | SYNC_FILE_RANGE_WRITE | SYNC_FILE_RANGE_WAIT_AFTER) != 0)
+            {
+              g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                           "Error syncing %s: %m", device_file);
+              goto out;
+            }
+          synced += ERASE_SIZE;
+        }
+
+      if (erase_check_cancelled (job, error))
+        goto out;
+
+      erase_report_progress (job, synced, size, &time_of_last_signal);
+    }
+
+  if (fdatasync (fd) != 0)
+    {
+      g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                   "Error syncing %s: %m", device_file);
+      goto out;
+    }
+
+  ret = TRUE;
+
+ out:
+  g_free (buf);
+  return ret;
+}
 
 static gboolean
 erase_device (UDisksBlock   *block,
@@ -2256,9 +2351,7 @@ erase_device (UDisksBlock   *block,
   UDisksBaseJob *job = NULL;
   gint fd = -1;
   guint64 size;
-  guint64 pos;
-  guchar *buf = NULL;
-  gint64 time_of_last_signal;
+  gboolean unsupported = FALSE;
   GError *local_error = NULL;
 
   if (g_strcmp0 (erase_type, "ata-secure-erase") == 0)
@@ -2271,7 +2364,10 @@ erase_device (UDisksBlock   *block,
       ret = erase_ata_device (block, object, daemon, caller_uid, TRUE, error);
       goto out;
     }
-  else if (g_strcmp0 (erase_type, "zero") != 0)
+  else if (g_strcmp0 (erase_type, "zero") != 0 &&
+           g_strcmp0 (erase_type, "zero-offload") != 0 &&
+           g_strcmp0 (erase_type, "discard") != 0 &&
+           g_strcmp0 (erase_type, "secure-discard") != 0)
     {
       g_set_error (&local_error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
                    "Unknown or unsupported erase type `%s'",
@@ -2280,7 +2376,7 @@ erase_device (UDisksBlock   *block,
     }
 
   device_file = udisks_block_get_device (block);
-  fd = open (device_file, O_WRONLY | O_SYNC | O_EXCL);
+  fd = open (device_file, O_WRONLY | O_EXCL);
   if (fd == -1)
     {
       g_set_error (&local_error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
@@ -2292,6 +2388,10 @@ erase_device (UDisksBlock   *block,
   udisks_base_job_set_auto_estimate (UDISKS_BASE_JOB (job), TRUE);
   udisks_job_set_progress_valid (UDISKS_JOB (job), TRUE);
 
+  /* wait for other erase jobs if the job limits say so */
+  if (!udisks_daemon_start_job_sync (daemon, job, &local_error))
+    goto out;
+
   if (ioctl (fd, BLKGETSIZE64, &size) != 0)
     {
       g_set_error (&local_error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
@@ -2301,47 +2401,31 @@ erase_device (UDisksBlock   *block,
 
   udisks_job_set_bytes (UDISKS_JOB (job), size);
 
-  buf = g_new0 (guchar, ERASE_SIZE);
-  pos = 0;
-  time_of_last_signal = g_get_monotonic_time ();
-  while (pos < size)
+  if (g_strcmp0 (erase_type, "discard") == 0)
     {
-      size_t to_write;
-      ssize_t num_written;
-      gint64 now;
-
-      to_write = MIN (size - pos, ERASE_SIZE);
-    again:
-      num_written = write (fd, buf, to_write);
-      if (num_written == -1 || num_written == 0)
-        {
-          if (errno == EINTR)
-            goto again;
-          g_set_error (&local_error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                       "Error writing %d bytes to %s: %m",
-                       (gint) to_write, device_file);
-          goto out;
-        }
-      pos += num_written;
-
-      if (g_cancellable_is_cancelled (udisks_base_job_get_cancellable (job)))
-        {
-          g_set_error (&local_error, UDISKS_ERROR, UDISKS_ERROR_CANCELLED,
-                       "Job was canceled");
-          goto out;
-        }
-
-      /* only emit D-Bus signal at most once a second */
-      now = g_get_monotonic_time ();
-      if (now - time_of_last_signal > G_USEC_PER_SEC)
+      ret = erase_device_ioctl (fd, device_file, BLKDISCARD, "BLKDISCARD", job, size, &unsupported, &local_error);
+    }
+  else if (g_strcmp0 (erase_type, "secure-discard") == 0)
+    {
+      ret = erase_device_ioctl (fd, device_file, BLKSECDISCARD, "BLKSECDISCARD", job, size, &unsupported, &local_error);
+    }
+  else if (g_strcmp0 (erase_type, "zero-offload") == 0)
+    {
+      /* let the kernel zero the blocks, it uses the device's write-zeroes
+       * (with unmap if possible) command when there is one
+       */
+      ret = erase_device_ioctl (fd, device_file, BLKZEROOUT, "BLKZEROOUT", job, size, &unsupported, &local_error);
+      if (!ret && unsupported)
         {
-          /* TODO: estimation etc. */
-          udisks_job_set_progress (UDISKS_JOB (job), ((gdouble) pos) / size);
-          time_of_last_signal = now;
+          udisks_debug ("BLKZEROOUT not supported on %s, writing zeroes instead", device_file);
+          g_clear_error (&local_error);
+          ret = erase_device_write (fd, device_file, job, size, get_erase_queue_depth (object), &local_error);
         }
     }
-
-  ret = TRUE;
+  else
+    {
+      ret = erase_device_write (fd, device_file, job, size, get_erase_queue_depth (object), &local_error);
+    }
 
  out:
   if (job != NULL)
@@ -2353,7 +2437,6 @@ erase_device (UDisksBlock   *block,
     }
   if (local_error != NULL)
     g_propagate_error (error, local_error);
-  g_free (buf);
   if (fd != -1)
     close (fd);
   return ret;
@@ -2691,6 +2774,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
 {
   FormatWaitData *wait_data = NULL;
   UDisksObject *object;
+  UDisksBaseJob *wipe_job;
   UDisksPartition *partition = NULL;
   UDisksPartitionTable *partition_table = NULL;
   UDisksObject *cleartext_object = NULL;
@@ -2875,12 +2959,20 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
   device_name = udisks_block_dup_device (block);
 
   /* First wipe the device... */
+  wipe_job = udisks_daemon_launch_simple_job (daemon, object, "format-wipe", caller_uid, NULL);
+  if (!udisks_daemon_start_job_sync (daemon, wipe_job, &error))
+    {
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (wipe_job), FALSE, error->message);
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
   if (! bd_fs_wipe (device_name, TRUE, &error)) {
     if (g_error_matches (error, BD_FS_ERROR, BD_FS_ERROR_NOFS))
       /* no signature to remove, ignore */
       g_clear_error (&error);
     else
       {
+        udisks_simple_job_complete (UDISKS_SIMPLE_JOB (wipe_job), FALSE, error->message);
         g_dbus_method_invocation_return_error (invocation,
                                                UDISKS_ERROR,
                                                UDISKS_ERROR_FAILED,
@@ -2890,6 +2982,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
         goto out;
       }
   }
+  udisks_simple_job_complete (UDISKS_SIMPLE_JOB (wipe_job), TRUE, "");
 
   /* ...then wait until this change has taken effect */
   wait_data = g_new0 (FormatWaitData, 1);
@@ -2903,6 +2996,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
                                           wait_data,
                                           NULL,
                                           15,
+                                          NULL, /* cancellable */
                                           &error) == NULL)
     {
       g_prefix_error (&error, "Error synchronizing after initial wipe: ");
@@ -2996,6 +3090,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
                                               wait_data,
                                               NULL,
                                               30,
+                                              NULL, /* cancellable */
                                               &error) == NULL)
         {
           g_prefix_error (&error, "Error waiting for LUKS UUID: ");
@@ -3036,6 +3131,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
                                                              wait_data,
                                                              NULL,
                                                              30,
+                                                             NULL, /* cancellable */
                                                              &error);
       if (cleartext_object == NULL)
         {
@@ -3138,6 +3234,7 @@ udisks_linux_block_handle_format (UDisksBlock             *block,
                                           wait_data,
                                           NULL,
                                           30,
+                                          NULL, /* cancellable */
                                           &error) == NULL)
     {
       g_prefix_error (&error,
@@ -90,8 +90,19 @@ struct _UDisksLinuxDriveAta
   gboolean     secure_erase_in_progress;
   unsigned long drive_read, drive_write;
   gboolean     standby_enabled;
+
+  /* SMART refresh schedule, see udisks_linux_drive_ata_smart_refresh_is_due() */
+  gint         smart_refresh_interval;   /* seconds */
+  guint        smart_refresh_backoff;    /* interval is doubled this many times */
+  gint64       smart_next_refresh;       /* monotonic time, 0 if never scheduled */
 };
 
+/* default and minimum SMART refresh interval, in seconds */
+#define SMART_REFRESH_INTERVAL_DEFAULT (10*60)
+#define SMART_REFRESH_INTERVAL_MIN     60
+/* maximum number of times the interval is doubled for sleeping drives */
+#define SMART_REFRESH_BACKOFF_MAX      3
+
 struct _UDisksLinuxDriveAtaClass
 {
   UDisksDriveAtaSkeletonClass parent_class;
@@ -122,6 +133,7 @@ udisks_linux_drive_ata_finalize (GObject *object)
 static void
 udisks_linux_drive_ata_init (UDisksLinuxDriveAta *drive)
 {
+  drive->smart_refresh_interval = SMART_REFRESH_INTERVAL_DEFAULT;
   g_dbus_interface_skeleton_set_flags (G_DBUS_INTERFACE_SKELETON (drive),
                                        G_DBUS_INTERFACE_SKELETON_FLAGS_HANDLE_METHOD_INVOCATIONS_IN_THREAD);
 }
@@ -551,7 +563,9 @@ udisks_linux_drive_ata_refresh_smart_sync (UDisksLinuxDriveAta  *drive,
   device = udisks_linux_drive_object_get_device (object, TRUE /* get_hw */);
   g_assert (device != NULL);
 
-  /* TODO: use cancellable */
+  /* libatasmart calls can't be interrupted, so check before each one */
+  if (g_cancellable_set_error_if_cancelled (cancellable, error))
+    goto out;
 
   if (simulate_path != NULL)
     {
@@ -606,6 +620,9 @@ udisks_linux_drive_ata_refresh_smart_sync (UDisksLinuxDriveAta  *drive,
         }
     }
 
+  if (g_cancellable_set_error_if_cancelled (cancellable, error))
+    goto out;
+
   if (sk_disk_open (g_udev_device_get_device_file (device->udev_device), &d) != 0)
     {
       g_set_error (error,
@@ -615,6 +632,9 @@ udisks_linux_drive_ata_refresh_smart_sync (UDisksLinuxDriveAta  *drive,
       goto out;
     }
 
+  if (g_cancellable_set_error_if_cancelled (cancellable, error))
+    goto out;
+
   if (sk_disk_smart_read_data (d) != 0)
     {
       g_set_error (error,
@@ -683,6 +703,81 @@ udisks_linux_drive_ata_refresh_smart_sync (UDisksLinuxDriveAta  *drive,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* called with object_lock held */
+static void
+schedule_smart_refresh_unlocked (UDisksLinuxDriveAta *drive)
+{
+  gint64 interval;
+  gint64 spread;
+
+  interval = (gint64) drive->smart_refresh_interval << drive->smart_refresh_backoff;
+
+  /* spread refreshes by up to +/- 1/8 of the interval so drives that were
+   * added at the same time (e.g. on start-up) don't all get polled at once
+   */
+  spread = interval / 4;
+  interval += g_random_int_range (0, spread + 1) - spread / 2;
+
+  drive->smart_next_refresh = g_get_monotonic_time () + interval * G_USEC_PER_SEC;
+}
+
+/**
+ * udisks_linux_drive_ata_smart_refresh_is_due:
+ * @drive: A #UDisksLinuxDriveAta.
+ *
+ * Checks whether periodic housekeeping should refresh the SMART data
+ * of @drive. This is the case if the data was never refreshed through
+ * udisks_linux_drive_ata_smart_refresh_done() or the interval configured
+ * with the <literal>ata-smart-refresh-interval</literal> drive
+ * configuration key has passed.
+ *
+ * This method may be called from any thread.
+ *
+ * Returns: %TRUE if SMART data should be refreshed.
+ */
+gboolean
+udisks_linux_drive_ata_smart_refresh_is_due (UDisksLinuxDriveAta *drive)
+{
+  gboolean ret;
+
+  g_return_val_if_fail (UDISKS_IS_LINUX_DRIVE_ATA (drive), FALSE);
+
+  G_LOCK (object_lock);
+  ret = g_get_monotonic_time () >= drive->smart_next_refresh;
+  G_UNLOCK (object_lock);
+
+  return ret;
+}
+
+/**
+ * udisks_linux_drive_ata_smart_refresh_done:
+ * @drive: A #UDisksLinuxDriveAta.
+ * @asleep: Whether the refresh was skipped because the drive is asleep.
+ *
+ * Schedules the next periodic SMART refresh of @drive. The configured
+ * interval is randomly spread and, if @asleep is %TRUE, doubled for
+ * every consecutive refresh that found the drive asleep (up to eight
+ * times the interval).
+ *
+ * This method may be called from any thread.
+ */
+void
+udisks_linux_drive_ata_smart_refresh_done (UDisksLinuxDriveAta *drive,
+                                           gboolean             asleep)
+{
+  g_return_if_fail (UDISKS_IS_LINUX_DRIVE_ATA (drive));
+
+  G_LOCK (object_lock);
+  if (asleep)
+    drive->smart_refresh_backoff = MIN (drive->smart_refresh_backoff + 1, SMART_REFRESH_BACKOFF_MAX);
+  else
+    drive->smart_refresh_backoff = 0;
+  schedule_smart_refresh_unlocked (drive);
+  G_UNLOCK (object_lock);
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 /**
  * udisks_linux_drive_ata_smart_selftest_sync:
  * @drive: A #UDisksLinuxDriveAta.
@@ -1852,6 +1947,7 @@ udisks_linux_drive_ata_apply_configuration (UDisksLinuxDriveAta *drive,
 {
   gboolean has_conf = FALSE;
   ApplyConfData *data = NULL;
+  gint smart_refresh_interval;
 
   data = g_new0 (ApplyConfData, 1);
   data->ata_pm_standby = -1;
@@ -1874,6 +1970,26 @@ udisks_linux_drive_ata_apply_configuration (UDisksLinuxDriveAta *drive,
     goto out;
 
 
+  /* the SMART refresh interval is used by housekeeping, nothing to send to the drive */
+  if (!g_variant_lookup (configuration, "ata-smart-refresh-interval", "i", &smart_refresh_interval))
+    smart_refresh_interval = SMART_REFRESH_INTERVAL_DEFAULT;
+  if (smart_refresh_interval < SMART_REFRESH_INTERVAL_MIN)
+    {
+      udisks_warning ("SMART refresh interval of %d seconds for %s is too short, using %d seconds",
+                      smart_refresh_interval, udisks_drive_get_id (data->drive),
+                      SMART_REFRESH_INTERVAL_MIN);
+      smart_refresh_interval = SMART_REFRESH_INTERVAL_MIN;
+    }
+  G_LOCK (object_lock);
+  if (drive->smart_refresh_interval != smart_refresh_interval)
+    {
+      drive->smart_refresh_interval = smart_refresh_interval;
+      drive->smart_refresh_backoff = 0;
+      if (drive->smart_next_refresh > 0)
+        schedule_smart_refresh_unlocked (drive);
+    }
+  G_UNLOCK (object_lock);
+
   has_conf |= g_variant_lookup (configuration, "ata-pm-standby", "i", &data->ata_pm_standby);
   has_conf |= g_variant_lookup (configuration, "ata-apm-level", "i", &data->ata_apm_level);
   has_conf |= g_variant_lookup (configuration, "ata-aam-level", "i", &data->ata_aam_level);
@@ -38,6 +38,9 @@ gboolean        udisks_linux_drive_ata_refresh_smart_sync (UDisksLinuxDriveAta
                                                            const gchar             *simulate_path,
                                                            GCancellable            *cancellable,
                                                            GError                 **error);
+gboolean        udisks_linux_drive_ata_smart_refresh_is_due (UDisksLinuxDriveAta    *drive);
+void            udisks_linux_drive_ata_smart_refresh_done  (UDisksLinuxDriveAta     *drive,
+                                                            gboolean                 asleep);
 gboolean        udisks_linux_drive_ata_smart_selftest_sync (UDisksLinuxDriveAta     *drive,
                                                             const gchar             *type,
                                                             GCancellable            *cancellable,
@@ -68,8 +68,17 @@ struct _UDisksLinuxDriveObject
   UDisksDrive *iface_drive;
   UDisksDriveAta *iface_drive_ata;
   GHashTable *module_ifaces;
+
+  /* housekeeping statistics, protected by housekeeping_stats_lock */
+  guint housekeeping_count;
+  guint housekeeping_num_cancelled;
+  gint64 housekeeping_last_usec;
+  gint64 housekeeping_max_usec;
+  gint64 housekeeping_total_usec;
 };
 
+G_LOCK_DEFINE_STATIC (housekeeping_stats_lock);
+
 struct _UDisksLinuxDriveObjectClass
 {
   UDisksObjectSkeletonClass parent_class;
@@ -985,8 +994,11 @@ udisks_linux_drive_object_should_include_device (GUdevClient        *client,
  * @cancellable: A %GCancellable or %NULL.
  * @error: Return location for error or %NULL.
  *
- * Called periodically (every ten minutes or so) to perform
- * housekeeping tasks such as refreshing ATA SMART data.
+ * Called periodically (every minute or so) to perform housekeeping
+ * tasks such as refreshing ATA SMART data. SMART data is only
+ * refreshed once the drive's own refresh interval has passed, see
+ * udisks_linux_drive_ata_smart_refresh_is_due(), unless
+ * @secs_since_last is 0.
  *
  * The function runs in a dedicated thread and is allowed to perform
  * blocking I/O.
@@ -1003,31 +1015,60 @@ udisks_linux_drive_object_housekeeping (UDisksLinuxDriveObject  *object,
                                         GError                 **error)
 {
   gboolean ret;
+  gboolean cancelled = FALSE;
+  gboolean attempted = FALSE;
+  gint64 start_usec;
+  gint64 duration_usec;
 
   ret = FALSE;
+  start_usec = g_get_monotonic_time ();
+
+  if (g_cancellable_set_error_if_cancelled (cancellable, error))
+    {
+      cancelled = TRUE;
+      goto out;
+    }
 
   if (object->iface_drive_ata != NULL &&
       udisks_drive_ata_get_smart_supported (object->iface_drive_ata) &&
       udisks_drive_ata_get_smart_enabled (object->iface_drive_ata))
     {
+      UDisksLinuxDriveAta *ata = UDISKS_LINUX_DRIVE_ATA (object->iface_drive_ata);
       GError *local_error;
       gboolean nowakeup;
+      gboolean refreshed;
 
       /* Wake-up only on start-up */
       nowakeup = TRUE;
       if (secs_since_last == 0)
         nowakeup = FALSE;
 
+      /* Each drive has its own schedule, except on start-up and hotplug */
+      if (nowakeup && !udisks_linux_drive_ata_smart_refresh_is_due (ata))
+        {
+          ret = TRUE;
+          goto out;
+        }
+
       udisks_info ("Refreshing SMART data on %s (nowakeup=%d)",
                    g_dbus_object_get_object_path (G_DBUS_OBJECT (object)),
                    nowakeup);
 
+      attempted = TRUE;
       local_error = NULL;
-      if (!udisks_linux_drive_ata_refresh_smart_sync (UDISKS_LINUX_DRIVE_ATA (object->iface_drive_ata),
-                                                      nowakeup,
-                                                      NULL, /* simulate_path */
-                                                      cancellable,
-                                                      &local_error))
+      refreshed = udisks_linux_drive_ata_refresh_smart_sync (ata,
+                                                             nowakeup,
+                                                             NULL, /* simulate_path */
+                                                             cancellable,
+                                                             &local_error);
+
+      /* back off while the drive is sleeping */
+      udisks_linux_drive_ata_smart_refresh_done (ata,
+                                                 !refreshed &&
+                                                 g_error_matches (local_error, UDISKS_ERROR,
+                                                                  UDISKS_ERROR_WOULD_WAKEUP));
+
+      if (!refreshed)
         {
           if (nowakeup && (local_error->domain == UDISKS_ERROR &&
                            local_error->code == UDISKS_ERROR_WOULD_WAKEUP))
@@ -1046,6 +1087,7 @@ udisks_linux_drive_object_housekeeping (UDisksLinuxDriveObject  *object,
             }
           else
             {
+              cancelled = g_error_matches (local_error, G_IO_ERROR, G_IO_ERROR_CANCELLED);
               g_propagate_prefixed_error (error, local_error, "Error updating SMART data: ");
               goto out;
             }
@@ -1055,9 +1097,61 @@ udisks_linux_drive_object_housekeeping (UDisksLinuxDriveObject  *object,
   ret = TRUE;
 
  out:
+  /* only account for housekeeping that actually talked to the drive */
+  if (attempted || cancelled)
+    {
+      duration_usec = g_get_monotonic_time () - start_usec;
+      G_LOCK (housekeeping_stats_lock);
+      object->housekeeping_count++;
+      if (cancelled)
+        object->housekeeping_num_cancelled++;
+      object->housekeeping_last_usec = duration_usec;
+      object->housekeeping_max_usec = MAX (object->housekeeping_max_usec, duration_usec);
+      object->housekeeping_total_usec += duration_usec;
+      G_UNLOCK (housekeeping_stats_lock);
+    }
   return ret;
 }
 
+/**
+ * udisks_linux_drive_object_get_housekeeping_stats:
+ * @object: A #UDisksLinuxDriveObject.
+ * @out_count: (out) (allow-none): Return location for the number of housekeeping runs or %NULL.
+ * @out_num_cancelled: (out) (allow-none): Return location for the number of cancelled runs or %NULL.
+ * @out_last_usec: (out) (allow-none): Return location for the duration of the last run or %NULL.
+ * @out_max_usec: (out) (allow-none): Return location for the duration of the slowest run or %NULL.
+ * @out_avg_usec: (out) (allow-none): Return location for the average duration or %NULL.
+ *
+ * Gets statistics about udisks_linux_drive_object_housekeeping() calls
+ * on @object. Durations are in microseconds.
+ *
+ * This method may be called from any thread.
+ */
+void
+udisks_linux_drive_object_get_housekeeping_stats (UDisksLinuxDriveObject *object,
+                                                  guint                  *out_count,
+                                                  guint                  *out_num_cancelled,
+                                                  gint64                 *out_last_usec,
+                                                  gint64                 *out_max_usec,
+                                                  gint64                 *out_avg_usec)
+{
+  g_return_if_fail (UDISKS_IS_LINUX_DRIVE_OBJECT (object));
+
+  G_LOCK (housekeeping_stats_lock);
+  if (out_count != NULL)
+    *out_count = object->housekeeping_count;
+  if (out_num_cancelled != NULL)
+    *out_num_cancelled = object->housekeeping_num_cancelled;
+  if (out_last_usec != NULL)
+    *out_last_usec = object->housekeeping_last_usec;
+  if (out_max_usec != NULL)
+    *out_max_usec = object->housekeeping_max_usec;
+  if (out_avg_usec != NULL)
+    *out_avg_usec = object->housekeeping_count > 0 ?
+                    object->housekeeping_total_usec / object->housekeeping_count : 0;
+  G_UNLOCK (housekeeping_stats_lock);
+}
+
 static gboolean
 is_block_unlocked (GList *objects, const gchar *crypto_object_path)
 {
@@ -49,6 +49,12 @@ gboolean                udisks_linux_drive_object_housekeeping  (UDisksLinuxDriv
                                                                  guint                     secs_since_last,
                                                                  GCancellable             *cancellable,
                                                                  GError                  **error);
+void                    udisks_linux_drive_object_get_housekeeping_stats (UDisksLinuxDriveObject *object,
+                                                                          guint                  *out_count,
+                                                                          guint                  *out_num_cancelled,
+                                                                          gint64                 *out_last_usec,
+                                                                          gint64                 *out_max_usec,
+                                                                          gint64                 *out_avg_usec);
 
 gboolean                udisks_linux_drive_object_is_not_in_use (UDisksLinuxDriveObject   *object,
                                                                  GCancellable             *cancellable,
@@ -248,44 +248,48 @@ has_option (const gchar *options,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/* runs in thread dedicated to handling @invocation */
+typedef struct
+{
+  UDisksObject *object;
+  gchar        *device;
+  gchar        *name;
+  GString      *passphrase;
+  const gchar  *action_id;
+  gboolean      read_only;
+} UnlockRequest;
+
+static void
+unlock_request_clear (UnlockRequest *request)
+{
+  g_clear_object (&request->object);
+  g_free (request->device);
+  g_free (request->name);
+  udisks_string_wipe_and_free (request->passphrase);
+  memset (request, 0, sizeof (UnlockRequest));
+}
+
+/* Checks that @object can be unlocked and works out the key, the name and
+ * the polkit action to use
+ */
 static gboolean
-handle_unlock (UDisksEncrypted        *encrypted,
-               GDBusMethodInvocation  *invocation,
-               const gchar            *passphrase,
-               GVariant               *options)
+prepare_unlock (UDisksDaemon   *daemon,
+                UDisksObject   *object,
+                const gchar    *passphrase,
+                GVariant       *options,
+                uid_t           caller_uid,
+                UnlockRequest  *request,
+                GError        **error)
 {
-  UDisksObject *object = NULL;
   UDisksBlock *block;
-  UDisksDaemon *daemon;
-  UDisksState *state;
-  gchar *name = NULL;
   UDisksObject *cleartext_object = NULL;
-  UDisksBlock *cleartext_block;
-  UDisksLinuxDevice *cleartext_device = NULL;
-  GError *error = NULL;
-  uid_t caller_uid;
-  const gchar *action_id;
-  const gchar *message;
   gboolean is_in_crypttab = FALSE;
   gchar *crypttab_name = NULL;
   gchar *crypttab_passphrase = NULL;
   gchar *crypttab_options = NULL;
-  gchar *device = NULL;
-  gboolean read_only = FALSE;
-  GString *effective_passphrase = NULL;
-  LuksJobData data;
-
-  object = udisks_daemon_util_dup_object (encrypted, &error);
-  if (object == NULL)
-    {
-      g_dbus_method_invocation_take_error (invocation, error);
-      goto out;
-    }
+  gboolean ret = FALSE;
 
   block = udisks_object_peek_block (object);
-  daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
-  state = udisks_daemon_get_state (daemon);
+  request->object = g_object_ref (object);
 
   /* TODO: check if the device is mentioned in /etc/crypttab (see crypttab(5)) - if so use that
    *
@@ -296,11 +300,11 @@ handle_unlock (UDisksEncrypted        *encrypted,
   if (!(g_strcmp0 (udisks_block_get_id_usage (block), "crypto") == 0 &&
         g_strcmp0 (udisks_block_get_id_type (block), "crypto_LUKS") == 0))
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Device %s does not appear to be a LUKS device",
-                                             udisks_block_get_device (block));
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Device %s does not appear to be a LUKS device",
+                   udisks_block_get_device (block));
       goto out;
     }
 
@@ -310,157 +314,223 @@ handle_unlock (UDisksEncrypted        *encrypted,
                                                          g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object))),
                                                          g_free,
                                                          0, /* timeout_seconds */
+                                                         NULL, /* cancellable */
                                                          NULL); /* error */
   if (cleartext_object != NULL)
     {
       UDisksBlock *unlocked_block;
       unlocked_block = udisks_object_peek_block (cleartext_object);
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Device %s is already unlocked as %s",
-                                             udisks_block_get_device (block),
-                                             udisks_block_get_device (unlocked_block));
-      goto out;
-    }
-
-  /* we need the uid of the caller for the unlocked-luks file */
-  error = NULL;
-  if (!udisks_daemon_util_get_caller_uid_sync (daemon, invocation, NULL /* GCancellable */, &caller_uid, NULL, NULL, &error))
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Device %s is already unlocked as %s",
+                   udisks_block_get_device (block),
+                   udisks_block_get_device (unlocked_block));
       goto out;
     }
 
   /* fallback mechanism: keyfile_contents -> passphrase -> crypttab_passphrase -> error (no key) */
-  if (!udisks_variant_lookup_binary (options, "keyfile_contents", &effective_passphrase)) {
+  if (!udisks_variant_lookup_binary (options, "keyfile_contents", &request->passphrase)) {
     if (passphrase && (strlen (passphrase) > 0))
       {
-        effective_passphrase = g_string_new (passphrase);
+        request->passphrase = g_string_new (passphrase);
       }
     else
       {
         /* check if in crypttab file */
-        error = NULL;
         if (!check_crypttab (block,
                              TRUE,
                              &is_in_crypttab,
                              &crypttab_name,
                              &crypttab_passphrase,
                              &crypttab_options,
-                             &error))
-          {
-            g_dbus_method_invocation_take_error (invocation, error);
-            goto out;
-          }
+                             error))
+          goto out;
         if (is_in_crypttab && crypttab_passphrase != NULL && strlen (crypttab_passphrase) > 0)
           {
-            effective_passphrase = g_string_new (crypttab_passphrase);
+            request->passphrase = g_string_new (crypttab_passphrase);
           }
         else
           {
-            g_dbus_method_invocation_return_error (invocation,
-                                                   UDISKS_ERROR,
-                                                   UDISKS_ERROR_FAILED,
-                                                   "No key available to unlock device %s",
-                                                   udisks_block_get_device (block));
+            g_set_error (error,
+                         UDISKS_ERROR,
+                         UDISKS_ERROR_FAILED,
+                         "No key available to unlock device %s",
+                         udisks_block_get_device (block));
             goto out;
           }
       }
   }
 
-  /* Now, check that the user is actually authorized to unlock the device.
-   */
-  action_id = "org.freedesktop.udisks2.encrypted-unlock";
-  /* Translators: Shown in authentication dialog when the user
-   * requests unlocking an encrypted device.
-   *
-   * Do not translate $(drive), it's a placeholder and
-   * will be replaced by the name of the drive/device in question
+  /* Now, work out the action the user needs to be authorized for
    */
-  message = N_("Authentication is required to unlock the encrypted device $(drive)");
+  request->action_id = "org.freedesktop.udisks2.encrypted-unlock";
   if (!udisks_daemon_util_setup_by_user (daemon, object, caller_uid))
     {
       if (is_in_crypttab && has_option (crypttab_options, "x-udisks-auth"))
         {
-          action_id = "org.freedesktop.udisks2.encrypted-unlock-crypttab";
+          request->action_id = "org.freedesktop.udisks2.encrypted-unlock-crypttab";
         }
       else if (udisks_block_get_hint_system (block))
         {
-          action_id = "org.freedesktop.udisks2.encrypted-unlock-system";
+          request->action_id = "org.freedesktop.udisks2.encrypted-unlock-system";
         }
       else if (!udisks_daemon_util_on_user_seat (daemon, object, caller_uid))
         {
-          action_id = "org.freedesktop.udisks2.encrypted-unlock-other-seat";
+          request->action_id = "org.freedesktop.udisks2.encrypted-unlock-other-seat";
         }
     }
 
-  if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                    object,
-                                                    action_id,
-                                                    options,
-                                                    message,
-                                                    invocation))
-    goto out;
-
   /* calculate the name to use */
   if (is_in_crypttab && crypttab_name != NULL)
-    name = g_strdup (crypttab_name);
+    request->name = g_strdup (crypttab_name);
   else
-    name = g_strdup_printf ("luks-%s", udisks_block_get_id_uuid (block));
+    request->name = g_strdup_printf ("luks-%s", udisks_block_get_id_uuid (block));
 
-  device = udisks_block_dup_device (block);
+  request->device = udisks_block_dup_device (block);
 
   /* TODO: support reading a 'readonly' option from @options */
   if (udisks_block_get_read_only (block))
-    read_only = TRUE;
+    request->read_only = TRUE;
 
-  data.device = device;
-  data.map_name = name;
-  data.passphrase = effective_passphrase;
-  data.read_only = read_only;
+  ret = TRUE;
+
+ out:
+  g_free (crypttab_name);
+  g_free (crypttab_passphrase);
+  g_free (crypttab_options);
+  g_clear_object (&cleartext_object);
+  return ret;
+}
+
+/* Opens the LUKS device of @request and waits for the cleartext object */
+static UDisksObject *
+unlock_device (UDisksDaemon   *daemon,
+               UnlockRequest  *request,
+               uid_t           caller_uid,
+               GError        **error)
+{
+  UDisksObject *cleartext_object;
+  GError *local_error = NULL;
+  LuksJobData data;
+
+  data.device = request->device;
+  data.map_name = request->name;
+  data.passphrase = request->passphrase;
+  data.read_only = request->read_only;
 
   if (!udisks_daemon_launch_threaded_job_sync (daemon,
-                                               object,
+                                               request->object,
                                                "encrypted-unlock",
                                                caller_uid,
                                                luks_open_job_func,
                                                &data,
                                                NULL, /* user_data_free_func */
                                                NULL, /* cancellable */
-                                               &error))
+                                               &local_error))
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Error unlocking %s: %s",
-                                             udisks_block_get_device (block),
-                                             error->message);
-      goto out;
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Error unlocking %s: %s",
+                   request->device,
+                   local_error->message);
+      g_clear_error (&local_error);
+      return NULL;
     }
 
   /* Determine the resulting cleartext object */
-  error = NULL;
   cleartext_object = udisks_daemon_wait_for_object_sync (daemon,
                                                          wait_for_cleartext_object,
-                                                         g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object))),
+                                                         g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (request->object))),
                                                          g_free,
                                                          10, /* timeout_seconds */
-                                                         &error);
+                                                         NULL, /* cancellable */
+                                                         error);
   if (cleartext_object == NULL)
     {
-      g_prefix_error (&error,
+      g_prefix_error (error,
                       "Error waiting for cleartext object after unlocking %s",
-                      udisks_block_get_device (block));
+                      request->device);
+      return NULL;
+    }
+
+  udisks_notice ("Unlocked LUKS device %s as %s",
+                 request->device,
+                 udisks_block_get_device (udisks_object_peek_block (cleartext_object)));
+
+  return cleartext_object;
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_unlock (UDisksEncrypted        *encrypted,
+               GDBusMethodInvocation  *invocation,
+               const gchar            *passphrase,
+               GVariant               *options)
+{
+  UDisksObject *object = NULL;
+  UDisksBlock *block;
+  UDisksDaemon *daemon;
+  UDisksState *state;
+  UDisksObject *cleartext_object = NULL;
+  UDisksBlock *cleartext_block;
+  UDisksLinuxDevice *cleartext_device = NULL;
+  GError *error = NULL;
+  uid_t caller_uid;
+  const gchar *message;
+  UnlockRequest request;
+
+  memset (&request, 0, sizeof (UnlockRequest));
+
+  object = udisks_daemon_util_dup_object (encrypted, &error);
+  if (object == NULL)
+    {
       g_dbus_method_invocation_take_error (invocation, error);
       goto out;
     }
-  cleartext_block = udisks_object_peek_block (cleartext_object);
 
-  udisks_notice ("Unlocked LUKS device %s as %s",
-                 udisks_block_get_device (block),
-                 udisks_block_get_device (cleartext_block));
+  block = udisks_object_peek_block (object);
+  daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
+  state = udisks_daemon_get_state (daemon);
+
+  /* we need the uid of the caller for the unlocked-luks file */
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon, invocation, NULL /* GCancellable */, &caller_uid, NULL, NULL, &error))
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  if (!prepare_unlock (daemon, object, passphrase, options, caller_uid, &request, &error))
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  /* Now, check that the user is actually authorized to unlock the device.
+   */
+  /* Translators: Shown in authentication dialog when the user
+   * requests unlocking an encrypted device.
+   *
+   * Do not translate $(drive), it's a placeholder and
+   * will be replaced by the name of the drive/device in question
+   */
+  message = N_("Authentication is required to unlock the encrypted device $(drive)");
+  if (!udisks_daemon_util_check_authorization_sync (daemon,
+                                                    object,
+                                                    request.action_id,
+                                                    options,
+                                                    message,
+                                                    invocation))
+    goto out;
+
+  cleartext_object = unlock_device (daemon, &request, caller_uid, &error);
+  if (cleartext_object == NULL)
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+  cleartext_block = udisks_object_peek_block (cleartext_object);
 
   cleartext_device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (cleartext_object));
 
@@ -476,21 +546,293 @@ handle_unlock (UDisksEncrypted        *encrypted,
                                     g_dbus_object_get_object_path (G_DBUS_OBJECT (cleartext_object)));
 
  out:
-  g_free (device);
-  g_free (crypttab_name);
-  g_free (crypttab_passphrase);
-  g_free (crypttab_options);
-  g_free (name);
+  unlock_request_clear (&request);
   g_clear_object (&cleartext_device);
   g_clear_object (&cleartext_object);
   g_clear_object (&object);
-  udisks_string_wipe_and_free (effective_passphrase);
 
   return TRUE; /* returning TRUE means that we handled the method invocation */
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+typedef struct
+{
+  const gchar   *object_path;
+  UnlockRequest  request;
+  UDisksObject  *cleartext_object;
+  GError        *error;
+} UnlockBatchItem;
+
+typedef struct
+{
+  UDisksDaemon  *daemon;
+  uid_t          caller_uid;
+  GPtrArray     *items;
+  volatile gint  next_item;
+} UnlockBatch;
+
+static void
+unlock_batch_item_free (UnlockBatchItem *item)
+{
+  unlock_request_clear (&item->request);
+  g_clear_object (&item->cleartext_object);
+  g_clear_error (&item->error);
+  g_slice_free (UnlockBatchItem, item);
+}
+
+static gpointer
+unlock_batch_thread_func (gpointer user_data)
+{
+  UnlockBatch *batch = user_data;
+  gint n;
+
+  while ((n = g_atomic_int_add (&batch->next_item, 1)) < (gint) batch->items->len)
+    {
+      UnlockBatchItem *item = batch->items->pdata[n];
+
+      if (item->error != NULL)
+        continue;
+
+      item->cleartext_object = unlock_device (batch->daemon, &item->request, batch->caller_uid, &item->error);
+    }
+
+  return NULL;
+}
+
+/* Returns the objects with a crypttab entry that are not unlocked yet */
+static GPtrArray *
+get_crypttab_object_paths (UDisksDaemon *daemon)
+{
+  GPtrArray *ret;
+  GList *objects, *l;
+
+  ret = g_ptr_array_new_with_free_func (g_free);
+  objects = udisks_daemon_get_objects (daemon);
+  for (l = objects; l != NULL; l = l->next)
+    {
+      UDisksObject *object = UDISKS_OBJECT (l->data);
+      UDisksObject *cleartext_object;
+      UDisksBlock *block;
+      gboolean is_in_crypttab = FALSE;
+
+      block = udisks_object_peek_block (object);
+      if (block == NULL || udisks_object_peek_encrypted (object) == NULL)
+        continue;
+
+      if (!check_crypttab (block, FALSE, &is_in_crypttab, NULL, NULL, NULL, NULL) || !is_in_crypttab)
+        continue;
+
+      cleartext_object = wait_for_cleartext_object (daemon,
+                                                    (gpointer) g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+      if (cleartext_object != NULL)
+        {
+          g_object_unref (cleartext_object);
+          continue;
+        }
+
+      g_ptr_array_add (ret, g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object))));
+    }
+  g_ptr_array_add (ret, NULL);
+  g_list_free_full (objects, g_object_unref);
+
+  return ret;
+}
+
+/**
+ * udisks_linux_encrypted_unlock_batch:
+ * @daemon: A #UDisksDaemon.
+ * @invocation: The #GDBusMethodInvocation of the call to unlock the devices.
+ * @object_paths: The object paths of the encrypted devices to unlock or an empty array for all the
+ *   locked devices with a crypttab entry.
+ * @passphrase: The passphrase to unlock all the devices with or an empty string.
+ * @options: The options to unlock all the devices with.
+ * @error: Return location for error or %NULL.
+ *
+ * Unlocks the encrypted devices at @object_paths like the
+ * org.freedesktop.UDisks2.Encrypted.Unlock() method would, but updating
+ * the <filename>unlocked-luks</filename> state file once. Authorization
+ * is checked for each device, one at a time, before any device is
+ * unlocked. The devices are
+ * unlocked in parallel with as many threads as there are CPUs since
+ * deriving the keys is CPU bound.
+ *
+ * This function blocks until all the devices are processed.
+ *
+ * Returns: (transfer floating): A #GVariant of type <literal>a(ooss)</literal> with the object path,
+ *   the cleartext object path (<literal>/</literal> on failure), D-Bus error name and error message for each
+ *   device or %NULL if @error is set.
+ */
+GVariant *
+udisks_linux_encrypted_unlock_batch (UDisksDaemon           *daemon,
+                                     GDBusMethodInvocation  *invocation,
+                                     const gchar *const     *object_paths,
+                                     const gchar            *passphrase,
+                                     GVariant               *options,
+                                     GError                **error)
+{
+  UnlockBatch batch;
+  GPtrArray *crypttab_object_paths = NULL;
+  GPtrArray *threads;
+  GVariantBuilder builder;
+  GVariantBuilder state_builder;
+  const gchar *message;
+  guint num_unlocked = 0;
+  guint num_workers;
+  guint n;
+
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+  g_return_val_if_fail (G_IS_DBUS_METHOD_INVOCATION (invocation), NULL);
+  g_return_val_if_fail (object_paths != NULL, NULL);
+
+  memset (&batch, 0, sizeof (batch));
+  batch.daemon = daemon;
+
+  /* we need the uid of the caller for the unlocked-luks file */
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon, invocation, NULL /* GCancellable */, &batch.caller_uid, NULL, NULL, error))
+    return NULL;
+
+  if (object_paths[0] == NULL)
+    {
+      crypttab_object_paths = get_crypttab_object_paths (daemon);
+      object_paths = (const gchar *const *) crypttab_object_paths->pdata;
+    }
+
+  /* Collect and validate the devices */
+  batch.items = g_ptr_array_new_with_free_func ((GDestroyNotify) unlock_batch_item_free);
+  for (n = 0; object_paths[n] != NULL; n++)
+    {
+      UnlockBatchItem *item;
+      UDisksObject *object;
+      guint m;
+
+      item = g_slice_new0 (UnlockBatchItem);
+      item->object_path = object_paths[n];
+      g_ptr_array_add (batch.items, item);
+
+      for (m = 0; m < n; m++)
+        {
+          if (g_strcmp0 (object_paths[m], object_paths[n]) == 0)
+            break;
+        }
+      if (m < n)
+        {
+          g_set_error (&item->error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Object path %s at index %u was already given",
+                       object_paths[n], n);
+          continue;
+        }
+
+      object = udisks_daemon_find_object (daemon, object_paths[n]);
+      if (object == NULL || udisks_object_peek_encrypted (object) == NULL
+          || !UDISKS_IS_LINUX_BLOCK_OBJECT (object))
+        {
+          g_set_error (&item->error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Object path %s for index %u is not an encrypted device",
+                       object_paths[n], n);
+          g_clear_object (&object);
+          continue;
+        }
+
+      prepare_unlock (daemon, object, passphrase, options, batch.caller_uid, &item->request, &item->error);
+      g_object_unref (object);
+    }
+
+  /* Check authorization for each device like a single call would, one
+   * device at a time - checks with the same action and details as an
+   * earlier one are answered from the authorization cache
+   */
+  /* Translators: Shown in authentication dialog when the user
+   * requests unlocking an encrypted device.
+   *
+   * Do not translate $(drive), it's a placeholder and
+   * will be replaced by the name of the drive/device in question
+   */
+  message = N_("Authentication is required to unlock the encrypted device $(drive)");
+  for (n = 0; n < batch.items->len; n++)
+    {
+      UnlockBatchItem *item = batch.items->pdata[n];
+
+      if (item->error != NULL)
+        continue;
+
+      udisks_daemon_util_check_authorization_sync_with_error (daemon,
+                                                              item->request.object,
+                                                              item->request.action_id,
+                                                              options,
+                                                              message,
+                                                              invocation,
+                                                              &item->error);
+    }
+
+  /* deriving the keys is CPU bound, use one thread per CPU */
+  num_workers = MIN (batch.items->len, (guint) g_get_num_processors ());
+  threads = g_ptr_array_new ();
+  for (n = 0; n < num_workers; n++)
+    g_ptr_array_add (threads, g_thread_new ("unlock-batch", unlock_batch_thread_func, &batch));
+  for (n = 0; n < threads->len; n++)
+    g_thread_join (threads->pdata[n]);
+  g_ptr_array_unref (threads);
+
+  g_variant_builder_init (&builder, G_VARIANT_TYPE ("a(ooss)"));
+  g_variant_builder_init (&state_builder, G_VARIANT_TYPE ("a(ttsu)"));
+  for (n = 0; n < batch.items->len; n++)
+    {
+      UnlockBatchItem *item = batch.items->pdata[n];
+      gchar *error_name = NULL;
+
+      if (item->cleartext_object != NULL)
+        {
+          UDisksLinuxDevice *cleartext_device;
+          UDisksBlock *block;
+          UDisksBlock *cleartext_block;
+
+          block = udisks_object_peek_block (item->request.object);
+          cleartext_block = udisks_object_peek_block (item->cleartext_object);
+          cleartext_device = udisks_linux_block_object_get_device (UDISKS_LINUX_BLOCK_OBJECT (item->cleartext_object));
+          g_variant_builder_add (&state_builder,
+                                 "(ttsu)",
+                                 (guint64) udisks_block_get_device_number (cleartext_block),
+                                 (guint64) udisks_block_get_device_number (block),
+                                 g_udev_device_get_sysfs_attr (cleartext_device->udev_device, "dm/uuid"),
+                                 (guint32) batch.caller_uid);
+          num_unlocked++;
+          g_object_unref (cleartext_device);
+        }
+      else
+        {
+          error_name = g_dbus_error_encode_gerror (item->error);
+        }
+
+      g_variant_builder_add (&builder, "(ooss)",
+                             item->object_path,
+                             item->cleartext_object != NULL ?
+                               g_dbus_object_get_object_path (G_DBUS_OBJECT (item->cleartext_object)) : "/",
+                             error_name != NULL ? error_name : "",
+                             item->error != NULL ? item->error->message : "");
+      g_free (error_name);
+    }
+
+  /* update the unlocked-luks file once for all the unlocked devices */
+  if (num_unlocked > 0)
+    udisks_state_add_unlocked_luks_entries (udisks_daemon_get_state (daemon),
+                                            g_variant_builder_end (&state_builder));
+  else
+    g_variant_builder_clear (&state_builder);
+
+  g_ptr_array_unref (batch.items);
+  if (crypttab_object_paths != NULL)
+    g_ptr_array_unref (crypttab_object_paths);
+
+  return g_variant_builder_end (&builder);
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 gboolean
 udisks_linux_encrypted_lock (UDisksLinuxEncrypted   *encrypted,
                              GDBusMethodInvocation  *invocation,
@@ -546,6 +888,7 @@ udisks_linux_encrypted_lock (UDisksLinuxEncrypted   *encrypted,
                                                          g_strdup (g_dbus_object_get_object_path (G_DBUS_OBJECT (object))),
                                                          g_free,
                                                          0, /* timeout_seconds */
+                                                         NULL, /* cancellable */
                                                          NULL); /* error */
   if (cleartext_object == NULL)
     {
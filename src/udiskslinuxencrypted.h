@@ -38,6 +38,12 @@ gboolean         udisks_linux_encrypted_lock     (UDisksLinuxEncrypted   *encryp
                                                   GDBusMethodInvocation  *invocation,
                                                   GVariant               *options,
                                                   GError                **error);
+GVariant        *udisks_linux_encrypted_unlock_batch (UDisksDaemon           *daemon,
+                                                      GDBusMethodInvocation  *invocation,
+                                                      const gchar *const     *object_paths,
+                                                      const gchar            *passphrase,
+                                                      GVariant               *options,
+                                                      GError                **error);
 
 G_END_DECLS
 
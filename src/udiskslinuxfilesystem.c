@@ -1163,13 +1163,56 @@ is_system_managed (UDisksBlock  *block,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/* runs in thread dedicated to handling @invocation */
+typedef struct _FilesystemBatch FilesystemBatch;
+
+/* protects choosing and creating mount points */
+G_LOCK_DEFINE_STATIC (mount_point_lock);
+
+static gboolean filesystem_batch_check_authorization (FilesystemBatch        *batch,
+                                                      UDisksObject           *object,
+                                                      const gchar            *action_id,
+                                                      GVariant               *options,
+                                                      const gchar            *message,
+                                                      GError                **error);
+static void     filesystem_batch_add_mounted_fs      (FilesystemBatch        *batch,
+                                                      const gchar            *mount_point,
+                                                      dev_t                   block_device,
+                                                      uid_t                   uid,
+                                                      gboolean                fstab_mount);
+
+/* Checks authorization for a single call or for a filesystem of @batch */
 static gboolean
-handle_mount (UDisksFilesystem      *filesystem,
-              GDBusMethodInvocation *invocation,
-              GVariant              *options)
+check_authorization (UDisksDaemon           *daemon,
+                     UDisksObject           *object,
+                     const gchar            *action_id,
+                     GVariant               *options,
+                     const gchar            *message,
+                     GDBusMethodInvocation  *invocation,
+                     FilesystemBatch        *batch,
+                     GError                **error)
+{
+  if (batch != NULL)
+    return filesystem_batch_check_authorization (batch, object, action_id, options, message, error);
+
+  return udisks_daemon_util_check_authorization_sync_with_error (daemon,
+                                                                 object,
+                                                                 action_id,
+                                                                 options,
+                                                                 message,
+                                                                 invocation,
+                                                                 error);
+}
+
+/* must be called with filesystem->lock held */
+static gboolean
+mount_filesystem (UDisksFilesystem       *filesystem,
+                  UDisksObject           *object,
+                  GDBusMethodInvocation  *invocation,
+                  GVariant               *options,
+                  FilesystemBatch        *batch,
+                  gchar                 **out_mount_point,
+                  GError                **error)
 {
-  UDisksObject *object = NULL;
   UDisksBlock *block;
   UDisksDaemon *daemon;
   UDisksState *state;
@@ -1182,25 +1225,15 @@ handle_mount (UDisksFilesystem      *filesystem,
   gchar *mount_point_to_use = NULL;
   gchar *fstab_mount_options = NULL;
   gchar *caller_user_name = NULL;
-  GError *error = NULL;
+  GError *local_error = NULL;
   const gchar *action_id = NULL;
   const gchar *message = NULL;
   gboolean system_managed = FALSE;
   gboolean success = FALSE;
+  gboolean ret = FALSE;
   gchar *device = NULL;
   UDisksBaseJob *job = NULL;
 
-
-  /* only allow a single call at a time */
-  g_mutex_lock (&UDISKS_LINUX_FILESYSTEM (filesystem)->lock);
-
-  object = udisks_daemon_util_dup_object (filesystem, &error);
-  if (object == NULL)
-    {
-      g_dbus_method_invocation_take_error (invocation, error);
-      goto out;
-    }
-
   block = udisks_object_peek_block (object);
   daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
   state = udisks_daemon_get_state (daemon);
@@ -1225,29 +1258,24 @@ handle_mount (UDisksFilesystem      *filesystem,
             g_string_append (str, ", ");
           g_string_append_printf (str, "`%s'", existing_mount_points[n]);
         }
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_ALREADY_MOUNTED,
-                                             "Device %s is already mounted at %s.\n",
-                                             device,
-                                             str->str);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_ALREADY_MOUNTED,
+                   "Device %s is already mounted at %s.\n",
+                   device,
+                   str->str);
       g_string_free (str, TRUE);
       goto out;
     }
 
-  error = NULL;
   if (!udisks_daemon_util_get_caller_uid_sync (daemon,
                                                invocation,
                                                NULL /* GCancellable */,
                                                &caller_uid,
                                                &caller_gid,
                                                &caller_user_name,
-                                               &error))
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
-      goto out;
-    }
+                                               error))
+    goto out;
 
   if (system_managed)
     {
@@ -1275,12 +1303,14 @@ handle_mount (UDisksFilesystem      *filesystem,
                 }
             }
 
-          if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                            object,
-                                                            action_id,
-                                                            options,
-                                                            message,
-                                                            invocation))
+          if (!check_authorization (daemon,
+                                    object,
+                                    action_id,
+                                    options,
+                                    message,
+                                    invocation,
+                                    batch,
+                                    error))
             goto out;
           mount_fstab_as_root = TRUE;
         }
@@ -1289,12 +1319,12 @@ handle_mount (UDisksFilesystem      *filesystem,
         {
           if (g_mkdir_with_parents (mount_point_to_use, 0755) != 0)
             {
-              g_dbus_method_invocation_return_error (invocation,
-                                                     UDISKS_ERROR,
-                                                     UDISKS_ERROR_FAILED,
-                                                     "Error creating directory `%s' to be used for mounting %s: %m",
-                                                     mount_point_to_use,
-                                                     device);
+              g_set_error (error,
+                           UDISKS_ERROR,
+                           UDISKS_ERROR_FAILED,
+                           "Error creating directory `%s' to be used for mounting %s: %m",
+                           mount_point_to_use,
+                           device);
               goto out;
             }
         }
@@ -1312,7 +1342,7 @@ handle_mount (UDisksFilesystem      *filesystem,
           BDExtraArg gid_arg = {g_strdup ("run_as_gid"), g_strdup_printf("%d", find_primary_gid (caller_uid))};
           const BDExtraArg *extra_args[3] = {&uid_arg, &gid_arg, NULL};
 
-          success = bd_fs_mount (NULL, mount_point_to_use, NULL, NULL, extra_args, &error);
+          success = bd_fs_mount (NULL, mount_point_to_use, NULL, NULL, extra_args, &local_error);
 
           g_free (uid_arg.opt);
           g_free (uid_arg.val);
@@ -1321,45 +1351,49 @@ handle_mount (UDisksFilesystem      *filesystem,
         }
       else
         {
-          success = bd_fs_mount (NULL, mount_point_to_use, NULL, NULL, NULL, &error);
+          success = bd_fs_mount (NULL, mount_point_to_use, NULL, NULL, NULL, &local_error);
         }
 
       if (!success)
-          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, local_error->message);
       else
           udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), TRUE, NULL);
 
       if (!success)
         {
-          if (!mount_fstab_as_root && g_error_matches (error, BD_FS_ERROR, BD_FS_ERROR_AUTH))
+          if (!mount_fstab_as_root && g_error_matches (local_error, BD_FS_ERROR, BD_FS_ERROR_AUTH))
             {
-              if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                                object,
-                                                                "org.freedesktop.udisks2.filesystem-fstab",
-                                                                options,
-                                                                /* Translators: Shown in authentication dialog when the
-                                                                 * user requests mounting a filesystem that is in
-                                                                 * /etc/fstab file with the x-udisks-auth option.
-                                                                 *
-                                                                 * Do not translate $(drive), it's a
-                                                                 * placeholder and will be replaced by the name of
-                                                                 * the drive/device in question
-                                                                 *
-                                                                 * Do not translate /etc/fstab
-                                                                 */
-                                                                N_("Authentication is required to mount $(drive) referenced in the /etc/fstab file"),
-                                                                invocation))
+              g_clear_error (&local_error);
+              if (!check_authorization (daemon,
+                                        object,
+                                        "org.freedesktop.udisks2.filesystem-fstab",
+                                        options,
+                                        /* Translators: Shown in authentication dialog when the
+                                         * user requests mounting a filesystem that is in
+                                         * /etc/fstab file with the x-udisks-auth option.
+                                         *
+                                         * Do not translate $(drive), it's a
+                                         * placeholder and will be replaced by the name of
+                                         * the drive/device in question
+                                         *
+                                         * Do not translate /etc/fstab
+                                         */
+                                        N_("Authentication is required to mount $(drive) referenced in the /etc/fstab file"),
+                                        invocation,
+                                        batch,
+                                        error))
                 goto out;
               mount_fstab_as_root = TRUE;
               goto mount_fstab_again;
             }
 
-          g_dbus_method_invocation_return_error (invocation,
-                                                 UDISKS_ERROR,
-                                                 UDISKS_ERROR_FAILED,
-                                                 "Error mounting system-managed device %s: %s",
-                                                 device,
-                                                 error->message);
+          g_set_error (error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Error mounting system-managed device %s: %s",
+                       device,
+                       local_error->message);
+          g_clear_error (&local_error);
           goto out;
         }
       udisks_notice ("Mounted %s (system) at %s on behalf of uid %u",
@@ -1368,13 +1402,22 @@ handle_mount (UDisksFilesystem      *filesystem,
                      caller_uid);
 
       /* update the mounted-fs file */
-      udisks_state_add_mounted_fs (state,
-                                   mount_point_to_use,
-                                   udisks_block_get_device_number (block),
-                                   caller_uid,
-                                   TRUE); /* fstab_mounted */
-
-      udisks_filesystem_complete_mount (filesystem, invocation, mount_point_to_use);
+      if (batch != NULL)
+        filesystem_batch_add_mounted_fs (batch,
+                                         mount_point_to_use,
+                                         udisks_block_get_device_number (block),
+                                         caller_uid,
+                                         TRUE); /* fstab_mounted */
+      else
+        udisks_state_add_mounted_fs (state,
+                                     mount_point_to_use,
+                                     udisks_block_get_device_number (block),
+                                     caller_uid,
+                                     TRUE); /* fstab_mounted */
+
+      *out_mount_point = mount_point_to_use;
+      mount_point_to_use = NULL;
+      ret = TRUE;
       goto out;
     }
 
@@ -1393,41 +1436,31 @@ handle_mount (UDisksFilesystem      *filesystem,
   if (probed_fs_usage != NULL && strlen (probed_fs_usage) > 0 &&
       g_strcmp0 (probed_fs_usage, "filesystem") != 0)
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Cannot mount block device %s with probed usage `%s' - expected `filesystem'",
-                                             device,
-                                             probed_fs_usage);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Cannot mount block device %s with probed usage `%s' - expected `filesystem'",
+                   device,
+                   probed_fs_usage);
       goto out;
     }
 
   /* calculate filesystem type (guaranteed to be valid UTF-8) */
-  error = NULL;
   fs_type_to_use = calculate_fs_type (block,
                                       options,
-                                      &error);
+                                      error);
   if (fs_type_to_use == NULL)
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
-      goto out;
-    }
+    goto out;
 
   /* calculate mount options (guaranteed to be valid UTF-8) */
-  error = NULL;
   mount_options_to_use = calculate_mount_options (daemon,
                                                   block,
                                                   caller_uid,
                                                   fs_type_to_use,
                                                   options,
-                                                  &error);
+                                                  error);
   if (mount_options_to_use == NULL)
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
-      goto out;
-    }
+    goto out;
 
   /* Now, check that the user is actually authorized to mount the
    * device. Need to do this before calculating a mount point since we
@@ -1453,40 +1486,45 @@ handle_mount (UDisksFilesystem      *filesystem,
         }
     }
 
-  if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                    object,
-                                                    action_id,
-                                                    options,
-                                                    message,
-                                                    invocation))
+  if (!check_authorization (daemon,
+                            object,
+                            action_id,
+                            options,
+                            message,
+                            invocation,
+                            batch,
+                            error))
     goto out;
 
-  /* calculate mount point (guaranteed to be valid UTF-8) */
-  error = NULL;
+  /* calculate mount point (guaranteed to be valid UTF-8) and create it,
+   * other filesystems may be mounted in parallel with the same label
+   */
+  G_LOCK (mount_point_lock);
   mount_point_to_use = calculate_mount_point (daemon,
                                               block,
                                               caller_uid,
                                               caller_gid,
                                               caller_user_name,
                                               fs_type_to_use,
-                                              &error);
+                                              error);
   if (mount_point_to_use == NULL)
     {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
+      G_UNLOCK (mount_point_lock);
       goto out;
     }
 
   /* create the mount point */
   if (g_mkdir (mount_point_to_use, 0700) != 0)
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Error creating mount point `%s': %m",
-                                             mount_point_to_use);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Error creating mount point `%s': %m",
+                   mount_point_to_use);
+      G_UNLOCK (mount_point_lock);
       goto out;
     }
+  G_UNLOCK (mount_point_lock);
 
   job = udisks_daemon_launch_simple_job (daemon,
                                          UDISKS_OBJECT (object),
@@ -1494,38 +1532,48 @@ handle_mount (UDisksFilesystem      *filesystem,
                                          0,
                                          NULL /* cancellable */);
 
-  if (!bd_fs_mount (device, mount_point_to_use, fs_type_to_use, mount_options_to_use, NULL, &error))
+  if (!bd_fs_mount (device, mount_point_to_use, fs_type_to_use, mount_options_to_use, NULL, &local_error))
     {
       /* ugh, something went wrong.. we need to clean up the created mount point */
       if (g_rmdir (mount_point_to_use) != 0)
         udisks_warning ("Error removing directory %s: %m", mount_point_to_use);
 
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Error mounting %s at %s: %s",
-                                             device,
-                                             mount_point_to_use,
-                                             error->message);
-      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_FAILED,
+                   "Error mounting %s at %s: %s",
+                   device,
+                   mount_point_to_use,
+                   local_error->message);
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, local_error->message);
+      g_clear_error (&local_error);
       goto out;
     }
   else
     udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), TRUE, NULL);
 
   /* update the mounted-fs file */
-  udisks_state_add_mounted_fs (state,
-                               mount_point_to_use,
-                               udisks_block_get_device_number (block),
-                               caller_uid,
-                               FALSE); /* fstab_mounted */
+  if (batch != NULL)
+    filesystem_batch_add_mounted_fs (batch,
+                                     mount_point_to_use,
+                                     udisks_block_get_device_number (block),
+                                     caller_uid,
+                                     FALSE); /* fstab_mounted */
+  else
+    udisks_state_add_mounted_fs (state,
+                                 mount_point_to_use,
+                                 udisks_block_get_device_number (block),
+                                 caller_uid,
+                                 FALSE); /* fstab_mounted */
 
   udisks_notice ("Mounted %s at %s on behalf of uid %u",
                  device,
                  mount_point_to_use,
                  caller_uid);
 
-  udisks_filesystem_complete_mount (filesystem, invocation, mount_point_to_use);
+  *out_mount_point = mount_point_to_use;
+  mount_point_to_use = NULL;
+  ret = TRUE;
 
  out:
   g_free (fs_type_to_use);
@@ -1534,6 +1582,39 @@ handle_mount (UDisksFilesystem      *filesystem,
   g_free (fstab_mount_options);
   g_free (caller_user_name);
   g_free (device);
+  return ret;
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_mount (UDisksFilesystem      *filesystem,
+              GDBusMethodInvocation *invocation,
+              GVariant              *options)
+{
+  UDisksObject *object = NULL;
+  gchar *mount_point = NULL;
+  GError *error = NULL;
+
+  /* only allow a single call at a time */
+  g_mutex_lock (&UDISKS_LINUX_FILESYSTEM (filesystem)->lock);
+
+  object = udisks_daemon_util_dup_object (filesystem, &error);
+  if (object == NULL)
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  if (!mount_filesystem (filesystem, object, invocation, options, NULL, &mount_point, &error))
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  udisks_filesystem_complete_mount (filesystem, invocation, mount_point);
+
+ out:
+  g_free (mount_point);
   g_clear_object (&object);
 
   /* only allow a single call at a time */
@@ -1553,19 +1634,21 @@ get_error_code_for_umount (const gchar *error_message)
     return UDISKS_ERROR_FAILED;
 }
 
-/* runs in thread dedicated to handling @invocation */
+/* must be called with filesystem->lock held */
 static gboolean
-handle_unmount (UDisksFilesystem      *filesystem,
-                GDBusMethodInvocation *invocation,
-                GVariant              *options)
+unmount_filesystem (UDisksFilesystem       *filesystem,
+                    UDisksObject           *object,
+                    GDBusMethodInvocation  *invocation,
+                    GVariant               *options,
+                    FilesystemBatch        *batch,
+                    GError                **error)
 {
-  UDisksObject *object;
   UDisksBlock *block;
   UDisksDaemon *daemon;
   UDisksState *state;
   gchar *mount_point = NULL;
   gchar *fstab_mount_options = NULL;
-  GError *error = NULL;
+  GError *local_error = NULL;
   uid_t mounted_by_uid;
   uid_t caller_uid;
   const gchar *const *mount_points;
@@ -1573,18 +1656,9 @@ handle_unmount (UDisksFilesystem      *filesystem,
   gboolean system_managed = FALSE;
   gboolean fstab_mounted;
   gboolean success;
+  gboolean ret = FALSE;
   UDisksBaseJob *job = NULL;
 
-  /* only allow a single call at a time */
-  g_mutex_lock (&UDISKS_LINUX_FILESYSTEM (filesystem)->lock);
-
-  object = udisks_daemon_util_dup_object (filesystem, &error);
-  if (object == NULL)
-    {
-      g_dbus_method_invocation_take_error (invocation, error);
-      goto out;
-    }
-
   block = udisks_object_peek_block (object);
   daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
   state = udisks_daemon_get_state (daemon);
@@ -1600,21 +1674,16 @@ handle_unmount (UDisksFilesystem      *filesystem,
   mount_points = udisks_filesystem_get_mount_points (filesystem);
   if (mount_points == NULL || g_strv_length ((gchar **) mount_points) == 0)
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_NOT_MOUNTED,
-                                             "Device `%s' is not mounted",
-                                             udisks_block_get_device (block));
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   UDISKS_ERROR_NOT_MOUNTED,
+                   "Device `%s' is not mounted",
+                   udisks_block_get_device (block));
       goto out;
     }
 
-  error = NULL;
-  if (!udisks_daemon_util_get_caller_uid_sync (daemon, invocation, NULL, &caller_uid, NULL, NULL, &error))
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
-      goto out;
-    }
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon, invocation, NULL, &caller_uid, NULL, NULL, error))
+    goto out;
 
   /* check if mount point is managed by e.g. /etc/fstab or similar */
   if (is_system_managed (block, &mount_point, &fstab_mount_options))
@@ -1645,7 +1714,7 @@ handle_unmount (UDisksFilesystem      *filesystem,
           BDExtraArg gid_arg = {g_strdup ("run_as_gid"), g_strdup_printf("%d", find_primary_gid (caller_uid))};
           const BDExtraArg *extra_args[3] = {&uid_arg, &gid_arg, NULL};
 
-          success = bd_fs_unmount (mount_point, FALSE, opt_force, extra_args, &error);
+          success = bd_fs_unmount (mount_point, FALSE, opt_force, extra_args, &local_error);
 
           g_free (uid_arg.opt);
           g_free (uid_arg.val);
@@ -1653,56 +1722,59 @@ handle_unmount (UDisksFilesystem      *filesystem,
           g_free (gid_arg.val);
         }
       else
-          success = bd_fs_unmount (mount_point, FALSE, opt_force, NULL, &error);
+          success = bd_fs_unmount (mount_point, FALSE, opt_force, NULL, &local_error);
 
       if (!success)
-          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, local_error->message);
       else
           udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), TRUE, NULL);
 
       if (!success)
         {
-          if (!unmount_fstab_as_root && error->code == BD_FS_ERROR_AUTH)
+          if (!unmount_fstab_as_root && local_error->code == BD_FS_ERROR_AUTH)
             {
-              if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                                object,
-                                                                "org.freedesktop.udisks2.filesystem-fstab",
-                                                                options,
-                                                                /* Translators: Shown in authentication dialog when the
-                                                                 * user requests unmounting a filesystem that is in
-                                                                 * /etc/fstab file with the x-udisks-auth option.
-                                                                 *
-                                                                 * Do not translate $(drive), it's a
-                                                                 * placeholder and will be replaced by the name of
-                                                                 * the drive/device in question
-                                                                 *
-                                                                 * Do not translate /etc/fstab
-                                                                 */
-                                                                N_("Authentication is required to unmount $(drive) referenced in the /etc/fstab file"),
-                                                                invocation))
+              g_clear_error (&local_error);
+              if (!check_authorization (daemon,
+                                        object,
+                                        "org.freedesktop.udisks2.filesystem-fstab",
+                                        options,
+                                        /* Translators: Shown in authentication dialog when the
+                                         * user requests unmounting a filesystem that is in
+                                         * /etc/fstab file with the x-udisks-auth option.
+                                         *
+                                         * Do not translate $(drive), it's a
+                                         * placeholder and will be replaced by the name of
+                                         * the drive/device in question
+                                         *
+                                         * Do not translate /etc/fstab
+                                         */
+                                        N_("Authentication is required to unmount $(drive) referenced in the /etc/fstab file"),
+                                        invocation,
+                                        batch,
+                                        error))
                 goto out;
               unmount_fstab_as_root = TRUE;
               goto unmount_fstab_again;
             }
 
-          g_dbus_method_invocation_return_error (invocation,
-                                                 UDISKS_ERROR,
-                                                 get_error_code_for_umount (error->message),
-                                                 "Error unmounting system-managed device %s: %s",
-                                                 udisks_block_get_device (block),
-                                                 error->message);
-
+          g_set_error (error,
+                       UDISKS_ERROR,
+                       get_error_code_for_umount (local_error->message),
+                       "Error unmounting system-managed device %s: %s",
+                       udisks_block_get_device (block),
+                       local_error->message);
+          g_clear_error (&local_error);
           goto out;
         }
       udisks_notice ("Unmounted %s (system) from %s on behalf of uid %u",
                      udisks_block_get_device (block),
                      mount_point,
                      caller_uid);
-      udisks_filesystem_complete_unmount (filesystem, invocation);
+      ret = TRUE;
       goto out;
     }
 
-  error = NULL;
+  g_free (mount_point);
   mount_point = udisks_state_find_mounted_fs (state,
                                               udisks_block_get_device_number (block),
                                               &mounted_by_uid,
@@ -1728,12 +1800,14 @@ handle_unmount (UDisksFilesystem      *filesystem,
        */
       message = N_("Authentication is required to unmount $(drive) mounted by another user");
 
-      if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                        object,
-                                                        action_id,
-                                                        options,
-                                                        message,
-                                                        invocation))
+      if (!check_authorization (daemon,
+                                object,
+                                action_id,
+                                options,
+                                message,
+                                invocation,
+                                batch,
+                                error))
         goto out;
     }
 
@@ -1744,15 +1818,16 @@ handle_unmount (UDisksFilesystem      *filesystem,
                                          NULL);
 
   if (!bd_fs_unmount (mount_point ? mount_point : udisks_block_get_device (block),
-                      FALSE, opt_force, NULL, &error))
+                      FALSE, opt_force, NULL, &local_error))
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             get_error_code_for_umount (error->message),
-                                             "Error unmounting %s: %s",
-                                             udisks_block_get_device (block),
-                                             error->message);
-      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_set_error (error,
+                   UDISKS_ERROR,
+                   get_error_code_for_umount (local_error->message),
+                   "Error unmounting %s: %s",
+                   udisks_block_get_device (block),
+                   local_error->message);
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, local_error->message);
+      g_clear_error (&local_error);
       goto out;
     }
   else
@@ -1763,12 +1838,42 @@ handle_unmount (UDisksFilesystem      *filesystem,
   udisks_notice ("Unmounted %s on behalf of uid %u",
                  udisks_block_get_device (block),
                  caller_uid);
-
-  udisks_filesystem_complete_unmount (filesystem, invocation);
+  ret = TRUE;
 
  out:
   g_free (mount_point);
   g_free (fstab_mount_options);
+  return ret;
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_unmount (UDisksFilesystem      *filesystem,
+                GDBusMethodInvocation *invocation,
+                GVariant              *options)
+{
+  UDisksObject *object;
+  GError *error = NULL;
+
+  /* only allow a single call at a time */
+  g_mutex_lock (&UDISKS_LINUX_FILESYSTEM (filesystem)->lock);
+
+  object = udisks_daemon_util_dup_object (filesystem, &error);
+  if (object == NULL)
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  if (!unmount_filesystem (filesystem, object, invocation, options, NULL, &error))
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  udisks_filesystem_complete_unmount (filesystem, invocation);
+
+ out:
   g_clear_object (&object);
 
   g_mutex_unlock (&UDISKS_LINUX_FILESYSTEM (filesystem)->lock);
@@ -1778,6 +1883,479 @@ handle_unmount (UDisksFilesystem      *filesystem,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* Maximum number of filesystems mounted or unmounted at the same time by
+ * udisks_linux_filesystem_mount_batch() and udisks_linux_filesystem_unmount_batch()
+ */
+#define FILESYSTEM_BATCH_MAX_WORKERS 8
+
+typedef struct _FilesystemBatchItem FilesystemBatchItem;
+
+struct _FilesystemBatchItem
+{
+  const gchar           *object_path;
+  UDisksObject          *object;
+  UDisksFilesystem      *filesystem;
+  gchar                **mount_points;  /* known mount points, used for ordering */
+  GPtrArray             *dependencies;  /* items that have to be done before this one */
+  gboolean               started;
+  gboolean               done;
+  gchar                 *mount_point;
+  GError                *error;
+};
+
+struct _FilesystemBatch
+{
+  UDisksDaemon          *daemon;
+  GDBusMethodInvocation *invocation;
+  GVariant              *options;
+  gboolean               unmount;
+
+  /* only one authorization is checked at a time */
+  GMutex                 auth_lock;
+
+  /* protects everything below */
+  GMutex                 lock;
+  GCond                  cond;
+  GPtrArray             *items;
+  guint                  num_not_started;
+  GVariantBuilder        mounted_fs_builder;
+  guint                  num_mounted_fs;
+};
+
+static void
+filesystem_batch_item_free (FilesystemBatchItem *item)
+{
+  g_clear_object (&item->object);
+  g_clear_object (&item->filesystem);
+  g_strfreev (item->mount_points);
+  if (item->dependencies != NULL)
+    g_ptr_array_unref (item->dependencies);
+  g_free (item->mount_point);
+  g_clear_error (&item->error);
+  g_slice_free (FilesystemBatchItem, item);
+}
+
+/* Checks authorization for @object like a single call would. The checks
+ * are serialized so that the caller is not asked to authenticate for
+ * several filesystems at once and checks with the same action and
+ * details as an earlier one are answered from the authorization cache.
+ */
+static gboolean
+filesystem_batch_check_authorization (FilesystemBatch  *batch,
+                                      UDisksObject     *object,
+                                      const gchar      *action_id,
+                                      GVariant         *options,
+                                      const gchar      *message,
+                                      GError          **error)
+{
+  gboolean ret;
+
+  g_mutex_lock (&batch->auth_lock);
+  ret = udisks_daemon_util_check_authorization_sync_with_error (batch->daemon,
+                                                                object,
+                                                                action_id,
+                                                                options,
+                                                                message,
+                                                                batch->invocation,
+                                                                error);
+  g_mutex_unlock (&batch->auth_lock);
+
+  return ret;
+}
+
+static void
+filesystem_batch_add_mounted_fs (FilesystemBatch *batch,
+                                 const gchar     *mount_point,
+                                 dev_t            block_device,
+                                 uid_t            uid,
+                                 gboolean         fstab_mount)
+{
+  g_mutex_lock (&batch->lock);
+  g_variant_builder_add (&batch->mounted_fs_builder,
+                         "(stub)",
+                         mount_point,
+                         (guint64) block_device,
+                         (guint32) uid,
+                         fstab_mount);
+  batch->num_mounted_fs++;
+  g_mutex_unlock (&batch->lock);
+}
+
+static gboolean
+is_below_mount_point (const gchar *path,
+                      const gchar *mount_point)
+{
+  gsize len = strlen (mount_point);
+
+  if (!g_str_has_prefix (path, mount_point) || path[len] == '\0')
+    return FALSE;
+
+  return path[len] == '/' || (len > 0 && mount_point[len - 1] == '/');
+}
+
+/* Returns %TRUE if @item has to wait for @other: nested filesystems are
+ * mounted after and unmounted before the filesystem they are nested in
+ */
+static gboolean
+filesystem_batch_item_depends_on (FilesystemBatch     *batch,
+                                  FilesystemBatchItem *item,
+                                  FilesystemBatchItem *other)
+{
+  guint n, m;
+
+  if (item->mount_points == NULL || other->mount_points == NULL)
+    return FALSE;
+
+  for (n = 0; item->mount_points[n] != NULL; n++)
+    {
+      for (m = 0; other->mount_points[m] != NULL; m++)
+        {
+          if (batch->unmount && is_below_mount_point (other->mount_points[m], item->mount_points[n]))
+            return TRUE;
+          if (!batch->unmount && is_below_mount_point (item->mount_points[n], other->mount_points[m]))
+            return TRUE;
+        }
+    }
+
+  return FALSE;
+}
+
+/* must be called with batch->lock held, returns the next item that can be
+ * processed or %NULL if all the remaining items have to wait
+ */
+static FilesystemBatchItem *
+filesystem_batch_next_item (FilesystemBatch *batch)
+{
+  guint n, m;
+
+  for (n = 0; n < batch->items->len; n++)
+    {
+      FilesystemBatchItem *item = batch->items->pdata[n];
+      gboolean ready = TRUE;
+
+      if (item->started)
+        continue;
+
+      for (m = 0; item->dependencies != NULL && m < item->dependencies->len; m++)
+        {
+          FilesystemBatchItem *dependency = item->dependencies->pdata[m];
+
+          if (!dependency->done)
+            {
+              ready = FALSE;
+              break;
+            }
+
+          /* a filesystem that is already mounted (or unmounted) is fine */
+          if (dependency->error != NULL
+              && !g_error_matches (dependency->error,
+                                   UDISKS_ERROR,
+                                   batch->unmount ? UDISKS_ERROR_NOT_MOUNTED : UDISKS_ERROR_ALREADY_MOUNTED))
+            {
+              if (batch->unmount)
+                g_set_error (&item->error,
+                             UDISKS_ERROR,
+                             UDISKS_ERROR_DEVICE_BUSY,
+                             "Not unmounting %s, failed to unmount the filesystem %s mounted below it",
+                             item->object_path,
+                             dependency->object_path);
+              else
+                g_set_error (&item->error,
+                             UDISKS_ERROR,
+                             UDISKS_ERROR_FAILED,
+                             "Not mounting %s, failed to mount the filesystem %s it is mounted below",
+                             item->object_path,
+                             dependency->object_path);
+              item->started = TRUE;
+              item->done = TRUE;
+              batch->num_not_started--;
+              /* items depending on this one may be waiting */
+              g_cond_broadcast (&batch->cond);
+              ready = FALSE;
+              break;
+            }
+        }
+
+      if (ready)
+        return item;
+    }
+
+  return NULL;
+}
+
+static gpointer
+filesystem_batch_thread_func (gpointer user_data)
+{
+  FilesystemBatch *batch = user_data;
+  FilesystemBatchItem *item;
+
+  g_mutex_lock (&batch->lock);
+  while (batch->num_not_started > 0)
+    {
+      item = filesystem_batch_next_item (batch);
+      if (item == NULL)
+        {
+          /* the remaining items may just have failed, see filesystem_batch_next_item() */
+          if (batch->num_not_started > 0)
+            g_cond_wait (&batch->cond, &batch->lock);
+          continue;
+        }
+
+      item->started = TRUE;
+      batch->num_not_started--;
+      g_mutex_unlock (&batch->lock);
+
+      g_mutex_lock (&UDISKS_LINUX_FILESYSTEM (item->filesystem)->lock);
+      if (batch->unmount)
+        unmount_filesystem (item->filesystem,
+                            item->object,
+                            batch->invocation,
+                            batch->options,
+                            batch,
+                            &item->error);
+      else
+        mount_filesystem (item->filesystem,
+                          item->object,
+                          batch->invocation,
+                          batch->options,
+                          batch,
+                          &item->mount_point,
+                          &item->error);
+      g_mutex_unlock (&UDISKS_LINUX_FILESYSTEM (item->filesystem)->lock);
+
+      g_mutex_lock (&batch->lock);
+      item->done = TRUE;
+      g_cond_broadcast (&batch->cond);
+    }
+  g_mutex_unlock (&batch->lock);
+
+  return NULL;
+}
+
+static GVariant *
+filesystem_batch_run (UDisksDaemon           *daemon,
+                      GDBusMethodInvocation  *invocation,
+                      const gchar *const     *object_paths,
+                      GVariant               *options,
+                      gboolean                unmount)
+{
+  FilesystemBatch batch;
+  GHashTable *seen_paths;
+  GPtrArray *threads;
+  GVariantBuilder builder;
+  guint num_workers;
+  guint n, m;
+
+  memset (&batch, 0, sizeof (batch));
+  batch.daemon = daemon;
+  batch.invocation = invocation;
+  batch.options = options;
+  batch.unmount = unmount;
+  g_mutex_init (&batch.auth_lock);
+  g_mutex_init (&batch.lock);
+  g_cond_init (&batch.cond);
+  batch.items = g_ptr_array_new_with_free_func ((GDestroyNotify) filesystem_batch_item_free);
+  g_variant_builder_init (&batch.mounted_fs_builder, G_VARIANT_TYPE ("a(stub)"));
+
+  /* Collect and validate the filesystems */
+  seen_paths = g_hash_table_new (g_str_hash, g_str_equal);
+  for (n = 0; object_paths[n] != NULL; n++)
+    {
+      FilesystemBatchItem *item;
+
+      item = g_slice_new0 (FilesystemBatchItem);
+      item->object_path = object_paths[n];
+      g_ptr_array_add (batch.items, item);
+
+      if (g_hash_table_contains (seen_paths, object_paths[n]))
+        {
+          g_set_error (&item->error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Object path %s at index %u was already given",
+                       object_paths[n], n);
+          goto invalid;
+        }
+      g_hash_table_add (seen_paths, (gpointer) object_paths[n]);
+
+      item->object = udisks_daemon_find_object (daemon, object_paths[n]);
+      if (item->object == NULL)
+        {
+          g_set_error (&item->error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Invalid object path %s at index %u",
+                       object_paths[n], n);
+          goto invalid;
+        }
+
+      item->filesystem = udisks_object_get_filesystem (item->object);
+      if (item->filesystem == NULL || !UDISKS_IS_LINUX_FILESYSTEM (item->filesystem)
+          || !UDISKS_IS_LINUX_BLOCK_OBJECT (item->object))
+        {
+          g_set_error (&item->error,
+                       UDISKS_ERROR,
+                       UDISKS_ERROR_FAILED,
+                       "Object path %s for index %u is not a filesystem",
+                       object_paths[n], n);
+          goto invalid;
+        }
+
+      if (unmount)
+        {
+          item->mount_points = g_strdupv ((gchar **) udisks_filesystem_get_mount_points (item->filesystem));
+        }
+      else
+        {
+          gchar *mount_point = NULL;
+
+          /* only mount points from /etc/fstab are known in advance */
+          if (is_system_managed (udisks_object_peek_block (item->object), &mount_point, NULL))
+            {
+              item->mount_points = g_new0 (gchar *, 2);
+              item->mount_points[0] = mount_point;
+            }
+        }
+
+      batch.num_not_started++;
+      continue;
+
+    invalid:
+      item->started = TRUE;
+      item->done = TRUE;
+    }
+  g_hash_table_unref (seen_paths);
+
+  /* Work out the order for nested mount points */
+  for (n = 0; n < batch.items->len; n++)
+    {
+      FilesystemBatchItem *item = batch.items->pdata[n];
+
+      if (item->done)
+        continue;
+
+      for (m = 0; m < batch.items->len; m++)
+        {
+          FilesystemBatchItem *other = batch.items->pdata[m];
+
+          if (m == n || other->done || !filesystem_batch_item_depends_on (&batch, item, other))
+            continue;
+
+          if (item->dependencies == NULL)
+            item->dependencies = g_ptr_array_new ();
+          g_ptr_array_add (item->dependencies, other);
+        }
+    }
+
+  num_workers = MIN (batch.num_not_started, FILESYSTEM_BATCH_MAX_WORKERS);
+  threads = g_ptr_array_new ();
+  for (n = 0; n < num_workers; n++)
+    g_ptr_array_add (threads, g_thread_new ("filesystem-batch", filesystem_batch_thread_func, &batch));
+  for (n = 0; n < threads->len; n++)
+    g_thread_join (threads->pdata[n]);
+  g_ptr_array_unref (threads);
+
+  /* update the mounted-fs file once for all the mounted filesystems */
+  if (batch.num_mounted_fs > 0)
+    udisks_state_add_mounted_fs_entries (udisks_daemon_get_state (daemon),
+                                         g_variant_builder_end (&batch.mounted_fs_builder));
+  else
+    g_variant_builder_clear (&batch.mounted_fs_builder);
+
+  g_variant_builder_init (&builder, unmount ? G_VARIANT_TYPE ("a(oss)") : G_VARIANT_TYPE ("a(osss)"));
+  for (n = 0; n < batch.items->len; n++)
+    {
+      FilesystemBatchItem *item = batch.items->pdata[n];
+      gchar *error_name = NULL;
+
+      if (item->error != NULL)
+        error_name = g_dbus_error_encode_gerror (item->error);
+
+      if (unmount)
+        g_variant_builder_add (&builder, "(oss)",
+                               item->object_path,
+                               error_name != NULL ? error_name : "",
+                               item->error != NULL ? item->error->message : "");
+      else
+        g_variant_builder_add (&builder, "(osss)",
+                               item->object_path,
+                               item->mount_point != NULL ? item->mount_point : "",
+                               error_name != NULL ? error_name : "",
+                               item->error != NULL ? item->error->message : "");
+      g_free (error_name);
+    }
+
+  g_ptr_array_unref (batch.items);
+  g_cond_clear (&batch.cond);
+  g_mutex_clear (&batch.lock);
+  g_mutex_clear (&batch.auth_lock);
+
+  return g_variant_builder_end (&builder);
+}
+
+/**
+ * udisks_linux_filesystem_mount_batch:
+ * @daemon: A #UDisksDaemon.
+ * @invocation: The #GDBusMethodInvocation of the call to mount the filesystems.
+ * @object_paths: The object paths of the filesystems to mount.
+ * @options: The options to mount all the filesystems with.
+ *
+ * Mounts the filesystems at @object_paths in parallel, like the
+ * org.freedesktop.UDisks2.Filesystem.Mount() method would, but updating
+ * the <filename>mounted-fs</filename> state file once. Authorization is
+ * checked for each filesystem, one at a time. Filesystems with
+ * mount points nested in the mount point of another filesystem are
+ * mounted after that one.
+ *
+ * This function blocks until all the filesystems are processed.
+ *
+ * Returns: (transfer floating): A #GVariant of type <literal>a(osss)</literal> with the
+ *   object path, mount point, D-Bus error name and error message for
+ *   each element of @object_paths.
+ */
+GVariant *
+udisks_linux_filesystem_mount_batch (UDisksDaemon           *daemon,
+                                     GDBusMethodInvocation  *invocation,
+                                     const gchar *const     *object_paths,
+                                     GVariant               *options)
+{
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+  g_return_val_if_fail (G_IS_DBUS_METHOD_INVOCATION (invocation), NULL);
+  g_return_val_if_fail (object_paths != NULL, NULL);
+
+  return filesystem_batch_run (daemon, invocation, object_paths, options, FALSE);
+}
+
+/**
+ * udisks_linux_filesystem_unmount_batch:
+ * @daemon: A #UDisksDaemon.
+ * @invocation: The #GDBusMethodInvocation of the call to unmount the filesystems.
+ * @object_paths: The object paths of the filesystems to unmount.
+ * @options: The options to unmount all the filesystems with.
+ *
+ * Like udisks_linux_filesystem_mount_batch() but unmounts the
+ * filesystems. Filesystems are unmounted after the filesystems mounted
+ * below them.
+ *
+ * Returns: (transfer floating): A #GVariant of type <literal>a(oss)</literal> with the
+ *   object path, D-Bus error name and error message for each element of
+ *   @object_paths.
+ */
+GVariant *
+udisks_linux_filesystem_unmount_batch (UDisksDaemon           *daemon,
+                                       GDBusMethodInvocation  *invocation,
+                                       const gchar *const     *object_paths,
+                                       GVariant               *options)
+{
+  g_return_val_if_fail (UDISKS_IS_DAEMON (daemon), NULL);
+  g_return_val_if_fail (G_IS_DBUS_METHOD_INVOCATION (invocation), NULL);
+  g_return_val_if_fail (object_paths != NULL, NULL);
+
+  return filesystem_batch_run (daemon, invocation, object_paths, options, TRUE);
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 /* runs in thread dedicated to handling method call */
 static gboolean
 handle_set_label (UDisksFilesystem      *filesystem,
@@ -33,6 +33,14 @@ GType             udisks_linux_filesystem_get_type (void) G_GNUC_CONST;
 UDisksFilesystem *udisks_linux_filesystem_new      (void);
 void              udisks_linux_filesystem_update   (UDisksLinuxFilesystem  *filesystem,
                                                     UDisksLinuxBlockObject *object);
+GVariant         *udisks_linux_filesystem_mount_batch   (UDisksDaemon           *daemon,
+                                                         GDBusMethodInvocation  *invocation,
+                                                         const gchar *const     *object_paths,
+                                                         GVariant               *options);
+GVariant         *udisks_linux_filesystem_unmount_batch (UDisksDaemon           *daemon,
+                                                         GDBusMethodInvocation  *invocation,
+                                                         const gchar *const     *object_paths,
+                                                         GVariant               *options);
 
 G_END_DECLS
 
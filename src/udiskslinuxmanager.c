@@ -43,6 +43,8 @@
 #include "udisksdaemonutil.h"
 #include "udisksstate.h"
 #include "udiskslinuxblockobject.h"
+#include "udiskslinuxfilesystem.h"
+#include "udiskslinuxencrypted.h"
 #include "udiskslinuxdevice.h"
 #include "udisksmodulemanager.h"
 #include "udiskslinuxfsinfo.h"
@@ -197,6 +199,7 @@ udisks_linux_manager_new (UDisksDaemon *daemon)
   return UDISKS_MANAGER (g_object_new (UDISKS_TYPE_LINUX_MANAGER,
                                        "daemon", daemon,
                                        "version", PACKAGE_VERSION,
+                                       "startup-profile", udisks_daemon_get_startup_profile (daemon),
                                        NULL));
 }
 
@@ -402,6 +405,7 @@ handle_loop_setup (UDisksManager          *object,
                                                     &wait_data,
                                                     NULL,
                                                     10, /* timeout_seconds */
+                                                    NULL, /* cancellable */
                                                     &error);
   if (loop_object == NULL)
     {
@@ -734,6 +738,7 @@ handle_mdraid_create (UDisksManager         *_object,
                                                      raid_device_file,
                                                      NULL,
                                                      10, /* timeout_seconds */
+                                                     NULL, /* cancellable */
                                                      &error);
   if (array_object == NULL)
     {
@@ -869,10 +874,361 @@ handle_enable_modules (UDisksManager *object,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+static void
+variant_unref0 (GVariant *value)
+{
+  if (value != NULL)
+    g_variant_unref (value);
+}
+
+/* Gets the properties of the @interface_name interface of @object or %NULL
+ * if @object doesn't implement it. The properties of each interface are
+ * only computed once per query, @cache keeps them.
+ */
+static GVariant *
+query_get_properties (GDBusObject *object,
+                      const gchar *interface_name,
+                      GHashTable  *cache)
+{
+  GDBusInterface *iface;
+  GVariant *ret = NULL;
+
+  if (g_hash_table_lookup_extended (cache, interface_name, NULL, (gpointer *) &ret))
+    return ret;
+
+  iface = g_dbus_object_get_interface (object, interface_name);
+  if (iface != NULL)
+    {
+      if (G_IS_DBUS_INTERFACE_SKELETON (iface))
+        ret = g_dbus_interface_skeleton_get_properties (G_DBUS_INTERFACE_SKELETON (iface));
+      g_object_unref (iface);
+    }
+  g_hash_table_insert (cache, g_strdup (interface_name), ret);
+
+  return ret;
+}
+
+static gboolean
+value_has_prefix (GVariant    *value,
+                  const gchar *prefix)
+{
+  if (g_variant_is_of_type (value, G_VARIANT_TYPE_STRING)
+      || g_variant_is_of_type (value, G_VARIANT_TYPE_OBJECT_PATH))
+    return g_str_has_prefix (g_variant_get_string (value, NULL), prefix);
+
+  if (g_variant_is_of_type (value, G_VARIANT_TYPE_BYTESTRING))
+    return g_str_has_prefix (g_variant_get_bytestring (value), prefix);
+
+  return FALSE;
+}
+
+static gboolean
+value_matches (GVariant    *value,
+               const gchar *match,
+               GVariant    *filter_value)
+{
+  gboolean is_array;
+  GVariantIter iter;
+  GVariant *child;
+  gboolean ret = FALSE;
+
+  if (g_strcmp0 (match, "equals") == 0)
+    {
+      if (g_variant_equal (value, filter_value))
+        return TRUE;
+      is_array = g_variant_is_of_type (value, G_VARIANT_TYPE_ARRAY)
+                 && g_variant_type_equal (g_variant_type_element (g_variant_get_type (value)),
+                                          g_variant_get_type (filter_value));
+    }
+  else
+    {
+      if (value_has_prefix (value, g_variant_get_string (filter_value, NULL)))
+        return TRUE;
+      is_array = g_variant_is_of_type (value, G_VARIANT_TYPE_ARRAY)
+                 && !g_variant_is_of_type (value, G_VARIANT_TYPE_BYTESTRING);
+    }
+
+  if (!is_array)
+    return FALSE;
+
+  /* any element matching is enough */
+  g_variant_iter_init (&iter, value);
+  while (!ret && (child = g_variant_iter_next_value (&iter)) != NULL)
+    {
+      if (g_strcmp0 (match, "equals") == 0)
+        ret = g_variant_equal (child, filter_value);
+      else
+        ret = value_has_prefix (child, g_variant_get_string (filter_value, NULL));
+      g_variant_unref (child);
+    }
+
+  return ret;
+}
+
+static gboolean
+query_object_matches (GDBusObject *object,
+                      GVariant    *filters,
+                      GHashTable  *cache)
+{
+  GVariantIter iter;
+  const gchar *interface_name;
+  const gchar *property_name;
+  const gchar *match;
+  GVariant *filter_value;
+
+  g_variant_iter_init (&iter, filters);
+  while (g_variant_iter_next (&iter, "(&s&s&sv)", &interface_name, &property_name, &match, &filter_value))
+    {
+      GVariant *properties;
+      GVariant *value = NULL;
+      gboolean matches = FALSE;
+
+      properties = query_get_properties (object, interface_name, cache);
+      if (properties != NULL && *property_name == '\0')
+        matches = TRUE;
+      else if (properties != NULL)
+        {
+          value = g_variant_lookup_value (properties, property_name, NULL);
+          if (value != NULL)
+            {
+              matches = value_matches (value, match, filter_value);
+              g_variant_unref (value);
+            }
+        }
+      g_variant_unref (filter_value);
+
+      if (!matches)
+        return FALSE;
+    }
+
+  return TRUE;
+}
+
+/* Adds the projected interfaces and properties of @object to @builder,
+ * returns %FALSE if there are none.
+ */
+static gboolean
+query_add_object (GVariantBuilder *builder,
+                  GDBusObject     *object,
+                  GVariant        *projection,
+                  GHashTable      *cache)
+{
+  GVariantBuilder interfaces_builder;
+  gboolean have_interfaces = FALSE;
+
+  g_variant_builder_init (&interfaces_builder, G_VARIANT_TYPE ("a{sa{sv}}"));
+
+  if (g_variant_n_children (projection) == 0)
+    {
+      GList *interfaces, *l;
+
+      interfaces = g_dbus_object_get_interfaces (object);
+      for (l = interfaces; l != NULL; l = l->next)
+        {
+          const gchar *interface_name;
+          GVariant *properties;
+
+          interface_name = g_dbus_interface_get_info (G_DBUS_INTERFACE (l->data))->name;
+          properties = query_get_properties (object, interface_name, cache);
+          if (properties != NULL)
+            {
+              g_variant_builder_add (&interfaces_builder, "{s@a{sv}}", interface_name, properties);
+              have_interfaces = TRUE;
+            }
+        }
+      g_list_free_full (interfaces, g_object_unref);
+    }
+  else
+    {
+      GVariantIter iter;
+      const gchar *interface_name;
+      const gchar **property_names;
+
+      g_variant_iter_init (&iter, projection);
+      while (g_variant_iter_next (&iter, "{&s^a&s}", &interface_name, &property_names))
+        {
+          GVariant *properties;
+
+          properties = query_get_properties (object, interface_name, cache);
+          if (properties != NULL && property_names[0] == NULL)
+            {
+              g_variant_builder_add (&interfaces_builder, "{s@a{sv}}", interface_name, properties);
+              have_interfaces = TRUE;
+            }
+          else if (properties != NULL)
+            {
+              GVariantBuilder properties_builder;
+              guint n;
+
+              g_variant_builder_init (&properties_builder, G_VARIANT_TYPE_VARDICT);
+              for (n = 0; property_names[n] != NULL; n++)
+                {
+                  GVariant *value = g_variant_lookup_value (properties, property_names[n], NULL);
+                  if (value != NULL)
+                    {
+                      g_variant_builder_add (&properties_builder, "{sv}", property_names[n], value);
+                      g_variant_unref (value);
+                    }
+                }
+              g_variant_builder_add (&interfaces_builder, "{sa{sv}}", interface_name, &properties_builder);
+              have_interfaces = TRUE;
+            }
+          g_free (property_names);
+        }
+    }
+
+  if (!have_interfaces)
+    {
+      g_variant_builder_clear (&interfaces_builder);
+      return FALSE;
+    }
+
+  g_variant_builder_add (builder, "{oa{sa{sv}}}",
+                         g_dbus_object_get_object_path (object),
+                         &interfaces_builder);
+  return TRUE;
+}
+
+static gboolean
+handle_query_objects (UDisksManager         *object,
+                      GDBusMethodInvocation *invocation,
+                      GVariant              *arg_projection,
+                      GVariant              *arg_filters,
+                      GVariant              *arg_options)
+{
+  UDisksLinuxManager *manager = UDISKS_LINUX_MANAGER (object);
+  GDBusObjectManager *object_manager;
+  GVariantBuilder builder;
+  GVariantIter iter;
+  const gchar *property_name;
+  const gchar *match;
+  GVariant *filter_value;
+  GList *objects, *l;
+
+  /* check the filters before doing anything */
+  g_variant_iter_init (&iter, arg_filters);
+  while (g_variant_iter_next (&iter, "(&s&s&sv)", NULL, &property_name, &match, &filter_value))
+    {
+      gboolean valid;
+
+      if (*property_name == '\0')
+        valid = TRUE;
+      else if (g_strcmp0 (match, "equals") == 0)
+        valid = TRUE;
+      else if (g_strcmp0 (match, "prefix") == 0)
+        valid = g_variant_is_of_type (filter_value, G_VARIANT_TYPE_STRING);
+      else
+        valid = FALSE;
+      g_variant_unref (filter_value);
+
+      if (!valid)
+        {
+          g_dbus_method_invocation_return_error (invocation,
+                                                 UDISKS_ERROR,
+                                                 UDISKS_ERROR_FAILED,
+                                                 "Invalid filter for property %s: match type %s",
+                                                 property_name, match);
+          return TRUE;
+        }
+    }
+
+  /* one pass over the objects, each interface's properties are computed at most once */
+  g_variant_builder_init (&builder, G_VARIANT_TYPE ("a{oa{sa{sv}}}"));
+  object_manager = G_DBUS_OBJECT_MANAGER (udisks_daemon_get_object_manager (manager->daemon));
+  objects = g_dbus_object_manager_get_objects (object_manager);
+  for (l = objects; l != NULL; l = l->next)
+    {
+      GDBusObject *dbus_object = G_DBUS_OBJECT (l->data);
+      GHashTable *cache;
+
+      cache = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, (GDestroyNotify) variant_unref0);
+      if (query_object_matches (dbus_object, arg_filters, cache))
+        query_add_object (&builder, dbus_object, arg_projection, cache);
+      g_hash_table_unref (cache);
+    }
+  g_list_free_full (objects, g_object_unref);
+
+  udisks_manager_complete_query_objects (object, invocation, g_variant_builder_end (&builder));
+
+  return TRUE; /* returning TRUE means that we handled the method invocation */
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_mount_filesystems (UDisksManager         *object,
+                          GDBusMethodInvocation *invocation,
+                          const gchar *const    *arg_objects,
+                          GVariant              *arg_options)
+{
+  UDisksLinuxManager *manager = UDISKS_LINUX_MANAGER (object);
+
+  udisks_manager_complete_mount_filesystems (object,
+                                             invocation,
+                                             udisks_linux_filesystem_mount_batch (manager->daemon,
+                                                                                  invocation,
+                                                                                  arg_objects,
+                                                                                  arg_options));
+
+  return TRUE; /* returning TRUE means that we handled the method invocation */
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_unmount_filesystems (UDisksManager         *object,
+                            GDBusMethodInvocation *invocation,
+                            const gchar *const    *arg_objects,
+                            GVariant              *arg_options)
+{
+  UDisksLinuxManager *manager = UDISKS_LINUX_MANAGER (object);
+
+  udisks_manager_complete_unmount_filesystems (object,
+                                               invocation,
+                                               udisks_linux_filesystem_unmount_batch (manager->daemon,
+                                                                                      invocation,
+                                                                                      arg_objects,
+                                                                                      arg_options));
+
+  return TRUE; /* returning TRUE means that we handled the method invocation */
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_unlock_encrypted (UDisksManager         *object,
+                         GDBusMethodInvocation *invocation,
+                         const gchar *const    *arg_objects,
+                         const gchar           *arg_passphrase,
+                         GVariant              *arg_options)
+{
+  UDisksLinuxManager *manager = UDISKS_LINUX_MANAGER (object);
+  GVariant *results;
+  GError *error = NULL;
+
+  results = udisks_linux_encrypted_unlock_batch (manager->daemon,
+                                                 invocation,
+                                                 arg_objects,
+                                                 arg_passphrase,
+                                                 arg_options,
+                                                 &error);
+  if (results == NULL)
+    g_dbus_method_invocation_take_error (invocation, error);
+  else
+    udisks_manager_complete_unlock_encrypted (object, invocation, results);
+
+  return TRUE; /* returning TRUE means that we handled the method invocation */
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 static void
 manager_iface_init (UDisksManagerIface *iface)
 {
   iface->handle_loop_setup = handle_loop_setup;
   iface->handle_mdraid_create = handle_mdraid_create;
   iface->handle_enable_modules = handle_enable_modules;
+  iface->handle_query_objects = handle_query_objects;
+  iface->handle_mount_filesystems = handle_mount_filesystems;
+  iface->handle_unmount_filesystems = handle_unmount_filesystems;
+  iface->handle_unlock_encrypted = handle_unlock_encrypted;
 }
@@ -66,8 +66,6 @@ typedef struct _UDisksLinuxMDRaidClass   UDisksLinuxMDRaidClass;
 struct _UDisksLinuxMDRaid
 {
   UDisksMDRaidSkeleton parent_instance;
-
-  guint polling_timeout;
 };
 
 struct _UDisksLinuxMDRaidClass
@@ -75,9 +73,6 @@ struct _UDisksLinuxMDRaidClass
   UDisksMDRaidSkeletonClass parent_class;
 };
 
-static void ensure_polling (UDisksLinuxMDRaid  *mdraid,
-                            gboolean            polling_on);
-
 static void mdraid_iface_init (UDisksMDRaidIface *iface);
 
 G_DEFINE_TYPE_WITH_CODE (UDisksLinuxMDRaid, udisks_linux_mdraid, UDISKS_TYPE_MDRAID_SKELETON,
@@ -88,10 +83,6 @@ G_DEFINE_TYPE_WITH_CODE (UDisksLinuxMDRaid, udisks_linux_mdraid, UDISKS_TYPE_MDR
 static void
 udisks_linux_mdraid_finalize (GObject *object)
 {
-  UDisksLinuxMDRaid *mdraid = UDISKS_LINUX_MDRAID (object);
-
-  ensure_polling (mdraid, FALSE);
-
   if (G_OBJECT_CLASS (udisks_linux_mdraid_parent_class)->finalize != NULL)
     G_OBJECT_CLASS (udisks_linux_mdraid_parent_class)->finalize (object);
 }
@@ -190,55 +181,6 @@ read_sysfs_attr_as_uint64 (GUdevDevice *device,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-static gboolean
-on_polling_timout (gpointer user_data)
-{
-  UDisksLinuxMDRaid *mdraid = UDISKS_LINUX_MDRAID (user_data);
-  UDisksLinuxMDRaidObject *object = NULL;
-  UDisksLinuxDevice *raid_device;
-
-  /* udisks_debug ("polling timeout"); */
-
-  object = udisks_daemon_util_dup_object (mdraid, NULL);
-  if (object == NULL)
-    goto out;
-
-  /* synthesize uevent */
-  raid_device = udisks_linux_mdraid_object_get_device (object);
-  if (raid_device != NULL)
-    {
-      udisks_linux_mdraid_object_uevent (object, "change", raid_device, FALSE);
-      g_object_unref (raid_device);
-    }
-
- out:
-  g_clear_object (&object);
-  return TRUE; /* keep timeout around */
-}
-
-static void
-ensure_polling (UDisksLinuxMDRaid  *mdraid,
-                gboolean            polling_on)
-{
-  if (polling_on)
-    {
-      if (mdraid->polling_timeout == 0)
-        {
-          mdraid->polling_timeout = g_timeout_add_seconds (1,
-                                                           on_polling_timout,
-                                                           mdraid);
-        }
-    }
-  else
-    {
-      if (mdraid->polling_timeout != 0)
-        {
-          g_source_remove (mdraid->polling_timeout);
-          mdraid->polling_timeout = 0;
-        }
-    }
-}
-
 static gint
 member_cmpfunc (GVariant **a,
                 GVariant **b)
@@ -273,6 +215,87 @@ sync_action_to_job_id (const char *sync_action)
     return "mdraid-sync-job";
 }
 
+/* Updates the sync progress properties of @mdraid and the sync job of @object */
+static void
+update_sync_status (UDisksLinuxMDRaid       *mdraid,
+                    UDisksLinuxMDRaidObject *object,
+                    UDisksLinuxDevice       *raid_device,
+                    const gchar             *sync_action,
+                    const gchar             *sync_completed)
+{
+  UDisksMDRaid *iface = UDISKS_MDRAID (mdraid);
+  UDisksDaemon *daemon;
+  UDisksBaseJob *job = NULL;
+  gdouble sync_completed_val = 0.0;
+  guint64 sync_rate = 0;
+  guint64 sync_remaining_time = 0;
+
+  daemon = udisks_linux_mdraid_object_get_daemon (object);
+
+  if (sync_completed != NULL && g_strcmp0 (sync_completed, "none") != 0)
+    {
+      guint64 completed_sectors = 0;
+      guint64 num_sectors = 1;
+      if (sscanf (sync_completed, "%" G_GUINT64_FORMAT " / %" G_GUINT64_FORMAT,
+                  &completed_sectors, &num_sectors) == 2)
+        {
+          if (num_sectors != 0)
+            sync_completed_val = ((gdouble) completed_sectors) / ((gdouble) num_sectors);
+        }
+
+      /* this is KiB/s (see drivers/md/md.c:sync_speed_show() */
+      sync_rate = read_sysfs_attr_as_uint64 (raid_device->udev_device, "md/sync_speed") * 1024;
+      if (sync_rate > 0)
+        {
+          guint64 num_bytes_remaining = (num_sectors - completed_sectors) * 512ULL;
+          sync_remaining_time = ((guint64) G_USEC_PER_SEC) * num_bytes_remaining / sync_rate;
+        }
+    }
+
+  if (sync_action)
+    {
+      if (g_strcmp0 (sync_action, "idle") != 0)
+        {
+          if (! udisks_linux_mdraid_object_has_sync_job (object))
+            {
+              /* Launch a job */
+              job = udisks_daemon_launch_simple_job (daemon,
+                                                     UDISKS_OBJECT (object),
+                                                     sync_action_to_job_id (sync_action),
+                                                     0,
+                                                     NULL /* cancellable */);
+
+              /* Mark the job as not cancellable. It simply has to finish... */
+              udisks_job_set_cancelable (UDISKS_JOB (job), FALSE);
+              udisks_linux_mdraid_object_set_sync_job (object, job);
+            }
+          else
+            job = udisks_linux_mdraid_object_get_sync_job (object);
+
+          /* Update the job's interface */
+          udisks_job_set_progress (UDISKS_JOB (job), sync_completed_val);
+          udisks_job_set_progress_valid (UDISKS_JOB (job), TRUE);
+          udisks_job_set_rate (UDISKS_JOB (job), sync_rate);
+
+          udisks_job_set_expected_end_time (UDISKS_JOB (job),
+                                            g_get_real_time () + sync_remaining_time);
+        }
+      else
+        {
+          if (udisks_linux_mdraid_object_has_sync_job (object))
+            {
+              /* Complete the job */
+              udisks_linux_mdraid_object_complete_sync_job (object,
+                                                            TRUE,
+                                                            "Finished");
+            }
+        }
+    }
+  udisks_mdraid_set_sync_completed (iface, sync_completed_val);
+  udisks_mdraid_set_sync_rate (iface, sync_rate);
+  udisks_mdraid_set_sync_remaining_time (iface, sync_remaining_time);
+}
+
 /**
  * udisks_linux_mdraid_update:
  * @mdraid: A #UDisksLinuxMDRaid.
@@ -301,14 +324,10 @@ udisks_linux_mdraid_update (UDisksLinuxMDRaid       *mdraid,
   gchar *bitmap_location = NULL;
   guint degraded = 0;
   guint64 chunk_size = 0;
-  gdouble sync_completed_val = 0.0;
-  guint64 sync_rate = 0;
-  guint64 sync_remaining_time = 0;
   GVariantBuilder builder;
   UDisksDaemon *daemon = NULL;
   gboolean has_redundancy = FALSE;
   gboolean has_stripes = FALSE;
-  UDisksBaseJob *job = NULL;
 
   daemon = udisks_linux_mdraid_object_get_daemon (object);
 
@@ -418,81 +437,10 @@ udisks_linux_mdraid_update (UDisksLinuxMDRaid       *mdraid,
   udisks_mdraid_set_bitmap_location (iface, bitmap_location);
   udisks_mdraid_set_chunk_size (iface, chunk_size);
 
-  if (sync_completed != NULL && g_strcmp0 (sync_completed, "none") != 0)
-    {
-      guint64 completed_sectors = 0;
-      guint64 num_sectors = 1;
-      if (sscanf (sync_completed, "%" G_GUINT64_FORMAT " / %" G_GUINT64_FORMAT,
-                  &completed_sectors, &num_sectors) == 2)
-        {
-          if (num_sectors != 0)
-            sync_completed_val = ((gdouble) completed_sectors) / ((gdouble) num_sectors);
-        }
-
-      /* this is KiB/s (see drivers/md/md.c:sync_speed_show() */
-      sync_rate = read_sysfs_attr_as_uint64 (raid_device->udev_device, "md/sync_speed") * 1024;
-      if (sync_rate > 0)
-        {
-          guint64 num_bytes_remaining = (num_sectors - completed_sectors) * 512ULL;
-          sync_remaining_time = ((guint64) G_USEC_PER_SEC) * num_bytes_remaining / sync_rate;
-        }
-    }
-
-  if (sync_action)
-    {
-      if (g_strcmp0 (sync_action, "idle") != 0)
-        {
-          if (! udisks_linux_mdraid_object_has_sync_job (object))
-            {
-              /* Launch a job */
-              job = udisks_daemon_launch_simple_job (daemon,
-                                                     UDISKS_OBJECT (object),
-                                                     sync_action_to_job_id (sync_action),
-                                                     0,
-                                                     NULL /* cancellable */);
-
-              /* Mark the job as not cancellable. It simply has to finish... */
-              udisks_job_set_cancelable (UDISKS_JOB (job), FALSE);
-              udisks_linux_mdraid_object_set_sync_job (object, job);
-            }
-          else
-            job = udisks_linux_mdraid_object_get_sync_job (object);
-
-          /* Update the job's interface */
-          udisks_job_set_progress (UDISKS_JOB (job), sync_completed_val);
-          udisks_job_set_progress_valid (UDISKS_JOB (job), TRUE);
-          udisks_job_set_rate (UDISKS_JOB (job), sync_rate);
-
-          udisks_job_set_expected_end_time (UDISKS_JOB (job),
-                                            g_get_real_time () + sync_remaining_time);
-        }
-      else
-        {
-          if (udisks_linux_mdraid_object_has_sync_job (object))
-            {
-              /* Complete the job */
-              udisks_linux_mdraid_object_complete_sync_job (object,
-                                                            TRUE,
-                                                            "Finished");
-            }
-        }
-    }
-  udisks_mdraid_set_sync_completed (iface, sync_completed_val);
-  udisks_mdraid_set_sync_rate (iface, sync_rate);
-  udisks_mdraid_set_sync_remaining_time (iface, sync_remaining_time);
-
-  /* ensure we poll, exactly when we need to */
-  if (g_strcmp0 (sync_action, "resync") == 0 ||
-      g_strcmp0 (sync_action, "recover") == 0 ||
-      g_strcmp0 (sync_action, "check") == 0 ||
-      g_strcmp0 (sync_action, "repair") == 0)
-    {
-      ensure_polling (mdraid, TRUE);
-    }
-  else
-    {
-      ensure_polling (mdraid, FALSE);
-    }
+  /* the sync progress is also updated on its own when md/sync_completed
+   * changes, see udisks_linux_mdraid_update_sync_progress()
+   */
+  update_sync_status (mdraid, object, raid_device, sync_action, sync_completed);
 
   /* figure out active devices */
   g_variant_builder_init (&builder, G_VARIANT_TYPE ("a(oiasta{sv})"));
@@ -616,6 +564,51 @@ udisks_linux_mdraid_update (UDisksLinuxMDRaid       *mdraid,
   return ret;
 }
 
+/**
+ * udisks_linux_mdraid_update_sync_progress:
+ * @mdraid: A #UDisksLinuxMDRaid.
+ * @object: The enclosing #UDisksLinuxMDRaidObject instance.
+ *
+ * Updates only the sync progress related properties and the sync job
+ * from the <filename>md/sync_completed</filename> and
+ * <filename>md/sync_speed</filename> sysfs attributes. This is
+ * considerably cheaper than udisks_linux_mdraid_update() and is used
+ * when the kernel notifies us about progress of a running sync
+ * operation.
+ *
+ * Returns: %TRUE if the progress was updated, %FALSE if the RAID array is not running.
+ */
+gboolean
+udisks_linux_mdraid_update_sync_progress (UDisksLinuxMDRaid       *mdraid,
+                                          UDisksLinuxMDRaidObject *object)
+{
+  UDisksLinuxDevice *raid_device = NULL;
+  gchar *sync_action = NULL;
+  gchar *sync_completed = NULL;
+
+  raid_device = udisks_linux_mdraid_object_get_device (object);
+  if (raid_device == NULL)
+    return FALSE;
+
+  /* Can't use GUdevDevice methods as they cache the result and these variables vary */
+  sync_action = read_sysfs_attr (raid_device->udev_device, "md/sync_action");
+  if (sync_action != NULL)
+    g_strstrip (sync_action);
+  sync_completed = read_sysfs_attr (raid_device->udev_device, "md/sync_completed");
+  if (sync_completed != NULL)
+    g_strstrip (sync_completed);
+
+  /* changes of md/sync_action itself are handled by a full update, only
+   * look at it here to not launch a job for an idle array
+   */
+  update_sync_status (mdraid, object, raid_device, sync_action, sync_completed);
+
+  g_free (sync_completed);
+  g_free (sync_action);
+  g_object_unref (raid_device);
+  return TRUE;
+}
+
 /* ---------------------------------------------------------------------------------------------------- */
 
 static UDisksObject *
@@ -761,6 +754,7 @@ handle_start (UDisksMDRaid           *_mdraid,
                                                      object,
                                                      NULL,
                                                      10, /* timeout_seconds */
+                                                     NULL, /* cancellable */
                                                      &error);
   if (block_object == NULL)
     {
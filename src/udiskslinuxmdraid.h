@@ -33,6 +33,8 @@ GType         udisks_linux_mdraid_get_type  (void) G_GNUC_CONST;
 UDisksMDRaid *udisks_linux_mdraid_new       (void);
 gboolean      udisks_linux_mdraid_update    (UDisksLinuxMDRaid       *mdraid,
                                              UDisksLinuxMDRaidObject *object);
+gboolean      udisks_linux_mdraid_update_sync_progress (UDisksLinuxMDRaid       *mdraid,
+                                                        UDisksLinuxMDRaidObject *object);
 
 G_END_DECLS
 
@@ -72,6 +72,11 @@ struct _UDisksLinuxMDRaidObject
   /* watches for sysfs attr changes */
   GSource *sync_action_source;
   GSource *degraded_source;
+  GSource *sync_completed_source;
+
+  /* rate-limiting of sync progress updates */
+  GSource *sync_progress_source;
+  gint64 last_sync_progress_update;
 
   /* sync job */
   UDisksBaseJob *sync_job;
@@ -91,6 +96,9 @@ enum
   PROP_SYNC_JOB,
 };
 
+/* Minimum interval between two sync progress updates, in milliseconds */
+#define SYNC_PROGRESS_INTERVAL_MSEC 1000
+
 static void
 remove_watches (UDisksLinuxMDRaidObject *object)
 {
@@ -104,6 +112,16 @@ remove_watches (UDisksLinuxMDRaidObject *object)
       g_source_destroy (object->degraded_source);
       object->degraded_source = NULL;
     }
+  if (object->sync_completed_source != NULL)
+    {
+      g_source_destroy (object->sync_completed_source);
+      object->sync_completed_source = NULL;
+    }
+  if (object->sync_progress_source != NULL)
+    {
+      g_source_destroy (object->sync_progress_source);
+      object->sync_progress_source = NULL;
+    }
 }
 
 G_DEFINE_TYPE (UDisksLinuxMDRaidObject, udisks_linux_mdraid_object, UDISKS_TYPE_OBJECT_SKELETON);
@@ -493,27 +511,23 @@ watch_attr (UDisksLinuxDevice *device,
 
 /* ----------------------------------------------------------------------------------------------------  */
 
+/* Consumes the new value of the attribute so the next change is
+ * reported again. Returns %FALSE if the watches should be removed.
+ */
 static gboolean
-attr_changed (GIOChannel   *channel,
-              GIOCondition  cond,
-              gpointer      user_data)
+drain_attr (UDisksLinuxMDRaidObject *object,
+            GIOChannel              *channel)
 {
-  UDisksLinuxMDRaidObject *object = UDISKS_LINUX_MDRAID_OBJECT (user_data);
-  gboolean bail = FALSE;
   GError *error = NULL;
   gchar *str = NULL;
   gsize len = 0;
 
-  if (cond & ~G_IO_ERR)
-    goto out;
-
   if (g_io_channel_seek_position (channel, 0, G_SEEK_SET, &error) != G_IO_STATUS_NORMAL)
     {
       udisks_debug ("Error seeking in channel (uuid %s): %s (%s, %d)",
                     object->uuid, error->message, g_quark_to_string (error->domain), error->code);
       g_clear_error (&error);
-      bail = TRUE;
-      goto out;
+      return FALSE;
     }
 
   if (g_io_channel_read_to_end (channel, &str, &len, &error) != G_IO_STATUS_NORMAL)
@@ -521,19 +535,93 @@ attr_changed (GIOChannel   *channel,
       udisks_debug ("Error reading (uuid %s): %s (%s, %d)",
                     object->uuid, error->message, g_quark_to_string (error->domain), error->code);
       g_clear_error (&error);
-      bail = TRUE;
-      goto out;
+      return FALSE;
     }
 
   g_free (str);
+  return TRUE;
+}
+
+static gboolean
+attr_changed (GIOChannel   *channel,
+              GIOCondition  cond,
+              gpointer      user_data)
+{
+  UDisksLinuxMDRaidObject *object = UDISKS_LINUX_MDRAID_OBJECT (user_data);
+
+  if (cond & ~G_IO_ERR)
+    goto out;
+
+  if (! drain_attr (object, channel))
+    {
+      remove_watches (object);
+      goto out;
+    }
 
   /* synthesize uevent */
   if (object->raid_device != NULL)
     udisks_linux_mdraid_object_uevent (object, "change", object->raid_device, FALSE);
 
  out:
-  if (bail)
-    remove_watches (object);
+  return TRUE; /* keep event source around */
+}
+
+static void
+update_sync_progress (UDisksLinuxMDRaidObject *object)
+{
+  object->last_sync_progress_update = g_get_monotonic_time ();
+  if (object->iface_mdraid != NULL)
+    udisks_linux_mdraid_update_sync_progress (UDISKS_LINUX_MDRAID (object->iface_mdraid), object);
+}
+
+static gboolean
+on_sync_progress_timeout (gpointer user_data)
+{
+  UDisksLinuxMDRaidObject *object = UDISKS_LINUX_MDRAID_OBJECT (user_data);
+
+  object->sync_progress_source = NULL;
+  update_sync_progress (object);
+  return FALSE; /* remove source */
+}
+
+static gboolean
+sync_completed_changed (GIOChannel   *channel,
+                        GIOCondition  cond,
+                        gpointer      user_data)
+{
+  UDisksLinuxMDRaidObject *object = UDISKS_LINUX_MDRAID_OBJECT (user_data);
+  gint64 elapsed_msec;
+
+  if (cond & ~G_IO_ERR)
+    goto out;
+
+  if (! drain_attr (object, channel))
+    {
+      remove_watches (object);
+      goto out;
+    }
+
+  /* md/sync_completed may change very often during a sync - only update
+   * the progress at most once per SYNC_PROGRESS_INTERVAL_MSEC and coalesce
+   * all the changes in between into a single deferred update
+   */
+  if (object->sync_progress_source != NULL)
+    goto out;
+
+  elapsed_msec = (g_get_monotonic_time () - object->last_sync_progress_update) / 1000;
+  if (elapsed_msec >= SYNC_PROGRESS_INTERVAL_MSEC)
+    {
+      update_sync_progress (object);
+    }
+  else
+    {
+      object->sync_progress_source = g_timeout_source_new (SYNC_PROGRESS_INTERVAL_MSEC - elapsed_msec);
+      g_source_set_callback (object->sync_progress_source, on_sync_progress_timeout, object, NULL);
+      g_source_attach (object->sync_progress_source, g_main_context_get_thread_default ());
+      g_source_unref (object->sync_progress_source);
+    }
+
+ out:
   return TRUE; /* keep event source around */
 }
 
@@ -554,6 +642,7 @@ raid_device_added (UDisksLinuxMDRaidObject *object,
 {
   g_assert (object->sync_action_source == NULL);
   g_assert (object->degraded_source == NULL);
+  g_assert (object->sync_completed_source == NULL);
 
   /* udisks_debug ("start watching %s", g_udev_device_get_sysfs_path (device->udev_device)); */
   object->sync_action_source = watch_attr (device,
@@ -564,6 +653,11 @@ raid_device_added (UDisksLinuxMDRaidObject *object,
                                         "md/degraded",
                                         (GSourceFunc) attr_changed,
                                         object);
+  /* progress of a sync operation, this is only reported at checkpoints */
+  object->sync_completed_source = watch_attr (device,
+                                              "md/sync_completed",
+                                              (GSourceFunc) sync_completed_changed,
+                                              object);
 }
 
 static void
@@ -138,6 +138,36 @@ typedef struct
   gboolean      ignore_container;
 } WaitForPartitionData;
 
+static gboolean
+partition_object_matches (UDisksObject *object,
+                          const gchar  *table_object_path,
+                          guint64       pos_to_wait_for,
+                          gboolean      ignore_container,
+                          gboolean      only_container)
+{
+  UDisksPartition *partition;
+  gboolean ret = FALSE;
+
+  partition = udisks_object_get_partition (object);
+  if (partition == NULL)
+    return FALSE;
+
+  if (g_strcmp0 (udisks_partition_get_table (partition), table_object_path) == 0)
+    {
+      guint64 offset = udisks_partition_get_offset (partition);
+      guint64 size = udisks_partition_get_size (partition);
+
+      if (pos_to_wait_for >= offset && pos_to_wait_for < offset + size)
+        {
+          gboolean is_container = udisks_partition_get_is_container (partition);
+          ret = !(is_container && ignore_container) && !(!is_container && only_container);
+        }
+    }
+
+  g_object_unref (partition);
+  return ret;
+}
+
 static UDisksObject *
 wait_for_partition (UDisksDaemon *daemon,
                     gpointer      user_data)
@@ -145,97 +175,37 @@ wait_for_partition (UDisksDaemon *daemon,
   WaitForPartitionData *data = user_data;
   UDisksObject *ret = NULL;
   GList *objects, *l;
+  const gchar *table_object_path;
 
+  table_object_path = g_dbus_object_get_object_path (G_DBUS_OBJECT (data->partition_table_object));
   objects = udisks_daemon_get_objects (daemon);
   for (l = objects; l != NULL; l = l->next)
     {
       UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksPartition *partition = udisks_object_get_partition (object);
-      if (partition != NULL)
+      if (partition_object_matches (object, table_object_path,
+                                    data->pos_to_wait_for, data->ignore_container, FALSE))
         {
-          if (g_strcmp0 (udisks_partition_get_table (partition),
-                         g_dbus_object_get_object_path (G_DBUS_OBJECT (data->partition_table_object))) == 0)
-            {
-              guint64 offset = udisks_partition_get_offset (partition);
-              guint64 size = udisks_partition_get_size (partition);
-
-              if (data->pos_to_wait_for >= offset && data->pos_to_wait_for < offset + size)
-                {
-                  if (!(udisks_partition_get_is_container (partition) && data->ignore_container))
-                    {
-                      g_object_unref (partition);
-                      ret = g_object_ref (object);
-                      goto out;
-                    }
-                }
-            }
-          g_object_unref (partition);
+          ret = g_object_ref (object);
+          break;
         }
     }
 
- out:
   g_list_free_full (objects, g_object_unref);
   return ret;
 }
 
 #define MIB_SIZE (1048576L)
 
-static UDisksObject *
-udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *table,
-                                                      GDBusMethodInvocation  *invocation,
-                                                      guint64                 offset,
-                                                      guint64                 size,
-                                                      const gchar            *type,
-                                                      const gchar            *name,
-                                                      GVariant               *options)
+static gboolean
+authorize_create_partition (UDisksDaemon          *daemon,
+                            UDisksObject          *object,
+                            UDisksBlock           *block,
+                            uid_t                  caller_uid,
+                            GVariant              *options,
+                            GDBusMethodInvocation *invocation)
 {
   const gchar *action_id = NULL;
   const gchar *message = NULL;
-  UDisksBlock *block = NULL;
-  UDisksObject *object = NULL;
-  UDisksDaemon *daemon = NULL;
-  gchar *device_name = NULL;
-  WaitForPartitionData *wait_data = NULL;
-  UDisksObject *partition_object = NULL;
-  UDisksBlock *partition_block = NULL;
-  BDPartSpec *part_spec = NULL;
-  BDPartSpec *overlapping_part = NULL;
-  BDPartTypeReq part_type = 0;
-  const gchar *table_type;
-  uid_t caller_uid;
-  gid_t caller_gid;
-  GError *error = NULL;
-  UDisksBaseJob *job = NULL;
-
-  object = udisks_daemon_util_dup_object (table, &error);
-  if (object == NULL)
-    {
-      g_dbus_method_invocation_take_error (invocation, error);
-      goto out;
-    }
-
-  daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
-  block = udisks_object_get_block (object);
-  if (block == NULL)
-    {
-      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                                             "Partition table object is not a block device");
-      goto out;
-    }
-
-  error = NULL;
-  if (!udisks_daemon_util_get_caller_uid_sync (daemon,
-                                               invocation,
-                                               NULL /* GCancellable */,
-                                               &caller_uid,
-                                               &caller_gid,
-                                               NULL,
-                                               &error))
-    {
-      g_dbus_method_invocation_return_gerror (invocation, error);
-      g_clear_error (&error);
-      goto out;
-    }
 
   action_id = "org.freedesktop.udisks2.modify-device";
   /* Translators: Shown in authentication dialog when the user
@@ -257,18 +227,21 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
         }
     }
 
-  if (!udisks_daemon_util_check_authorization_sync (daemon,
-                                                    object,
-                                                    action_id,
-                                                    options,
-                                                    message,
-                                                    invocation))
-    goto out;
-
-  device_name = g_strdup (udisks_block_get_device (block));
+  return udisks_daemon_util_check_authorization_sync (daemon,
+                                                      object,
+                                                      action_id,
+                                                      options,
+                                                      message,
+                                                      invocation);
+}
 
-  table_type = udisks_partition_table_get_type_ (table);
-  wait_data = g_new0 (WaitForPartitionData, 1);
+static gboolean
+get_part_type_request (const gchar    *table_type,
+                       const gchar    *type,
+                       const gchar    *name,
+                       BDPartTypeReq  *out_part_type,
+                       GError        **error)
+{
   if (g_strcmp0 (table_type, "dos") == 0)
     {
       char *endp;
@@ -276,9 +249,9 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
 
       if (strlen (name) > 0)
         {
-          g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                                                 "MBR partition table does not support names");
-          goto out;
+          g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                       "MBR partition table does not support names");
+          return FALSE;
         }
 
       /* Determine whether we are creating a primary, extended or logical partition */
@@ -286,35 +259,42 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
       if (type[0] != '\0' && *endp == '\0' &&
           (type_as_int == 0x05 || type_as_int == 0x0f || type_as_int == 0x85))
         {
-          part_type = BD_PART_TYPE_REQ_EXTENDED;
+          *out_part_type = BD_PART_TYPE_REQ_EXTENDED;
         }
       else
-        part_type = BD_PART_TYPE_REQ_NEXT;
+        *out_part_type = BD_PART_TYPE_REQ_NEXT;
     }
   else if (g_strcmp0 (table_type, "gpt") == 0)
     {
-      part_type = BD_PART_TYPE_REQ_NORMAL;
+      *out_part_type = BD_PART_TYPE_REQ_NORMAL;
     }
   else
     {
-      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                                             "Don't know how to create partitions this partition table of type `%s'",
-                                             table_type);
-      goto out;
+      g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                   "Don't know how to create partitions this partition table of type `%s'",
+                   table_type);
+      return FALSE;
     }
 
-  job = udisks_daemon_launch_simple_job (daemon,
-                                         UDISKS_OBJECT (object),
-                                         "partition-create",
-                                         caller_uid,
-                                         NULL);
+  return TRUE;
+}
 
-  if (job == NULL)
-    {
-      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                                             "Failed to create a job object");
-      goto out;
-    }
+/* Creates the partition table entry and sets its name and type.
+ * Doesn't wait for the partition to show up.
+ */
+static BDPartSpec *
+create_partition (const gchar    *device_name,
+                  const gchar    *table_type,
+                  BDPartTypeReq   part_type,
+                  guint64         offset,
+                  guint64         size,
+                  const gchar    *type,
+                  const gchar    *name,
+                  GError        **error)
+{
+  BDPartSpec *part_spec = NULL;
+  BDPartSpec *overlapping_part = NULL;
+  GError *local_error = NULL;
 
   /* Users might want to specify logical partitions start and size using size of
    * of the extended partition. If this happens we need to shift start (offset)
@@ -325,7 +305,7 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
    *      use case. But we should definitely provide some functionality to get
    *      right "numbers" and stop doing this.
   */
-  overlapping_part = bd_part_get_part_by_pos (device_name, offset, &error);
+  overlapping_part = bd_part_get_part_by_pos (device_name, offset, &local_error);
   if (overlapping_part != NULL && ! (overlapping_part->type & BD_PART_TYPE_FREESPACE))
     {
       // extended partition or metadata of the extended partition
@@ -343,38 +323,34 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
       else
         {
           // overlapping partition is not a free space nor an extended part -> error
-          g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
-                                                 "Requested start for the new partition %"G_GUINT64_FORMAT" "
-                                                 "overlaps with existing partition %s.",
-                                                  offset, overlapping_part->path);
+          g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                       "Requested start for the new partition %"G_GUINT64_FORMAT" "
+                       "overlaps with existing partition %s.",
+                       offset, overlapping_part->path);
           goto out;
         }
     }
   else
-    g_clear_error (&error);
+    g_clear_error (&local_error);
 
   part_spec = bd_part_create_part (device_name, part_type, offset,
-                                   size, BD_PART_ALIGN_OPTIMAL, &error);
+                                   size, BD_PART_ALIGN_OPTIMAL, &local_error);
   if (!part_spec)
     {
-      g_dbus_method_invocation_return_error (invocation,
-                                             UDISKS_ERROR,
-                                             UDISKS_ERROR_FAILED,
-                                             "Error creating partition on %s: %s",
-                                             udisks_block_get_device (block),
-                                             error->message);
-      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                   "Error creating partition on %s: %s",
+                   device_name, local_error->message);
+      g_clear_error (&local_error);
       goto out;
     }
 
   /* set name if given */
   if (g_strcmp0 (table_type, "gpt") == 0 && strlen (name) > 0)
     {
-      if (!bd_part_set_part_name (device_name, part_spec->path, name, &error))
+      if (!bd_part_set_part_name (device_name, part_spec->path, name, error))
         {
-          g_prefix_error (&error, "Error setting name for newly created partition: ");
-          g_dbus_method_invocation_take_error (invocation, error);
-          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          g_prefix_error (error, "Error setting name for newly created partition: ");
+          g_clear_pointer (&part_spec, g_free);
           goto out;
         }
     }
@@ -385,19 +361,140 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
       gboolean ret = FALSE;
 
       if (g_strcmp0 (table_type, "gpt") == 0)
-          ret = bd_part_set_part_type (device_name, part_spec->path, type, &error);
+          ret = bd_part_set_part_type (device_name, part_spec->path, type, error);
       else if (g_strcmp0 (table_type, "dos") == 0)
-          ret = bd_part_set_part_id (device_name, part_spec->path, type, &error);
+          ret = bd_part_set_part_id (device_name, part_spec->path, type, error);
 
       if (!ret)
         {
-          g_prefix_error (&error, "Error setting type for newly created partition: ");
-          g_dbus_method_invocation_take_error (invocation, error);
-          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          g_prefix_error (error, "Error setting type for newly created partition: ");
+          g_clear_pointer (&part_spec, g_free);
           goto out;
         }
     }
 
+ out:
+  g_free (overlapping_part);
+  return part_spec;
+}
+
+/* wipe the newly created partition if wanted */
+static gboolean
+wipe_partition (BDPartSpec   *part_spec,
+                UDisksBlock  *partition_block,
+                GError      **error)
+{
+  GError *local_error = NULL;
+
+  if (part_spec->type == BD_PART_TYPE_EXTENDED)
+    return TRUE;
+
+  if (!bd_fs_wipe (part_spec->path, TRUE, &local_error))
+    {
+      if (g_error_matches (local_error, BD_FS_ERROR, BD_FS_ERROR_NOFS))
+        g_clear_error (&local_error);
+      else
+        {
+          g_set_error (error, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                       "Error wiping newly created partition %s: %s",
+                       udisks_block_get_device (partition_block),
+                       local_error->message);
+          g_clear_error (&local_error);
+          return FALSE;
+        }
+    }
+
+  return TRUE;
+}
+
+static UDisksObject *
+udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *table,
+                                                      GDBusMethodInvocation  *invocation,
+                                                      guint64                 offset,
+                                                      guint64                 size,
+                                                      const gchar            *type,
+                                                      const gchar            *name,
+                                                      GVariant               *options)
+{
+  UDisksBlock *block = NULL;
+  UDisksObject *object = NULL;
+  UDisksDaemon *daemon = NULL;
+  gchar *device_name = NULL;
+  WaitForPartitionData *wait_data = NULL;
+  UDisksObject *partition_object = NULL;
+  UDisksBlock *partition_block = NULL;
+  BDPartSpec *part_spec = NULL;
+  BDPartTypeReq part_type = 0;
+  const gchar *table_type;
+  uid_t caller_uid;
+  gid_t caller_gid;
+  GError *error = NULL;
+  UDisksBaseJob *job = NULL;
+
+  object = udisks_daemon_util_dup_object (table, &error);
+  if (object == NULL)
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
+  block = udisks_object_get_block (object);
+  if (block == NULL)
+    {
+      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                             "Partition table object is not a block device");
+      goto out;
+    }
+
+  error = NULL;
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon,
+                                               invocation,
+                                               NULL /* GCancellable */,
+                                               &caller_uid,
+                                               &caller_gid,
+                                               NULL,
+                                               &error))
+    {
+      g_dbus_method_invocation_return_gerror (invocation, error);
+      g_clear_error (&error);
+      goto out;
+    }
+
+  if (!authorize_create_partition (daemon, object, block, caller_uid, options, invocation))
+    goto out;
+
+  device_name = g_strdup (udisks_block_get_device (block));
+
+  table_type = udisks_partition_table_get_type_ (table);
+  if (!get_part_type_request (table_type, type, name, &part_type, &error))
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  job = udisks_daemon_launch_simple_job (daemon,
+                                         UDISKS_OBJECT (object),
+                                         "partition-create",
+                                         caller_uid,
+                                         NULL);
+
+  if (job == NULL)
+    {
+      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                             "Failed to create a job object");
+      goto out;
+    }
+
+  part_spec = create_partition (device_name, table_type, part_type, offset, size, type, name, &error);
+  if (part_spec == NULL)
+    {
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  wait_data = g_new0 (WaitForPartitionData, 1);
   wait_data->ignore_container = (part_spec->type == BD_PART_TYPE_LOGICAL);
   wait_data->pos_to_wait_for = (part_spec->start + part_spec->size) / 2L;
 
@@ -410,12 +507,13 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
                                                          wait_data,
                                                          NULL,
                                                          30,
+                                                         NULL, /* cancellable */
                                                          &error);
   if (partition_object == NULL)
     {
       g_prefix_error (&error, "Error waiting for partition to appear: ");
-      g_dbus_method_invocation_take_error (invocation, error);
       udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_dbus_method_invocation_take_error (invocation, error);
       goto out;
     }
   partition_block = udisks_object_get_block (partition_object);
@@ -428,26 +526,12 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
       goto out;
     }
 
-  /* wipe the newly created partition if wanted */
-  if (part_spec->type != BD_PART_TYPE_EXTENDED)
+  if (!wipe_partition (part_spec, partition_block, &error))
     {
-      if (!bd_fs_wipe (part_spec->path, TRUE, &error))
-        {
-          if (g_error_matches (error, BD_FS_ERROR, BD_FS_ERROR_NOFS))
-            g_clear_error (&error);
-          else
-            {
-              g_dbus_method_invocation_return_error (invocation,
-                                                     UDISKS_ERROR,
-                                                     UDISKS_ERROR_FAILED,
-                                                     "Error wiping newly created partition %s: %s",
-                                                     udisks_block_get_device (partition_block),
-                                                     error->message);
-              udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
-              g_clear_object (&partition_object);
-              goto out;
-            }
-        }
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_dbus_method_invocation_take_error (invocation, error);
+      g_clear_object (&partition_object);
+      goto out;
     }
 
   /* this is sometimes needed because parted(8) does not generate the uevent itself */
@@ -457,7 +541,6 @@ udisks_linux_partition_table_handle_create_partition (UDisksPartitionTable   *ta
  out:
   g_free (wait_data);
   g_free (part_spec);
-  g_free (overlapping_part);
   g_clear_error (&error);
   g_clear_object (&partition_block);
   g_free (device_name);
@@ -599,9 +682,313 @@ handle_create_partition_and_format (UDisksPartitionTable   *table,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+typedef struct
+{
+  guint64       offset;
+  guint64       size;
+  const gchar  *type;
+  const gchar  *name;
+  const gchar  *format_type;
+  GVariant     *format_options;
+  BDPartTypeReq part_type;
+  BDPartSpec   *part_spec;
+} PartitionRequest;
+
+typedef struct
+{
+  UDisksObject     *partition_table_object;
+  PartitionRequest *requests;
+  guint             num_requests;
+} WaitForPartitionsData;
+
+static UDisksObject **
+wait_for_partitions (UDisksDaemon *daemon,
+                     gpointer      user_data)
+{
+  WaitForPartitionsData *data = user_data;
+  UDisksObject **ret;
+  GList *objects, *l;
+  const gchar *table_object_path;
+  guint num_found = 0;
+  guint n;
+
+  table_object_path = g_dbus_object_get_object_path (G_DBUS_OBJECT (data->partition_table_object));
+  ret = g_new0 (UDisksObject *, data->num_requests + 1);
+  objects = udisks_daemon_get_objects (daemon);
+  for (l = objects; l != NULL; l = l->next)
+    {
+      UDisksObject *object = UDISKS_OBJECT (l->data);
+
+      for (n = 0; n < data->num_requests; n++)
+        {
+          BDPartSpec *part_spec = data->requests[n].part_spec;
+
+          if (ret[n] != NULL)
+            continue;
+
+          /* logical partitions created in the same call may lie in the
+           * middle of an extended one, so match containers only for it */
+          if (partition_object_matches (object, table_object_path,
+                                        (part_spec->start + part_spec->size) / 2L,
+                                        part_spec->type == BD_PART_TYPE_LOGICAL,
+                                        part_spec->type == BD_PART_TYPE_EXTENDED))
+            {
+              ret[n] = g_object_ref (object);
+              num_found++;
+              break;
+            }
+        }
+    }
+  g_list_free_full (objects, g_object_unref);
+
+  /* only done when all of the partitions showed up */
+  if (num_found < data->num_requests)
+    {
+      for (n = 0; n < data->num_requests; n++)
+        g_clear_object (&ret[n]);
+      g_clear_pointer (&ret, g_free);
+    }
+
+  return ret;
+}
+
+static void
+free_objects (UDisksObject **objects)
+{
+  UDisksObject **l;
+
+  if (objects == NULL)
+    return;
+
+  for (l = objects; *l != NULL; l++)
+    g_object_unref (*l);
+  g_free (objects);
+}
+
+static void
+handle_format_complete_flag (gpointer user_data)
+{
+  gboolean *formatted = user_data;
+  *formatted = TRUE;
+}
+
+/* runs in thread dedicated to handling @invocation */
+static gboolean
+handle_create_partitions (UDisksPartitionTable   *table,
+                          GDBusMethodInvocation  *invocation,
+                          GVariant               *partitions,
+                          GVariant               *options)
+{
+  UDisksBlock *block = NULL;
+  UDisksObject *object = NULL;
+  UDisksDaemon *daemon = NULL;
+  gchar *device_name = NULL;
+  WaitForPartitionsData wait_data;
+  UDisksObject **partition_objects = NULL;
+  PartitionRequest *requests = NULL;
+  const gchar **object_paths = NULL;
+  const gchar *table_type;
+  GVariantIter iter;
+  guint num_requests = 0;
+  guint n;
+  uid_t caller_uid;
+  gid_t caller_gid;
+  GError *error = NULL;
+  UDisksBaseJob *job = NULL;
+  int fd = -1;
+
+  object = udisks_daemon_util_dup_object (table, &error);
+  if (object == NULL)
+    {
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  daemon = udisks_linux_block_object_get_daemon (UDISKS_LINUX_BLOCK_OBJECT (object));
+  block = udisks_object_get_block (object);
+  if (block == NULL)
+    {
+      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                             "Partition table object is not a block device");
+      goto out;
+    }
+
+  if (!udisks_daemon_util_get_caller_uid_sync (daemon,
+                                               invocation,
+                                               NULL /* GCancellable */,
+                                               &caller_uid,
+                                               &caller_gid,
+                                               NULL,
+                                               &error))
+    {
+      g_dbus_method_invocation_return_gerror (invocation, error);
+      g_clear_error (&error);
+      goto out;
+    }
+
+  if (!authorize_create_partition (daemon, object, block, caller_uid, options, invocation))
+    goto out;
+
+  num_requests = g_variant_n_children (partitions);
+  if (num_requests == 0)
+    {
+      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                             "No partitions to create given");
+      goto out;
+    }
+
+  /* validate all the requests before touching the disk */
+  table_type = udisks_partition_table_get_type_ (table);
+  requests = g_new0 (PartitionRequest, num_requests);
+  g_variant_iter_init (&iter, partitions);
+  for (n = 0; n < num_requests; n++)
+    {
+      PartitionRequest *request = &requests[n];
+
+      g_variant_iter_next (&iter, "(tt&s&s&s@a{sv})",
+                           &request->offset,
+                           &request->size,
+                           &request->type,
+                           &request->name,
+                           &request->format_type,
+                           &request->format_options);
+      if (!get_part_type_request (table_type, request->type, request->name,
+                                  &request->part_type, &error))
+        {
+          g_prefix_error (&error, "Partition %u: ", n);
+          g_dbus_method_invocation_take_error (invocation, error);
+          goto out;
+        }
+    }
+
+  /* See handle_create_partition for a motivation of taking the lock.
+   */
+  fd = flock_block_dev (table);
+
+  device_name = g_strdup (udisks_block_get_device (block));
+  job = udisks_daemon_launch_simple_job (daemon,
+                                         UDISKS_OBJECT (object),
+                                         "partition-create",
+                                         caller_uid,
+                                         NULL);
+  if (job == NULL)
+    {
+      g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                             "Failed to create a job object");
+      goto out;
+    }
+
+  /* create all the table entries first and only then wait for the
+   * kernel and udev to catch up with all of them at once
+   */
+  for (n = 0; n < num_requests; n++)
+    {
+      PartitionRequest *request = &requests[n];
+
+      request->part_spec = create_partition (device_name, table_type, request->part_type,
+                                             request->offset, request->size,
+                                             request->type, request->name, &error);
+      if (request->part_spec == NULL)
+        {
+          g_prefix_error (&error, "Partition %u: ", n);
+          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          g_dbus_method_invocation_take_error (invocation, error);
+          goto out;
+        }
+    }
+
+  /* sit and wait for all the partitions to show up */
+  wait_data.partition_table_object = object;
+  wait_data.requests = requests;
+  wait_data.num_requests = num_requests;
+  partition_objects = udisks_daemon_wait_for_objects_sync (daemon,
+                                                           wait_for_partitions,
+                                                           &wait_data,
+                                                           NULL,
+                                                           30,
+                                                           NULL, /* cancellable */
+                                                           &error);
+  if (partition_objects == NULL)
+    {
+      g_prefix_error (&error, "Error waiting for partitions to appear: ");
+      udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+      g_dbus_method_invocation_take_error (invocation, error);
+      goto out;
+    }
+
+  for (n = 0; n < num_requests; n++)
+    {
+      UDisksBlock *partition_block = udisks_object_peek_block (partition_objects[n]);
+
+      if (partition_block == NULL)
+        {
+          g_dbus_method_invocation_return_error (invocation, UDISKS_ERROR, UDISKS_ERROR_FAILED,
+                                                 "Partition object is not a block device");
+          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, NULL);
+          goto out;
+        }
+
+      if (!wipe_partition (requests[n].part_spec, partition_block, &error))
+        {
+          udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), FALSE, error->message);
+          g_dbus_method_invocation_take_error (invocation, error);
+          goto out;
+        }
+
+      /* this is sometimes needed because parted(8) does not generate the uevent itself */
+      udisks_linux_block_object_trigger_uevent (UDISKS_LINUX_BLOCK_OBJECT (partition_objects[n]));
+    }
+  udisks_simple_job_complete (UDISKS_SIMPLE_JOB (job), TRUE, NULL);
+
+  /* format the partitions that asked for it, in order */
+  for (n = 0; n < num_requests; n++)
+    {
+      gboolean formatted = FALSE;
+
+      if (strlen (requests[n].format_type) == 0)
+        continue;
+
+      udisks_linux_block_handle_format (udisks_object_peek_block (partition_objects[n]),
+                                        invocation,
+                                        requests[n].format_type,
+                                        requests[n].format_options,
+                                        handle_format_complete_flag, &formatted);
+      /* @invocation has already been returned an error */
+      if (!formatted)
+        goto out;
+    }
+
+  object_paths = g_new0 (const gchar *, num_requests + 1);
+  for (n = 0; n < num_requests; n++)
+    object_paths[n] = g_dbus_object_get_object_path (G_DBUS_OBJECT (partition_objects[n]));
+  udisks_partition_table_complete_create_partitions (table, invocation, object_paths);
+
+ out:
+  unflock_block_dev (fd);
+  if (requests != NULL)
+    {
+      for (n = 0; n < num_requests; n++)
+        {
+          g_free (requests[n].part_spec);
+          if (requests[n].format_options != NULL)
+            g_variant_unref (requests[n].format_options);
+        }
+      g_free (requests);
+    }
+  g_free (object_paths);
+  free_objects (partition_objects);
+  g_free (device_name);
+  g_clear_object (&object);
+  g_clear_object (&block);
+  return TRUE; /* returning TRUE means that we handled the method invocation */
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 static void
 partition_table_iface_init (UDisksPartitionTableIface *iface)
 {
   iface->handle_create_partition = handle_create_partition;
   iface->handle_create_partition_and_format = handle_create_partition_and_format;
+  iface->handle_create_partitions = handle_create_partitions;
 }
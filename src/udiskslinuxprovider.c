@@ -34,6 +34,8 @@
 #include "udisksstate.h"
 #include "udiskslinuxdevice.h"
 #include "udisksmodulemanager.h"
+#include "udisksconfigmanager.h"
+#include "udisksdaemonutil.h"
 
 #include <modules/udisksmoduleifacetypes.h>
 #include <modules/udisksmoduleobject.h>
@@ -61,8 +63,17 @@ struct _UDisksLinuxProvider
   UDisksProvider parent_instance;
 
   GUdevClient *gudev_client;
-  GAsyncQueue *probe_request_queue;
-  GThread *probe_request_thread;
+
+  /* uevents are probed concurrently by a pool of worker threads; requests
+   * are kept in @probe_request_queue in the order they were received and
+   * are handed to the main thread in that same order. Requests for a sysfs
+   * path that is already being probed are parked in
+   * @probe_request_busy_paths until the in-flight one is done. Both are
+   * protected by probe_lock.
+   */
+  GThreadPool *probe_request_pool;
+  GQueue probe_request_queue;
+  GHashTable *probe_request_busy_paths;
 
   UDisksObjectSkeleton *manager_object;
 
@@ -92,10 +103,29 @@ struct _UDisksLinuxProvider
 
   guint housekeeping_timeout;
   guint64 housekeeping_last;
+  guint64 module_housekeeping_last;
   gboolean housekeeping_running;
+
+  /* drives and module objects are housekept concurrently by a pool of
+   * worker threads, each object is cancelled after @housekeeping_deadline
+   * seconds. Objects whose housekeeping is still in progress are kept in
+   * @housekeeping_busy (protected by provider_lock) and skipped by the
+   * next housekeeping run.
+   */
+  GThreadPool *housekeeping_pool;
+  GHashTable *housekeeping_busy;
+  guint housekeeping_deadline;
 };
 
 G_LOCK_DEFINE_STATIC (provider_lock);
+G_LOCK_DEFINE_STATIC (probe_lock);
+
+/* Drives are checked every minute but each one refreshes its SMART data
+ * on its own schedule, see udisks_linux_drive_ata_smart_refresh_is_due().
+ * Module objects are housekept every 10 minutes.
+ */
+#define HOUSEKEEPING_INTERVAL_SECONDS         60
+#define MODULE_HOUSEKEEPING_INTERVAL_SECONDS  (10*60)
 
 struct _UDisksLinuxProviderClass
 {
@@ -130,7 +160,11 @@ static void on_etc_udisks2_dir_monitor_changed (GFileMonitor     *monitor,
                                                 GFileMonitorEvent event_type,
                                                 gpointer          user_data);
 
-gpointer probe_request_thread_func (gpointer user_data);
+static void probe_request_thread_func (gpointer data,
+                                       gpointer user_data);
+
+static void housekeeping_job_func (gpointer data,
+                                   gpointer user_data);
 
 G_DEFINE_TYPE (UDisksLinuxProvider, udisks_linux_provider, UDISKS_TYPE_PROVIDER);
 
@@ -140,11 +174,16 @@ udisks_linux_provider_finalize (GObject *object)
   UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (object);
   UDisksDaemon *daemon;
 
-  /* stop the request thread and wait for it */
-  g_async_queue_push (provider->probe_request_queue, (gpointer) 0xdeadbeef);
-  g_thread_join (provider->probe_request_thread);
-  g_thread_unref (provider->probe_request_thread);
-  g_async_queue_unref (provider->probe_request_queue);
+  /* stop the probing threads and wait for them - every pending request
+   * holds a reference to @provider so there is nothing left to process here
+   */
+  g_thread_pool_free (provider->probe_request_pool, FALSE, TRUE);
+  g_warn_if_fail (g_queue_is_empty (&provider->probe_request_queue));
+  g_hash_table_unref (provider->probe_request_busy_paths);
+
+  /* every housekeeping job holds a reference to @provider as well */
+  g_thread_pool_free (provider->housekeeping_pool, FALSE, TRUE);
+  g_hash_table_unref (provider->housekeeping_busy);
 
   daemon = udisks_provider_get_daemon (UDISKS_PROVIDER (provider));
 
@@ -197,6 +236,7 @@ typedef struct
   UDisksLinuxProvider *provider;
   GUdevDevice *udev_device;
   UDisksLinuxDevice *udisks_device;
+  gboolean probed;
 } ProbeRequest;
 
 static void
@@ -210,46 +250,97 @@ probe_request_free (ProbeRequest *request)
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/* called in main thread with a processed ProbeRequest struct - see probe_request_thread_func() */
+/* called in main thread - see probe_request_thread_func() */
 static gboolean
-on_idle_with_probed_uevent (gpointer user_data)
+on_idle_with_probed_uevents (gpointer user_data)
 {
-  ProbeRequest *request = user_data;
-  udisks_linux_provider_handle_uevent (request->provider,
-                                       g_udev_device_get_action (request->udev_device),
-                                       request->udisks_device);
-  probe_request_free (request);
+  UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (user_data);
+  ProbeRequest *request;
+
+  /* Hand over processed requests strictly in the order the uevents were
+   * received. A request that is still being probed blocks the ones queued
+   * after it; they are picked up by the idle callback scheduled once it's
+   * done.
+   */
+  while (TRUE)
+    {
+      G_LOCK (probe_lock);
+      request = g_queue_peek_head (&provider->probe_request_queue);
+      if (request == NULL || !request->probed)
+        {
+          G_UNLOCK (probe_lock);
+          break;
+        }
+      g_queue_pop_head (&provider->probe_request_queue);
+      G_UNLOCK (probe_lock);
+
+      udisks_linux_provider_handle_uevent (request->provider,
+                                           g_udev_device_get_action (request->udev_device),
+                                           request->udisks_device);
+      probe_request_free (request);
+    }
+
+  g_object_unref (provider);
   return FALSE; /* remove source */
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-gpointer
-probe_request_thread_func (gpointer user_data)
+/* called with probe_lock held */
+static void
+probe_request_dispatch (UDisksLinuxProvider *provider,
+                        ProbeRequest        *request)
 {
-  UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (user_data);
-  ProbeRequest *request;
+  const gchar *sysfs_path;
+  GQueue *waiting;
 
-  do
+  /* never probe the same device from two threads at once */
+  sysfs_path = g_udev_device_get_sysfs_path (request->udev_device);
+  waiting = g_hash_table_lookup (provider->probe_request_busy_paths, sysfs_path);
+  if (waiting != NULL)
+    {
+      g_queue_push_tail (waiting, request);
+    }
+  else
     {
-      request = g_async_queue_pop (provider->probe_request_queue);
+      g_hash_table_insert (provider->probe_request_busy_paths, g_strdup (sysfs_path), g_queue_new ());
+      g_thread_pool_push (provider->probe_request_pool, request, NULL);
+    }
+}
 
-      /* used by _finalize() above to stop this thread - if received, we can
-       * no longer use @provider
-       */
-      if (request == (gpointer) 0xdeadbeef)
-        goto out;
+/* runs in a probing thread from the provider->probe_request_pool */
+static void
+probe_request_thread_func (gpointer data,
+                           gpointer user_data)
+{
+  UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (user_data);
+  ProbeRequest *request = data;
+  const gchar *sysfs_path;
+  GQueue *waiting;
+  ProbeRequest *next;
+
+  /* probe the device - this may take a while */
+  request->udisks_device = udisks_linux_device_new_sync (request->udev_device);
 
-      /* probe the device - this may take a while */
-      request->udisks_device = udisks_linux_device_new_sync (request->udev_device);
+  G_LOCK (probe_lock);
+  request->probed = TRUE;
 
-      /* now that we've probed the device, post the request back to the main thread */
-      g_idle_add (on_idle_with_probed_uevent, request);
+  /* start probing the next request for the same device, if any */
+  sysfs_path = g_udev_device_get_sysfs_path (request->udev_device);
+  waiting = g_hash_table_lookup (provider->probe_request_busy_paths, sysfs_path);
+  g_warn_if_fail (waiting != NULL);
+  if (waiting != NULL)
+    {
+      next = g_queue_pop_head (waiting);
+      if (next != NULL)
+        g_thread_pool_push (provider->probe_request_pool, next, NULL);
+      else
+        g_hash_table_remove (provider->probe_request_busy_paths, sysfs_path);
     }
-  while (TRUE);
+  G_UNLOCK (probe_lock);
 
- out:
-  return NULL;
+  /* now that we've probed the device, post the request back to the main thread */
+  g_idle_add (on_idle_with_probed_uevents, g_object_ref (provider));
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -267,8 +358,11 @@ on_uevent (GUdevClient  *client,
   request->provider = g_object_ref (provider);
   request->udev_device = g_object_ref (device);
 
-  /* process uevent in "probing-thread" */
-  g_async_queue_push (provider->probe_request_queue, request);
+  /* process uevent in one of the "probing-threads" */
+  G_LOCK (probe_lock);
+  g_queue_push_tail (&provider->probe_request_queue, request);
+  probe_request_dispatch (provider, request);
+  G_UNLOCK (probe_lock);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -288,10 +382,12 @@ udisks_linux_provider_init (UDisksLinuxProvider *provider)
                     G_CALLBACK (on_uevent),
                     provider);
 
-  provider->probe_request_queue = g_async_queue_new ();
-  provider->probe_request_thread = g_thread_new ("probing-thread",
-                                                 probe_request_thread_func,
-                                                 provider);
+  g_queue_init (&provider->probe_request_queue);
+  provider->probe_request_busy_paths = g_hash_table_new_full (g_str_hash,
+                                                              g_str_equal,
+                                                              g_free,
+                                                              (GDestroyNotify) g_queue_free);
+  provider->housekeeping_busy = g_hash_table_new (g_direct_hash, g_direct_equal);
 
   file = g_file_new_for_path (PACKAGE_SYSCONF_DIR "/udisks2");
   provider->etc_udisks2_dir_monitor = g_file_monitor_directory (file,
@@ -415,43 +511,193 @@ udev_device_name_cmp (GUdevDevice *a,
   return device_name_cmp (g_udev_device_get_name (a), g_udev_device_get_name (b));
 }
 
+/* ---------------------------------------------------------------------------------------------------- */
+
+/* Coldplug handles every block device exactly once. To make that possible
+ * without a second pass, devices are ordered by their level in the device
+ * stack: whole disks come first, then partitions, then devices stacked on
+ * top of those (device-mapper, md-raid, LVM, ...) - each device comes after
+ * its parent disk and after all of its slaves.
+ */
+typedef struct
+{
+  GUdevDevice *udev_device;
+  UDisksLinuxDevice *udisks_device;
+  guint level;
+} ColdplugDevice;
+
+static void
+coldplug_device_free (ColdplugDevice *cdevice)
+{
+  g_clear_object (&cdevice->udev_device);
+  g_clear_object (&cdevice->udisks_device);
+  g_slice_free (ColdplugDevice, cdevice);
+}
+
+static gint
+coldplug_device_level_cmp (const ColdplugDevice *a,
+                           const ColdplugDevice *b)
+{
+  return (gint) a->level - (gint) b->level;
+}
+
+/* runs in a thread from the pool created in get_coldplug_devices() */
+static void
+coldplug_probe_thread_func (gpointer data,
+                            gpointer user_data)
+{
+  ColdplugDevice *cdevice = data;
+
+  cdevice->udisks_device = udisks_linux_device_new_sync (cdevice->udev_device);
+}
+
+static guint
+get_device_level (const gchar *sysfs_path,
+                  GHashTable  *levels)
+{
+  gpointer value;
+  gchar *partition_file;
+  gchar *parent;
+  gchar **slaves;
+  guint level = 0;
+  guint n;
+
+  if (g_hash_table_lookup_extended (levels, sysfs_path, NULL, &value))
+    return GPOINTER_TO_UINT (value);
+
+  /* guard against (bogus) loops in the device stack */
+  g_hash_table_insert (levels, g_strdup (sysfs_path), GUINT_TO_POINTER (0));
+
+  /* a partition comes after the disk it is on ... */
+  partition_file = g_build_filename (sysfs_path, "partition", NULL);
+  if (g_file_test (partition_file, G_FILE_TEST_EXISTS))
+    {
+      parent = g_path_get_dirname (sysfs_path);
+      level = MAX (level, get_device_level (parent, levels) + 1);
+      g_free (parent);
+    }
+  g_free (partition_file);
+
+  /* ... and a stacked device comes after all its slaves */
+  slaves = udisks_daemon_util_resolve_links (sysfs_path, "slaves");
+  for (n = 0; slaves != NULL && slaves[n] != NULL; n++)
+    level = MAX (level, get_device_level (slaves[n], levels) + 1);
+  g_strfreev (slaves);
+
+  g_hash_table_insert (levels, g_strdup (sysfs_path), GUINT_TO_POINTER (level));
+  return level;
+}
+
+/* Returns a list of ColdplugDevice in the order they should be handled,
+ * free with g_list_free_full() and coldplug_device_free().
+ */
 static GList *
-get_udisks_devices (UDisksLinuxProvider *provider)
+get_coldplug_devices (UDisksLinuxProvider *provider)
 {
+  UDisksDaemon *daemon;
+  GThreadPool *pool;
+  GHashTable *levels;
   GList *devices;
-  GList *udisks_devices;
+  GList *cdevices;
   GList *l;
+  gint max_threads;
+  gint64 start_time;
+  gint64 probe_time;
+
+  daemon = udisks_provider_get_daemon (UDISKS_PROVIDER (provider));
+  max_threads = udisks_config_manager_get_probing_threads (udisks_daemon_get_config_manager (daemon));
+
+  start_time = g_get_monotonic_time ();
 
   devices = g_udev_client_query_by_subsystem (provider->gudev_client, "block");
 
   /* make sure we process sda before sdz and sdz before sdaa */
   devices = g_list_sort (devices, (GCompareFunc) udev_device_name_cmp);
 
-  udisks_devices = NULL;
+  /* probe all devices in parallel - a non-exclusive pool can't fail to be
+   * created and freeing it waits for all the probes to finish
+   */
+  pool = g_thread_pool_new (coldplug_probe_thread_func,
+                            NULL,
+                            max_threads,
+                            FALSE, /* exclusive */
+                            NULL);
+  cdevices = NULL;
   for (l = devices; l != NULL; l = l->next)
     {
       GUdevDevice *device = G_UDEV_DEVICE (l->data);
+      ColdplugDevice *cdevice;
+
       if (!g_udev_device_get_is_initialized (device))
         continue;
-      udisks_devices = g_list_prepend (udisks_devices, udisks_linux_device_new_sync (device));
+      cdevice = g_slice_new0 (ColdplugDevice);
+      cdevice->udev_device = g_object_ref (device);
+      cdevices = g_list_prepend (cdevices, cdevice);
+      g_thread_pool_push (pool, cdevice, NULL);
     }
-  udisks_devices = g_list_reverse (udisks_devices);
+  cdevices = g_list_reverse (cdevices);
   g_list_free_full (devices, g_object_unref);
+  g_thread_pool_free (pool, FALSE, TRUE);
+
+  probe_time = g_get_monotonic_time ();
+
+  /* g_list_sort() is stable so the name order is kept within a level */
+  levels = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, NULL);
+  for (l = cdevices; l != NULL; l = l->next)
+    {
+      ColdplugDevice *cdevice = l->data;
+      cdevice->level = get_device_level (g_udev_device_get_sysfs_path (cdevice->udev_device), levels);
+    }
+  g_hash_table_unref (levels);
+  cdevices = g_list_sort (cdevices, (GCompareFunc) coldplug_device_level_cmp);
+
+  udisks_info ("Probed %u block devices in %.3f seconds using up to %d threads (ordering took %.3f seconds)",
+               g_list_length (cdevices),
+               (probe_time - start_time) / ((gdouble) G_USEC_PER_SEC),
+               max_threads,
+               (g_get_monotonic_time () - probe_time) / ((gdouble) G_USEC_PER_SEC));
 
-  return udisks_devices;
+  return cdevices;
 }
 
 static void
 do_coldplug (UDisksLinuxProvider *provider,
-             GList               *udisks_devices)
+             GList               *cdevices)
 {
   GList *l;
+  gint64 start_time;
+  gint64 level_start_time;
+  guint num_devices = 0;
+  guint level = 0;
 
-  for (l = udisks_devices; l != NULL; l = l->next)
+  start_time = level_start_time = g_get_monotonic_time ();
+
+  for (l = cdevices; l != NULL; l = l->next)
     {
-      UDisksLinuxDevice *device = l->data;
-      udisks_linux_provider_handle_uevent (provider, "add", device);
+      ColdplugDevice *cdevice = l->data;
+
+      if (cdevice->level != level)
+        {
+          udisks_debug ("Coldplug of %u devices at level %u took %.3f seconds",
+                        num_devices, level,
+                        (g_get_monotonic_time () - level_start_time) / ((gdouble) G_USEC_PER_SEC));
+          level = cdevice->level;
+          level_start_time = g_get_monotonic_time ();
+          num_devices = 0;
+        }
+
+      udisks_linux_provider_handle_uevent (provider, "add", cdevice->udisks_device);
+      num_devices++;
     }
+
+  if (num_devices > 0)
+    udisks_debug ("Coldplug of %u devices at level %u took %.3f seconds",
+                  num_devices, level,
+                  (g_get_monotonic_time () - level_start_time) / ((gdouble) G_USEC_PER_SEC));
+
+  udisks_info ("Coldplug of %u block devices took %.3f seconds",
+               g_list_length (cdevices),
+               (g_get_monotonic_time () - start_time) / ((gdouble) G_USEC_PER_SEC));
 }
 
 static void
@@ -461,7 +707,7 @@ ensure_modules (UDisksLinuxProvider *provider)
   UDisksModuleManager *module_manager;
   GDBusInterfaceSkeleton *iface;
   UDisksModuleNewManagerIfaceFunc new_manager_iface_func;
-  GList *udisks_devices;
+  GList *cdevices;
   GList *l;
   gboolean do_refresh = FALSE;
   gboolean loaded;
@@ -518,9 +764,9 @@ ensure_modules (UDisksLinuxProvider *provider)
       /* Perform coldplug */
       udisks_debug ("Performing coldplug...");
 
-      udisks_devices = get_udisks_devices (provider);
-      do_coldplug (provider, udisks_devices);
-      g_list_free_full (udisks_devices, g_object_unref);
+      cdevices = get_coldplug_devices (provider);
+      do_coldplug (provider, cdevices);
+      g_list_free_full (cdevices, (GDestroyNotify) coldplug_device_free);
 
       udisks_debug ("Coldplug complete");
     }
@@ -594,9 +840,9 @@ udisks_linux_provider_start (UDisksProvider *_provider)
   UDisksDaemon *daemon;
   UDisksManager *manager;
   UDisksModuleManager *module_manager;
-  GList *udisks_devices;
-  guint n;
+  GList *cdevices;
   GDBusConnection *dbus_conn;
+  gint64 phase_start_time;
 
   provider->coldplug = TRUE;
 
@@ -648,19 +894,20 @@ udisks_linux_provider_start (UDisksProvider *_provider)
 
   /* probe for extra data we don't get from udev */
   udisks_info ("Initialization (device probing)");
-  udisks_devices = get_udisks_devices (provider);
-
-  /* do two coldplug runs to handle dependencies between devices */
-  for (n = 0; n < 2; n++)
-    {
-      udisks_info ("Initialization (coldplug %u/2)", n + 1);
-      do_coldplug (provider, udisks_devices);
-    }
-  g_list_free_full (udisks_devices, g_object_unref);
+  phase_start_time = g_get_monotonic_time ();
+  cdevices = get_coldplug_devices (provider);
+  udisks_daemon_add_startup_phase (daemon, "probing", phase_start_time, g_get_monotonic_time ());
+
+  /* devices are ordered so that a single coldplug run handles dependencies between devices */
+  udisks_info ("Initialization (coldplug)");
+  phase_start_time = g_get_monotonic_time ();
+  do_coldplug (provider, cdevices);
+  g_list_free_full (cdevices, (GDestroyNotify) coldplug_device_free);
+  udisks_daemon_add_startup_phase (daemon, "coldplug", phase_start_time, g_get_monotonic_time ());
   udisks_info ("Initialization complete");
 
-  /* schedule housekeeping for every 10 minutes */
-  provider->housekeeping_timeout = g_timeout_add_seconds (10*60,
+  /* schedule housekeeping for every minute */
+  provider->housekeeping_timeout = g_timeout_add_seconds (HOUSEKEEPING_INTERVAL_SECONDS,
                                                           on_housekeeping_timeout,
                                                           provider);
   /* ... and also do an initial run */
@@ -700,6 +947,38 @@ udisks_linux_provider_start (UDisksProvider *_provider)
                                       NULL);                            /* user data freeing func */
 }
 
+static void
+udisks_linux_provider_constructed (GObject *object)
+{
+  UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (object);
+  UDisksDaemon *daemon;
+  gint max_threads;
+
+  if (G_OBJECT_CLASS (udisks_linux_provider_parent_class)->constructed != NULL)
+    G_OBJECT_CLASS (udisks_linux_provider_parent_class)->constructed (object);
+
+  daemon = udisks_provider_get_daemon (UDISKS_PROVIDER (provider));
+  max_threads = udisks_config_manager_get_probing_threads (udisks_daemon_get_config_manager (daemon));
+
+  /* a non-exclusive pool can't fail to be created */
+  provider->probe_request_pool = g_thread_pool_new (probe_request_thread_func,
+                                                    provider,
+                                                    max_threads,
+                                                    FALSE, /* exclusive */
+                                                    NULL);
+  udisks_debug ("Using up to %d threads for device probing", max_threads);
+
+  max_threads = udisks_config_manager_get_housekeeping_threads (udisks_daemon_get_config_manager (daemon));
+  provider->housekeeping_deadline = udisks_config_manager_get_housekeeping_timeout (udisks_daemon_get_config_manager (daemon));
+  provider->housekeeping_pool = g_thread_pool_new (housekeeping_job_func,
+                                                   provider,
+                                                   max_threads,
+                                                   FALSE, /* exclusive */
+                                                   NULL);
+  udisks_debug ("Using up to %d threads for housekeeping (%u seconds per object)",
+                max_threads, provider->housekeeping_deadline);
+}
+
 static void
 udisks_linux_provider_class_init (UDisksLinuxProviderClass *klass)
 {
@@ -708,6 +987,7 @@ udisks_linux_provider_class_init (UDisksLinuxProviderClass *klass)
 
   gobject_class = G_OBJECT_CLASS (klass);
   gobject_class->finalize     = udisks_linux_provider_finalize;
+  gobject_class->constructed  = udisks_linux_provider_constructed;
 
   provider_class        = UDISKS_PROVIDER_CLASS (klass);
   provider_class->start = udisks_linux_provider_start;
@@ -962,6 +1242,7 @@ handle_block_uevent_for_drive (UDisksLinuxProvider *provider,
           udisks_linux_drive_object_uevent (object, action, device);
 
           g_warn_if_fail (g_hash_table_remove (provider->sysfs_path_to_drive, sysfs_path));
+          udisks_daemon_index_drive_device (daemon, sysfs_path, NULL);
 
           devices = udisks_linux_drive_object_get_devices (object);
           if (devices == NULL)
@@ -991,7 +1272,10 @@ handle_block_uevent_for_drive (UDisksLinuxProvider *provider,
       if (object != NULL)
         {
           if (g_hash_table_lookup (provider->sysfs_path_to_drive, sysfs_path) == NULL)
-            g_hash_table_insert (provider->sysfs_path_to_drive, g_strdup (sysfs_path), object);
+            {
+              g_hash_table_insert (provider->sysfs_path_to_drive, g_strdup (sysfs_path), object);
+              udisks_daemon_index_drive_device (daemon, sysfs_path, object);
+            }
           udisks_linux_drive_object_uevent (object, action, device);
         }
       else
@@ -1006,6 +1290,7 @@ handle_block_uevent_for_drive (UDisksLinuxProvider *provider,
                                                                 G_DBUS_OBJECT_SKELETON (object));
                   g_hash_table_insert (provider->vpd_to_drive, g_strdup (vpd), object);
                   g_hash_table_insert (provider->sysfs_path_to_drive, g_strdup (sysfs_path), object);
+                  udisks_daemon_index_drive_device (daemon, sysfs_path, object);
 
                   /* schedule initial housekeeping for the drive unless coldplugging */
                   if (!provider->coldplug)
@@ -1044,6 +1329,7 @@ handle_block_uevent_for_block (UDisksLinuxProvider *provider,
       object = g_hash_table_lookup (provider->sysfs_to_block, sysfs_path);
       if (object != NULL)
         {
+          udisks_daemon_unindex_block_object (daemon, object);
           g_dbus_object_manager_server_unexport (udisks_daemon_get_object_manager (daemon),
                                                  g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
           g_warn_if_fail (g_hash_table_remove (provider->sysfs_to_block, sysfs_path));
@@ -1055,6 +1341,8 @@ handle_block_uevent_for_block (UDisksLinuxProvider *provider,
       if (object != NULL)
         {
           udisks_linux_block_object_uevent (object, action, device);
+          /* device file symlinks may have changed */
+          udisks_daemon_index_block_object (daemon, object);
         }
       else
         {
@@ -1062,6 +1350,7 @@ handle_block_uevent_for_block (UDisksLinuxProvider *provider,
           g_dbus_object_manager_server_export_uniquely (udisks_daemon_get_object_manager (daemon),
                                                         G_DBUS_OBJECT_SKELETON (object));
           g_hash_table_insert (provider->sysfs_to_block, g_strdup (sysfs_path), object);
+          udisks_daemon_index_block_object (daemon, object);
         }
     }
 }
@@ -1263,7 +1552,8 @@ handle_block_uevent (UDisksLinuxProvider *provider,
   if (g_strcmp0 (action, "add") != 0)
     {
       /* Possibly need to clean up */
-      udisks_state_check (udisks_daemon_get_state (udisks_provider_get_daemon (UDISKS_PROVIDER (provider))));
+      udisks_state_check_block (udisks_daemon_get_state (udisks_provider_get_daemon (UDISKS_PROVIDER (provider))),
+                                g_udev_device_get_device_number (device->udev_device));
     }
 }
 
@@ -1288,90 +1578,272 @@ udisks_linux_provider_handle_uevent (UDisksLinuxProvider *provider,
     }
 
   G_UNLOCK (provider_lock);
+
+  /* let anyone waiting for objects recheck */
+  udisks_provider_emit_changed (UDISKS_PROVIDER (provider));
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/* Runs in housekeeping thread - called without lock held */
+/* A single housekeeping run; shared by the thread waiting for the run to
+ * complete and all the jobs of the run. Jobs that missed their deadline may
+ * still be running after the waiting thread gave up on them, hence the
+ * reference counting.
+ */
+typedef struct
+{
+  volatile gint ref_count;
+  GMutex lock;
+  GCond cond;
+  guint num_pending;      /* protected by @lock */
+  GList *jobs;            /* of HousekeepingJob, fixed once the jobs are pushed */
+} HousekeepingRun;
+
+typedef struct
+{
+  HousekeepingRun *run;
+  UDisksLinuxProvider *provider;
+  GDBusObject *object;    /* UDisksLinuxDriveObject or UDisksModuleObject */
+  GCancellable *cancellable;
+  guint secs_since_last;
+  gint64 start_time;      /* protected by run->lock, 0 until started */
+  gint64 duration;        /* protected by run->lock, -1 until finished */
+} HousekeepingJob;
+
 static void
-housekeeping_all_drives (UDisksLinuxProvider *provider,
-                         guint                secs_since_last)
+housekeeping_job_free (HousekeepingJob *job)
 {
-  GList *objects;
-  GList *l;
+  g_object_unref (job->provider);
+  g_object_unref (job->object);
+  g_object_unref (job->cancellable);
+  g_slice_free (HousekeepingJob, job);
+}
 
-  G_LOCK (provider_lock);
-  objects = g_hash_table_get_values (provider->vpd_to_drive);
-  g_list_foreach (objects, (GFunc) g_object_ref, NULL);
-  G_UNLOCK (provider_lock);
+static HousekeepingRun *
+housekeeping_run_new (void)
+{
+  HousekeepingRun *run;
 
-  for (l = objects; l != NULL; l = l->next)
+  run = g_slice_new0 (HousekeepingRun);
+  run->ref_count = 1;
+  g_mutex_init (&run->lock);
+  g_cond_init (&run->cond);
+
+  return run;
+}
+
+static void
+housekeeping_run_unref (HousekeepingRun *run)
+{
+  if (g_atomic_int_dec_and_test (&run->ref_count))
     {
-      UDisksLinuxDriveObject *object = UDISKS_LINUX_DRIVE_OBJECT (l->data);
-      GError *error;
-
-      error = NULL;
-      if (!udisks_linux_drive_object_housekeeping (object,
-                                                   secs_since_last,
-                                                   NULL, /* TODO: cancellable */
-                                                   &error))
-        {
-          udisks_warning ("Error performing housekeeping for drive %s: %s (%s, %d)",
-                          g_dbus_object_get_object_path (G_DBUS_OBJECT (object)),
-                          error->message, g_quark_to_string (error->domain), error->code);
-          g_clear_error (&error);
-        }
+      g_list_free_full (run->jobs, (GDestroyNotify) housekeeping_job_free);
+      g_mutex_clear (&run->lock);
+      g_cond_clear (&run->cond);
+      g_slice_free (HousekeepingRun, run);
     }
-
-  g_list_foreach (objects, (GFunc) g_object_unref, NULL);
-  g_list_free (objects);
 }
 
-/* Runs in housekeeping thread - called without lock held */
+/* called with provider_lock held */
 static void
-housekeeping_all_modules (UDisksLinuxProvider *provider,
+housekeeping_run_add_job (HousekeepingRun     *run,
+                          UDisksLinuxProvider *provider,
+                          GDBusObject         *object,
                           guint                secs_since_last)
 {
-  GList *objects = NULL;
-  GList *l;
-  GHashTable *inst_table;
-  GHashTableIter iter_funcs, iter_inst;
-  GDBusObjectSkeleton *inst;
+  HousekeepingJob *job;
 
-  G_LOCK (provider_lock);
-  g_hash_table_iter_init (&iter_funcs, provider->module_funcs_to_instances);
-  while (g_hash_table_iter_next (&iter_funcs, NULL, (gpointer *) &inst_table))
+  if (g_hash_table_contains (provider->housekeeping_busy, object))
     {
-      g_hash_table_iter_init (&iter_inst, inst_table);
-      while (g_hash_table_iter_next (&iter_inst, (gpointer *) &inst, NULL))
-        objects = g_list_append (objects, g_object_ref (inst));
+      udisks_info ("Skipping housekeeping for %s: previous housekeeping still in progress",
+                   g_dbus_object_get_object_path (object));
+      return;
     }
+  g_hash_table_add (provider->housekeeping_busy, object);
+
+  job = g_slice_new0 (HousekeepingJob);
+  job->run = run;
+  job->provider = g_object_ref (provider);
+  job->object = g_object_ref (object);
+  job->cancellable = g_cancellable_new ();
+  job->secs_since_last = secs_since_last;
+  job->duration = -1;
+  run->jobs = g_list_prepend (run->jobs, job);
+}
+
+/* Runs in a housekeeping pool thread - called without lock held */
+static void
+housekeeping_job_func (gpointer data,
+                       gpointer user_data)
+{
+  HousekeepingJob *job = data;
+  HousekeepingRun *run = job->run;
+  UDisksLinuxProvider *provider = job->provider;
+  gboolean is_drive;
+  gboolean ret;
+  GError *error = NULL;
+
+  is_drive = UDISKS_IS_LINUX_DRIVE_OBJECT (job->object);
+
+  g_mutex_lock (&run->lock);
+  job->start_time = g_get_monotonic_time ();
+  g_cond_broadcast (&run->cond);
+  g_mutex_unlock (&run->lock);
+
+  if (g_cancellable_set_error_if_cancelled (job->cancellable, &error))
+    ret = FALSE;
+  else if (is_drive)
+    ret = udisks_linux_drive_object_housekeeping (UDISKS_LINUX_DRIVE_OBJECT (job->object),
+                                                  job->secs_since_last,
+                                                  job->cancellable,
+                                                  &error);
+  else
+    ret = udisks_module_object_housekeeping (UDISKS_MODULE_OBJECT (job->object),
+                                             job->secs_since_last,
+                                             job->cancellable,
+                                             &error);
+
+  if (!ret)
+    {
+      /* the deadline was already reported when the job was cancelled */
+      if (!g_cancellable_is_cancelled (job->cancellable))
+        udisks_warning ("Error performing housekeeping for %s %s: %s (%s, %d)",
+                        is_drive ? "drive" : "module object",
+                        g_dbus_object_get_object_path (job->object),
+                        error->message, g_quark_to_string (error->domain), error->code);
+      g_clear_error (&error);
+    }
+
+  if (is_drive)
+    {
+      guint count;
+      gint64 last_usec, max_usec, avg_usec;
+
+      udisks_linux_drive_object_get_housekeeping_stats (UDISKS_LINUX_DRIVE_OBJECT (job->object),
+                                                        &count,
+                                                        NULL,
+                                                        &last_usec,
+                                                        &max_usec,
+                                                        &avg_usec);
+      udisks_debug ("Housekeeping for drive %s took %.3f seconds (max %.3f, average %.3f over %u runs)",
+                    g_dbus_object_get_object_path (job->object),
+                    last_usec / (gdouble) G_USEC_PER_SEC,
+                    max_usec / (gdouble) G_USEC_PER_SEC,
+                    avg_usec / (gdouble) G_USEC_PER_SEC,
+                    count);
+    }
+
+  G_LOCK (provider_lock);
+  g_hash_table_remove (provider->housekeeping_busy, job->object);
   G_UNLOCK (provider_lock);
 
-  for (l = objects; l != NULL; l = l->next)
+  g_mutex_lock (&run->lock);
+  job->duration = g_get_monotonic_time () - job->start_time;
+  run->num_pending--;
+  g_cond_broadcast (&run->cond);
+  g_mutex_unlock (&run->lock);
+
+  housekeeping_run_unref (run);
+}
+
+/* Waits for the jobs of @run, cancelling those exceeding their deadline.
+ *
+ * Returns once all jobs are done, or all unfinished jobs were cancelled
+ * but are still stuck (e.g. in an uninterruptible ioctl()), or all pool
+ * threads are occupied by such jobs - in which case the jobs that have
+ * not started yet are cancelled as well.
+ *
+ * Called with run->lock held.
+ */
+static void
+housekeeping_run_wait (HousekeepingRun *run,
+                       gint64           deadline_usec,
+                       guint            max_threads)
+{
+  while (run->num_pending > 0)
     {
-      UDisksModuleObject *object = UDISKS_MODULE_OBJECT (l->data);
-      GError *error;
+      gint64 now;
+      gint64 next_deadline = G_MAXINT64;
+      guint num_stuck = 0;
+      GList *l;
 
-      error = NULL;
-      if (! udisks_module_object_housekeeping (object,
-                                               secs_since_last,
-                                               NULL, /* TODO: cancellable */
-                                               &error))
+      now = g_get_monotonic_time ();
+      for (l = run->jobs; l != NULL; l = l->next)
         {
-          udisks_warning ("Error performing housekeeping for module object %s: %s (%s, %d)",
-                          g_dbus_object_get_object_path (G_DBUS_OBJECT (object)),
-                          error->message, g_quark_to_string (error->domain), error->code);
-          g_clear_error (&error);
+          HousekeepingJob *job = l->data;
+
+          if (job->start_time == 0 || job->duration >= 0)
+            continue;
+
+          if (g_cancellable_is_cancelled (job->cancellable))
+            {
+              num_stuck++;
+            }
+          else if (now >= job->start_time + deadline_usec)
+            {
+              udisks_warning ("Housekeeping for %s did not complete within %u seconds, cancelling",
+                              g_dbus_object_get_object_path (job->object),
+                              (guint) (deadline_usec / G_USEC_PER_SEC));
+              g_cancellable_cancel (job->cancellable);
+              num_stuck++;
+            }
+          else
+            {
+              next_deadline = MIN (next_deadline, job->start_time + deadline_usec);
+            }
         }
-    }
 
-  g_list_foreach (objects, (GFunc) g_object_unref, NULL);
-  g_list_free (objects);
+      if (num_stuck == run->num_pending)
+        break;
+
+      if (num_stuck >= max_threads)
+        {
+          udisks_warning ("All housekeeping threads are blocked, skipping %u remaining objects",
+                          run->num_pending - num_stuck);
+          for (l = run->jobs; l != NULL; l = l->next)
+            {
+              HousekeepingJob *job = l->data;
+              if (job->start_time == 0)
+                g_cancellable_cancel (job->cancellable);
+            }
+          break;
+        }
+
+      if (next_deadline == G_MAXINT64)
+        g_cond_wait (&run->cond, &run->lock);
+      else
+        g_cond_wait_until (&run->cond, &run->lock, next_deadline);
+    }
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+static void
+log_authorization_stats (UDisksDaemon *daemon)
+{
+  GVariant *stats;
+  GVariantIter iter;
+  const gchar *action_id;
+  guint64 hits, misses;
+  guint64 total_hits = 0;
+  guint64 total_misses = 0;
+
+  stats = g_variant_ref_sink (udisks_daemon_get_authorization_stats (daemon));
+  g_variant_iter_init (&iter, stats);
+  while (g_variant_iter_next (&iter, "{&s(tt)}", &action_id, &hits, &misses))
+    {
+      udisks_debug ("Authorization checks for %s: %" G_GUINT64_FORMAT " cache hits, %" G_GUINT64_FORMAT " misses",
+                    action_id, hits, misses);
+      total_hits += hits;
+      total_misses += misses;
+    }
+  if (total_hits + total_misses > 0)
+    udisks_info ("Authorization checks so far: %" G_GUINT64_FORMAT " answered from the cache, %"
+                 G_GUINT64_FORMAT " passed to polkit",
+                 total_hits, total_misses);
+  g_variant_unref (stats);
+}
+
 static void
 housekeeping_thread_func (GTask           *task,
                           gpointer         source_object,
@@ -1379,10 +1851,23 @@ housekeeping_thread_func (GTask           *task,
                           GCancellable    *cancellable)
 {
   UDisksLinuxProvider *provider = UDISKS_LINUX_PROVIDER (task_data);
+  HousekeepingRun *run;
+  HousekeepingJob *slowest = NULL;
+  GHashTableIter iter_funcs, iter_inst;
+  GHashTable *inst_table;
+  GDBusObject *object;
   guint secs_since_last;
+  guint module_secs_since_last;
+  gboolean modules_due;
+  guint num_jobs;
+  guint num_unfinished = 0;
   guint64 now;
+  gint64 start_time;
+  gboolean initial;
+  GList *l;
 
-  /* TODO: probably want some kind of timeout here to avoid faulty devices/drives blocking forever */
+  start_time = g_get_monotonic_time ();
+  initial = (provider->housekeeping_last == 0);
 
   secs_since_last = 0;
   now = time (NULL);
@@ -1390,18 +1875,84 @@ housekeeping_thread_func (GTask           *task,
     secs_since_last = now - provider->housekeeping_last;
   provider->housekeeping_last = now;
 
-  udisks_info ("Housekeeping initiated (%u seconds since last housekeeping)", secs_since_last);
+  module_secs_since_last = 0;
+  if (provider->module_housekeeping_last > 0)
+    module_secs_since_last = now - provider->module_housekeeping_last;
+  modules_due = (provider->module_housekeeping_last == 0 ||
+                 module_secs_since_last >= MODULE_HOUSEKEEPING_INTERVAL_SECONDS);
+  if (modules_due)
+    provider->module_housekeeping_last = now;
 
-  housekeeping_all_drives (provider, secs_since_last);
-  housekeeping_all_modules (provider, secs_since_last);
+  udisks_debug ("Housekeeping initiated (%u seconds since last housekeeping)", secs_since_last);
+
+  run = housekeeping_run_new ();
+
+  /* drives first, then objects exported by modules */
+  G_LOCK (provider_lock);
+  g_hash_table_iter_init (&iter_funcs, provider->vpd_to_drive);
+  while (g_hash_table_iter_next (&iter_funcs, NULL, (gpointer *) &object))
+    housekeeping_run_add_job (run, provider, object, secs_since_last);
+  if (modules_due)
+    {
+      g_hash_table_iter_init (&iter_funcs, provider->module_funcs_to_instances);
+      while (g_hash_table_iter_next (&iter_funcs, NULL, (gpointer *) &inst_table))
+        {
+          g_hash_table_iter_init (&iter_inst, inst_table);
+          while (g_hash_table_iter_next (&iter_inst, (gpointer *) &object, NULL))
+            housekeeping_run_add_job (run, provider, object, module_secs_since_last);
+        }
+    }
+  G_UNLOCK (provider_lock);
+
+  run->jobs = g_list_reverse (run->jobs);
+  num_jobs = g_list_length (run->jobs);
+  run->num_pending = num_jobs;
+
+  for (l = run->jobs; l != NULL; l = l->next)
+    {
+      g_atomic_int_inc (&run->ref_count);
+      g_thread_pool_push (provider->housekeeping_pool, l->data, NULL);
+    }
+
+  g_mutex_lock (&run->lock);
+  housekeeping_run_wait (run,
+                         provider->housekeeping_deadline * G_USEC_PER_SEC,
+                         g_thread_pool_get_max_threads (provider->housekeeping_pool));
+  num_unfinished = run->num_pending;
+  for (l = run->jobs; l != NULL; l = l->next)
+    {
+      HousekeepingJob *job = l->data;
+      if (UDISKS_IS_LINUX_DRIVE_OBJECT (job->object) &&
+          (slowest == NULL || job->duration > slowest->duration))
+        slowest = job;
+    }
+  if (slowest != NULL && slowest->duration >= 0)
+    udisks_debug ("Housekeeping complete (%u objects, %u unfinished, slowest drive %s took %.3f seconds)",
+                  num_jobs, num_unfinished,
+                  g_dbus_object_get_object_path (slowest->object),
+                  slowest->duration / (gdouble) G_USEC_PER_SEC);
+  else
+    udisks_debug ("Housekeeping complete (%u objects, %u unfinished)",
+                  num_jobs, num_unfinished);
+  g_mutex_unlock (&run->lock);
+
+  housekeeping_run_unref (run);
+
+  if (initial)
+    udisks_daemon_add_startup_phase (udisks_provider_get_daemon (UDISKS_PROVIDER (provider)),
+                                     "housekeeping",
+                                     start_time,
+                                     g_get_monotonic_time ());
+
+  if (modules_due && !initial)
+    log_authorization_stats (udisks_provider_get_daemon (UDISKS_PROVIDER (provider)));
 
-  udisks_info ("Housekeeping complete");
   G_LOCK (provider_lock);
   provider->housekeeping_running = FALSE;
   G_UNLOCK (provider_lock);
 }
 
-/* called from the main thread on start-up and every 10 minutes or so */
+/* called from the main thread on start-up and every minute or so */
 static gboolean
 on_housekeeping_timeout (gpointer user_data)
 {
@@ -1444,6 +1995,8 @@ update_all_block_objects (UDisksLinuxProvider *provider)
 
   g_list_foreach (objects, (GFunc) g_object_unref, NULL);
   g_list_free (objects);
+
+  udisks_provider_emit_changed (UDISKS_PROVIDER (provider));
 }
 
 static void
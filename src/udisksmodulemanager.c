@@ -372,6 +372,8 @@ udisks_module_manager_load_modules (UDisksModuleManager *manager)
   GModule *module;
   ModuleData *module_data;
   gchar *pth;
+  gchar *phase_name;
+  gint64 module_init_start_time;
 
   UDisksModuleIfaceSetupFunc block_object_iface_setup_func;
   UDisksModuleIfaceSetupFunc drive_object_iface_setup_func;
@@ -432,7 +434,14 @@ udisks_module_manager_load_modules (UDisksModuleManager *manager)
               module_id = module_id_func ();
 
               /* Initialize the module and store its state pointer. */
+              module_init_start_time = g_get_monotonic_time ();
               module_state_pointer = module_init_func (udisks_module_manager_get_daemon (manager));
+              phase_name = g_strdup_printf ("module-%s", module_id != NULL ? module_id : "unknown");
+              udisks_daemon_add_startup_phase (udisks_module_manager_get_daemon (manager),
+                                               phase_name,
+                                               module_init_start_time,
+                                               g_get_monotonic_time ());
+              g_free (phase_name);
 
               /* Module tear down function */
               manager->teardown_funcs = g_list_append (manager->teardown_funcs,  module_teardown_func);
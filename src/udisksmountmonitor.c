@@ -71,10 +71,54 @@ struct _UDisksMountMonitor
   GIOChannel *swaps_channel;
   GSource *swaps_watch_source;
 
-  gboolean have_data;
-  GList *mounts;
+  /* Change notifications are coalesced: the first change after a quiet
+   * period is handled right away, further changes within
+   * MOUNTS_COALESCE_MSEC are handled together by @reload_source.
+   */
+  GMainContext *context;
+  GSource *reload_source;
+  gint64 last_reload;
+  gboolean mounts_dirty;
+  gboolean swaps_dirty;
+
+  /* The parsed lines of /proc/self/mountinfo keyed by mount ID and of
+   * /proc/swaps keyed by file name, see SourceEntry. Lines that didn't
+   * change since the last reload are not parsed again.
+   */
+  GHashTable *mountinfo_entries;
+  GHashTable *swaps_entries;
+  guint64 generation;
+
+  /* mount key (see make_mount_key()) -> MountRef */
+  GHashTable *mounts;
+
+  /* dev_t -> GList of UDisksMount (not referenced, @mounts holds them),
+   * sorted with udisks_mount_compare()
+   */
+  GHashTable *mounts_by_dev;
+
+  /* protects @mountinfo_entries, @swaps_entries, @mounts and @mounts_by_dev */
+  GMutex lock;
 };
 
+typedef struct
+{
+  gchar *line;            /* the line as read from the file */
+  gchar *mount_key;       /* key in monitor->mounts or NULL if the line isn't tracked */
+  guint64 generation;     /* the reload the line was last seen in */
+} SourceEntry;
+
+/* Several lines may map to the same mount, e.g. a file system bind-mounted
+ * on top of itself, so mounts are reference counted.
+ */
+typedef struct
+{
+  UDisksMount *mount;
+  guint count;
+} MountRef;
+
+#define MOUNTS_COALESCE_MSEC 100
+
 typedef struct _UDisksMountMonitorClass UDisksMountMonitorClass;
 
 struct _UDisksMountMonitorClass
@@ -100,9 +144,26 @@ static guint signals[LAST_SIGNAL] = { 0 };
 
 G_DEFINE_TYPE (UDisksMountMonitor, udisks_mount_monitor, G_TYPE_OBJECT)
 
-static void udisks_mount_monitor_ensure (UDisksMountMonitor *monitor);
-static void udisks_mount_monitor_invalidate (UDisksMountMonitor *monitor);
 static void udisks_mount_monitor_constructed (GObject *object);
+static void reload_mounts (UDisksMountMonitor *monitor,
+                           gboolean            reload_mountinfo,
+                           gboolean            reload_swaps,
+                           gboolean            emit_signals);
+
+static void
+source_entry_free (SourceEntry *entry)
+{
+  g_free (entry->line);
+  g_free (entry->mount_key);
+  g_slice_free (SourceEntry, entry);
+}
+
+static void
+mount_ref_free (MountRef *ref)
+{
+  g_object_unref (ref->mount);
+  g_slice_free (MountRef, ref);
+}
 
 static void
 udisks_mount_monitor_finalize (GObject *object)
@@ -119,8 +180,18 @@ udisks_mount_monitor_finalize (GObject *object)
   if (monitor->swaps_watch_source != NULL)
     g_source_destroy (monitor->swaps_watch_source);
 
-  g_list_foreach (monitor->mounts, (GFunc) g_object_unref, NULL);
-  g_list_free (monitor->mounts);
+  if (monitor->reload_source != NULL)
+    {
+      g_source_destroy (monitor->reload_source);
+      g_source_unref (monitor->reload_source);
+    }
+  g_main_context_unref (monitor->context);
+
+  g_hash_table_unref (monitor->mountinfo_entries);
+  g_hash_table_unref (monitor->swaps_entries);
+  g_hash_table_unref (monitor->mounts_by_dev);
+  g_hash_table_unref (monitor->mounts);
+  g_mutex_clear (&monitor->lock);
 
   if (G_OBJECT_CLASS (udisks_mount_monitor_parent_class)->finalize != NULL)
     G_OBJECT_CLASS (udisks_mount_monitor_parent_class)->finalize (object);
@@ -129,7 +200,23 @@ udisks_mount_monitor_finalize (GObject *object)
 static void
 udisks_mount_monitor_init (UDisksMountMonitor *monitor)
 {
-  monitor->mounts = NULL;
+  g_mutex_init (&monitor->lock);
+  monitor->mountinfo_entries = g_hash_table_new_full (g_direct_hash,
+                                                      g_direct_equal,
+                                                      NULL,
+                                                      (GDestroyNotify) source_entry_free);
+  monitor->swaps_entries = g_hash_table_new_full (g_str_hash,
+                                                  g_str_equal,
+                                                  g_free,
+                                                  (GDestroyNotify) source_entry_free);
+  monitor->mounts = g_hash_table_new_full (g_str_hash,
+                                           g_str_equal,
+                                           g_free,
+                                           (GDestroyNotify) mount_ref_free);
+  monitor->mounts_by_dev = g_hash_table_new_full (g_int64_hash,
+                                                  g_int64_equal,
+                                                  g_free,
+                                                  (GDestroyNotify) g_list_free);
 }
 
 static void
@@ -185,89 +272,40 @@ udisks_mount_monitor_class_init (UDisksMountMonitorClass *klass)
                                                 UDISKS_TYPE_MOUNT);
 }
 
-static void
-diff_sorted_lists (GList *list1,
-                   GList *list2,
-                   GCompareFunc compare,
-                   GList **added,
-                   GList **removed)
+static gboolean
+on_reload_timeout (gpointer user_data)
 {
-  int order;
+  UDisksMountMonitor *monitor = UDISKS_MOUNT_MONITOR (user_data);
 
-  *added = *removed = NULL;
+  g_source_unref (monitor->reload_source);
+  monitor->reload_source = NULL;
 
-  while (list1 != NULL && list2 != NULL)
-    {
-      order = (*compare) (list1->data, list2->data);
-      if (order < 0)
-        {
-          *removed = g_list_prepend (*removed, list1->data);
-          list1 = list1->next;
-        }
-      else if (order > 0)
-        {
-          *added = g_list_prepend (*added, list2->data);
-          list2 = list2->next;
-        }
-      else
-        { /* same item */
-          list1 = list1->next;
-          list2 = list2->next;
-        }
-    }
+  reload_mounts (monitor, monitor->mounts_dirty, monitor->swaps_dirty, TRUE);
 
-  while (list1 != NULL)
-    {
-      *removed = g_list_prepend (*removed, list1->data);
-      list1 = list1->next;
-    }
-  while (list2 != NULL)
-    {
-      *added = g_list_prepend (*added, list2->data);
-      list2 = list2->next;
-    }
+  return FALSE; /* remove the source */
 }
 
 static void
-reload_mounts (UDisksMountMonitor *monitor)
+schedule_reload (UDisksMountMonitor *monitor)
 {
-  GList *old_mounts;
-  GList *cur_mounts;
-  GList *added;
-  GList *removed;
-  GList *l;
-
-  udisks_mount_monitor_ensure (monitor);
-
-  old_mounts = g_list_copy (monitor->mounts);
-  g_list_foreach (old_mounts, (GFunc) g_object_ref, NULL);
-
-  udisks_mount_monitor_invalidate (monitor);
-  udisks_mount_monitor_ensure (monitor);
+  gint64 now;
+  gint64 next;
 
-  cur_mounts = g_list_copy (monitor->mounts);
+  /* already scheduled, it will pick up this change as well */
+  if (monitor->reload_source != NULL)
+    return;
 
-  old_mounts = g_list_sort (old_mounts, (GCompareFunc) udisks_mount_compare);
-  cur_mounts = g_list_sort (cur_mounts, (GCompareFunc) udisks_mount_compare);
-  diff_sorted_lists (old_mounts, cur_mounts, (GCompareFunc) udisks_mount_compare, &added, &removed);
-
-  for (l = removed; l != NULL; l = l->next)
+  now = g_get_monotonic_time ();
+  next = monitor->last_reload + MOUNTS_COALESCE_MSEC * 1000;
+  if (now >= next)
     {
-      UDisksMount *mount = UDISKS_MOUNT (l->data);
-      g_signal_emit (monitor, signals[MOUNT_REMOVED_SIGNAL], 0, mount);
+      reload_mounts (monitor, monitor->mounts_dirty, monitor->swaps_dirty, TRUE);
+      return;
     }
 
-  for (l = added; l != NULL; l = l->next)
-    {
-      UDisksMount *mount = UDISKS_MOUNT (l->data);
-      g_signal_emit (monitor, signals[MOUNT_ADDED_SIGNAL], 0, mount);
-    }
-
-  g_list_foreach (old_mounts, (GFunc) g_object_unref, NULL);
-  g_list_free (old_mounts);
-  g_list_free (cur_mounts);
-  g_list_free (removed);
-  g_list_free (added);
+  monitor->reload_source = g_timeout_source_new ((next - now) / 1000 + 1);
+  g_source_set_callback (monitor->reload_source, on_reload_timeout, monitor, NULL);
+  g_source_attach (monitor->reload_source, monitor->context);
 }
 
 static gboolean
@@ -278,7 +316,8 @@ mounts_changed_event (GIOChannel *channel,
   UDisksMountMonitor *monitor = UDISKS_MOUNT_MONITOR (user_data);
   if (cond & ~G_IO_ERR)
     goto out;
-  reload_mounts (monitor);
+  monitor->mounts_dirty = TRUE;
+  schedule_reload (monitor);
  out:
   return TRUE;
 }
@@ -291,7 +330,8 @@ swaps_changed_event (GIOChannel *channel,
   UDisksMountMonitor *monitor = UDISKS_MOUNT_MONITOR (user_data);
   if (cond & ~G_IO_ERR)
     goto out;
-  reload_mounts (monitor);
+  monitor->swaps_dirty = TRUE;
+  schedule_reload (monitor);
  out:
   return TRUE;
 }
@@ -302,13 +342,15 @@ udisks_mount_monitor_constructed (GObject *object)
   UDisksMountMonitor *monitor = UDISKS_MOUNT_MONITOR (object);
   GError *error;
 
+  monitor->context = g_main_context_ref_thread_default ();
+
   error = NULL;
   monitor->mounts_channel = g_io_channel_new_file ("/proc/self/mountinfo", "r", &error);
   if (monitor->mounts_channel != NULL)
     {
       monitor->mounts_watch_source = g_io_create_watch (monitor->mounts_channel, G_IO_ERR);
       g_source_set_callback (monitor->mounts_watch_source, (GSourceFunc) mounts_changed_event, monitor, NULL);
-      g_source_attach (monitor->mounts_watch_source, g_main_context_get_thread_default ());
+      g_source_attach (monitor->mounts_watch_source, monitor->context);
       g_source_unref (monitor->mounts_watch_source);
     }
   else
@@ -323,7 +365,7 @@ udisks_mount_monitor_constructed (GObject *object)
     {
       monitor->swaps_watch_source = g_io_create_watch (monitor->swaps_channel, G_IO_ERR);
       g_source_set_callback (monitor->swaps_watch_source, (GSourceFunc) swaps_changed_event, monitor, NULL);
-      g_source_attach (monitor->swaps_watch_source, g_main_context_get_thread_default ());
+      g_source_attach (monitor->swaps_watch_source, monitor->context);
       g_source_unref (monitor->swaps_watch_source);
     }
   else
@@ -336,6 +378,9 @@ udisks_mount_monitor_constructed (GObject *object)
       g_clear_error (&error);
     }
 
+  /* initial load, nobody is listening yet */
+  reload_mounts (monitor, TRUE, TRUE, FALSE);
+
   if (G_OBJECT_CLASS (udisks_mount_monitor_parent_class)->constructed != NULL)
     (*G_OBJECT_CLASS (udisks_mount_monitor_parent_class)->constructed) (object);
 }
@@ -357,175 +402,335 @@ udisks_mount_monitor_new (void)
   return UDISKS_MOUNT_MONITOR (g_object_new (UDISKS_TYPE_MOUNT_MONITOR, NULL));
 }
 
+/* ---------------------------------------------------------------------------------------------------- */
+
+static gchar *
+make_mount_key (dev_t            dev,
+                const gchar     *mount_point,
+                UDisksMountType  type)
+{
+  return g_strdup_printf ("%d:%u:%u:%s", type, major (dev), minor (dev),
+                          mount_point != NULL ? mount_point : "");
+}
+
+/* called with monitor->lock held */
 static void
-udisks_mount_monitor_invalidate (UDisksMountMonitor *monitor)
+index_mount (UDisksMountMonitor *monitor,
+             UDisksMount        *mount)
 {
-  monitor->have_data = FALSE;
+  gint64 dev = udisks_mount_get_dev (mount);
+  gpointer orig_key;
+  GList *mounts = NULL;
+
+  /* steal the list so the destroy notify doesn't free it */
+  if (g_hash_table_lookup_extended (monitor->mounts_by_dev, &dev, &orig_key, (gpointer *) &mounts))
+    g_hash_table_steal (monitor->mounts_by_dev, &dev);
+  else
+    orig_key = g_memdup (&dev, sizeof dev);
 
-  g_list_foreach (monitor->mounts, (GFunc) g_object_unref, NULL);
-  g_list_free (monitor->mounts);
-  monitor->mounts = NULL;
+  /* keep shortest mount paths first, see udisks_mount_monitor_get_mounts_for_dev() */
+  mounts = g_list_insert_sorted (mounts, mount, (GCompareFunc) udisks_mount_compare);
+  g_hash_table_insert (monitor->mounts_by_dev, orig_key, mounts);
 }
 
-static gboolean
-have_mount (UDisksMountMonitor *monitor,
-            dev_t               dev,
-            const gchar        *mount_point)
+/* called with monitor->lock held */
+static void
+unindex_mount (UDisksMountMonitor *monitor,
+               UDisksMount        *mount)
 {
-  GList *l;
-  gboolean ret;
+  gint64 dev = udisks_mount_get_dev (mount);
+  gpointer orig_key;
+  GList *mounts;
 
-  ret = FALSE;
+  if (!g_hash_table_lookup_extended (monitor->mounts_by_dev, &dev, &orig_key, (gpointer *) &mounts))
+    g_return_if_reached ();
+
+  g_hash_table_steal (monitor->mounts_by_dev, &dev);
+  mounts = g_list_remove (mounts, mount);
+  if (mounts != NULL)
+    g_hash_table_insert (monitor->mounts_by_dev, orig_key, mounts);
+  else
+    g_free (orig_key);
+}
+
+/* Takes a reference on the mount for the given parameters, creating it if
+ * needed. Returns the mount key. Called with monitor->lock held.
+ */
+static gchar *
+acquire_mount (UDisksMountMonitor  *monitor,
+               dev_t                dev,
+               const gchar         *mount_point,
+               UDisksMountType      type,
+               GList              **added)
+{
+  MountRef *ref;
+  gchar *key;
+
+  key = make_mount_key (dev, mount_point, type);
+  ref = g_hash_table_lookup (monitor->mounts, key);
+  if (ref == NULL)
+    {
+      ref = g_slice_new0 (MountRef);
+      ref->mount = _udisks_mount_new (dev, mount_point, type);
+      g_hash_table_insert (monitor->mounts, g_strdup (key), ref);
+      index_mount (monitor, ref->mount);
+      *added = g_list_prepend (*added, g_object_ref (ref->mount));
+    }
+  ref->count++;
+
+  return key;
+}
+
+/* called with monitor->lock held */
+static void
+release_mount (UDisksMountMonitor  *monitor,
+               const gchar         *key,
+               GList              **removed)
+{
+  MountRef *ref;
+
+  if (key == NULL)
+    return;
+
+  ref = g_hash_table_lookup (monitor->mounts, key);
+  g_return_if_fail (ref != NULL);
 
-  for (l = monitor->mounts; l != NULL; l = l->next)
+  if (--ref->count == 0)
     {
-      UDisksMount *mount = UDISKS_MOUNT (l->data);
-      if (udisks_mount_get_dev (mount) == dev &&
-          g_strcmp0 (udisks_mount_get_mount_path (mount), mount_point) == 0)
+      *removed = g_list_prepend (*removed, g_object_ref (ref->mount));
+      unindex_mount (monitor, ref->mount);
+      g_hash_table_remove (monitor->mounts, key);
+    }
+}
+
+/* Drops entries not seen in the current reload. Called with monitor->lock held. */
+static void
+remove_stale_entries (UDisksMountMonitor  *monitor,
+                      GHashTable          *entries,
+                      GList              **removed)
+{
+  GHashTableIter iter;
+  SourceEntry *entry;
+
+  g_hash_table_iter_init (&iter, entries);
+  while (g_hash_table_iter_next (&iter, NULL, (gpointer *) &entry))
+    {
+      if (entry->generation != monitor->generation)
         {
-          ret = TRUE;
-          break;
+          release_mount (monitor, entry->mount_key, removed);
+          g_hash_table_iter_remove (&iter);
         }
     }
+}
 
-  return ret;
+/* Updates @entry (or creates a new one in @entries for @key if @entry is
+ * %NULL) for a changed line. Called with monitor->lock held.
+ */
+static void
+update_entry (UDisksMountMonitor  *monitor,
+              GHashTable          *entries,
+              SourceEntry         *entry,
+              gpointer             key,
+              const gchar         *line,
+              gboolean             have_mount,
+              dev_t                dev,
+              const gchar         *mount_point,
+              UDisksMountType      type,
+              GList              **added,
+              GList              **removed)
+{
+  gchar *mount_key = NULL;
+
+  /* acquire the new mount first so it is reused if it didn't change */
+  if (have_mount)
+    mount_key = acquire_mount (monitor, dev, mount_point, type, added);
+
+  if (entry == NULL)
+    {
+      entry = g_slice_new0 (SourceEntry);
+      g_hash_table_insert (entries, key, entry);
+    }
+  else
+    {
+      release_mount (monitor, entry->mount_key, removed);
+      g_free (entry->line);
+      g_free (entry->mount_key);
+    }
+
+  entry->line = g_strdup (line);
+  entry->mount_key = mount_key;
+  entry->generation = monitor->generation;
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* Parses a line from /proc/self/mountinfo, returns FALSE if the line doesn't
+ * describe a mount we track.
+ */
+static gboolean
+parse_mountinfo_line (const gchar  *line,
+                      dev_t        *out_dev,
+                      gchar       **out_mount_point)
+{
+  guint mount_id;
+  guint parent_id;
+  guint major, minor;
+  gchar encoded_root[PATH_MAX + 1];
+  gchar encoded_mount_point[PATH_MAX + 1];
+  dev_t dev;
+
+  if (sscanf (line,
+              "%u %u %u:%u " PATH_MAX_FMT " " PATH_MAX_FMT,
+              &mount_id,
+              &parent_id,
+              &major,
+              &minor,
+              encoded_root,
+              encoded_mount_point) != 6)
+    {
+      udisks_warning ("Error parsing line '%s'", line);
+      return FALSE;
+    }
+  encoded_root[sizeof encoded_root - 1] = '\0';
+  encoded_mount_point[sizeof encoded_mount_point - 1] = '\0';
+
+  /* Temporary work-around for btrfs, see
+   *
+   *  https://bugzilla.redhat.com/show_bug.cgi?id=495152#c31
+   *  http://article.gmane.org/gmane.comp.file-systems.btrfs/2851
+   *
+   * for details.
+   */
+  if (major == 0)
+    {
+      const gchar *sep;
+      sep = strstr (line, " - ");
+      if (sep != NULL)
+        {
+          gchar fstype[PATH_MAX + 1];
+          gchar mount_source[PATH_MAX + 1];
+          struct stat statbuf;
+
+          if (sscanf (sep + 3, PATH_MAX_FMT " " PATH_MAX_FMT, fstype, mount_source) != 2)
+            {
+              udisks_warning ("Error parsing things past - for '%s'", line);
+              return FALSE;
+            }
+          fstype[sizeof fstype - 1] = '\0';
+          mount_source[sizeof mount_source - 1] = '\0';
+
+          if (g_strcmp0 (fstype, "btrfs") != 0)
+            return FALSE;
+
+          if (!g_str_has_prefix (mount_source, "/dev/"))
+            return FALSE;
+
+          if (stat (mount_source, &statbuf) != 0)
+            {
+              udisks_warning ("Error statting %s: %m", mount_source);
+              return FALSE;
+            }
+
+          if (!S_ISBLK (statbuf.st_mode))
+            {
+              udisks_warning ("%s is not a block device", mount_source);
+              return FALSE;
+            }
+
+          dev = statbuf.st_rdev;
+        }
+      else
+        {
+          return FALSE;
+        }
+    }
+  else
+    {
+      dev = makedev (major, minor);
+    }
+
+  *out_dev = dev;
+  *out_mount_point = g_strcompress (encoded_mount_point);
+  return TRUE;
+}
+
+/* called with monitor->lock held */
 static gboolean
 udisks_mount_monitor_get_mountinfo (UDisksMountMonitor  *monitor,
+                                    GList              **added,
+                                    GList              **removed,
                                     GError             **error)
 {
-  gboolean ret;
   gchar *contents;
-  gchar **lines;
-  guint n;
-
-  ret = FALSE;
-  contents = NULL;
-  lines = NULL;
+  gchar *line;
+  gchar *next;
 
   if (!g_file_get_contents ("/proc/self/mountinfo", &contents, NULL, error))
     {
       g_prefix_error (error, "Error reading /proc/self/mountinfo: ");
-      goto out;
+      return FALSE;
     }
 
   /* See Documentation/filesystems/proc.txt for the format of /proc/self/mountinfo
    *
    * Note that things like space are encoded as \020.
+   *
+   * Every line starts with the unique mount ID so only new and changed
+   * lines need to be parsed.
    */
-  lines = g_strsplit (contents, "\n", 0);
-  for (n = 0; lines[n] != NULL; n++)
+  for (line = contents; *line != '\0'; line = next)
     {
+      SourceEntry *entry;
+      gchar *end;
+      gchar *mount_point = NULL;
       guint mount_id;
-      guint parent_id;
-      guint major, minor;
-      gchar encoded_root[PATH_MAX + 1];
-      gchar encoded_mount_point[PATH_MAX + 1];
-      gchar *mount_point;
-      dev_t dev;
+      gboolean have_mount;
+      dev_t dev = 0;
 
-      if (strlen (lines[n]) == 0)
+      next = strchr (line, '\n');
+      if (next != NULL)
+        *next++ = '\0';
+      else
+        next = line + strlen (line);
+
+      if (*line == '\0')
         continue;
 
-      if (sscanf (lines[n],
-                  "%u %u %u:%u " PATH_MAX_FMT " " PATH_MAX_FMT,
-                  &mount_id,
-                  &parent_id,
-                  &major,
-                  &minor,
-                  encoded_root,
-                  encoded_mount_point) != 6)
+      mount_id = strtoul (line, &end, 10);
+      if (end == line)
         {
-          udisks_warning ("Error parsing line '%s'", lines[n]);
+          udisks_warning ("Error parsing line '%s'", line);
           continue;
         }
-      encoded_root[sizeof encoded_root - 1] = '\0';
-      encoded_mount_point[sizeof encoded_mount_point - 1] = '\0';
-
-      /* Temporary work-around for btrfs, see
-       *
-       *  https://bugzilla.redhat.com/show_bug.cgi?id=495152#c31
-       *  http://article.gmane.org/gmane.comp.file-systems.btrfs/2851
-       *
-       * for details.
-       */
-      if (major == 0)
-        {
-          const gchar *sep;
-          sep = strstr (lines[n], " - ");
-          if (sep != NULL)
-            {
-              gchar fstype[PATH_MAX + 1];
-              gchar mount_source[PATH_MAX + 1];
-              struct stat statbuf;
-
-              if (sscanf (sep + 3, PATH_MAX_FMT " " PATH_MAX_FMT, fstype, mount_source) != 2)
-                {
-                  udisks_warning ("Error parsing things past - for '%s'", lines[n]);
-                  continue;
-                }
-              fstype[sizeof fstype - 1] = '\0';
-              mount_source[sizeof mount_source - 1] = '\0';
-
-              if (g_strcmp0 (fstype, "btrfs") != 0)
-                continue;
-
-              if (!g_str_has_prefix (mount_source, "/dev/"))
-                continue;
-
-              if (stat (mount_source, &statbuf) != 0)
-                {
-                  udisks_warning ("Error statting %s: %m", mount_source);
-                  continue;
-                }
-
-              if (!S_ISBLK (statbuf.st_mode))
-                {
-                  udisks_warning ("%s is not a block device", mount_source);
-                  continue;
-                }
-
-              dev = statbuf.st_rdev;
-            }
-          else
-            {
-              continue;
-            }
-        }
-      else
-        {
-          dev = makedev (major, minor);
-        }
-
-      mount_point = g_strcompress (encoded_mount_point);
 
-      /* TODO: we can probably use a hash table or something if this turns out to be slow */
-      if (!have_mount (monitor, dev, mount_point))
+      entry = g_hash_table_lookup (monitor->mountinfo_entries, GUINT_TO_POINTER (mount_id));
+      if (entry != NULL && g_strcmp0 (entry->line, line) == 0)
         {
-          UDisksMount *mount;
-          mount = _udisks_mount_new (dev, mount_point, UDISKS_MOUNT_TYPE_FILESYSTEM);
-          monitor->mounts = g_list_prepend (monitor->mounts, mount);
+          entry->generation = monitor->generation;
+          continue;
         }
 
+      have_mount = parse_mountinfo_line (line, &dev, &mount_point);
+      update_entry (monitor, monitor->mountinfo_entries, entry, GUINT_TO_POINTER (mount_id), line,
+                    have_mount, dev, mount_point, UDISKS_MOUNT_TYPE_FILESYSTEM,
+                    added, removed);
       g_free (mount_point);
     }
 
-  ret = TRUE;
+  remove_stale_entries (monitor, monitor->mountinfo_entries, removed);
 
- out:
   g_free (contents);
-  g_strfreev (lines);
 
-  return ret;
+  return TRUE;
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* called with monitor->lock held */
 static gboolean
 udisks_mount_monitor_get_swaps (UDisksMountMonitor  *monitor,
+                                GList              **added,
+                                GList              **removed,
                                 GError             **error)
 {
   gboolean ret;
@@ -558,7 +763,7 @@ udisks_mount_monitor_get_swaps (UDisksMountMonitor  *monitor,
     {
       gchar filename[PATH_MAX + 1];
       struct stat statbuf;
-      dev_t dev;
+      SourceEntry *entry;
 
       /* skip first line of explanatory text */
       if (n == 0)
@@ -574,22 +779,28 @@ udisks_mount_monitor_get_swaps (UDisksMountMonitor  *monitor,
         }
       filename[sizeof filename - 1] = '\0';
 
-      if (stat (filename, &statbuf) != 0)
+      /* the usage columns change all the time, only the file name matters */
+      entry = g_hash_table_lookup (monitor->swaps_entries, filename);
+      if (entry != NULL)
         {
-          udisks_warning ("Error statting %s: %m", filename);
+          entry->generation = monitor->generation;
           continue;
         }
 
-      dev = statbuf.st_rdev;
-
-      if (!have_mount (monitor, dev, NULL))
+      /* not remembered on failure so it is retried on the next reload */
+      if (stat (filename, &statbuf) != 0)
         {
-          UDisksMount *mount;
-          mount = _udisks_mount_new (dev, NULL, UDISKS_MOUNT_TYPE_SWAP);
-          monitor->mounts = g_list_prepend (monitor->mounts, mount);
+          udisks_warning ("Error statting %s: %m", filename);
+          continue;
         }
+
+      update_entry (monitor, monitor->swaps_entries, NULL, g_strdup (filename), filename,
+                    TRUE, statbuf.st_rdev, NULL, UDISKS_MOUNT_TYPE_SWAP,
+                    added, removed);
     }
 
+  remove_stale_entries (monitor, monitor->swaps_entries, removed);
+
   ret = TRUE;
 
  out:
@@ -602,15 +813,27 @@ udisks_mount_monitor_get_swaps (UDisksMountMonitor  *monitor,
 /* ---------------------------------------------------------------------------------------------------- */
 
 static void
-udisks_mount_monitor_ensure (UDisksMountMonitor *monitor)
+reload_mounts (UDisksMountMonitor *monitor,
+               gboolean            reload_mountinfo,
+               gboolean            reload_swaps,
+               gboolean            emit_signals)
 {
+  GList *added = NULL;
+  GList *removed = NULL;
+  GList *l;
   GError *error;
 
-  if (monitor->have_data)
-    goto out;
+  monitor->mounts_dirty = FALSE;
+  monitor->swaps_dirty = FALSE;
+  monitor->last_reload = g_get_monotonic_time ();
+
+  g_mutex_lock (&monitor->lock);
+
+  monitor->generation++;
 
   error = NULL;
-  if (!udisks_mount_monitor_get_mountinfo (monitor, &error))
+  if (reload_mountinfo &&
+      !udisks_mount_monitor_get_mountinfo (monitor, &added, &removed, &error))
     {
       udisks_warning ("Error getting mounts: %s (%s, %d)",
                       error->message, g_quark_to_string (error->domain), error->code);
@@ -618,19 +841,39 @@ udisks_mount_monitor_ensure (UDisksMountMonitor *monitor)
     }
 
   error = NULL;
-  if (!udisks_mount_monitor_get_swaps (monitor, &error))
+  if (reload_swaps &&
+      !udisks_mount_monitor_get_swaps (monitor, &added, &removed, &error))
     {
       udisks_warning ("Error getting swaps: %s (%s, %d)",
                       error->message, g_quark_to_string (error->domain), error->code);
       g_clear_error (&error);
     }
 
-  monitor->have_data = TRUE;
+  g_mutex_unlock (&monitor->lock);
 
- out:
-  ;
+  if (emit_signals)
+    {
+      removed = g_list_reverse (removed);
+      for (l = removed; l != NULL; l = l->next)
+        {
+          UDisksMount *mount = UDISKS_MOUNT (l->data);
+          g_signal_emit (monitor, signals[MOUNT_REMOVED_SIGNAL], 0, mount);
+        }
+
+      added = g_list_reverse (added);
+      for (l = added; l != NULL; l = l->next)
+        {
+          UDisksMount *mount = UDISKS_MOUNT (l->data);
+          g_signal_emit (monitor, signals[MOUNT_ADDED_SIGNAL], 0, mount);
+        }
+    }
+
+  g_list_free_full (removed, g_object_unref);
+  g_list_free_full (added, g_object_unref);
 }
 
+/* ---------------------------------------------------------------------------------------------------- */
+
 /**
  * udisks_mount_monitor_get_mounts_for_dev:
  * @monitor: A #UDisksMountMonitor.
@@ -638,6 +881,8 @@ udisks_mount_monitor_ensure (UDisksMountMonitor *monitor)
  *
  * Gets all #UDisksMount objects for @dev.
  *
+ * This method may be called from any thread.
+ *
  * Returns: A #GList of #UDisksMount objects. The returned list must
  * be freed with g_list_free() after each element has been freed with
  * g_object_unref().
@@ -646,25 +891,15 @@ GList *
 udisks_mount_monitor_get_mounts_for_dev (UDisksMountMonitor *monitor,
                                          dev_t               dev)
 {
+  gint64 key = dev;
   GList *ret;
-  GList *l;
 
-  ret = NULL;
-
-  udisks_mount_monitor_ensure (monitor);
-
-  for (l = monitor->mounts; l != NULL; l = l->next)
-    {
-      UDisksMount *mount = UDISKS_MOUNT (l->data);
-
-      if (udisks_mount_get_dev (mount) == dev)
-        {
-          ret = g_list_prepend (ret, g_object_ref (mount));
-        }
-    }
-
-  /* Sort the list to ensure that shortest mount paths appear first */
-  ret = g_list_sort (ret, (GCompareFunc) udisks_mount_compare);
+  /* the index is kept sorted so that shortest mount paths appear first */
+  g_mutex_lock (&monitor->lock);
+  ret = g_list_copy_deep (g_hash_table_lookup (monitor->mounts_by_dev, &key),
+                          (GCopyFunc) g_object_ref,
+                          NULL);
+  g_mutex_unlock (&monitor->lock);
 
   return ret;
 }
@@ -677,6 +912,8 @@ udisks_mount_monitor_get_mounts_for_dev (UDisksMountMonitor *monitor,
  *
  * Checks if @dev is in use (e.g. mounted or swap-area in-use).
  *
+ * This method may be called from any thread.
+ *
  * Returns: %TRUE if in use, %FALSE otherwise.
  */
 gboolean
@@ -684,24 +921,21 @@ udisks_mount_monitor_is_dev_in_use (UDisksMountMonitor  *monitor,
                                     dev_t                dev,
                                     UDisksMountType     *out_type)
 {
+  gint64 key = dev;
+  GList *mounts;
   gboolean ret;
-  GList *l;
 
   ret = FALSE;
-  udisks_mount_monitor_ensure (monitor);
-  for (l = monitor->mounts; l != NULL; l = l->next)
-    {
-      UDisksMount *mount = UDISKS_MOUNT (l->data);
 
-      if (udisks_mount_get_dev (mount) == dev)
-        {
-          if (out_type != NULL)
-            *out_type = udisks_mount_get_mount_type (mount);
-          ret = TRUE;
-          goto out;
-        }
+  g_mutex_lock (&monitor->lock);
+  mounts = g_hash_table_lookup (monitor->mounts_by_dev, &key);
+  if (mounts != NULL)
+    {
+      if (out_type != NULL)
+        *out_type = udisks_mount_get_mount_type (UDISKS_MOUNT (mounts->data));
+      ret = TRUE;
     }
+  g_mutex_unlock (&monitor->lock);
 
- out:
   return ret;
 }
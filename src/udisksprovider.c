@@ -58,6 +58,14 @@ enum
   PROP_DAEMON
 };
 
+enum
+{
+  CHANGED_SIGNAL,
+  LAST_SIGNAL
+};
+
+static guint signals[LAST_SIGNAL] = { 0 };
+
 G_DEFINE_ABSTRACT_TYPE (UDisksProvider, udisks_provider, G_TYPE_OBJECT);
 
 static void
@@ -153,6 +161,25 @@ udisks_provider_class_init (UDisksProviderClass *klass)
                                                         G_PARAM_CONSTRUCT_ONLY |
                                                         G_PARAM_STATIC_STRINGS));
 
+  /**
+   * UDisksProvider::changed:
+   * @provider: A #UDisksProvider.
+   *
+   * Emitted when objects managed by @provider were added, removed or
+   * updated, e.g. after a uevent was processed.
+   *
+   * This signal is emitted in the main thread.
+   */
+  signals[CHANGED_SIGNAL] = g_signal_new ("changed",
+                                          G_OBJECT_CLASS_TYPE (klass),
+                                          G_SIGNAL_RUN_LAST,
+                                          G_STRUCT_OFFSET (UDisksProviderClass, changed),
+                                          NULL,
+                                          NULL,
+                                          g_cclosure_marshal_VOID__VOID,
+                                          G_TYPE_NONE,
+                                          0);
+
   g_type_class_add_private (klass, sizeof (UDisksProviderPrivate));
 }
 
@@ -184,5 +211,19 @@ udisks_provider_start  (UDisksProvider *provider)
   UDISKS_PROVIDER_GET_CLASS (provider)->start (provider);
 }
 
+/**
+ * udisks_provider_emit_changed:
+ * @provider: A #UDisksProvider.
+ *
+ * Emits the #UDisksProvider::changed signal on @provider. Must be
+ * called from the main thread.
+ */
+void
+udisks_provider_emit_changed (UDisksProvider *provider)
+{
+  g_return_if_fail (UDISKS_IS_PROVIDER (provider));
+  g_signal_emit (provider, signals[CHANGED_SIGNAL], 0);
+}
+
 
 /* ---------------------------------------------------------------------------------------------------- */
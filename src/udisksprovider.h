@@ -52,6 +52,7 @@ struct _UDisksProvider
  * UDisksProviderClass:
  * @parent_class: The parent class.
  * @start: Virtual function for udisks_provider_start(). The default implementation does nothing.
+ * @changed: Signal class handler for the #UDisksProvider::changed signal.
  *
  * Class structure for #UDisksProvider.
  */
@@ -61,14 +62,18 @@ struct _UDisksProviderClass
 
   void (*start) (UDisksProvider *provider);
 
+  /* signals */
+  void (*changed) (UDisksProvider *provider);
+
   /*< private >*/
-  gpointer padding[8];
+  gpointer padding[7];
 };
 
 
 GType           udisks_provider_get_type   (void) G_GNUC_CONST;
 UDisksDaemon   *udisks_provider_get_daemon (UDisksProvider *provider);
 void            udisks_provider_start      (UDisksProvider *provider);
+void            udisks_provider_emit_changed (UDisksProvider *provider);
 
 G_END_DECLS
 
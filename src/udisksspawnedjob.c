@@ -877,15 +877,8 @@ udisks_spawned_job_release_resources (UDisksSpawnedJob *job)
     }
 }
 
-/**
- * udisks_spawned_job_start:
- * @job: the job to start
- *
- * Connect to the #UDisksSpawnedJob::spawned-job-completed or
- * #UDisksJob::completed signals to get notified when the job is done.
- *
- * */
-void udisks_spawned_job_start (UDisksSpawnedJob *job)
+static void
+spawned_job_start (UDisksSpawnedJob *job)
 {
   GError *error;
   gint child_argc;
@@ -1014,6 +1007,27 @@ void udisks_spawned_job_start (UDisksSpawnedJob *job)
   ;
 }
 
+/**
+ * udisks_spawned_job_start:
+ * @job: the job to start
+ *
+ * Connect to the #UDisksSpawnedJob::spawned-job-completed or
+ * #UDisksJob::completed signals to get notified when the job is done.
+ *
+ * If @job is subject to the job limits, it may be queued and only
+ * spawned later, see udisks_daemon_start_job().
+ *
+ * */
+void udisks_spawned_job_start (UDisksSpawnedJob *job)
+{
+  UDisksDaemon *daemon = udisks_base_job_get_daemon (UDISKS_BASE_JOB (job));
+
+  if (daemon != NULL)
+    udisks_daemon_start_job (daemon, UDISKS_BASE_JOB (job), (UDisksJobStartFunc) spawned_job_start);
+  else
+    spawned_job_start (job);
+}
+
 /* manage strings with potentially unsafe content */
 
 static gpointer
@@ -135,6 +135,14 @@
  * without having been properly stopped or shut down, the fact that it
  * was cleaned up is logged to ensure that the information is brought
  * to the attention of the system administrator.
+ *
+ * Changes to the files are group-committed: a thread recording a new
+ * entry does not return until the file has been atomically replaced
+ * on disk, but changes made by other threads in the meantime are
+ * written out together with it. This way the files on disk never lag
+ * behind an operation that has completed while bulk operations (e.g.
+ * unlocking many devices in parallel) don't rewrite the files once per
+ * device.
  */
 
 /**
@@ -157,8 +165,36 @@ struct _UDisksState
 
   /* key-path -> GVariant */
   GHashTable *cache;
+
+  /* key -> GVariant of values not written yet, protected by @lock */
+  GHashTable *pending;
+  /* incremented on every change, protected by @lock */
+  guint64 serial;
+
+  /* group commit of the pending changes */
+  GMutex write_lock;
+  GCond write_cond;
+  gboolean writing;
+  guint64 written_serial;
+
+  /* pending clean-up checks and statistics, protected by @check_lock */
+  GMutex check_lock;
+  GSource *check_source;
+  gboolean full_check_pending;
+  GArray *devs_to_check;
+  guint64 num_check_requests;
+  guint64 num_full_checks;
+  gint64 full_checks_usec;
+  guint64 num_scoped_checks;
+  gint64 scoped_checks_usec;
 };
 
+/* Delay for coalescing check requests, in milliseconds */
+#define CHECK_DELAY_MSEC 100
+
+/* Interval of the full checks done as a safety net, in seconds */
+#define FULL_CHECK_INTERVAL_SEC 300
+
 typedef struct _UDisksStateClass UDisksStateClass;
 
 struct _UDisksStateClass
@@ -172,26 +208,33 @@ enum
   PROP_DAEMON
 };
 
-static void      udisks_state_check_in_thread     (UDisksState          *state);
+static void      udisks_state_check_in_thread     (UDisksState          *state,
+                                                   GArray               *devs_to_check);
 static void      udisks_state_check_mounted_fs    (UDisksState          *state,
+                                                   GArray               *devs_to_check,
                                                    GArray               *devs_to_clean);
 static void      udisks_state_check_unlocked_luks (UDisksState          *state,
                                                    gboolean              check_only,
+                                                   GArray               *devs_to_check,
                                                    GArray               *devs_to_clean);
 static void      udisks_state_check_loop          (UDisksState          *state,
                                                    gboolean              check_only,
+                                                   GArray               *devs_to_check,
                                                    GArray               *devs_to_clean);
 static void      udisks_state_check_mdraid        (UDisksState          *state,
                                                    gboolean              check_only,
+                                                   GArray               *devs_to_check,
                                                    GArray               *devs_to_clean);
 static GVariant *udisks_state_get                 (UDisksState          *state,
                                                    const gchar          *key,
                                                    const GVariantType   *type,
                                                    gboolean             *error);
-static gboolean  udisks_state_set                 (UDisksState          *state,
+static void      udisks_state_set                 (UDisksState          *state,
                                                    const gchar          *key,
                                                    const GVariantType   *type,
                                                    GVariant             *value);
+static void      udisks_state_sync                (UDisksState          *state);
+static gboolean  on_full_check_timeout            (gpointer              user_data);
 
 G_DEFINE_TYPE (UDisksState, udisks_state, G_TYPE_OBJECT);
 
@@ -199,7 +242,12 @@ static void
 udisks_state_init (UDisksState *state)
 {
   g_mutex_init (&state->lock);
+  g_mutex_init (&state->write_lock);
+  g_cond_init (&state->write_cond);
+  g_mutex_init (&state->check_lock);
+  state->devs_to_check = g_array_new (FALSE, FALSE, sizeof (dev_t));
   state->cache = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, (GDestroyNotify) g_variant_unref);
+  state->pending = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, (GDestroyNotify) g_variant_unref);
 }
 
 static void
@@ -207,7 +255,12 @@ udisks_state_finalize (GObject *object)
 {
   UDisksState *state = UDISKS_STATE (object);
 
+  g_array_unref (state->devs_to_check);
+  g_hash_table_unref (state->pending);
   g_hash_table_unref (state->cache);
+  g_mutex_clear (&state->check_lock);
+  g_cond_clear (&state->write_cond);
+  g_mutex_clear (&state->write_lock);
   g_mutex_clear (&state->lock);
 
   G_OBJECT_CLASS (udisks_state_parent_class)->finalize (object);
@@ -308,6 +361,14 @@ udisks_state_thread_func (gpointer user_data)
 
   g_main_loop_run (state->loop);
 
+  g_mutex_lock (&state->check_lock);
+  if (state->check_source != NULL)
+    {
+      g_source_destroy (state->check_source);
+      state->check_source = NULL;
+    }
+  g_mutex_unlock (&state->check_lock);
+
   state->thread = NULL;
   g_main_loop_unref (state->loop);
   state->loop = NULL;
@@ -332,11 +393,22 @@ udisks_state_thread_func (gpointer user_data)
 void
 udisks_state_start_cleanup (UDisksState *state)
 {
+  GSource *source;
+
   g_return_if_fail (UDISKS_IS_STATE (state));
   g_return_if_fail (state->thread == NULL);
 
   state->context = g_main_context_new ();
   state->loop = g_main_loop_new (state->context, FALSE);
+
+  /* checks are normally only done for the devices that changed, do a
+   * full one every now and then in case we missed something
+   */
+  source = g_timeout_source_new_seconds (FULL_CHECK_INTERVAL_SEC);
+  g_source_set_callback (source, on_full_check_timeout, state, NULL);
+  g_source_attach (source, state->context);
+  g_source_unref (source);
+
   state->thread = g_thread_new ("cleanup",
                                 udisks_state_thread_func,
                                 g_object_ref (state));
@@ -361,12 +433,113 @@ udisks_state_stop_cleanup (UDisksState *state)
   g_thread_join (thread);
 }
 
+static gboolean
+dev_in_array (GArray *devs,
+              dev_t   dev)
+{
+  guint n;
+
+  if (devs == NULL)
+    return FALSE;
+
+  for (n = 0; n < devs->len; n++)
+    {
+      if (g_array_index (devs, dev_t, n) == dev)
+        return TRUE;
+    }
+  return FALSE;
+}
+
 static gboolean
 udisks_state_check_func (gpointer user_data)
 {
   UDisksState *state = UDISKS_STATE (user_data);
-  udisks_state_check_in_thread (state);
-  return FALSE;
+  GArray *devs_to_check;
+  gboolean full_check;
+  gint64 start_time;
+  gint64 duration;
+
+  /* take all the requests made so far */
+  g_mutex_lock (&state->check_lock);
+  state->check_source = NULL;
+  full_check = state->full_check_pending;
+  state->full_check_pending = FALSE;
+  devs_to_check = state->devs_to_check;
+  state->devs_to_check = g_array_new (FALSE, FALSE, sizeof (dev_t));
+  g_mutex_unlock (&state->check_lock);
+
+  start_time = g_get_monotonic_time ();
+  udisks_state_check_in_thread (state, full_check ? NULL : devs_to_check);
+  duration = g_get_monotonic_time () - start_time;
+
+  g_mutex_lock (&state->check_lock);
+  if (full_check)
+    {
+      state->num_full_checks++;
+      state->full_checks_usec += duration;
+    }
+  else
+    {
+      state->num_scoped_checks++;
+      state->scoped_checks_usec += duration;
+    }
+  g_mutex_unlock (&state->check_lock);
+
+  udisks_debug ("Cleanup check of %s took %" G_GINT64_FORMAT " usec",
+                full_check ? "all entries" : "changed devices", duration);
+
+  g_array_unref (devs_to_check);
+  return FALSE; /* remove source */
+}
+
+static gboolean
+on_full_check_timeout (gpointer user_data)
+{
+  UDisksState *state = UDISKS_STATE (user_data);
+  guint64 num_requests;
+  guint64 num_full_checks;
+  gint64 full_checks_usec;
+  guint64 num_scoped_checks;
+  gint64 scoped_checks_usec;
+
+  udisks_state_get_check_stats (state,
+                                &num_requests,
+                                &num_full_checks,
+                                &full_checks_usec,
+                                &num_scoped_checks,
+                                &scoped_checks_usec);
+  udisks_info ("Cleanup checks so far: %" G_GUINT64_FORMAT " requests handled by %" G_GUINT64_FORMAT
+               " full checks in %" G_GINT64_FORMAT " usec and %" G_GUINT64_FORMAT
+               " checks of changed devices in %" G_GINT64_FORMAT " usec",
+               num_requests,
+               num_full_checks, full_checks_usec,
+               num_scoped_checks, scoped_checks_usec);
+
+  udisks_state_check (state);
+  return TRUE; /* keep timeout around */
+}
+
+static void
+udisks_state_schedule_check (UDisksState *state,
+                             gboolean     full_check,
+                             dev_t        block_device)
+{
+  g_mutex_lock (&state->check_lock);
+  state->num_check_requests++;
+  if (full_check)
+    state->full_check_pending = TRUE;
+  else if (!dev_in_array (state->devs_to_check, block_device))
+    g_array_append_val (state->devs_to_check, block_device);
+
+  /* coalesce with the requests made in the next CHECK_DELAY_MSEC */
+  if (state->check_source == NULL)
+    {
+      state->check_source = g_timeout_source_new (CHECK_DELAY_MSEC);
+      g_source_set_callback (state->check_source, udisks_state_check_func, state, NULL);
+      g_source_attach (state->check_source, state->context);
+      g_source_unref (state->check_source);
+    }
+  g_mutex_unlock (&state->check_lock);
 }
 
 /**
@@ -375,6 +548,9 @@ udisks_state_check_func (gpointer user_data)
  *
  * Causes the clean-up thread for @state to check if anything should be cleaned up.
  *
+ * The check is done shortly after this is called and all the requests
+ * made in the meantime are handled by a single check.
+ *
  * This can be called from any thread and will not block the calling thread.
  */
 void
@@ -383,9 +559,66 @@ udisks_state_check (UDisksState *state)
   g_return_if_fail (UDISKS_IS_STATE (state));
   g_return_if_fail (state->thread != NULL);
 
-  g_main_context_invoke (state->context,
-                         udisks_state_check_func,
-                         state);
+  udisks_state_schedule_check (state, TRUE, 0);
+}
+
+/**
+ * udisks_state_check_block:
+ * @state: A #UDisksState.
+ * @block_device: The #dev_t of a block device that changed.
+ *
+ * Like udisks_state_check() but only checks the entries referring to
+ * @block_device (and the entries depending on them). This is a lot
+ * cheaper than a full check and should be used when it is known which
+ * device changed, e.g. on uevents.
+ *
+ * This can be called from any thread and will not block the calling thread.
+ */
+void
+udisks_state_check_block (UDisksState *state,
+                          dev_t        block_device)
+{
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (state->thread != NULL);
+
+  udisks_state_schedule_check (state, FALSE, block_device);
+}
+
+/**
+ * udisks_state_get_check_stats:
+ * @state: A #UDisksState.
+ * @out_num_requests: (out) (allow-none): Return location for the number of requested checks or %NULL.
+ * @out_num_full_checks: (out) (allow-none): Return location for the number of full checks or %NULL.
+ * @out_full_checks_usec: (out) (allow-none): Return location for the time spent in full checks or %NULL.
+ * @out_num_scoped_checks: (out) (allow-none): Return location for the number of checks limited to some devices or %NULL.
+ * @out_scoped_checks_usec: (out) (allow-none): Return location for the time spent in checks limited to some devices or %NULL.
+ *
+ * Gets statistics about the checks done by the clean-up thread. Requests
+ * made shortly after each other are handled by a single check. Times
+ * are in microseconds.
+ */
+void
+udisks_state_get_check_stats (UDisksState *state,
+                              guint64     *out_num_requests,
+                              guint64     *out_num_full_checks,
+                              gint64      *out_full_checks_usec,
+                              guint64     *out_num_scoped_checks,
+                              gint64      *out_scoped_checks_usec)
+{
+  g_return_if_fail (UDISKS_IS_STATE (state));
+
+  g_mutex_lock (&state->check_lock);
+  if (out_num_requests != NULL)
+    *out_num_requests = state->num_check_requests;
+  if (out_num_full_checks != NULL)
+    *out_num_full_checks = state->num_full_checks;
+  if (out_full_checks_usec != NULL)
+    *out_full_checks_usec = state->full_checks_usec;
+  if (out_num_scoped_checks != NULL)
+    *out_num_scoped_checks = state->num_scoped_checks;
+  if (out_scoped_checks_usec != NULL)
+    *out_scoped_checks_usec = state->scoped_checks_usec;
+  g_mutex_unlock (&state->check_lock);
 }
 
 /**
@@ -405,9 +638,10 @@ udisks_state_get_daemon (UDisksState *state)
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/* must be called from state thread */
+/* must be called from state thread, @devs_to_check is %NULL for a full check */
 static void
-udisks_state_check_in_thread (UDisksState *state)
+udisks_state_check_in_thread (UDisksState *state,
+                              GArray      *devs_to_check)
 {
   GArray *devs_to_clean;
 
@@ -417,7 +651,10 @@ udisks_state_check_in_thread (UDisksState *state)
    * can't be stopped if they are in use
    */
 
-  udisks_info ("Cleanup check start");
+  if (devs_to_check == NULL)
+    udisks_info ("Cleanup check start");
+  else
+    udisks_debug ("Cleanup check start (%u devices)", devs_to_check->len);
 
   /* First go through all block devices we might tear down
    * but only check + record devices marked for cleaning
@@ -425,39 +662,51 @@ udisks_state_check_in_thread (UDisksState *state)
   devs_to_clean = g_array_new (FALSE, FALSE, sizeof (dev_t));
   udisks_state_check_unlocked_luks (state,
                                     TRUE, /* check_only */
+                                    devs_to_check,
                                     devs_to_clean);
   udisks_state_check_loop (state,
                            TRUE, /* check_only */
+                           devs_to_check,
                            devs_to_clean);
 
   udisks_state_check_mdraid (state,
                              TRUE, /* check_only */
+                             devs_to_check,
                              devs_to_clean);
 
   /* Then go through all mounted filesystems and pass the
    * devices that we intend to clean...
    */
-  udisks_state_check_mounted_fs (state, devs_to_clean);
+  udisks_state_check_mounted_fs (state, devs_to_check, devs_to_clean);
 
   /* Then go through all block devices and clear them up
    * ... for real this time
    */
   udisks_state_check_unlocked_luks (state,
                                     FALSE, /* check_only */
+                                    devs_to_check,
                                     NULL);
   udisks_state_check_loop (state,
                            FALSE, /* check_only */
+                           devs_to_check,
                            NULL);
 
   udisks_state_check_mdraid (state,
                              FALSE, /* check_only */
+                             devs_to_check,
                              NULL);
 
   g_array_unref (devs_to_clean);
 
-  udisks_info ("Cleanup check end");
+  if (devs_to_check == NULL)
+    udisks_info ("Cleanup check end");
+  else
+    udisks_debug ("Cleanup check end");
 
   g_mutex_unlock (&state->lock);
+
+  /* write out the entries removed above */
+  udisks_state_sync (state);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -764,9 +1013,36 @@ udisks_state_check_mounted_fs_entry (UDisksState  *state,
   return keep;
 }
 
+/* returns TRUE if the entry refers to one of @devs_to_check or @devs_to_clean */
+static gboolean
+mounted_fs_entry_in_scope (GVariant *value,
+                           GArray   *devs_to_check,
+                           GArray   *devs_to_clean)
+{
+  GVariant *details;
+  GVariant *block_device_value;
+  gboolean ret = TRUE;
+
+  if (devs_to_check == NULL)
+    return TRUE;
+
+  g_variant_get (value, "{&s@a{sv}}", NULL, &details);
+  block_device_value = lookup_asv (details, "block-device");
+  if (block_device_value != NULL)
+    {
+      dev_t block_device = g_variant_get_uint64 (block_device_value);
+      ret = dev_in_array (devs_to_check, block_device) || dev_in_array (devs_to_clean, block_device);
+      g_variant_unref (block_device_value);
+    }
+  g_variant_unref (details);
+
+  return ret;
+}
+
 /* called with mutex->lock held */
 static void
 udisks_state_check_mounted_fs (UDisksState *state,
+                               GArray      *devs_to_check,
                                GArray      *devs_to_clean)
 {
   gboolean changed;
@@ -794,7 +1070,8 @@ udisks_state_check_mounted_fs (UDisksState *state,
       g_variant_iter_init (&iter, value);
       while ((child = g_variant_iter_next_value (&iter)) != NULL)
         {
-          if (udisks_state_check_mounted_fs_entry (state, child, devs_to_clean))
+          if (!mounted_fs_entry_in_scope (child, devs_to_check, devs_to_clean) ||
+              udisks_state_check_mounted_fs_entry (state, child, devs_to_clean))
             g_variant_builder_add_value (&builder, child);
           else
             changed = TRUE;
@@ -824,43 +1101,34 @@ udisks_state_check_mounted_fs (UDisksState *state,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/**
- * udisks_state_add_mounted_fs:
- * @state: A #UDisksState.
- * @block_device: The block device.
- * @mount_point: The mount point.
- * @uid: The user id of the process requesting the device to be mounted.
- * @fstab_mount: %TRUE if the device was mounted via /etc/fstab.
- *
- * Adds a new entry to the
- * <filename>/run/udisks2/mounted-fs</filename> file.
- */
-void
-udisks_state_add_mounted_fs (UDisksState    *state,
-                             const gchar    *mount_point,
-                             dev_t           block_device,
-                             uid_t           uid,
-                             gboolean        fstab_mount)
+/* must be called with state->lock held, @entries is of type a(stub) */
+static void
+add_mounted_fs_entries_unlocked (UDisksState *state,
+                                 GVariant    *entries)
 {
   GVariant *value;
   GVariant *new_value;
-  GVariant *details_value;
   GVariantBuilder builder;
-  GVariantBuilder details_builder;
+  GHashTable *new_mount_points;
+  GVariantIter entries_iter;
+  const gchar *mount_point;
+  guint64 block_device;
+  guint32 uid;
+  gboolean fstab_mount;
 
   gboolean ok = FALSE;
 
-  g_return_if_fail (UDISKS_IS_STATE (state));
-  g_return_if_fail (mount_point != NULL);
-
-  g_mutex_lock (&state->lock);
-
   /* load existing entries */
   value = udisks_state_get (state,
                             "mounted-fs",
                             G_VARIANT_TYPE ("a{sa{sv}}"), &ok);
   if (!ok)
-    goto out;
+    return;
+
+  new_mount_points = g_hash_table_new (g_str_hash, g_str_equal);
+  g_variant_iter_init (&entries_iter, entries);
+  while (g_variant_iter_next (&entries_iter, "(&stub)", &mount_point, NULL, NULL, NULL))
+    g_hash_table_add (new_mount_points, (gpointer) mount_point);
 
   /* start by including existing entries */
   g_variant_builder_init (&builder, G_VARIANT_TYPE ("a{sa{sv}}"));
@@ -875,7 +1143,7 @@ udisks_state_add_mounted_fs (UDisksState    *state,
           const gchar *entry_mount_point;
           g_variant_get (child, "{&s@a{sv}}", &entry_mount_point, NULL);
           /* Skip/remove stale entries */
-          if (g_strcmp0 (entry_mount_point, mount_point) == 0)
+          if (g_hash_table_contains (new_mount_points, entry_mount_point))
             {
               udisks_warning ("Removing stale entry for mount point `%s' in /run/udisks/mounted-fs file",
                               entry_mount_point);
@@ -889,27 +1157,31 @@ udisks_state_add_mounted_fs (UDisksState    *state,
       g_variant_unref (value);
     }
 
-  /* build the details */
-  g_variant_builder_init (&details_builder, G_VARIANT_TYPE ("a{sv}"));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "block-device",
-                         g_variant_new_uint64 (block_device));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "mounted-by-uid",
-                         g_variant_new_uint32 (uid));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "fstab-mount",
-                         g_variant_new_boolean (fstab_mount));
-  details_value = g_variant_builder_end (&details_builder);
-
-  /* finally add the new entry */
-  g_variant_builder_add (&builder,
-                         "{s@a{sv}}",
-                         mount_point,
-                         details_value); /* consumes details_value */
+  /* finally add the new entries */
+  g_variant_iter_init (&entries_iter, entries);
+  while (g_variant_iter_next (&entries_iter, "(&stub)", &mount_point, &block_device, &uid, &fstab_mount))
+    {
+      GVariantBuilder details_builder;
+
+      /* build the details */
+      g_variant_builder_init (&details_builder, G_VARIANT_TYPE ("a{sv}"));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "block-device",
+                             g_variant_new_uint64 (block_device));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "mounted-by-uid",
+                             g_variant_new_uint32 (uid));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "fstab-mount",
+                             g_variant_new_boolean (fstab_mount));
+      g_variant_builder_add (&builder,
+                             "{sa{sv}}",
+                             mount_point,
+                             &details_builder);
+    }
   new_value = g_variant_builder_end (&builder);
 
   /* save new entries */
@@ -918,8 +1190,67 @@ udisks_state_add_mounted_fs (UDisksState    *state,
                          G_VARIANT_TYPE ("a{sa{sv}}"),
                          new_value /* consumes new_value */);
 
- out:
+  g_hash_table_unref (new_mount_points);
+}
+
+/**
+ * udisks_state_add_mounted_fs:
+ * @state: A #UDisksState.
+ * @block_device: The block device.
+ * @mount_point: The mount point.
+ * @uid: The user id of the process requesting the device to be mounted.
+ * @fstab_mount: %TRUE if the device was mounted via /etc/fstab.
+ *
+ * Adds a new entry to the
+ * <filename>/run/udisks2/mounted-fs</filename> file.
+ */
+void
+udisks_state_add_mounted_fs (UDisksState    *state,
+                             const gchar    *mount_point,
+                             dev_t           block_device,
+                             uid_t           uid,
+                             gboolean        fstab_mount)
+{
+  GVariant *entries;
+
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (mount_point != NULL);
+
+  entries = g_variant_new_parsed ("[(%s, %t, %u, %b)]",
+                                  mount_point,
+                                  (guint64) block_device,
+                                  (guint32) uid,
+                                  fstab_mount);
+  udisks_state_add_mounted_fs_entries (state, entries);
+}
+
+/**
+ * udisks_state_add_mounted_fs_entries:
+ * @state: A #UDisksState.
+ * @entries: A #GVariant of type <literal>a(stub)</literal> with the mount point, block device, uid and
+ *   fstab mount flag of each entry. If floating, it is consumed.
+ *
+ * Like udisks_state_add_mounted_fs() but adds several entries at once,
+ * rewriting the <filename>/run/udisks2/mounted-fs</filename> file only
+ * once.
+ */
+void
+udisks_state_add_mounted_fs_entries (UDisksState *state,
+                                     GVariant    *entries)
+{
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (g_variant_is_of_type (entries, G_VARIANT_TYPE ("a(stub)")));
+
+  g_variant_ref_sink (entries);
+
+  g_mutex_lock (&state->lock);
+  add_mounted_fs_entries_unlocked (state, entries);
   g_mutex_unlock (&state->lock);
+
+  /* don't return before the new entries are on disk */
+  udisks_state_sync (state);
+
+  g_variant_unref (entries);
 }
 
 /**
@@ -1187,10 +1518,37 @@ udisks_state_check_unlocked_luks_entry (UDisksState  *state,
   return keep;
 }
 
+/* returns TRUE if the entry refers to one of @devs_to_check */
+static gboolean
+unlocked_luks_entry_in_scope (GVariant *value,
+                              GArray   *devs_to_check)
+{
+  guint64 cleartext_device;
+  GVariant *details;
+  GVariant *crypto_device_value;
+  gboolean ret = TRUE;
+
+  if (devs_to_check == NULL)
+    return TRUE;
+
+  g_variant_get (value, "{t@a{sv}}", &cleartext_device, &details);
+  crypto_device_value = lookup_asv (details, "crypto-device");
+  if (crypto_device_value != NULL)
+    {
+      ret = dev_in_array (devs_to_check, cleartext_device) ||
+            dev_in_array (devs_to_check, g_variant_get_uint64 (crypto_device_value));
+      g_variant_unref (crypto_device_value);
+    }
+  g_variant_unref (details);
+
+  return ret;
+}
+
 /* called with mutex->lock held */
 static void
 udisks_state_check_unlocked_luks (UDisksState *state,
                                   gboolean     check_only,
+                                  GArray      *devs_to_check,
                                   GArray      *devs_to_clean)
 {
   gboolean changed;
@@ -1218,7 +1576,8 @@ udisks_state_check_unlocked_luks (UDisksState *state,
       g_variant_iter_init (&iter, value);
       while ((child = g_variant_iter_next_value (&iter)) != NULL)
         {
-          if (udisks_state_check_unlocked_luks_entry (state, child, check_only, devs_to_clean))
+          if (!unlocked_luks_entry_in_scope (child, devs_to_check) ||
+              udisks_state_check_unlocked_luks_entry (state, child, check_only, devs_to_clean))
             g_variant_builder_add_value (&builder, child);
           else
             changed = TRUE;
@@ -1248,43 +1607,34 @@ udisks_state_check_unlocked_luks (UDisksState *state,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-/**
- * udisks_state_add_unlocked_luks:
- * @state: A #UDisksState.
- * @cleartext_device: The clear-text device.
- * @crypto_device: The crypto device.
- * @dm_uuid: The UUID of the unlocked dm device.
- * @uid: The user id of the process requesting the device to be unlocked.
- *
- * Adds a new entry to the
- * <filename>/run/udisks2/unlocked-luks</filename> file.
- */
-void
-udisks_state_add_unlocked_luks (UDisksState  *state,
-                                dev_t         cleartext_device,
-                                dev_t         crypto_device,
-                                const gchar  *dm_uuid,
-                                uid_t         uid)
+/* must be called with state->lock held, @entries is of type a(ttsu) */
+static void
+add_unlocked_luks_entries_unlocked (UDisksState *state,
+                                    GVariant    *entries)
 {
   GVariant *value;
   GVariant *new_value;
-  GVariant *details_value;
   GVariantBuilder builder;
-  GVariantBuilder details_builder;
+  GHashTable *new_cleartext_devices;
+  GVariantIter entries_iter;
+  guint64 cleartext_device;
+  guint64 crypto_device;
+  const gchar *dm_uuid;
+  guint32 uid;
 
   gboolean ok = FALSE;
 
-  g_return_if_fail (UDISKS_IS_STATE (state));
-  g_return_if_fail (dm_uuid != NULL);
-
-  g_mutex_lock (&state->lock);
-
   /* load existing entries */
   value = udisks_state_get (state,
                             "unlocked-luks",
                             G_VARIANT_TYPE ("a{ta{sv}}"), &ok);
   if (!ok)
-    goto out;
+    return;
+
+  new_cleartext_devices = g_hash_table_new_full (g_int64_hash, g_int64_equal, g_free, NULL);
+  g_variant_iter_init (&entries_iter, entries);
+  while (g_variant_iter_next (&entries_iter, "(tt&su)", &cleartext_device, NULL, NULL, NULL))
+    g_hash_table_add (new_cleartext_devices, g_memdup (&cleartext_device, sizeof (guint64)));
 
   /* start by including existing entries */
   g_variant_builder_init (&builder, G_VARIANT_TYPE ("a{ta{sv}}"));
@@ -1298,7 +1648,7 @@ udisks_state_add_unlocked_luks (UDisksState  *state,
           guint64 entry_cleartext_device;
           g_variant_get (child, "{t@a{sv}}", &entry_cleartext_device, NULL);
           /* Skip/remove stale entries */
-          if ((dev_t) entry_cleartext_device == cleartext_device)
+          if (g_hash_table_contains (new_cleartext_devices, &entry_cleartext_device))
             {
               udisks_warning ("Removing stale entry for cleartext device %d:%d in /run/udisks2/unlocked-luks file",
                               (gint) major (entry_cleartext_device),
@@ -1313,27 +1663,31 @@ udisks_state_add_unlocked_luks (UDisksState  *state,
       g_variant_unref (value);
     }
 
-  /* build the details */
-  g_variant_builder_init (&details_builder, G_VARIANT_TYPE ("a{sv}"));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "crypto-device",
-                         g_variant_new_uint64 (crypto_device));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "dm-uuid",
-                         g_variant_new_bytestring (dm_uuid));
-  g_variant_builder_add (&details_builder,
-                         "{sv}",
-                         "unlocked-by-uid",
-                         g_variant_new_uint32 (uid));
-  details_value = g_variant_builder_end (&details_builder);
-
-  /* finally add the new entry */
-  g_variant_builder_add (&builder,
-                         "{t@a{sv}}",
-                         (guint64) cleartext_device,
-                         details_value); /* consumes details_value */
+  /* finally add the new entries */
+  g_variant_iter_init (&entries_iter, entries);
+  while (g_variant_iter_next (&entries_iter, "(tt&su)", &cleartext_device, &crypto_device, &dm_uuid, &uid))
+    {
+      GVariantBuilder details_builder;
+
+      /* build the details */
+      g_variant_builder_init (&details_builder, G_VARIANT_TYPE ("a{sv}"));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "crypto-device",
+                             g_variant_new_uint64 (crypto_device));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "dm-uuid",
+                             g_variant_new_bytestring (dm_uuid));
+      g_variant_builder_add (&details_builder,
+                             "{sv}",
+                             "unlocked-by-uid",
+                             g_variant_new_uint32 (uid));
+      g_variant_builder_add (&builder,
+                             "{ta{sv}}",
+                             cleartext_device,
+                             &details_builder);
+    }
   new_value = g_variant_builder_end (&builder);
 
   /* save new entries */
@@ -1341,8 +1695,68 @@ udisks_state_add_unlocked_luks (UDisksState  *state,
                          "unlocked-luks",
                          G_VARIANT_TYPE ("a{ta{sv}}"),
                          new_value /* consumes new_value */);
- out:
+
+  g_hash_table_unref (new_cleartext_devices);
+}
+
+/**
+ * udisks_state_add_unlocked_luks:
+ * @state: A #UDisksState.
+ * @cleartext_device: The clear-text device.
+ * @crypto_device: The crypto device.
+ * @dm_uuid: The UUID of the unlocked dm device.
+ * @uid: The user id of the process requesting the device to be unlocked.
+ *
+ * Adds a new entry to the
+ * <filename>/run/udisks2/unlocked-luks</filename> file.
+ */
+void
+udisks_state_add_unlocked_luks (UDisksState  *state,
+                                dev_t         cleartext_device,
+                                dev_t         crypto_device,
+                                const gchar  *dm_uuid,
+                                uid_t         uid)
+{
+  GVariant *entries;
+
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (dm_uuid != NULL);
+
+  entries = g_variant_new_parsed ("[(%t, %t, %s, %u)]",
+                                  (guint64) cleartext_device,
+                                  (guint64) crypto_device,
+                                  dm_uuid,
+                                  (guint32) uid);
+  udisks_state_add_unlocked_luks_entries (state, entries);
+}
+
+/**
+ * udisks_state_add_unlocked_luks_entries:
+ * @state: A #UDisksState.
+ * @entries: A #GVariant of type <literal>a(ttsu)</literal> with the clear-text device, crypto device, dm UUID
+ *   and uid of each entry. If floating, it is consumed.
+ *
+ * Like udisks_state_add_unlocked_luks() but adds several entries at
+ * once, rewriting the <filename>/run/udisks2/unlocked-luks</filename>
+ * file only once.
+ */
+void
+udisks_state_add_unlocked_luks_entries (UDisksState *state,
+                                        GVariant    *entries)
+{
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (g_variant_is_of_type (entries, G_VARIANT_TYPE ("a(ttsu)")));
+
+  g_variant_ref_sink (entries);
+
+  g_mutex_lock (&state->lock);
+  add_unlocked_luks_entries_unlocked (state, entries);
   g_mutex_unlock (&state->lock);
+
+  /* don't return before the new entries are on disk */
+  udisks_state_sync (state);
+
+  g_variant_unref (entries);
 }
 
 /**
@@ -1529,9 +1943,43 @@ udisks_state_check_loop_entry (UDisksState  *state,
   return keep;
 }
 
+/* returns TRUE if the entry refers to one of @devs_to_check */
+static gboolean
+loop_entry_in_scope (GVariant *value,
+                     GArray   *devs_to_check)
+{
+  const gchar *loop_device;
+  GVariant *details;
+  GVariant *backing_file_device_value;
+  struct stat statbuf;
+  gboolean ret = TRUE;
+
+  if (devs_to_check == NULL)
+    return TRUE;
+
+  g_variant_get (value, "{&s@a{sv}}", &loop_device, &details);
+
+  /* entries are keyed by device file - if it's gone, the entry needs checking */
+  if (stat (loop_device, &statbuf) == 0 && S_ISBLK (statbuf.st_mode) &&
+      !dev_in_array (devs_to_check, statbuf.st_rdev))
+    {
+      ret = FALSE;
+      backing_file_device_value = lookup_asv (details, "backing-file-device");
+      if (backing_file_device_value != NULL)
+        {
+          ret = dev_in_array (devs_to_check, g_variant_get_uint64 (backing_file_device_value));
+          g_variant_unref (backing_file_device_value);
+        }
+    }
+  g_variant_unref (details);
+
+  return ret;
+}
+
 static void
 udisks_state_check_loop (UDisksState *state,
                          gboolean     check_only,
+                         GArray      *devs_to_check,
                          GArray      *devs_to_clean)
 {
   gboolean changed;
@@ -1559,7 +2007,8 @@ udisks_state_check_loop (UDisksState *state,
       g_variant_iter_init (&iter, value);
       while ((child = g_variant_iter_next_value (&iter)) != NULL)
         {
-          if (udisks_state_check_loop_entry (state, child, check_only, devs_to_clean))
+          if (!loop_entry_in_scope (child, devs_to_check) ||
+              udisks_state_check_loop_entry (state, child, check_only, devs_to_clean))
             g_variant_builder_add_value (&builder, child);
           else
             changed = TRUE;
@@ -1684,6 +2133,9 @@ udisks_state_add_loop (UDisksState   *state,
                     new_value /* consumes new_value */);
  out:
   g_mutex_unlock (&state->lock);
+
+  /* don't return before the new entry is on disk */
+  udisks_state_sync (state);
 }
 
 /**
@@ -1873,9 +2325,24 @@ udisks_state_check_mdraid_entry (UDisksState  *state,
   return keep;
 }
 
+/* returns TRUE if the entry refers to one of @devs_to_check */
+static gboolean
+mdraid_entry_in_scope (GVariant *value,
+                       GArray   *devs_to_check)
+{
+  guint64 raid_device;
+
+  if (devs_to_check == NULL)
+    return TRUE;
+
+  g_variant_get (value, "{t@a{sv}}", &raid_device, NULL);
+  return dev_in_array (devs_to_check, raid_device);
+}
+
 static void
 udisks_state_check_mdraid (UDisksState *state,
                            gboolean     check_only,
+                           GArray      *devs_to_check,
                            GArray      *devs_to_clean)
 {
   gboolean changed;
@@ -1903,7 +2370,8 @@ udisks_state_check_mdraid (UDisksState *state,
       g_variant_iter_init (&iter, value);
       while ((child = g_variant_iter_next_value (&iter)) != NULL)
         {
-          if (udisks_state_check_mdraid_entry (state, child, check_only, devs_to_clean))
+          if (!mdraid_entry_in_scope (child, devs_to_check) ||
+              udisks_state_check_mdraid_entry (state, child, check_only, devs_to_clean))
             g_variant_builder_add_value (&builder, child);
           else
             changed = TRUE;
@@ -2012,6 +2480,9 @@ udisks_state_add_mdraid (UDisksState   *state,
 
  out:
   g_mutex_unlock (&state->lock);
+
+  /* don't return before the new entry is on disk */
+  udisks_state_sync (state);
 }
 
 static gboolean
@@ -2086,6 +2557,18 @@ udisks_state_has_mdraid (UDisksState   *state,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+static gchar *
+get_state_path (const gchar *key)
+{
+#ifdef HAVE_FHS_MEDIA
+  /* /media usually isn't on a tmpfs, so we need to make this persistant */
+  if (strcmp (key, "mounted-fs") == 0)
+    return g_strdup_printf (PACKAGE_LOCALSTATE_DIR "/lib/udisks2/%s", key);
+  else
+#endif
+    return g_strdup_printf ("/run/udisks2/%s", key);
+}
+
 static GVariant *
 udisks_state_get (UDisksState           *state,
                   const gchar           *key,
@@ -2111,14 +2594,7 @@ udisks_state_get (UDisksState           *state,
    * - could also mmap the file
    */
 
-#ifdef HAVE_FHS_MEDIA
-  /* /media usually isn't on a tmpfs, so we need to make this persistant */
-  if (strcmp (key, "mounted-fs") == 0)
-    path = g_strdup_printf (PACKAGE_LOCALSTATE_DIR "/lib/udisks2/%s", key);
-  else
-#endif
-    path = g_strdup_printf ("/run/udisks2/%s", key);
-
+  path = get_state_path (key);
 
   /* see if it's already in the cache */
   ret = g_hash_table_lookup (state->cache, path);
@@ -2166,62 +2642,122 @@ udisks_state_get (UDisksState           *state,
   return ret;
 }
 
-static gboolean
+/* must be called with state->lock held, the change is written by udisks_state_sync() */
+static void
 udisks_state_set (UDisksState          *state,
                   const gchar          *key,
                   const GVariantType   *type,
                   GVariant             *value)
 {
-  gboolean ret = FALSE;
-  gsize size = 0;
   gchar *path = NULL;
-  gchar *data= NULL;
-  GVariant *normalized = NULL;
-  GError *error = NULL;
 
-  g_return_val_if_fail (UDISKS_IS_STATE (state), FALSE);
-  g_return_val_if_fail (key != NULL, FALSE);
-  g_return_val_if_fail (g_variant_type_is_definite (type), FALSE);
-  g_return_val_if_fail (g_variant_is_of_type (value, type), FALSE);
+  g_return_if_fail (UDISKS_IS_STATE (state));
+  g_return_if_fail (key != NULL);
+  g_return_if_fail (g_variant_type_is_definite (type));
+  g_return_if_fail (g_variant_is_of_type (value, type));
 
   g_variant_ref_sink (value);
-  normalized = g_variant_get_normal_form (value);
-  size = g_variant_get_size (normalized);
-  data = g_malloc (size);
-  g_variant_store (normalized, data);
 
-#ifdef HAVE_FHS_MEDIA
-  /* /media usually isn't on a tmpfs, so we need to make this persistant */
-  if (strcmp (key, "mounted-fs") == 0)
-    path = g_strdup_printf (PACKAGE_LOCALSTATE_DIR "/lib/udisks2/%s", key);
-  else
-#endif
-    path = g_strdup_printf ("/run/udisks2/%s", key);
+  path = get_state_path (key);
+  g_hash_table_insert (state->cache, path, g_variant_ref (value));
+  g_hash_table_insert (state->pending, g_strdup (key), value);
+  state->serial++;
+}
 
-  g_hash_table_insert (state->cache, g_strdup (path), g_variant_ref (value));
+static guint64
+udisks_state_write_pending (UDisksState *state)
+{
+  GHashTable *pending;
+  GHashTableIter iter;
+  const gchar *key;
+  GVariant *value;
+  guint64 serial;
 
-  if (!g_file_set_contents (path,
-                            data,
-                            size,
-                            &error))
+  /* take all the changes made so far, newer changes go to the next batch */
+  g_mutex_lock (&state->lock);
+  pending = state->pending;
+  state->pending = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, (GDestroyNotify) g_variant_unref);
+  serial = state->serial;
+  g_mutex_unlock (&state->lock);
+
+  g_hash_table_iter_init (&iter, pending);
+  while (g_hash_table_iter_next (&iter, (gpointer *) &key, (gpointer *) &value))
     {
-      udisks_warning ("Error setting %s: %s (%s, %d)", key,
-                     error->message,
-                     g_quark_to_string (error->domain),
-                     error->code);
-      g_clear_error (&error);
-      goto out;
+      GVariant *normalized;
+      GError *error = NULL;
+      gchar *path;
+      gchar *data;
+      gsize size;
+
+      normalized = g_variant_get_normal_form (value);
+      size = g_variant_get_size (normalized);
+      data = g_malloc (size);
+      g_variant_store (normalized, data);
+
+      /* g_file_set_contents() atomically replaces the file so a crash never
+       * leaves a partially written file behind
+       */
+      path = get_state_path (key);
+      if (!g_file_set_contents (path,
+                                data,
+                                size,
+                                &error))
+        {
+          udisks_warning ("Error setting %s: %s (%s, %d)", key,
+                         error->message,
+                         g_quark_to_string (error->domain),
+                         error->code);
+          g_clear_error (&error);
+        }
+
+      g_free (path);
+      g_free (data);
+      g_variant_unref (normalized);
     }
 
-  ret = TRUE;
+  udisks_debug ("Wrote %u state file(s) up to change %" G_GUINT64_FORMAT,
+                g_hash_table_size (pending), serial);
 
- out:
+  g_hash_table_unref (pending);
+  return serial;
+}
 
-  g_free (path);
-  g_free (data);
-  g_variant_unref (normalized);
-  g_variant_unref (value);
-  return ret;
+/* Blocks until all the changes made so far are written to disk. Must
+ * be called without state->lock held. If another thread is already
+ * writing, waits for it and then writes everything that was changed in
+ * the meantime in one go.
+ */
+static void
+udisks_state_sync (UDisksState *state)
+{
+  guint64 serial;
+
+  g_mutex_lock (&state->lock);
+  serial = state->serial;
+  g_mutex_unlock (&state->lock);
+
+  g_mutex_lock (&state->write_lock);
+  while (state->written_serial < serial)
+    {
+      guint64 written_serial;
+
+      if (state->writing)
+        {
+          g_cond_wait (&state->write_cond, &state->write_lock);
+          continue;
+        }
+
+      state->writing = TRUE;
+      g_mutex_unlock (&state->write_lock);
+
+      written_serial = udisks_state_write_pending (state);
+
+      g_mutex_lock (&state->write_lock);
+      state->writing = FALSE;
+      state->written_serial = written_serial;
+      g_cond_broadcast (&state->write_cond);
+    }
+  g_mutex_unlock (&state->write_lock);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -35,12 +35,22 @@ UDisksDaemon  *udisks_state_get_daemon           (UDisksState   *state);
 void           udisks_state_start_cleanup        (UDisksState   *state);
 void           udisks_state_stop_cleanup         (UDisksState   *state);
 void           udisks_state_check                (UDisksState   *state);
+void           udisks_state_check_block          (UDisksState   *state,
+                                                  dev_t          block_device);
+void           udisks_state_get_check_stats      (UDisksState   *state,
+                                                  guint64       *out_num_requests,
+                                                  guint64       *out_num_full_checks,
+                                                  gint64        *out_full_checks_usec,
+                                                  guint64       *out_num_scoped_checks,
+                                                  gint64        *out_scoped_checks_usec);
 /* mounted-fs */
 void           udisks_state_add_mounted_fs       (UDisksState   *state,
                                                   const gchar   *mount_point,
                                                   dev_t          block_device,
                                                   uid_t          uid,
                                                   gboolean       fstab_mount);
+void           udisks_state_add_mounted_fs_entries (UDisksState *state,
+                                                  GVariant      *entries);
 gchar         *udisks_state_find_mounted_fs      (UDisksState   *state,
                                                   dev_t          block_device,
                                                   uid_t         *out_uid,
@@ -51,6 +61,8 @@ void           udisks_state_add_unlocked_luks    (UDisksState   *state,
                                                   dev_t          crypto_device,
                                                   const gchar   *dm_uuid,
                                                   uid_t          uid);
+void           udisks_state_add_unlocked_luks_entries (UDisksState *state,
+                                                  GVariant      *entries);
 dev_t            udisks_state_find_unlocked_luks (UDisksState   *state,
                                                   dev_t          crypto_device,
                                                   uid_t         *out_uid);
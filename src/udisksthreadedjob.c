@@ -354,15 +354,9 @@ udisks_threaded_job_new (UDisksThreadedJobFunc  job_func,
                                             NULL));
 }
 
-/**
- * udisks_threaded_job_start:
- * @job: the job to start
- *
- * Start the @job. Connect to the #UDisksThreadedJob::threaded-job-completed or
- * #UDisksJob::completed signals to get notified when the job is done.
- *
- * */
-void udisks_threaded_job_start (UDisksThreadedJob *job) {
+static void
+threaded_job_start (UDisksThreadedJob *job)
+{
   GTask *task;
 
   task = g_task_new (NULL,
@@ -376,6 +370,27 @@ void udisks_threaded_job_start (UDisksThreadedJob *job) {
   g_object_unref (task);
 }
 
+/**
+ * udisks_threaded_job_start:
+ * @job: the job to start
+ *
+ * Start the @job. Connect to the #UDisksThreadedJob::threaded-job-completed or
+ * #UDisksJob::completed signals to get notified when the job is done.
+ *
+ * If @job is subject to the job limits, it may be queued and only
+ * started later, see udisks_daemon_start_job().
+ *
+ * */
+void udisks_threaded_job_start (UDisksThreadedJob *job)
+{
+  UDisksDaemon *daemon = udisks_base_job_get_daemon (UDISKS_BASE_JOB (job));
+
+  if (daemon != NULL)
+    udisks_daemon_start_job (daemon, UDISKS_BASE_JOB (job), (UDisksJobStartFunc) threaded_job_start);
+  else
+    threaded_job_start (job);
+}
+
 /**
  * udisks_threaded_job_get_user_data:
  * @job: A #UDisksThreadedJob.
@@ -26,6 +26,7 @@
 #include <stdlib.h>
 #include <udisks/udisks.h>
 #include <string.h>
+#include <math.h>
 
 #include <sys/types.h>
 #include <sys/stat.h>
@@ -373,6 +374,342 @@ print_object (UDisksObject *object,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* Machine-readable output. Objects are written as soon as they are
+ * serialized: with JSON_OUTPUT_ARRAY all of them form a JSON array with one
+ * element per line, with JSON_OUTPUT_LINES each line is a JSON value.
+ */
+typedef enum
+{
+  JSON_OUTPUT_NONE,
+  JSON_OUTPUT_ARRAY,
+  JSON_OUTPUT_LINES,
+} JsonOutput;
+
+static gboolean
+get_json_output (gboolean    json,
+                 gboolean    json_lines,
+                 JsonOutput *out_output)
+{
+  if (json && json_lines)
+    {
+      g_printerr ("Only one of --json and --json-lines can be used\n");
+      return FALSE;
+    }
+
+  if (json)
+    *out_output = JSON_OUTPUT_ARRAY;
+  else if (json_lines)
+    *out_output = JSON_OUTPUT_LINES;
+  else
+    *out_output = JSON_OUTPUT_NONE;
+  return TRUE;
+}
+
+static void
+json_append_string (GString     *out,
+                    const gchar *str,
+                    gssize       len)
+{
+  const guchar *c;
+  const guchar *end;
+  gboolean valid_utf8;
+
+  if (len < 0)
+    len = strlen (str);
+  valid_utf8 = g_utf8_validate (str, len, NULL);
+
+  g_string_append_c (out, '"');
+  end = (const guchar *) str + len;
+  for (c = (const guchar *) str; c < end; c++)
+    {
+      switch (*c)
+        {
+        case '"':
+          g_string_append (out, "\\\"");
+          break;
+        case '\\':
+          g_string_append (out, "\\\\");
+          break;
+        case '\n':
+          g_string_append (out, "\\n");
+          break;
+        case '\r':
+          g_string_append (out, "\\r");
+          break;
+        case '\t':
+          g_string_append (out, "\\t");
+          break;
+        default:
+          /* bytes of strings that aren't UTF-8 are taken as Latin-1 */
+          if (*c < 0x20 || (*c >= 0x80 && !valid_utf8))
+            g_string_append_printf (out, "\\u%04x", (guint) *c);
+          else
+            g_string_append_c (out, *c);
+          break;
+        }
+    }
+  g_string_append_c (out, '"');
+}
+
+static void
+json_append_variant (GString  *out,
+                     GVariant *value)
+{
+  GVariantIter iter;
+  GVariant *child;
+  gboolean first;
+  gchar buf[G_ASCII_DTOSTR_BUF_SIZE];
+
+  switch (g_variant_classify (value))
+    {
+    case G_VARIANT_CLASS_BOOLEAN:
+      g_string_append (out, g_variant_get_boolean (value) ? "true" : "false");
+      break;
+    case G_VARIANT_CLASS_BYTE:
+      g_string_append_printf (out, "%u", (guint) g_variant_get_byte (value));
+      break;
+    case G_VARIANT_CLASS_INT16:
+      g_string_append_printf (out, "%d", (gint) g_variant_get_int16 (value));
+      break;
+    case G_VARIANT_CLASS_UINT16:
+      g_string_append_printf (out, "%u", (guint) g_variant_get_uint16 (value));
+      break;
+    case G_VARIANT_CLASS_INT32:
+      g_string_append_printf (out, "%d", g_variant_get_int32 (value));
+      break;
+    case G_VARIANT_CLASS_UINT32:
+      g_string_append_printf (out, "%u", g_variant_get_uint32 (value));
+      break;
+    case G_VARIANT_CLASS_INT64:
+      g_string_append_printf (out, "%" G_GINT64_FORMAT, g_variant_get_int64 (value));
+      break;
+    case G_VARIANT_CLASS_UINT64:
+      g_string_append_printf (out, "%" G_GUINT64_FORMAT, g_variant_get_uint64 (value));
+      break;
+    case G_VARIANT_CLASS_HANDLE:
+      g_string_append_printf (out, "%d", g_variant_get_handle (value));
+      break;
+    case G_VARIANT_CLASS_DOUBLE:
+      if (isfinite (g_variant_get_double (value)))
+        g_string_append (out, g_ascii_dtostr (buf, sizeof buf, g_variant_get_double (value)));
+      else
+        g_string_append (out, "null");
+      break;
+    case G_VARIANT_CLASS_STRING:
+    case G_VARIANT_CLASS_OBJECT_PATH:
+    case G_VARIANT_CLASS_SIGNATURE:
+      json_append_string (out, g_variant_get_string (value, NULL), -1);
+      break;
+    case G_VARIANT_CLASS_VARIANT:
+      child = g_variant_get_variant (value);
+      json_append_variant (out, child);
+      g_variant_unref (child);
+      break;
+    case G_VARIANT_CLASS_MAYBE:
+      child = g_variant_get_maybe (value);
+      if (child != NULL)
+        {
+          json_append_variant (out, child);
+          g_variant_unref (child);
+        }
+      else
+        g_string_append (out, "null");
+      break;
+    case G_VARIANT_CLASS_ARRAY:
+      if (g_variant_is_of_type (value, G_VARIANT_TYPE_BYTESTRING))
+        {
+          gsize len;
+          const gchar *data = g_variant_get_fixed_array (value, &len, sizeof (guchar));
+
+          /* NUL-terminated byte strings (e.g. device files) are printed as
+           * strings, other byte arrays as arrays of numbers */
+          if (len > 0 && data[len - 1] == '\0' && memchr (data, '\0', len - 1) == NULL)
+            {
+              json_append_string (out, data, len - 1);
+              break;
+            }
+        }
+      if (g_variant_type_is_dict_entry (g_variant_type_element (g_variant_get_type (value))))
+        {
+          g_string_append_c (out, '{');
+          first = TRUE;
+          g_variant_iter_init (&iter, value);
+          while ((child = g_variant_iter_next_value (&iter)) != NULL)
+            {
+              GVariant *key = g_variant_get_child_value (child, 0);
+              GVariant *val = g_variant_get_child_value (child, 1);
+
+              if (!first)
+                g_string_append_c (out, ',');
+              first = FALSE;
+              if (g_variant_is_of_type (key, G_VARIANT_TYPE_STRING)
+                  || g_variant_is_of_type (key, G_VARIANT_TYPE_OBJECT_PATH))
+                json_append_string (out, g_variant_get_string (key, NULL), -1);
+              else
+                {
+                  /* JSON object keys have to be strings */
+                  gchar *key_str = g_variant_print (key, FALSE);
+                  json_append_string (out, key_str, -1);
+                  g_free (key_str);
+                }
+              g_string_append_c (out, ':');
+              json_append_variant (out, val);
+              g_variant_unref (val);
+              g_variant_unref (key);
+              g_variant_unref (child);
+            }
+          g_string_append_c (out, '}');
+          break;
+        }
+      /* fall through */
+    case G_VARIANT_CLASS_TUPLE:
+    case G_VARIANT_CLASS_DICT_ENTRY:
+      g_string_append_c (out, '[');
+      first = TRUE;
+      g_variant_iter_init (&iter, value);
+      while ((child = g_variant_iter_next_value (&iter)) != NULL)
+        {
+          if (!first)
+            g_string_append_c (out, ',');
+          first = FALSE;
+          json_append_variant (out, child);
+          g_variant_unref (child);
+        }
+      g_string_append_c (out, ']');
+      break;
+    }
+}
+
+/* Interfaces can be given with or without the org.freedesktop.UDisks2. prefix */
+static gboolean
+json_interface_matches (const gchar        *interface_name,
+                        const gchar *const *interfaces)
+{
+  guint n;
+
+  if (interfaces == NULL)
+    return TRUE;
+
+  for (n = 0; interfaces[n] != NULL; n++)
+    {
+      if (g_strcmp0 (interface_name, interfaces[n]) == 0)
+        return TRUE;
+      if (g_str_has_prefix (interface_name, "org.freedesktop.UDisks2.")
+          && g_strcmp0 (interface_name + strlen ("org.freedesktop.UDisks2."), interfaces[n]) == 0)
+        return TRUE;
+    }
+  return FALSE;
+}
+
+static gboolean
+json_property_matches (const gchar        *property_name,
+                       const gchar *const *properties)
+{
+  guint n;
+
+  if (properties == NULL)
+    return TRUE;
+
+  for (n = 0; properties[n] != NULL; n++)
+    if (g_strcmp0 (property_name, properties[n]) == 0)
+      return TRUE;
+  return FALSE;
+}
+
+/* Appends @object with the properties of its interfaces matching the
+ * filters, returns %FALSE if no interface matches.
+ */
+static gboolean
+json_append_object (GString            *out,
+                    UDisksObject       *object,
+                    const gchar *const *interfaces,
+                    const gchar *const *properties)
+{
+  GList *interface_proxies;
+  GList *l;
+  gboolean first_interface = TRUE;
+  gsize start = out->len;
+
+  g_string_append (out, "{\"path\":");
+  json_append_string (out, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)), -1);
+  g_string_append (out, ",\"interfaces\":{");
+
+  interface_proxies = g_dbus_object_get_interfaces (G_DBUS_OBJECT (object));
+  for (l = interface_proxies; l != NULL; l = l->next)
+    {
+      GDBusProxy *iproxy = G_DBUS_PROXY (l->data);
+      gchar **cached_properties;
+      gboolean first_property = TRUE;
+      guint n;
+
+      if (!json_interface_matches (g_dbus_proxy_get_interface_name (iproxy), interfaces))
+        continue;
+
+      if (!first_interface)
+        g_string_append_c (out, ',');
+      first_interface = FALSE;
+      json_append_string (out, g_dbus_proxy_get_interface_name (iproxy), -1);
+      g_string_append (out, ":{");
+
+      cached_properties = g_dbus_proxy_get_cached_property_names (iproxy);
+      for (n = 0; cached_properties != NULL && cached_properties[n] != NULL; n++)
+        {
+          GVariant *value;
+
+          if (!json_property_matches (cached_properties[n], properties))
+            continue;
+
+          value = g_dbus_proxy_get_cached_property (iproxy, cached_properties[n]);
+          if (value == NULL)
+            continue;
+
+          if (!first_property)
+            g_string_append_c (out, ',');
+          first_property = FALSE;
+          json_append_string (out, cached_properties[n], -1);
+          g_string_append_c (out, ':');
+          json_append_variant (out, value);
+          g_variant_unref (value);
+        }
+      g_strfreev (cached_properties);
+      g_string_append_c (out, '}');
+    }
+  g_list_foreach (interface_proxies, (GFunc) g_object_unref, NULL);
+  g_list_free (interface_proxies);
+
+  g_string_append (out, "}}");
+
+  if (first_interface && interfaces != NULL)
+    {
+      g_string_truncate (out, start);
+      return FALSE;
+    }
+  return TRUE;
+}
+
+/* Writes out one element of the output, @first is updated */
+static void
+json_print_element (GString    *element,
+                    JsonOutput  output,
+                    gboolean   *first)
+{
+  if (output == JSON_OUTPUT_ARRAY)
+    g_print ("%s%s\n", *first ? "[" : ",", element->str);
+  else
+    g_print ("%s\n", element->str);
+  *first = FALSE;
+}
+
+static void
+json_print_end (JsonOutput output,
+                gboolean   first)
+{
+  if (output == JSON_OUTPUT_ARRAY)
+    g_print (first ? "[]\n" : "]\n");
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 static UDisksObject *
 lookup_object_by_path (const gchar *path)
 {
@@ -2293,12 +2630,20 @@ handle_command_power_off (gint        *argc,
 static gchar *opt_info_object = NULL;
 static gchar *opt_info_device = NULL;
 static gchar *opt_info_drive = NULL;
+static gboolean opt_info_json = FALSE;
+static gboolean opt_info_json_lines = FALSE;
+static gchar **opt_info_interfaces = NULL;
+static gchar **opt_info_properties = NULL;
 
 static const GOptionEntry command_info_entries[] =
 {
   { "object-path", 'p', 0, G_OPTION_ARG_STRING, &opt_info_object, "Object to get information about", NULL},
   { "block-device", 'b', 0, G_OPTION_ARG_STRING, &opt_info_device, "Block device to get information about", NULL},
   { "drive", 'd', 0, G_OPTION_ARG_STRING, &opt_info_drive, "Drive to get information about", NULL},
+  { "json", 0, 0, G_OPTION_ARG_NONE, &opt_info_json, "Print the information as JSON", NULL},
+  { "json-lines", 0, 0, G_OPTION_ARG_NONE, &opt_info_json_lines, "Print the information as a single line of JSON", NULL},
+  { "interface", 'i', 0, G_OPTION_ARG_STRING_ARRAY, &opt_info_interfaces, "Only print the given interface (may be repeated)", NULL},
+  { "property", 0, 0, G_OPTION_ARG_STRING_ARRAY, &opt_info_properties, "Only print the given property (may be repeated)", NULL},
   { NULL }
 };
 
@@ -2321,11 +2666,16 @@ handle_command_info (gint        *argc,
   UDisksBlock *block;
   UDisksDrive *drive;
   guint n;
+  JsonOutput json_output;
 
   ret = 1;
   opt_info_object = NULL;
   opt_info_device = NULL;
   opt_info_drive = NULL;
+  opt_info_json = FALSE;
+  opt_info_json_lines = FALSE;
+  opt_info_interfaces = NULL;
+  opt_info_properties = NULL;
 
   modify_argv0_for_command (argc, argv, "info");
 
@@ -2440,6 +2790,8 @@ handle_command_info (gint        *argc,
   if (request_completion)
     goto out;
 
+  if (!get_json_output (opt_info_json, opt_info_json_lines, &json_output))
+    goto out;
 
   if (opt_info_object != NULL)
     {
@@ -2476,9 +2828,27 @@ handle_command_info (gint        *argc,
       goto out;
     }
 
-  g_print ("%s%s%s:%s\n",
-           _color_get (_COLOR_BOLD_ON), _color_get (_COLOR_FG_BLUE), g_dbus_object_get_object_path (G_DBUS_OBJECT (object)), _color_get (_COLOR_RESET));
-  print_object (object, 2);
+  if (json_output != JSON_OUTPUT_NONE)
+    {
+      GString *str = g_string_new (NULL);
+      if (!json_append_object (str, object,
+                               (const gchar *const *) opt_info_interfaces,
+                               (const gchar *const *) opt_info_properties))
+        {
+          /* the object is printed even if no interface matches */
+          g_string_append (str, "{\"path\":");
+          json_append_string (str, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)), -1);
+          g_string_append (str, ",\"interfaces\":{}}");
+        }
+      g_print ("%s\n", str->str);
+      g_string_free (str, TRUE);
+    }
+  else
+    {
+      g_print ("%s%s%s:%s\n",
+               _color_get (_COLOR_BOLD_ON), _color_get (_COLOR_FG_BLUE), g_dbus_object_get_object_path (G_DBUS_OBJECT (object)), _color_get (_COLOR_RESET));
+      print_object (object, 2);
+    }
   g_object_unref (object);
 
   ret = 0;
@@ -2488,6 +2858,8 @@ handle_command_info (gint        *argc,
   g_free (opt_info_object);
   g_free (opt_info_device);
   g_free (opt_info_drive);
+  g_strfreev (opt_info_interfaces);
+  g_strfreev (opt_info_properties);
   return ret;
 }
 
@@ -2514,8 +2886,17 @@ obj_proxy_drive_sortkey_cmp (GDBusObject *a,
 }
 
 
+static gboolean opt_dump_json = FALSE;
+static gboolean opt_dump_json_lines = FALSE;
+static gchar **opt_dump_interfaces = NULL;
+static gchar **opt_dump_properties = NULL;
+
 static const GOptionEntry command_dump_entries[] =
 {
+  { "json", 0, 0, G_OPTION_ARG_NONE, &opt_dump_json, "Print the objects as a JSON array", NULL},
+  { "json-lines", 0, 0, G_OPTION_ARG_NONE, &opt_dump_json_lines, "Print each object as a line of JSON", NULL},
+  { "interface", 'i', 0, G_OPTION_ARG_STRING_ARRAY, &opt_dump_interfaces, "Only print objects with the given interface (may be repeated)", NULL},
+  { "property", 0, 0, G_OPTION_ARG_STRING_ARRAY, &opt_dump_properties, "Only print the given property (may be repeated)", NULL},
   { NULL }
 };
 
@@ -2532,8 +2913,13 @@ handle_command_dump (gint        *argc,
   GList *objects;
   gchar *s;
   gboolean first;
+  JsonOutput json_output;
 
   ret = 1;
+  opt_dump_json = FALSE;
+  opt_dump_json_lines = FALSE;
+  opt_dump_interfaces = NULL;
+  opt_dump_properties = NULL;
 
   modify_argv0_for_command (argc, argv, "dump");
 
@@ -2559,6 +2945,33 @@ handle_command_dump (gint        *argc,
   if (request_completion)
     goto out;
 
+  if (!get_json_output (opt_dump_json, opt_dump_json_lines, &json_output))
+    goto out;
+
+  if (json_output != JSON_OUTPUT_NONE)
+    {
+      GString *str = g_string_new (NULL);
+
+      /* no sorting, every object is written out as soon as it's serialized */
+      objects = g_dbus_object_manager_get_objects (udisks_client_get_object_manager (client));
+      first = TRUE;
+      for (l = objects; l != NULL; l = l->next)
+        {
+          g_string_truncate (str, 0);
+          if (json_append_object (str, UDISKS_OBJECT (l->data),
+                                  (const gchar *const *) opt_dump_interfaces,
+                                  (const gchar *const *) opt_dump_properties))
+            json_print_element (str, json_output, &first);
+        }
+      json_print_end (json_output, first);
+      g_list_foreach (objects, (GFunc) g_object_unref, NULL);
+      g_list_free (objects);
+      g_string_free (str, TRUE);
+
+      ret = 0;
+      goto out;
+    }
+
   _color_run_pager ();
 
   objects = g_dbus_object_manager_get_objects (udisks_client_get_object_manager (client));
@@ -2582,6 +2995,8 @@ handle_command_dump (gint        *argc,
 
  out:
   g_option_context_free (o);
+  g_strfreev (opt_dump_interfaces);
+  g_strfreev (opt_dump_properties);
   return ret;
 }
 
@@ -2911,34 +3326,49 @@ handle_command_monitor (gint        *argc,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
-static GList *
-find_blocks_for_drive (GList       *objects,
-                       const gchar *drive_object_path)
+/* Returns the names of the whole-disk block devices of each drive, separated
+ * by spaces and in the order of @objects. Free with g_hash_table_unref().
+ */
+static GHashTable *
+get_devices_by_drive (GList *objects)
 {
-  GList *ret;
+  GHashTable *ret;
   GList *l;
 
-  ret = NULL;
+  ret = g_hash_table_new_full (g_str_hash, g_str_equal, g_free, (GDestroyNotify) g_ptr_array_unref);
   for (l = objects; l != NULL; l = l->next)
     {
       UDisksObject *object = UDISKS_OBJECT (l->data);
       UDisksBlock *block;
+      GPtrArray *devices;
+      const gchar *device_file;
 
-      block = udisks_object_get_block (object);
-      if (block == NULL)
+      block = udisks_object_peek_block (object);
+      if (block == NULL || udisks_object_peek_partition (object) != NULL)
         continue;
 
-      if (g_strcmp0 (udisks_block_get_drive (block), drive_object_path) == 0)
+      devices = g_hash_table_lookup (ret, udisks_block_get_drive (block));
+      if (devices == NULL)
         {
-          ret = g_list_append (ret, g_object_ref (block));
+          devices = g_ptr_array_new_with_free_func (g_free);
+          g_hash_table_insert (ret, g_strdup (udisks_block_get_drive (block)), devices);
         }
-      g_object_unref (block);
+
+      device_file = udisks_block_get_device (block);
+      if (g_str_has_prefix (device_file, "/dev/"))
+        device_file += 5;
+      g_ptr_array_add (devices, g_strdup (device_file));
     }
   return ret;
 }
 
+static gboolean opt_status_json = FALSE;
+static gboolean opt_status_json_lines = FALSE;
+
 static const GOptionEntry command_status_entries[] =
 {
+  { "json", 0, 0, G_OPTION_ARG_NONE, &opt_status_json, "Print the drives as a JSON array", NULL},
+  { "json-lines", 0, 0, G_OPTION_ARG_NONE, &opt_status_json_lines, "Print each drive as a line of JSON", NULL},
   { NULL }
 };
 
@@ -2982,8 +3412,12 @@ handle_command_status (gint        *argc,
   gchar *s;
   GList *l;
   GList *objects;
+  GHashTable *devices_by_drive;
+  JsonOutput json_output;
 
   ret = 1;
+  opt_status_json = FALSE;
+  opt_status_json_lines = FALSE;
 
   modify_argv0_for_command (argc, argv, "status");
 
@@ -3009,8 +3443,57 @@ handle_command_status (gint        *argc,
   if (request_completion)
     goto out;
 
+  if (!get_json_output (opt_status_json, opt_status_json_lines, &json_output))
+    goto out;
+
   objects = g_dbus_object_manager_get_objects (udisks_client_get_object_manager (client));
 
+  if (json_output != JSON_OUTPUT_NONE)
+    {
+      GString *str = g_string_new (NULL);
+      gboolean first = TRUE;
+
+      /* no sorting, every drive is written out as soon as it's serialized */
+      devices_by_drive = get_devices_by_drive (objects);
+      for (l = objects; l != NULL; l = l->next)
+        {
+          UDisksObject *object = UDISKS_OBJECT (l->data);
+          UDisksDrive *drive;
+          GPtrArray *devices;
+          guint n;
+
+          drive = udisks_object_peek_drive (object);
+          if (drive == NULL)
+            continue;
+
+          g_string_truncate (str, 0);
+          g_string_append (str, "{\"path\":");
+          json_append_string (str, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)), -1);
+          g_string_append (str, ",\"vendor\":");
+          json_append_string (str, udisks_drive_get_vendor (drive), -1);
+          g_string_append (str, ",\"model\":");
+          json_append_string (str, udisks_drive_get_model (drive), -1);
+          g_string_append (str, ",\"revision\":");
+          json_append_string (str, udisks_drive_get_revision (drive), -1);
+          g_string_append (str, ",\"serial\":");
+          json_append_string (str, udisks_drive_get_serial (drive), -1);
+          g_string_append (str, ",\"devices\":[");
+          devices = g_hash_table_lookup (devices_by_drive, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+          for (n = 0; devices != NULL && n < devices->len; n++)
+            {
+              if (n > 0)
+                g_string_append_c (str, ',');
+              json_append_string (str, g_ptr_array_index (devices, n), -1);
+            }
+          g_string_append (str, "]}");
+          json_print_element (str, json_output, &first);
+        }
+      json_print_end (json_output, first);
+      g_hash_table_unref (devices_by_drive);
+      g_string_free (str, TRUE);
+      goto done;
+    }
+
   /* print all drives
    *
    * We are guaranteed that, usually,
@@ -3027,50 +3510,32 @@ handle_command_status (gint        *argc,
 
   /* sort on Drive:SortKey */
   objects = g_list_sort (objects, (GCompareFunc) obj_proxy_drive_sortkey_cmp);
+  devices_by_drive = get_devices_by_drive (objects);
   for (l = objects; l != NULL; l = l->next)
     {
       UDisksObject *object = UDISKS_OBJECT (l->data);
       UDisksDrive *drive;
-      GList *blocks;
+      GPtrArray *devices;
       const gchar *vendor;
       const gchar *model;
       const gchar *revision;
       const gchar *serial;
       gchar *vendor_model;
-      GString *str;
       gchar *block;
-      GList *j;
 
       drive = udisks_object_peek_drive (object);
       if (drive == NULL)
         continue;
 
-      str = g_string_new (NULL);
-      blocks = find_blocks_for_drive (objects, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
-      for (j = blocks; j != NULL; j = j->next)
-        {
-          UDisksBlock *block_iface = UDISKS_BLOCK (j->data);
-          GDBusObject *block_object;
-          UDisksPartition *partition;
-          block_object = g_dbus_interface_get_object (G_DBUS_INTERFACE (block_iface));
-          partition = block_object == NULL ? NULL : udisks_object_peek_partition (UDISKS_OBJECT (block_object));
-          if (partition == NULL)
-            {
-              const gchar *device_file;
-              if (str->len > 0)
-                g_string_append (str, " ");
-              device_file = udisks_block_get_device (block_iface);
-              if (g_str_has_prefix (device_file, "/dev/"))
-                g_string_append (str, device_file + 5);
-              else
-                g_string_append (str, device_file);
-            }
+      devices = g_hash_table_lookup (devices_by_drive, g_dbus_object_get_object_path (G_DBUS_OBJECT (object)));
+      if (devices != NULL)
+        {
+          g_ptr_array_add (devices, NULL);
+          block = g_strjoinv (" ", (gchar **) devices->pdata);
+          g_ptr_array_remove_index (devices, devices->len - 1);
         }
-      if (str->len == 0)
-        g_string_append (str, "-");
-      block = g_string_free (str, FALSE);
-      g_list_foreach (blocks, (GFunc) g_object_unref, NULL);
-      g_list_free (blocks);
+      else
+        block = g_strdup ("-");
 
       vendor = udisks_drive_get_vendor (drive);
       model = udisks_drive_get_model (drive);
@@ -3098,8 +3563,9 @@ handle_command_status (gint        *argc,
                block);
       g_free (block);
     }
+  g_hash_table_unref (devices_by_drive);
 
-
+ done:
   g_list_foreach (objects, (GFunc) g_object_unref, NULL);
   g_list_free (objects);
 
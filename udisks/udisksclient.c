@@ -60,8 +60,28 @@ struct _UDisksClient
   GMainContext *context;
 
   GSource *changed_timeout_source;
+
+  /* Indexes of the block objects by the properties they are looked up
+   * by, kept up to date from the object manager signals. Values are
+   * arrays of object paths. Protected by @index_lock.
+   */
+  GMutex index_lock;
+  GHashTable *block_index_keys;         /* object path -> BlockIndexKeys */
+  GHashTable *blocks_by_label;          /* IdLabel -> GPtrArray */
+  GHashTable *blocks_by_uuid;           /* IdUUID -> GPtrArray */
+  GHashTable *blocks_by_dev;            /* DeviceNumber -> GPtrArray */
+  GHashTable *blocks_by_drive;          /* Drive -> GPtrArray */
 };
 
+/* The values a block object was indexed with */
+typedef struct
+{
+  gchar   *label;
+  gchar   *uuid;
+  guint64  dev;
+  gchar   *drive;
+} BlockIndexKeys;
+
 typedef struct
 {
   GObjectClass parent_class;
@@ -113,6 +133,11 @@ static void on_interface_proxy_properties_changed (GDBusObjectManagerClient   *m
 
 static void maybe_emit_changed_now (UDisksClient *client);
 
+static void index_block_object (UDisksClient *client,
+                                GDBusObject  *object);
+static void unindex_block_object (UDisksClient *client,
+                                  const gchar  *object_path);
+
 static void init_interface_proxy (UDisksClient *client,
                                   GDBusProxy   *proxy);
 
@@ -158,13 +183,52 @@ udisks_client_finalize (GObject *object)
   if (client->context != NULL)
     g_main_context_unref (client->context);
 
+  g_hash_table_unref (client->block_index_keys);
+  g_hash_table_unref (client->blocks_by_label);
+  g_hash_table_unref (client->blocks_by_uuid);
+  g_hash_table_unref (client->blocks_by_dev);
+  g_hash_table_unref (client->blocks_by_drive);
+  g_mutex_clear (&client->index_lock);
+
   G_OBJECT_CLASS (udisks_client_parent_class)->finalize (object);
 }
 
+static void
+block_index_keys_free (BlockIndexKeys *keys)
+{
+  g_free (keys->label);
+  g_free (keys->uuid);
+  g_free (keys->drive);
+  g_slice_free (BlockIndexKeys, keys);
+}
+
 static void
 udisks_client_init (UDisksClient *client)
 {
   static volatile GQuark udisks_error_domain = 0;
+
+  g_mutex_init (&client->index_lock);
+  client->block_index_keys = g_hash_table_new_full (g_str_hash,
+                                                    g_str_equal,
+                                                    g_free,
+                                                    (GDestroyNotify) block_index_keys_free);
+  client->blocks_by_label = g_hash_table_new_full (g_str_hash,
+                                                   g_str_equal,
+                                                   g_free,
+                                                   (GDestroyNotify) g_ptr_array_unref);
+  client->blocks_by_uuid = g_hash_table_new_full (g_str_hash,
+                                                  g_str_equal,
+                                                  g_free,
+                                                  (GDestroyNotify) g_ptr_array_unref);
+  client->blocks_by_dev = g_hash_table_new_full (g_int64_hash,
+                                                 g_int64_equal,
+                                                 g_free,
+                                                 (GDestroyNotify) g_ptr_array_unref);
+  client->blocks_by_drive = g_hash_table_new_full (g_str_hash,
+                                                   g_str_equal,
+                                                   g_free,
+                                                   (GDestroyNotify) g_ptr_array_unref);
+
   /* this will force associating errors in the UDISKS_ERROR error
    * domain with org.freedesktop.UDisks2.Error.* errors via
    * g_dbus_error_register_error_domain().
@@ -399,6 +463,7 @@ initable_init (GInitable     *initable,
         }
       g_list_foreach (interfaces, (GFunc) g_object_unref, NULL);
       g_list_free (interfaces);
+      index_block_object (client, G_DBUS_OBJECT (l->data));
     }
   g_list_foreach (objects, (GFunc) g_object_unref, NULL);
   g_list_free (objects);
@@ -566,6 +631,189 @@ udisks_client_peek_object (UDisksClient  *client,
 
 /* ---------------------------------------------------------------------------------------------------- */
 
+/* Adds @object_path to the paths indexed under @key, takes ownership of @key */
+static void
+index_add (GHashTable  *index,
+           gpointer     key,
+           const gchar *object_path)
+{
+  GPtrArray *paths;
+
+  paths = g_hash_table_lookup (index, key);
+  if (paths == NULL)
+    {
+      paths = g_ptr_array_new_with_free_func (g_free);
+      g_hash_table_insert (index, key, paths);
+    }
+  else
+    g_free (key);
+  g_ptr_array_add (paths, g_strdup (object_path));
+}
+
+static void
+index_remove (GHashTable    *index,
+              gconstpointer  key,
+              const gchar   *object_path)
+{
+  GPtrArray *paths;
+  guint n;
+
+  paths = g_hash_table_lookup (index, key);
+  if (paths == NULL)
+    return;
+
+  for (n = 0; n < paths->len; n++)
+    {
+      if (g_strcmp0 (g_ptr_array_index (paths, n), object_path) == 0)
+        {
+          g_ptr_array_remove_index (paths, n);
+          break;
+        }
+    }
+  if (paths->len == 0)
+    g_hash_table_remove (index, key);
+}
+
+/* must be called with @index_lock held */
+static void
+unindex_block_object_unlocked (UDisksClient *client,
+                               const gchar  *object_path)
+{
+  BlockIndexKeys *keys;
+
+  keys = g_hash_table_lookup (client->block_index_keys, object_path);
+  if (keys == NULL)
+    return;
+
+  index_remove (client->blocks_by_label, keys->label, object_path);
+  index_remove (client->blocks_by_uuid, keys->uuid, object_path);
+  index_remove (client->blocks_by_dev, &keys->dev, object_path);
+  if (g_strcmp0 (keys->drive, "/") != 0)
+    index_remove (client->blocks_by_drive, keys->drive, object_path);
+
+  g_hash_table_remove (client->block_index_keys, object_path);
+}
+
+static void
+unindex_block_object (UDisksClient *client,
+                      const gchar  *object_path)
+{
+  g_mutex_lock (&client->index_lock);
+  unindex_block_object_unlocked (client, object_path);
+  g_mutex_unlock (&client->index_lock);
+}
+
+/* Adds @object to the block indexes or updates its entries, removes it if
+ * it is not a block object (anymore).
+ */
+static void
+index_block_object (UDisksClient *client,
+                    GDBusObject  *object)
+{
+  UDisksBlock *block;
+  BlockIndexKeys *keys;
+  const gchar *object_path;
+  const gchar *label;
+  const gchar *uuid;
+  const gchar *drive;
+  gint64 *dev_key;
+
+  object_path = g_dbus_object_get_object_path (object);
+  block = udisks_object_get_block (UDISKS_OBJECT (object));
+  if (block == NULL)
+    {
+      unindex_block_object (client, object_path);
+      return;
+    }
+
+  /* blocks without a label or UUID are indexed under the empty string,
+   * so they can be looked up like any other value */
+  label = udisks_block_get_id_label (block);
+  if (label == NULL)
+    label = "";
+  uuid = udisks_block_get_id_uuid (block);
+  if (uuid == NULL)
+    uuid = "";
+  drive = udisks_block_get_drive (block);
+  if (drive == NULL)
+    drive = "/";
+
+  g_mutex_lock (&client->index_lock);
+
+  /* nothing to do if none of the indexed values changed */
+  keys = g_hash_table_lookup (client->block_index_keys, object_path);
+  if (keys != NULL
+      && g_strcmp0 (keys->label, label) == 0
+      && g_strcmp0 (keys->uuid, uuid) == 0
+      && keys->dev == udisks_block_get_device_number (block)
+      && g_strcmp0 (keys->drive, drive) == 0)
+    goto out;
+
+  unindex_block_object_unlocked (client, object_path);
+
+  keys = g_slice_new0 (BlockIndexKeys);
+  keys->dev = udisks_block_get_device_number (block);
+  keys->label = g_strdup (label);
+  index_add (client->blocks_by_label, g_strdup (label), object_path);
+  keys->uuid = g_strdup (uuid);
+  index_add (client->blocks_by_uuid, g_strdup (uuid), object_path);
+  dev_key = g_new (gint64, 1);
+  *dev_key = keys->dev;
+  index_add (client->blocks_by_dev, dev_key, object_path);
+  keys->drive = g_strdup (drive);
+  if (g_strcmp0 (drive, "/") != 0)
+    index_add (client->blocks_by_drive, g_strdup (drive), object_path);
+  g_hash_table_insert (client->block_index_keys, g_strdup (object_path), keys);
+
+ out:
+  g_mutex_unlock (&client->index_lock);
+  g_object_unref (block);
+}
+
+/* Returns the blocks indexed under @key in @index, in the order they were
+ * indexed in. Free with g_list_free() after unreffing the elements.
+ */
+static GList *
+get_indexed_blocks (UDisksClient  *client,
+                    GHashTable    *index,
+                    gconstpointer  key)
+{
+  GList *ret = NULL;
+  GPtrArray *paths;
+  gchar **object_paths = NULL;
+  guint n;
+
+  g_mutex_lock (&client->index_lock);
+  paths = g_hash_table_lookup (index, key);
+  if (paths != NULL)
+    {
+      object_paths = g_new0 (gchar *, paths->len + 1);
+      for (n = 0; n < paths->len; n++)
+        object_paths[n] = g_strdup (g_ptr_array_index (paths, n));
+    }
+  g_mutex_unlock (&client->index_lock);
+
+  for (n = 0; object_paths != NULL && object_paths[n] != NULL; n++)
+    {
+      GDBusObject *object;
+      UDisksBlock *block = NULL;
+
+      object = g_dbus_object_manager_get_object (client->object_manager, object_paths[n]);
+      if (object != NULL)
+        {
+          block = udisks_object_get_block (UDISKS_OBJECT (object));
+          g_object_unref (object);
+        }
+      if (block != NULL)
+        ret = g_list_prepend (ret, block);
+    }
+  g_strfreev (object_paths);
+
+  return g_list_reverse (ret);
+}
+
+/* ---------------------------------------------------------------------------------------------------- */
+
 /**
  * udisks_client_get_block_for_label:
  * @client: A #UDisksClient.
@@ -581,32 +829,10 @@ GList *
 udisks_client_get_block_for_label (UDisksClient        *client,
                                    const gchar         *label)
 {
-  GList *ret = NULL;
-  GList *l, *object_proxies = NULL;
-
   g_return_val_if_fail (UDISKS_IS_CLIENT (client), NULL);
   g_return_val_if_fail (label != NULL, NULL);
 
-  object_proxies = g_dbus_object_manager_get_objects (client->object_manager);
-  for (l = object_proxies; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
-
-      block = udisks_object_get_block (object);
-      if (block == NULL)
-        continue;
-
-      if (g_strcmp0 (udisks_block_get_id_label (block), label) == 0)
-        ret = g_list_prepend (ret, block);
-      else
-        g_object_unref (block);
-    }
-
-  g_list_foreach (object_proxies, (GFunc) g_object_unref, NULL);
-  g_list_free (object_proxies);
-  ret = g_list_reverse (ret);
-  return ret;
+  return get_indexed_blocks (client, client->blocks_by_label, label);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -626,32 +852,10 @@ GList *
 udisks_client_get_block_for_uuid (UDisksClient        *client,
                                   const gchar         *uuid)
 {
-  GList *ret = NULL;
-  GList *l, *object_proxies = NULL;
-
   g_return_val_if_fail (UDISKS_IS_CLIENT (client), NULL);
   g_return_val_if_fail (uuid != NULL, NULL);
 
-  object_proxies = g_dbus_object_manager_get_objects (client->object_manager);
-  for (l = object_proxies; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
-
-      block = udisks_object_get_block (object);
-      if (block == NULL)
-        continue;
-
-      if (g_strcmp0 (udisks_block_get_id_uuid (block), uuid) == 0)
-        ret = g_list_prepend (ret, block);
-      else
-        g_object_unref (block);
-    }
-
-  g_list_foreach (object_proxies, (GFunc) g_object_unref, NULL);
-  g_list_free (object_proxies);
-  ret = g_list_reverse (ret);
-  return ret;
+  return get_indexed_blocks (client, client->blocks_by_uuid, uuid);
 }
 
 /* ---------------------------------------------------------------------------------------------------- */
@@ -673,31 +877,17 @@ udisks_client_get_block_for_dev (UDisksClient *client,
                                  dev_t         block_device_number)
 {
   UDisksBlock *ret = NULL;
-  GList *l, *object_proxies = NULL;
+  GList *blocks;
+  gint64 dev = block_device_number;
 
   g_return_val_if_fail (UDISKS_IS_CLIENT (client), NULL);
 
-  object_proxies = g_dbus_object_manager_get_objects (client->object_manager);
-  for (l = object_proxies; l != NULL; l = l->next)
-    {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
+  blocks = get_indexed_blocks (client, client->blocks_by_dev, &dev);
+  if (blocks != NULL)
+    ret = g_object_ref (blocks->data);
 
-      block = udisks_object_get_block (object);
-      if (block == NULL)
-        continue;
-
-      if (udisks_block_get_device_number (block) == block_device_number)
-        {
-          ret = block;
-          goto out;
-        }
-      g_object_unref (block);
-    }
-
- out:
-  g_list_foreach (object_proxies, (GFunc) g_object_unref, NULL);
-  g_list_free (object_proxies);
+  g_list_foreach (blocks, (GFunc) g_object_unref, NULL);
+  g_list_free (blocks);
   return ret;
 }
 
@@ -707,35 +897,19 @@ static GList *
 get_top_level_blocks_for_drive (UDisksClient *client,
                                 const gchar  *drive_object_path)
 {
-  GList *ret;
-  GList *l;
-  GList *object_proxies;
-  GDBusObjectManager *object_manager;
-
-  object_manager = udisks_client_get_object_manager (client);
-  object_proxies = g_dbus_object_manager_get_objects (object_manager);
+  GList *ret = NULL;
+  GList *blocks, *l;
 
-  ret = NULL;
-  for (l = object_proxies; l != NULL; l = l->next)
+  blocks = get_indexed_blocks (client, client->blocks_by_drive, drive_object_path);
+  for (l = blocks; l != NULL; l = l->next)
     {
-      UDisksObject *object = UDISKS_OBJECT (l->data);
-      UDisksBlock *block;
-      UDisksPartition *partition;
-
-      block = udisks_object_get_block (object);
-      partition = udisks_object_peek_partition (object);
-      if (block == NULL)
-        continue;
+      GDBusObject *object = g_dbus_interface_get_object (G_DBUS_INTERFACE (l->data));
 
-      if (g_strcmp0 (udisks_block_get_drive (block), drive_object_path) == 0 &&
-          partition == NULL)
-        {
-          ret = g_list_append (ret, g_object_ref (object));
-        }
-      g_object_unref (block);
+      if (object != NULL && udisks_object_peek_partition (UDISKS_OBJECT (object)) == NULL)
+        ret = g_list_append (ret, g_object_ref (object));
     }
-  g_list_foreach (object_proxies, (GFunc) g_object_unref, NULL);
-  g_list_free (object_proxies);
+  g_list_foreach (blocks, (GFunc) g_object_unref, NULL);
+  g_list_free (blocks);
   return ret;
 }
 
@@ -1505,6 +1679,8 @@ on_object_added (GDBusObjectManager  *manager,
   g_list_foreach (interfaces, (GFunc) g_object_unref, NULL);
   g_list_free (interfaces);
 
+  index_block_object (client, object);
+
   udisks_client_queue_changed (client);
 }
 
@@ -1514,6 +1690,7 @@ on_object_removed (GDBusObjectManager  *manager,
                    gpointer             user_data)
 {
   UDisksClient *client = UDISKS_CLIENT (user_data);
+  unindex_block_object (client, g_dbus_object_get_object_path (object));
   udisks_client_queue_changed (client);
 }
 
@@ -1535,6 +1712,9 @@ on_interface_added (GDBusObjectManager  *manager,
 
   init_interface_proxy (client, G_DBUS_PROXY (interface));
 
+  if (UDISKS_IS_BLOCK (interface))
+    index_block_object (client, object);
+
   udisks_client_queue_changed (client);
 }
 
@@ -1545,6 +1725,8 @@ on_interface_removed (GDBusObjectManager  *manager,
                       gpointer             user_data)
 {
   UDisksClient *client = UDISKS_CLIENT (user_data);
+  if (UDISKS_IS_BLOCK (interface))
+    unindex_block_object (client, g_dbus_object_get_object_path (object));
   udisks_client_queue_changed (client);
 }
 
@@ -1562,6 +1744,9 @@ on_interface_proxy_properties_changed (GDBusObjectManagerClient   *manager,
   GVariantIter iter;
   gchar *property_name = NULL;
 
+  if (UDISKS_IS_BLOCK (interface_proxy))
+    index_block_object (client, G_DBUS_OBJECT (object_proxy));
+
   /* never emit the change signal for Job objects */
   if (g_strcmp0 (g_dbus_proxy_get_interface_name (interface_proxy), "org.freedesktop.UDisks2.Drive.Job") == 0)
     return;
@@ -2494,6 +2679,7 @@ udisks_client_get_job_description (UDisksClient   *client,
       g_hash_table_insert (hash, (gpointer) "filesystem-modify",    (gpointer) C_("job", "Modifying Filesystem"));
       g_hash_table_insert (hash, (gpointer) "format-erase",         (gpointer) C_("job", "Erasing Device"));
       g_hash_table_insert (hash, (gpointer) "format-mkfs",          (gpointer) C_("job", "Creating Filesystem"));
+      g_hash_table_insert (hash, (gpointer) "format-wipe",          (gpointer) C_("job", "Wiping Device"));
       g_hash_table_insert (hash, (gpointer) "loop-setup",           (gpointer) C_("job", "Setting Up Loop Device"));
       g_hash_table_insert (hash, (gpointer) "partition-modify",     (gpointer) C_("job", "Modifying Partition"));
       g_hash_table_insert (hash, (gpointer) "partition-delete",     (gpointer) C_("job", "Deleting Partition"));